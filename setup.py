@@ -34,6 +34,11 @@ setup(
         "lxml",
         "enum34",
     ],
+    extras_require={
+        "numpy": ["numpy"],
+        "orjson": ["orjson"],
+        "pyproj": ["pyproj"],
+    },
     classifiers=[
         "Development Status :: 3 - Alpha",
         "Intended Audience :: Developers",
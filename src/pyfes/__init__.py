@@ -1,3 +1,51 @@
-import pkg_resources
+"""A python implementation of OGC FES/ISO 19143.
 
-__version__ = pkg_resources.require("pyfes")[0].version
\ No newline at end of file
+Importing pyfes does no work besides defining this module. The package
+version and the submodules are loaded the first time they are accessed.
+Python versions before 3.7 only set the version on import, so there the
+submodules have to be imported explicitly, as in ``import pyfes.fes20``.
+
+"""
+
+import importlib
+import sys
+
+from .utils import make_lazy_getattr
+
+_SUBMODULES = (
+    "caches",
+    "errors",
+    "fes20",
+    "geometries",
+    "instrumentation",
+    "intervals",
+    "parsers",
+    "rtrees",
+    "spatial",
+    "srs",
+    "temporal",
+    "utils",
+    "validators",
+)
+
+
+def _get_version():
+    try:
+        from importlib import metadata
+    except ImportError:  # python < 3.8
+        import pkg_resources
+        return pkg_resources.require("pyfes")[0].version
+    return metadata.version("pyfes")
+
+
+def _make_submodule_loader(name):
+    return lambda: importlib.import_module("." + name, __name__)
+
+
+__getattr__ = make_lazy_getattr(__name__, dict(
+    [("__version__", _get_version)] +
+    [(name, _make_submodule_loader(name)) for name in _SUBMODULES]
+))
+
+if sys.version_info < (3, 7):  # modules cannot define __getattr__
+    __version__ = _get_version()
@@ -0,0 +1,231 @@
+"""Caching of parsed filters.
+
+Clients tend to send the same filters over and over. A ``FilterCache`` can
+be passed to ``parsers.parse_filter`` in order to skip parsing of filters
+that have been seen before. Cached operator trees are frozen, so they can
+be shared safely between callers.
+
+Examples
+--------
+
+>>> cache = FilterCache(maxsize=128, ttl=300)
+>>> cache.get("some filter") is None
+True
+>>> cache.info()
+CacheInfo(hits=0, misses=1, evictions=0, maxsize=128, currsize=0)
+
+"""
+
+from collections import namedtuple
+from collections import OrderedDict
+import logging
+import re
+import threading
+import time
+
+from . import instrumentation
+from .fes20.namespaces import NAMESPACES
+from .utils import freeze
+from .utils import string_type
+
+logger = logging.getLogger(__name__)
+
+CacheInfo = namedtuple(
+    "CacheInfo", "hits misses evictions maxsize currsize")
+
+_clock = getattr(time, "monotonic", time.time)
+
+_NAMESPACE_DECLARATION_PATTERN = re.compile(
+    r"""xmlns:([\w.-]+)\s*=\s*(["'])(.*?)\2""")
+_WHITESPACE_BETWEEN_TAGS_PATTERN = re.compile(r"(<([^<>]*)>)\s+(?=<(/?))")
+_TAG_NAME_PATTERN = re.compile(r"(?:[\w.-]+:)?([\w.-]+)")
+_TAG_PATTERN = re.compile(r"<[^<>]*>")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+_WHITESPACE_AROUND_EQUALS_PATTERN = re.compile(r"\s*=\s*")
+_PREFIX_DECLARATION_PATTERN = re.compile(r"(\sxmlns:)([\w.-]+)(=)")
+_PREFIXED_NAME_PATTERN = re.compile(r"(</?|\s)([\w.-]+)(:)")
+_KNOWN_PREFIXES = dict((uri, prefix) for prefix, uri in NAMESPACES.items())
+
+
+def normalize_filter_text(data):
+    """Return a normalized version of the input filter text.
+
+    Normalization removes whitespace between tags, collapses whitespace
+    inside tags and renames namespace prefixes after the namespace URIs
+    they are bound to. Filters that differ only in their formatting or in
+    their choice of namespace prefixes thus end up with the same
+    normalized text.
+
+    Element text content is left untouched. This includes whitespace that
+    is the only content of an element and whitespace at the start of a
+    ``fes:Literal``, since both are part of the parsed values.
+
+    """
+
+    text = data.decode("utf-8") if isinstance(data, bytes) else data
+    text = text.strip()
+    if not text.startswith("<"):
+        return text
+    text = _WHITESPACE_BETWEEN_TAGS_PATTERN.sub(_remove_whitespace, text)
+    prefixes = _get_canonical_prefixes(text)
+
+    def normalize_tag(match):
+        tag = _WHITESPACE_PATTERN.sub(" ", match.group(0))
+        tag = _WHITESPACE_AROUND_EQUALS_PATTERN.sub("=", tag)
+        tag = tag.replace(" >", ">").replace(" />", "/>")
+        if prefixes is not None:
+            tag = _rename_prefixes(tag, prefixes)
+        return tag
+
+    return _TAG_PATTERN.sub(normalize_tag, text)
+
+
+def _remove_whitespace(match):
+    """Remove the whitespace after a tag, unless it is element text"""
+    tag, contents, next_is_end = match.groups()
+    is_start_tag = not (contents.startswith(("/", "?", "!")) or
+                        contents.endswith("/"))
+    if is_start_tag and (next_is_end or _TAG_NAME_PATTERN.match(
+            contents).group(1) == "Literal"):
+        result = match.group(0)
+    else:
+        result = tag
+    return result
+
+
+def _get_canonical_prefixes(text):
+    """Map each declared namespace prefix to a canonical prefix.
+
+    Returns None when a prefix is bound to more than one namespace URI,
+    in which case prefixes cannot be renamed safely.
+
+    """
+
+    declared = {}
+    for prefix, quote, uri in _NAMESPACE_DECLARATION_PATTERN.findall(text):
+        if declared.get(prefix, uri) != uri:
+            return None
+        declared[prefix] = uri
+    unknown_uris = sorted(set(
+        uri for uri in declared.values() if uri not in _KNOWN_PREFIXES))
+    canonical = {}
+    for prefix, uri in declared.items():
+        try:
+            canonical[prefix] = _KNOWN_PREFIXES[uri]
+        except KeyError:
+            canonical[prefix] = "ns{}".format(unknown_uris.index(uri))
+    return canonical
+
+
+def _rename_prefixes(tag, prefixes):
+
+    def rename(match):
+        prefix = match.group(2)
+        return "{}{}{}".format(
+            match.group(1), prefixes.get(prefix, prefix), match.group(3))
+
+    tag = _PREFIX_DECLARATION_PATTERN.sub(rename, tag)
+    return _PREFIXED_NAME_PATTERN.sub(rename, tag)
+
+
+class FilterCache(object):
+    """A bounded, thread-safe LRU cache of parsed filters.
+
+    Parameters
+    ----------
+    maxsize: int, optional
+        Maximum number of filters to keep. The least recently used filter
+        is evicted when the cache is full
+    ttl: float, optional
+        Number of seconds that a cached filter remains valid. Filters never
+        expire when this is None
+
+    """
+
+    def __init__(self, maxsize=256, ttl=None):
+        if maxsize < 1:
+            raise ValueError("maxsize must be a positive number")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def make_key(self, data, **kwargs):
+        """Return the cache key for the input filter and parser arguments.
+
+        Returns None if the filter is not text, such as an already decoded
+        JSON filter, or if the parser arguments cannot be hashed, meaning
+        that the filter cannot be cached.
+
+        """
+
+        if not isinstance(data, (string_type, bytes)):
+            return None
+        key = (normalize_filter_text(data), tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            key = None
+        return key
+
+    def get(self, key):
+        """Return the cached filter for key, or None"""
+        with self._lock:
+            try:
+                result, expires = self._data[key]
+            except KeyError:
+                self.misses += 1
+                result, expired = None, False
+            else:
+                expired = expires is not None and _clock() >= expires
+                if expired:
+                    del self._data[key]
+                    self.evictions += 1
+                    self.misses += 1
+                    result = None
+                else:
+                    self._data[key] = self._data.pop(key)
+                    self.hits += 1
+        if expired:
+            instrumentation.increment("cache.evictions")
+        instrumentation.increment(
+            "cache.misses" if result is None else "cache.hits")
+        return result
+
+    def put(self, key, parsed_filter):
+        """Store a parsed filter, freezing it so that it can be shared"""
+        freeze(parsed_filter)
+        expires = None if self.ttl is None else _clock() + self.ttl
+        evicted = 0
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (parsed_filter, expires)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                evicted += 1
+            self.evictions += evicted
+        if evicted > 0:
+            instrumentation.increment("cache.evictions", evicted)
+        return parsed_filter
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def info(self):
+        return CacheInfo(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            maxsize=self.maxsize,
+            currsize=len(self._data)
+        )
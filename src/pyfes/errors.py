@@ -19,3 +19,11 @@ class InvalidExpressionError(PyFesError):
 
 class InvalidBoundaryTypeError(PyFesError):
     pass
+
+
+class ImmutableObjectError(PyFesError):
+    pass
+
+
+class SerializationError(PyFesError):
+    pass
@@ -0,0 +1,180 @@
+"""Canonical form and structural hashing of FES v2.0 filters.
+
+Filters that are logically the same may be written in many different ways.
+The operands of ``fes:And`` and ``fes:Or`` can be given in any order and
+they can be nested arbitrarily. Canonicalization flattens nested logic
+operators of the same type and sorts their operands, so that equivalent
+filters end up as equal operator trees. The structural hash of a filter is
+a digest of its canonical form. Unlike python's builtin ``hash()``, it is
+stable across processes, so it can be stored and compared across machines.
+
+Examples
+--------
+
+>>> from pyfes.fes20 import expressions
+>>> first = operators.NullOperator(expressions.ValueReference("a"))
+>>> second = operators.NullOperator(expressions.ValueReference("b"))
+>>> and_ = operators.BinaryLogicOperator("And", first, second)
+>>> reversed_and = operators.BinaryLogicOperator("And", second, first)
+>>> canonicalize(and_) == canonicalize(reversed_and)
+True
+>>> structural_hash(and_) == structural_hash(reversed_and)
+True
+
+"""
+
+from enum import Enum
+import hashlib
+import json
+
+from . import expressions
+from . import operators
+from ..geometries import Geometry
+from ..utils import Freezable
+from ..utils import ReadOnlyList
+from ..utils import get_slot_names
+from ..utils import string_type
+
+_IGNORED_SLOTS = ("_frozen", "validators")
+
+
+def canonicalize(operator):
+    """Return the canonical form of a filter.
+
+    The input filter is not modified. Nodes that do not change are shared
+    between the input and the result.
+
+    Parameters
+    ----------
+    operator: operators.NonIdOperator or tuple of operators.ResourceId
+        The filter to canonicalize, as returned by ``parsers.parse_filter``
+
+    Returns
+    -------
+    operators.NonIdOperator or tuple of operators.ResourceId
+        The canonical form of the filter. Lists of resource identifiers
+        are sorted and have their duplicates removed
+
+    """
+
+    return _canonicalize(operator, {})
+
+
+def canonical_text(operator):
+    """Return a textual representation of the canonical form of a filter.
+
+    Filters that have the same canonical text have equal canonical forms.
+    Literals are encoded along with the name of their type, so ``1`` and
+    ``1.0`` are told apart.
+
+    """
+
+    return _encode(canonicalize(operator), {})
+
+
+def structural_hash(operator):
+    """Return a stable hash of the canonical form of a filter.
+
+    Returns
+    -------
+    str
+        The hexadecimal SHA-256 digest of the canonical text of the filter
+
+    """
+
+    return hashlib.sha256(
+        canonical_text(operator).encode("utf-8")).hexdigest()
+
+
+def _canonicalize(operator, memo):
+    if isinstance(operator, (list, tuple)):
+        encoded = dict((_encode(item, memo), item) for item in operator)
+        result = tuple(encoded[key] for key in sorted(encoded))
+    elif isinstance(operator, operators.BinaryLogicOperator):
+        operands = [_canonicalize(operand, memo) for operand in
+                    flatten_logic_operands(operator, operator.operator_type)]
+        operands.sort(key=lambda operand: _encode(operand, memo))
+        result = operands[0]
+        for operand in operands[1:]:
+            result = operators.BinaryLogicOperator.trusted(
+                operator_type=operator.operator_type,
+                first_expression=result,
+                second_expression=operand
+            )
+    elif isinstance(operator, operators.UnaryLogicOperator):
+        operand = _canonicalize(operator.expression, memo)
+        if operand is operator.expression:
+            result = operator
+        else:
+            result = operators.UnaryLogicOperator.trusted(
+                operator_type=operator.operator_type, operand=operand)
+    else:
+        result = operator
+    return result
+
+
+def flatten_logic_operands(operator, operator_type):
+    """Return the operands of nested logic operators of the same type.
+
+    This is done iteratively, since parsed filters with many operands
+    are nested deeply.
+
+    """
+
+    result = []
+    pending = [operator]
+    while len(pending) > 0:
+        current = pending.pop()
+        is_same_logic = (
+            isinstance(current, operators.BinaryLogicOperator) and
+            current.operator_type == operator_type
+        )
+        if is_same_logic:
+            pending.append(current.second_expression)
+            pending.append(current.first_expression)
+        else:
+            result.append(current)
+    return result
+
+
+def _encode(item, memo):
+    """Encode an item of an operator tree as text.
+
+    Encoded nodes are memoized by identity, which keeps the encoding of
+    deeply nested trees linear.
+
+    """
+
+    if isinstance(item, Freezable):
+        try:
+            result = memo[id(item)][1]
+        except KeyError:
+            result = _encode_node(item, memo)
+            # keep a reference to the item so that its id is not reused
+            memo[id(item)] = (item, result)
+    elif isinstance(item, Enum):
+        result = json.dumps(item.value)
+    elif isinstance(item, Geometry):
+        result = "Geometry({})".format(json.dumps([item.srs, item.wkt]))
+    elif isinstance(item, (list, tuple, ReadOnlyList)):
+        result = "[{}]".format(",".join(_encode(i, memo) for i in item))
+    elif item is None or isinstance(item, (bool, int, float, string_type)):
+        result = json.dumps(item)
+    else:
+        result = json.dumps(repr(item))
+    return result
+
+
+def _encode_node(node, memo):
+    if isinstance(node, operators.BinaryLogicOperator):
+        # logic operators are encoded with all of their operands at once,
+        # which avoids deep recursion on long chains of operands
+        operands = flatten_logic_operands(node, node.operator_type)
+        fields = [_encode(node.operator_type, memo), _encode(operands, memo)]
+    elif isinstance(node, expressions.Literal):
+        fields = [json.dumps(node.type_.__name__),
+                  _encode(node.value, memo)]
+    else:
+        fields = [_encode(getattr(node, name), memo) for name in
+                  get_slot_names(type(node)) if name not in _IGNORED_SLOTS]
+    return "{}({})".format(node.__class__.__name__, ",".join(fields))
@@ -0,0 +1,604 @@
+"""Compile FES v2.0 operator trees into python predicates.
+
+The compiled predicates are plain closures. All the work of walking the
+operator tree, resolving property paths, casting literals and dispatching on
+operator types is done once, when the filter is compiled. Evaluating the
+resulting predicate on a feature does not touch the operator objects anymore.
+
+Examples
+--------
+
+>>> from pyfes.fes20 import expressions
+>>> operator = operators.BinaryComparisonOperator(
+...     operator_type=operators.BinaryComparisonName.PROPERTY_IS_LESS_THAN,
+...     first_expression=expressions.ValueReference("DEPTH"),
+...     second_expression=expressions.Literal("30")
+... )
+>>> predicate = compile_filter(operator)
+>>> predicate({"DEPTH": 10})
+True
+>>> predicate({"DEPTH": 50})
+False
+
+"""
+
+import logging
+import numbers
+import operator as python_operator
+import re
+
+from . import expressions
+from . import operators
+from .canonical import flatten_logic_operands
+from .. import errors
+from .. import instrumentation
+from .. import spatial
+from .. import temporal
+from ..utils import as_text
+from ..utils import string_type
+
+logger = logging.getLogger(__name__)
+
+COMPARISON_FUNCTIONS = {
+    operators.BinaryComparisonName.PROPERTY_IS_EQUAL_TO: python_operator.eq,
+    operators.BinaryComparisonName.PROPERTY_IS_NOT_EQUAL_TO: (
+        python_operator.ne),
+    operators.BinaryComparisonName.PROPERTY_IS_LESS_THAN: python_operator.lt,
+    operators.BinaryComparisonName.PROPERTY_IS_LESS_THAN_OR_EQUAL_TO: (
+        python_operator.le),
+    operators.BinaryComparisonName.PROPERTY_IS_GREATER_THAN: (
+        python_operator.gt),
+    operators.BinaryComparisonName.PROPERTY_IS_GREATER_THAN_OR_EQUAL_TO: (
+        python_operator.ge),
+}
+
+SPATIAL_FUNCTIONS = {
+    operators.SpatialOperatorName.BBOX: spatial.intersects,
+    operators.SpatialOperatorName.EQUALS: spatial.equals,
+    operators.SpatialOperatorName.DISJOINT: spatial.disjoint,
+    operators.SpatialOperatorName.INTERSECTS: spatial.intersects,
+    operators.SpatialOperatorName.TOUCHES: spatial.touches,
+    operators.SpatialOperatorName.CROSSES: spatial.crosses,
+    operators.SpatialOperatorName.WITHIN: spatial.within,
+    operators.SpatialOperatorName.CONTAINS: spatial.contains,
+    operators.SpatialOperatorName.OVERLAPS: spatial.overlaps,
+}
+
+TEMPORAL_FUNCTIONS = {
+    operators.TemporalOperatorName.AFTER: temporal.after,
+    operators.TemporalOperatorName.BEFORE: temporal.before,
+    operators.TemporalOperatorName.BEGINS: temporal.begins,
+    operators.TemporalOperatorName.BEGUN_BY: temporal.begun_by,
+    operators.TemporalOperatorName.T_CONTAINS: temporal.contains,
+    operators.TemporalOperatorName.T_EQUALS: temporal.equals,
+    operators.TemporalOperatorName.T_OVERLAPS: temporal.overlaps,
+    operators.TemporalOperatorName.DURING: temporal.during,
+    operators.TemporalOperatorName.MEETS: temporal.meets,
+    operators.TemporalOperatorName.OVERLAPPED_BY: temporal.overlapped_by,
+    operators.TemporalOperatorName.MET_BY: temporal.met_by,
+    operators.TemporalOperatorName.ENDED_BY: temporal.ended_by,
+    operators.TemporalOperatorName.ANY_INTERACTS: temporal.any_interacts,
+}
+
+_MISSING = object()
+
+
+def compile_filter(operator, **kwargs):
+    """Compile an operator tree into a predicate callable.
+
+    Parameters
+    ----------
+    operator: operators.NonIdOperator or tuple of operators.ResourceId
+        The filter to compile, as returned by ``parsers.parse_filter``
+    kwargs:
+        Passed to ``PredicateCompiler``
+
+    Returns
+    -------
+    callable
+        A function that accepts a feature mapping and returns a bool
+
+    """
+
+    with instrumentation.timer("compile"):
+        return PredicateCompiler(**kwargs).compile(operator)
+
+
+def is_number(value):
+    return isinstance(value, numbers.Number) and not isinstance(value, bool)
+
+
+def as_number(value):
+    """Return the numeric interpretation of value, or None"""
+    if is_number(value):
+        result = value
+    else:
+        try:
+            result = float(value)
+        except (TypeError, ValueError):
+            result = None
+    return result
+
+
+def as_bool(value):
+    """Interpret XML boolean attribute values, such as matchCase"""
+    if isinstance(value, string_type):
+        result = value.lower() not in ("false", "0")
+    else:
+        result = bool(value)
+    return result
+
+
+def coerce_operands(first, second):
+    """Make two runtime values comparable with each other.
+
+    Feature values are frequently numbers while literals coming from XML are
+    strings, so a number is compared with the numeric interpretation of the
+    other value whenever one is available.
+
+    """
+
+    if is_number(first) and not is_number(second):
+        number = as_number(second)
+        if number is not None:
+            second = number
+    elif is_number(second) and not is_number(first):
+        number = as_number(first)
+        if number is not None:
+            first = number
+    return first, second
+
+
+def is_between(value, lower, upper):
+    """Whether a value is within two bounds, as in ``PropertyIsBetween``.
+
+    The value is coerced against the lower bound first and then against
+    the upper bound, as explained in ``coerce_operands``.
+
+    """
+
+    if value is None:
+        return False
+    value, lower = coerce_operands(value, lower)
+    value, upper = coerce_operands(value, upper)
+    try:
+        return lower <= value <= upper
+    except TypeError:
+        return False
+
+
+def get_shape(value):
+    """Return the shape of a runtime geometry value, or None"""
+    if value is None:
+        return None
+    try:
+        result = spatial.as_shape(value)
+    except errors.ValidationError:
+        result = None
+    if result is not None and result.is_empty:
+        result = None
+    return result
+
+
+def get_period(value):
+    """Return the time period of a runtime time value, or None"""
+    try:
+        result = temporal.as_period(value)
+    except ValueError:
+        result = None
+    return result
+
+
+def like_pattern_to_regex(pattern, wild_card="*", single_char=".",
+                          escape_char="\\"):
+    """Convert a PropertyIsLike pattern into a compiled regular expression"""
+    regex = ""
+    escaped = False
+    for char in pattern:
+        if escaped:
+            regex += re.escape(char)
+            escaped = False
+        elif escape_char and char == escape_char:
+            escaped = True
+        elif wild_card and char == wild_card:
+            regex += ".*"
+        elif single_char and char == single_char:
+            regex += "."
+        else:
+            regex += re.escape(char)
+    return re.compile(regex + r"\Z", re.DOTALL)
+
+
+class PredicateCompiler(object):
+    """Compiles FES operators into callables that evaluate features.
+
+    Features are mappings of property names to values. Value references
+    may use ``/`` in order to reach into nested mappings.
+
+    Parameters
+    ----------
+    functions: dict, optional
+        Maps FES function names to the python callables that implement them
+    id_property: str, optional
+        Name of the feature property that holds the feature identifier,
+        which is used when evaluating ``fes:ResourceId`` filters
+
+    """
+
+    _OPERATOR_COMPILER_HANDLERS = {
+        operators.BinaryComparisonOperator: (
+            "compile_binary_comparison_operator"),
+        operators.LikeOperator: "compile_like_operator",
+        operators.BetweenComparisonOperator: (
+            "compile_between_comparison_operator"),
+        operators.NullOperator: "compile_null_operator",
+        operators.NilOperator: "compile_nil_operator",
+        operators.BinarySpatialOperator: "compile_binary_spatial_operator",
+        operators.DistanceOperator: "compile_distance_operator",
+        operators.TemporalOperator: "compile_temporal_operator",
+        operators.BinaryLogicOperator: "compile_binary_logic_operator",
+        operators.UnaryLogicOperator: "compile_unary_logic_operator",
+        operators.ResourceId: "compile_resource_id",
+    }
+
+    _EXPRESSION_COMPILER_HANDLERS = {
+        expressions.ValueReference: "compile_value_reference",
+        expressions.Literal: "compile_literal",
+        expressions.Function: "compile_function",
+    }
+
+    def __init__(self, functions=None, id_property="id"):
+        self.functions = dict(functions) if functions is not None else {}
+        self.id_property = id_property
+
+    def compile(self, operator):
+        """Compile the input operator into a predicate.
+
+        Parameters
+        ----------
+        operator: operators.NonIdOperator or tuple of operators.ResourceId
+            The operator tree to compile
+
+        Returns
+        -------
+        callable
+            A function that accepts a feature and returns a bool
+
+        """
+
+        if isinstance(operator, (list, tuple)):
+            result = self.compile_resource_ids(operator)
+        elif isinstance(operator, expressions.Expression):
+            getter = self.compile_expression(operator)
+
+            def result(feature):
+                return bool(getter(feature))
+        else:
+            handler = self._get_handler(
+                operator, self._OPERATOR_COMPILER_HANDLERS)
+            result = handler(operator)
+        return result
+
+    def compile_expression(self, expression):
+        """Compile an expression into a callable that extracts its value"""
+        handler = self._get_handler(
+            expression, self._EXPRESSION_COMPILER_HANDLERS)
+        return handler(expression)
+
+    def compile_value_reference(self, value_reference):
+        return self._build_getter(value_reference.value)
+
+    def compile_literal(self, literal):
+        value = literal.value
+        return lambda feature: value
+
+    def compile_function(self, function):
+        try:
+            implementation = self.functions[function.name]
+        except KeyError:
+            raise errors.InvalidExpressionError(
+                "Unknown function: {!r}".format(function.name))
+        arguments = tuple(self.compile_expression(argument) for
+                          argument in function.arguments)
+        return lambda feature: implementation(
+            *[argument(feature) for argument in arguments])
+
+    def compile_binary_comparison_operator(self, operator):
+        compare = COMPARISON_FUNCTIONS[operator.operator_type]
+        match_case = as_bool(operator.match_case)
+        aggregate = _MATCH_ACTION_AGGREGATES[
+            operators.MatchAction(operator.match_action)]
+        first = operator.first_expression
+        second = operator.second_expression
+        if (isinstance(first, expressions.ValueReference) and
+                isinstance(second, expressions.Literal)):
+            # fast path for the most common case of comparing against a
+            # literal, whose casts can be resolved right away
+            getter = self.compile_value_reference(first)
+            test = build_literal_comparison(
+                compare, second.value, match_case)
+
+            def predicate(feature):
+                value = getter(feature)
+                if isinstance(value, (list, tuple)):
+                    return aggregate(test(item) for item in value)
+                return test(value)
+
+        else:
+            getter = self.compile_expression(first)
+            other_getter = self.compile_expression(second)
+            test = build_runtime_comparison(compare, match_case)
+
+            def predicate(feature):
+                value = getter(feature)
+                other = other_getter(feature)
+                if isinstance(value, (list, tuple)):
+                    return aggregate(test(item, other) for item in value)
+                return test(value, other)
+
+        return predicate
+
+    def compile_like_operator(self, operator):
+        pattern = operator.second_expression
+        if not isinstance(pattern, expressions.Literal):
+            raise errors.InvalidOperatorError(
+                "PropertyIsLike patterns must be literals")
+        regex = like_pattern_to_regex(
+            as_text(pattern.value),
+            wild_card=operator.wild_card,
+            single_char=operator.single_char,
+            escape_char=operator.escape_char
+        )
+        match = regex.match
+        getter = self.compile_expression(operator.first_expression)
+
+        def predicate(feature):
+            value = getter(feature)
+            return value is not None and match(as_text(value)) is not None
+
+        return predicate
+
+    def compile_between_comparison_operator(self, operator):
+        getter = self.compile_expression(operator.expression)
+        lower = self.compile_expression(operator.lower_boundary)
+        upper = self.compile_expression(operator.upper_boundary)
+
+        def predicate(feature):
+            return is_between(getter(feature), lower(feature), upper(feature))
+
+        return predicate
+
+    def compile_null_operator(self, operator):
+        getter = self.compile_expression(operator.expression)
+        return lambda feature: getter(feature) is None
+
+    def compile_nil_operator(self, operator):
+        expression = operator.expression
+        if isinstance(expression, expressions.ValueReference):
+            getter = self._build_getter(expression.value, default=_MISSING)
+        else:
+            getter = self.compile_expression(expression)
+        return lambda feature: getter(feature) is None
+
+    def compile_binary_spatial_operator(self, operator):
+        """Compile a spatial operator.
+
+        Geometries are expected to be WKT strings, ``geometries.Geometry``
+        or ``spatial.Shape`` instances. Features whose geometries are
+        missing or invalid do not match. The geometry operand of ``BBOX``
+        is replaced by its envelope.
+
+        """
+
+        test = SPATIAL_FUNCTIONS[operator.operator_type]
+        is_bbox = operator.operator_type == operators.SpatialOperatorName.BBOX
+        getter = self.compile_expression(operator.expression)
+        second = operator.second_operand
+        if isinstance(second, expressions.Expression):
+            other_getter = self.compile_expression(second)
+        else:
+            shape = spatial.as_shape(second)
+            if is_bbox:
+                shape = spatial.envelope_to_shape(shape.envelope)
+
+            def other_getter(feature):
+                return shape
+            is_bbox = False
+
+        def predicate(feature):
+            value = get_shape(getter(feature))
+            other = get_shape(other_getter(feature))
+            if value is None or other is None:
+                return False
+            if is_bbox:
+                other = spatial.envelope_to_shape(other.envelope)
+            return test(value, other)
+
+        return predicate
+
+    def compile_distance_operator(self, operator):
+        """Compile a distance operator.
+
+        Features are assumed to be in the same coordinate reference system
+        as the geometry of the operator, whose units the distance is
+        converted into.
+
+        """
+
+        getter = self.compile_expression(operator.expression)
+        shape = spatial.as_shape(operator.geometry)
+        distance = operator.get_srs_distance()
+        is_beyond = operator.operator_type == (
+            operators.DistanceOperatorName.BEYOND)
+
+        def predicate(feature):
+            value = get_shape(getter(feature))
+            if value is None:
+                return False
+            return (spatial.distance(value, shape) > distance) == is_beyond
+
+        return predicate
+
+    def compile_temporal_operator(self, operator):
+        """Compile a temporal operator.
+
+        Times are expected to be values that ``temporal.as_period``
+        accepts, such as ISO 8601 strings, datetimes or ``(begin, end)``
+        pairs. Features whose times are missing or invalid do not match.
+
+        """
+
+        relate = TEMPORAL_FUNCTIONS[operator.operator_type]
+        getter = self.compile_expression(operator.expression)
+        second = operator.second_operand
+        if isinstance(second, expressions.Literal):
+            second = get_period(second.value)
+            if second is None:
+                raise errors.InvalidExpressionError(
+                    "Invalid time: {!r}".format(
+                        operator.second_operand.value))
+        if isinstance(second, expressions.Expression):
+            other_getter = self.compile_expression(second)
+        else:
+            def other_getter(feature):
+                return second
+
+        def predicate(feature):
+            value = get_period(getter(feature))
+            other = get_period(other_getter(feature))
+            if value is None or other is None:
+                return False
+            return relate(value.begin, value.end, other.begin, other.end)
+
+        return predicate
+
+    def compile_binary_logic_operator(self, operator):
+        operator_type = operator.operator_type
+        predicates = tuple(
+            self.compile(operand) for operand in
+            flatten_logic_operands(operator, operator_type)
+        )
+        if operator_type == operators.BinaryLogicType.AND:
+            def predicate(feature):
+                for operand in predicates:
+                    if not operand(feature):
+                        return False
+                return True
+        else:
+            def predicate(feature):
+                for operand in predicates:
+                    if operand(feature):
+                        return True
+                return False
+        return predicate
+
+    def compile_unary_logic_operator(self, operator):
+        operand = self.compile(operator.expression)
+        return lambda feature: not operand(feature)
+
+    def compile_resource_id(self, operator):
+        return self.compile_resource_ids([operator])
+
+    def compile_resource_ids(self, resource_ids):
+        identifiers = frozenset(item.rid for item in resource_ids)
+        getter = self._build_getter(self.id_property)
+
+        def predicate(feature):
+            identifier = getter(feature)
+            if identifier is None:
+                return False
+            return as_text(identifier) in identifiers
+
+        return predicate
+
+    def _build_getter(self, path, default=None):
+        keys = tuple(path.split("/")) if "/" in path else None
+        if keys is None:
+            def getter(feature):
+                return feature.get(path, default)
+        else:
+            def getter(feature):
+                value = feature
+                for key in keys:
+                    try:
+                        value = value.get(key, default)
+                    except AttributeError:
+                        return default
+                return value
+        return getter
+
+    def _get_handler(self, item, handlers):
+        for type_ in type(item).__mro__:
+            handler_name = handlers.get(type_)
+            if handler_name is not None:
+                break
+        else:
+            raise errors.InvalidOperatorError(
+                "Cannot compile {!r}".format(item))
+        return getattr(self, handler_name)
+
+
+def build_literal_comparison(compare, literal_value, match_case):
+    """Return a test that compares runtime values with a constant.
+
+    Numeric and case-folded versions of the literal are worked out now, so
+    the test only has to pick one of them when it runs.
+
+    """
+
+    number = as_number(literal_value)
+    literal_is_number = is_number(literal_value)
+    text = literal_value
+    if not match_case and isinstance(text, string_type):
+        text = text.lower()
+
+    def test(value):
+        if value is None:
+            return False
+        if is_number(value):
+            other = text if number is None else number
+        elif literal_is_number:
+            # the same coercion as coerce_operands, with the literal as the
+            # number
+            converted = as_number(value)
+            value = value if converted is None else converted
+            other = literal_value
+        else:
+            other = text
+            if not match_case and isinstance(value, string_type):
+                value = value.lower()
+        try:
+            return compare(value, other)
+        except TypeError:
+            return False
+
+    return test
+
+
+def build_runtime_comparison(compare, match_case):
+    """Return a test that compares two values known only at runtime"""
+
+    def test(value, other):
+        if value is None or other is None:
+            return False
+        value, other = coerce_operands(value, other)
+        if not match_case:
+            value = value.lower() if isinstance(value, string_type) else value
+            other = other.lower() if isinstance(other, string_type) else other
+        try:
+            return compare(value, other)
+        except TypeError:
+            return False
+
+    return test
+
+
+def _exactly_one(results):
+    return sum(1 for item in results if item) == 1
+
+
+_MATCH_ACTION_AGGREGATES = {
+    operators.MatchAction.ALL: all,
+    operators.MatchAction.ANY: any,
+    operators.MatchAction.ONE: _exactly_one,
+}
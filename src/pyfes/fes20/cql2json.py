@@ -0,0 +1,774 @@
+"""Conversion between CQL2-JSON documents and FES v2.0 operators.
+
+CQL2-JSON is the JSON encoding of filters that is used by OGC API -
+Features. ``parse_cql2_json`` builds the same operators that the other
+filter parsers build, so every consumer of parsed filters also works with
+CQL2-JSON input, and ``render_cql2_json`` goes the other way.
+
+Documents are decoded with ``orjson`` when it is installed and with the
+standard ``json`` module otherwise. Both the parser and the renderer walk
+documents with an explicit stack, so deeply nested filters do not hit the
+recursion limit.
+
+Besides the standard CQL2 operations, ``s_dwithin`` and ``s_beyond`` are
+understood, with the distance as their third argument and, optionally,
+its units as the fourth, named like the ECQL ``cqlparsers.DISTANCE_UNITS``.
+
+Examples
+--------
+
+>>> operator = parse_cql2_json(
+...     '{"op": "<", "args": [{"property": "DEPTH"}, 30]}')
+>>> operator.operator_type.value
+'PropertyIsLessThan'
+>>> render_cql2_json(operator)
+b'{"op":"<","args":[{"property":"DEPTH"},30]}'
+
+"""
+
+from collections import namedtuple
+import json
+import logging
+import re
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional dependency
+    orjson = None
+
+from . import expressions
+from . import operators
+from .canonical import flatten_logic_operands
+from .cqlparsers import DISTANCE_UNITS
+from .cqlparsers import SPATIAL_PREDICATES
+from .cqlparsers import TEMPORAL_PREDICATES
+from .. import errors
+from .. import geometries
+from .. import temporal
+from ..utils import string_type
+
+logger = logging.getLogger(__name__)
+
+_COMPARISONS = {
+    "=": operators.BinaryComparisonName.PROPERTY_IS_EQUAL_TO,
+    "<>": operators.BinaryComparisonName.PROPERTY_IS_NOT_EQUAL_TO,
+    "<": operators.BinaryComparisonName.PROPERTY_IS_LESS_THAN,
+    "<=": operators.BinaryComparisonName.PROPERTY_IS_LESS_THAN_OR_EQUAL_TO,
+    ">": operators.BinaryComparisonName.PROPERTY_IS_GREATER_THAN,
+    ">=": operators.BinaryComparisonName.PROPERTY_IS_GREATER_THAN_OR_EQUAL_TO,
+}
+
+_SPATIAL_OPERATIONS = dict(
+    ("s_" + name.lower(), operator_type) for name, operator_type in
+    SPATIAL_PREDICATES.items()
+)
+
+_TEMPORAL_OPERATIONS = dict(
+    (name, TEMPORAL_PREDICATES[name.upper()]) for name in (
+        "t_after", "t_before", "t_contains", "t_during", "t_equals",
+        "t_finishedBy", "t_intersects", "t_meets", "t_metBy",
+        "t_overlappedBy", "t_overlaps", "t_startedBy", "t_starts",
+    )
+)
+
+_DISTANCE_OPERATIONS = {
+    "s_dwithin": operators.DistanceOperatorName.DWITHIN,
+    "s_beyond": operators.DistanceOperatorName.BEYOND,
+}
+
+_DISTANCE_UNIT_NAMES = dict(
+    (uom, name) for name, uom in DISTANCE_UNITS.items())
+
+_INVERSE_SPATIAL_OPERATIONS = {
+    operators.SpatialOperatorName.WITHIN: (
+        operators.SpatialOperatorName.CONTAINS),
+    operators.SpatialOperatorName.CONTAINS: (
+        operators.SpatialOperatorName.WITHIN),
+}
+
+_DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+# CQL2 like patterns always use these wildcards
+_WILD_CARD = "%"
+_SINGLE_CHAR = "_"
+_ESCAPE_CHAR = "\\"
+
+_Call = namedtuple("_Call", "op args")
+"""A CQL2-JSON function call, whose arguments still need rendering"""
+
+_Build = namedtuple("_Build", "op builder count")
+"""An operation whose ``count`` arguments are waiting to be built"""
+
+_CaseInsensitive = namedtuple("_CaseInsensitive", "expression")
+"""The argument of a ``casei`` call, which only comparisons accept"""
+
+
+def parse_cql2_json(data, **kwargs):
+    """Parse a CQL2-JSON filter.
+
+    Parameters
+    ----------
+    data: str, bytes or dict
+        The filter to parse, either as text or already decoded
+    kwargs:
+        Passed to ``Cql2JsonParser``
+
+    Returns
+    -------
+    operators.NonIdOperator
+        The parsed filter
+
+    """
+
+    return Cql2JsonParser(**kwargs).parse(data)
+
+
+def render_cql2_json(operator, **kwargs):
+    """Render a filter as a CQL2-JSON document.
+
+    Parameters
+    ----------
+    operator: operators.NonIdOperator
+        The filter to render
+    kwargs:
+        Passed to ``Cql2JsonRenderer``
+
+    Returns
+    -------
+    bytes
+        The UTF-8 encoded document
+
+    """
+
+    return Cql2JsonRenderer(**kwargs).render(operator)
+
+
+def decode_json(data):
+    """Decode JSON text, with orjson if it is available"""
+    try:
+        if orjson is not None:
+            return orjson.loads(data)
+        if isinstance(data, (bytes, bytearray)):
+            data = data.decode("utf-8")
+        return json.loads(data)
+    except ValueError as err:
+        raise errors.ValidationError("Invalid JSON: {}".format(err))
+
+
+def encode_json(document):
+    """Encode a document as compact UTF-8 JSON, with orjson if available.
+
+    Both encoders produce the same bytes for CQL2-JSON documents.
+
+    """
+
+    if orjson is not None:
+        return orjson.dumps(document)
+    return json.dumps(document, separators=(",", ":"),
+                      ensure_ascii=False).encode("utf-8")
+
+
+class Cql2JsonParser(object):
+    """Parses CQL2-JSON documents into FES operators.
+
+    Each operation has a builder method that takes the operation name and
+    its already parsed arguments. Operations without a builder are taken
+    to be function calls.
+
+    Parameters
+    ----------
+    srs: str, optional
+        The SRS of geometry literals
+
+    """
+
+    _OPERATION_BUILDER_HANDLERS = {
+        "and": "build_logic_operator",
+        "or": "build_logic_operator",
+        "not": "build_not_operator",
+        "like": "build_like_operator",
+        "between": "build_between_operator",
+        "in": "build_in_operator",
+        "isnull": "build_null_operator",
+        "casei": "build_case_insensitive",
+    }
+
+    # checked in this order, since GeoJSON geometries may have a bbox too
+    _LITERAL_PARSER_HANDLERS = (
+        ("type", "parse_geometry"),
+        ("property", "parse_property"),
+        ("timestamp", "parse_instant"),
+        ("date", "parse_instant"),
+        ("interval", "parse_interval"),
+        ("bbox", "parse_bbox"),
+    )
+
+    def __init__(self, srs=None):
+        self.srs = srs
+        self._builders = dict(
+            (name, getattr(self, handler)) for name, handler in
+            self._OPERATION_BUILDER_HANDLERS.items()
+        )
+        for name in _COMPARISONS:
+            self._builders[name] = self.build_comparison_operator
+        for name in _SPATIAL_OPERATIONS:
+            self._builders[name] = self.build_spatial_operator
+        for name in _DISTANCE_OPERATIONS:
+            self._builders[name] = self.build_distance_operator
+        for name in _TEMPORAL_OPERATIONS:
+            self._builders[name.lower()] = self.build_temporal_operator
+        self._literal_parsers = [
+            (key, getattr(self, handler)) for key, handler in
+            self._LITERAL_PARSER_HANDLERS
+        ]
+
+    def parse(self, data):
+        """Parse a CQL2-JSON filter.
+
+        Parameters
+        ----------
+        data: str, bytes or dict
+            The filter to parse, either as text or already decoded
+
+        """
+
+        if isinstance(data, (string_type, bytes, bytearray)):
+            data = decode_json(data)
+        result = self.parse_node(data)
+        if not isinstance(result, operators.NonIdOperator):
+            raise errors.ValidationError(
+                "A CQL2-JSON filter must be a predicate, not {!r}".format(
+                    data))
+        return result
+
+    def parse_node(self, node):
+        """Parse a node of a decoded document and all of its descendants.
+
+        Arguments are parsed before the operations that use them, by
+        keeping the pending nodes on a stack rather than by recursing.
+
+        """
+
+        pending = [node]
+        values = []
+        while len(pending) > 0:
+            current = pending.pop()
+            current_type = type(current)
+            if current_type is _Build:
+                arguments = _pop(values, current.count)
+                values.append(current.builder(current.op, arguments))
+            elif current_type is dict and "op" in current:
+                name, arguments, builder = self._get_builder(current)
+                pending.append(_Build(name, builder, len(arguments)))
+                pending.extend(reversed(arguments))
+            elif current_type is list:
+                pending.append(_Build(None, self.build_list, len(current)))
+                pending.extend(reversed(current))
+            else:
+                values.append(self.parse_literal(current))
+        return values[0]
+
+    def parse_literal(self, value):
+        if isinstance(value, dict):
+            for key, parser in self._literal_parsers:
+                if key in value:
+                    return parser(value)
+            raise errors.ValidationError(
+                "Unsupported CQL2-JSON object: {!r}".format(value))
+        if not isinstance(value, (string_type, int, float, bool, type(None))):
+            raise errors.ValidationError(
+                "Unsupported CQL2-JSON value: {!r}".format(value))
+        return expressions.Literal.trusted(value)
+
+    def parse_property(self, value):
+        name = value["property"]
+        if not isinstance(name, string_type):
+            raise errors.ValidationError(
+                "Invalid property name: {!r}".format(name))
+        return expressions.ValueReference.trusted(name)
+
+    def parse_instant(self, value):
+        instant = value.get("timestamp", value.get("date"))
+        if not isinstance(instant, string_type):
+            raise errors.ValidationError(
+                "Invalid instant: {!r}".format(value))
+        return expressions.Literal.trusted(instant)
+
+    def parse_interval(self, value):
+        bounds = value["interval"]
+        if not isinstance(bounds, list) or len(bounds) != 2:
+            raise errors.ValidationError(
+                "Invalid interval: {!r}".format(value))
+        instants = [self.parse_instant(bound).value if
+                    isinstance(bound, dict) else bound for bound in bounds]
+        if not all(isinstance(instant, string_type) for instant in instants):
+            raise errors.ValidationError(
+                "Invalid interval: {!r}".format(value))
+        return expressions.Literal.trusted("/".join(instants))
+
+    def parse_bbox(self, value):
+        bounds = value["bbox"]
+        valid = (
+            isinstance(bounds, list) and
+            len(bounds) in (4, 6) and
+            all(isinstance(item, (int, float)) and
+                not isinstance(item, bool) for item in bounds)
+        )
+        if not valid:
+            raise errors.ValidationError(
+                "Invalid bounding box: {!r}".format(value))
+        if len(bounds) == 6:
+            bounds = bounds[0:2] + bounds[3:5]
+        return geometries.make_box(*bounds, srs=self.srs)
+
+    def parse_geometry(self, value):
+        return geometries.parse_geojson(value, srs=self.srs)
+
+    def build_list(self, name, arguments):
+        return arguments
+
+    def build_logic_operator(self, name, arguments):
+        if len(arguments) < 2:
+            raise errors.ValidationError(
+                "{!r} needs at least two arguments".format(name))
+        operator_type = operators.BinaryLogicType(name.capitalize())
+        result = self._check_predicate(name, arguments[0])
+        for argument in arguments[1:]:
+            result = operators.BinaryLogicOperator.trusted(
+                operator_type=operator_type,
+                first_expression=result,
+                second_expression=self._check_predicate(name, argument)
+            )
+        return result
+
+    def build_not_operator(self, name, arguments):
+        operand, = self._check_arguments(name, arguments, 1, check=False)
+        return operators.UnaryLogicOperator.trusted(
+            operator_type=operators.UnaryLogicType.NOT,
+            operand=self._check_predicate(name, operand)
+        )
+
+    def build_comparison_operator(self, name, arguments):
+        first, second = self._check_arguments(name, arguments, 2,
+                                              check=False)
+        case_insensitive = [isinstance(argument, _CaseInsensitive) for
+                            argument in arguments]
+        if any(case_insensitive):
+            if not all(case_insensitive):
+                raise errors.ValidationError(
+                    "Both arguments of {!r} must be wrapped in casei".format(
+                        name))
+            first, second = first.expression, second.expression
+        return operators.BinaryComparisonOperator.trusted(
+            operator_type=_COMPARISONS[name],
+            first_expression=self._check_expression(name, first),
+            second_expression=self._check_expression(name, second),
+            match_case=not any(case_insensitive)
+        )
+
+    def build_case_insensitive(self, name, arguments):
+        expression, = self._check_arguments(name, arguments, 1)
+        return _CaseInsensitive(expression)
+
+    def build_like_operator(self, name, arguments):
+        first, second = self._check_arguments(name, arguments, 2)
+        return operators.LikeOperator.trusted(
+            first_expression=first,
+            second_expression=second,
+            wild_card=_WILD_CARD,
+            single_char=_SINGLE_CHAR,
+            escape_char=_ESCAPE_CHAR
+        )
+
+    def build_between_operator(self, name, arguments):
+        expression, lower, upper = self._check_arguments(name, arguments, 3)
+        return operators.BetweenComparisonOperator.trusted(
+            expression=expression,
+            lower_boundary=lower,
+            upper_boundary=upper
+        )
+
+    def build_in_operator(self, name, arguments):
+        """Build ``in`` as equality tests joined with ``or``"""
+        expression, values = self._check_arguments(name, arguments, 2,
+                                                   check=False)
+        if not isinstance(values, list) or len(values) == 0:
+            raise errors.ValidationError(
+                "The second argument of 'in' must be a non empty list")
+        expression = self._check_expression(name, expression)
+        result = None
+        for value in values:
+            comparison = operators.BinaryComparisonOperator.trusted(
+                operator_type=_COMPARISONS["="],
+                first_expression=expression,
+                second_expression=self._check_expression(name, value)
+            )
+            if result is None:
+                result = comparison
+            else:
+                result = operators.BinaryLogicOperator.trusted(
+                    operator_type=operators.BinaryLogicType.OR,
+                    first_expression=result,
+                    second_expression=comparison
+                )
+        return result
+
+    def build_null_operator(self, name, arguments):
+        expression, = self._check_arguments(name, arguments, 1)
+        return operators.NullOperator.trusted(expression=expression)
+
+    def build_spatial_operator(self, name, arguments):
+        first, second = self._check_arguments(name, arguments, 2,
+                                              check=False)
+        operator_type = _SPATIAL_OPERATIONS[name]
+        if isinstance(first, geometries.Geometry):
+            first, second = second, first
+            operator_type = _INVERSE_SPATIAL_OPERATIONS.get(
+                operator_type, operator_type)
+        return operators.BinarySpatialOperator(
+            operator_type=operator_type,
+            first_operand=self._check_expression(name, first),
+            second_operand=second
+        )
+
+    def build_distance_operator(self, name, arguments):
+        """Build ``s_dwithin`` and ``s_beyond``"""
+        uom = None
+        if len(arguments) == 4:
+            units = getattr(arguments[3], "value", None)
+            arguments = arguments[:3]
+            if not isinstance(units, string_type):
+                units = None
+            uom = DISTANCE_UNITS.get((units or "").lower())
+            if uom is None:
+                raise errors.ValidationError(
+                    "Unknown distance units for {!r}: {!r}".format(
+                        name, units))
+        expression, geometry, distance = self._check_arguments(
+            name, arguments, 3, check=False)
+        distance = getattr(distance, "value", None)
+        valid = (
+            isinstance(geometry, geometries.Geometry) and
+            isinstance(distance, (int, float)) and
+            not isinstance(distance, bool)
+        )
+        if not valid:
+            raise errors.ValidationError(
+                "{!r} needs a geometry and a distance".format(name))
+        return operators.DistanceOperator(
+            operator_type=_DISTANCE_OPERATIONS[name],
+            expression=self._check_expression(name, expression),
+            geometry=geometry,
+            distance=distance,
+            uom=uom
+        )
+
+    def build_temporal_operator(self, name, arguments):
+        first, second = self._check_arguments(name, arguments, 2)
+        return operators.TemporalOperator(
+            operator_type=TEMPORAL_PREDICATES[name.upper()],
+            first_operand=first,
+            second_operand=second
+        )
+
+    def build_function(self, name, arguments):
+        return expressions.Function.trusted(
+            name=name,
+            arguments=[self._check_expression(name, argument) for
+                       argument in arguments]
+        )
+
+    def _get_builder(self, node):
+        """Return the operation name, arguments and builder of a node.
+
+        Standard operations are matched regardless of their case and
+        passed to their builders in lower case.
+
+        """
+
+        name = node["op"]
+        arguments = node.get("args", [])
+        is_valid = (isinstance(name, string_type) and
+                    isinstance(arguments, list))
+        if not is_valid:
+            raise errors.ValidationError(
+                "Invalid CQL2-JSON operation: {!r}".format(node))
+        builder = self._builders.get(name.lower())
+        if builder is None:
+            return name, arguments, self.build_function
+        return name.lower(), arguments, builder
+
+    def _check_arguments(self, name, arguments, count, check=True):
+        if len(arguments) != count:
+            raise errors.ValidationError(
+                "{!r} takes {} arguments, got {}".format(
+                    name, count, len(arguments)))
+        if check:
+            arguments = [self._check_expression(name, argument) for
+                         argument in arguments]
+        return arguments
+
+    def _check_expression(self, name, argument):
+        if isinstance(argument, geometries.Geometry):
+            return expressions.Literal.trusted(argument)
+        if not isinstance(argument, expressions.Expression):
+            raise errors.ValidationError(
+                "Invalid argument for {!r}: {!r}".format(name, argument))
+        return argument
+
+    def _check_predicate(self, name, argument):
+        if not isinstance(argument, operators.NonIdOperator):
+            raise errors.ValidationError(
+                "Invalid argument for {!r}: {!r}".format(name, argument))
+        return argument
+
+
+class Cql2JsonRenderer(object):
+    """Renders FES operators as CQL2-JSON documents.
+
+    Each node is rendered by a method that returns either its final JSON
+    value or a ``_Call`` whose arguments still need to be rendered.
+    Arguments are rendered before the calls that use them.
+
+    FES features that CQL2 lacks, such as resource identifiers, nil tests
+    and match actions other than ``Any``, can not be rendered. Geometries
+    are written in x, y order and without their SRS.
+
+    """
+
+    _NODE_RENDERER_HANDLERS = {
+        operators.BinaryComparisonOperator: (
+            "render_binary_comparison_operator"),
+        operators.LikeOperator: "render_like_operator",
+        operators.BetweenComparisonOperator: (
+            "render_between_comparison_operator"),
+        operators.NullOperator: "render_null_operator",
+        operators.DistanceOperator: "render_distance_operator",
+        operators.BinarySpatialOperator: "render_binary_spatial_operator",
+        operators.TemporalOperator: "render_temporal_operator",
+        operators.BinaryLogicOperator: "render_binary_logic_operator",
+        operators.UnaryLogicOperator: "render_unary_logic_operator",
+        expressions.ValueReference: "render_value_reference",
+        expressions.Literal: "render_literal",
+        expressions.Function: "render_function",
+        geometries.Geometry: "render_geometry",
+        _Call: "render_call",
+        dict: "render_call",
+    }
+
+    _COMPARISON_NAMES = dict(
+        (operator_type, name) for name, operator_type in
+        _COMPARISONS.items()
+    )
+
+    _SPATIAL_NAMES = dict(
+        (operator_type, name) for name, operator_type in
+        _SPATIAL_OPERATIONS.items()
+    )
+
+    _DISTANCE_NAMES = dict(
+        (operator_type, name) for name, operator_type in
+        _DISTANCE_OPERATIONS.items()
+    )
+
+    _TEMPORAL_NAMES = dict(
+        (operator_type, name) for name, operator_type in
+        _TEMPORAL_OPERATIONS.items()
+    )
+
+    def render(self, operator):
+        """Render a filter as UTF-8 encoded CQL2-JSON"""
+        return encode_json(self.render_document(operator))
+
+    def render_document(self, operator):
+        """Render a filter as a CQL2-JSON document made of dicts and lists"""
+        if not isinstance(operator, operators.NonIdOperator):
+            raise errors.PyFesError(
+                "Cannot render {!r} as CQL2-JSON".format(operator))
+        pending = [(operator, False)]
+        values = []
+        while len(pending) > 0:
+            current, is_rendered = pending.pop()
+            if is_rendered:
+                arguments = _pop(values, len(current.args))
+                values.append({"op": current.op, "args": arguments})
+                continue
+            handler = self._get_handler(current)
+            if handler is None:
+                raise errors.PyFesError(
+                    "Cannot render {!r} as CQL2-JSON".format(current))
+            result = handler(current)
+            if isinstance(result, _Call):
+                pending.append((result, True))
+                pending.extend(
+                    (argument, False) for argument in reversed(result.args))
+            else:
+                values.append(result)
+        return values[0]
+
+    def render_binary_comparison_operator(self, operator):
+        if operator.match_action != operators.MatchAction.ANY:
+            raise errors.PyFesError(
+                "CQL2 has no equivalent of matchAction {!r}".format(
+                    operator.match_action.value))
+        arguments = (operator.first_expression, operator.second_expression)
+        if not operator.match_case:
+            arguments = tuple(_Call("casei", (argument,)) for
+                              argument in arguments)
+        return _Call(self._COMPARISON_NAMES[operator.operator_type],
+                     arguments)
+
+    def render_like_operator(self, operator):
+        pattern = operator.second_expression
+        if not isinstance(getattr(pattern, "value", None), string_type):
+            raise errors.PyFesError(
+                "Cannot render a like pattern that is not a text literal")
+        pattern = translate_like_pattern(
+            pattern.value, operator.wild_card, operator.single_char,
+            operator.escape_char)
+        return _Call("like", (operator.first_expression,
+                              expressions.Literal.trusted(pattern)))
+
+    def render_between_comparison_operator(self, operator):
+        return _Call("between", (operator.expression,
+                                 operator.lower_boundary,
+                                 operator.upper_boundary))
+
+    def render_null_operator(self, operator):
+        return _Call("isNull", (operator.expression,))
+
+    def render_distance_operator(self, operator):
+        arguments = (
+            operator.expression,
+            self._get_geometry(operator.geometry),
+            expressions.Literal.trusted(operator.distance),
+        )
+        if operator.uom is not None:
+            try:
+                units = _DISTANCE_UNIT_NAMES[operator.uom]
+            except KeyError:
+                raise errors.PyFesError(
+                    "Cannot render distance units {!r}".format(operator.uom))
+            arguments += (expressions.Literal.trusted(units),)
+        return _Call(self._DISTANCE_NAMES[operator.operator_type], arguments)
+
+    def render_binary_spatial_operator(self, operator):
+        operand = operator.second_operand
+        if operator.operator_type == operators.SpatialOperatorName.BBOX:
+            if isinstance(operand, expressions.Expression):
+                raise errors.PyFesError(
+                    "Cannot render a BBOX operand that is not a geometry")
+            return _Call("s_intersects", (
+                operator.expression,
+                {"bbox": list(self._get_geometry(operand).bounds)},
+            ))
+        if not isinstance(operand, expressions.Expression):
+            operand = self._get_geometry(operand)
+        return _Call(self._SPATIAL_NAMES[operator.operator_type],
+                     (operator.expression, operand))
+
+    def render_temporal_operator(self, operator):
+        operand = operator.second_operand
+        value = getattr(operand, "value", None)
+        if isinstance(operand, temporal.TimePeriod):
+            operand = _render_temporal_literal(
+                temporal.format_period(operand))
+        elif (isinstance(operand, expressions.Literal) and
+              isinstance(value, string_type)):
+            operand = _render_temporal_literal(value)
+        return _Call(self._TEMPORAL_NAMES[operator.operator_type],
+                     (operator.expression, operand))
+
+    def render_binary_logic_operator(self, operator):
+        operands = flatten_logic_operands(operator, operator.operator_type)
+        return _Call(operator.operator_type.value.lower(), tuple(operands))
+
+    def render_unary_logic_operator(self, operator):
+        return _Call("not", (operator.expression,))
+
+    def render_value_reference(self, value_reference):
+        return {"property": value_reference.value}
+
+    def render_literal(self, literal):
+        value = literal.value
+        if isinstance(value, geometries.Geometry):
+            return geometries.as_geojson(value)
+        if not isinstance(value, (string_type, int, float, bool, type(None))):
+            raise errors.PyFesError(
+                "Cannot render literal value {!r} as CQL2-JSON".format(value))
+        return value
+
+    def render_function(self, function):
+        return _Call(function.name, tuple(function.arguments))
+
+    def render_geometry(self, geometry):
+        return geometries.as_geojson(geometry)
+
+    def render_call(self, call):
+        """Return calls, and JSON objects that are already rendered"""
+        return call
+
+    def _get_geometry(self, operand):
+        if isinstance(operand, geometries.Geometry):
+            return operand
+        return geometries.parse_wkt(operand)
+
+    def _get_handler(self, node):
+        for type_ in type(node).__mro__:
+            handler_name = self._NODE_RENDERER_HANDLERS.get(type_)
+            if handler_name is not None:
+                return getattr(self, handler_name)
+        return None
+
+
+def translate_like_pattern(pattern, wild_card, single_char, escape_char,
+                           target_wild_card=_WILD_CARD,
+                           target_single_char=_SINGLE_CHAR,
+                           target_escape_char=_ESCAPE_CHAR):
+    """Rewrite a like pattern so that it uses other special characters.
+
+    Examples
+    --------
+    >>> translate_like_pattern("a*b.!*", "*", ".", "!")
+    'a%b_*'
+    >>> translate_like_pattern("100%", "*", ".", "!")
+    '100\\\\%'
+
+    """
+
+    specials = (target_wild_card, target_single_char, target_escape_char)
+    result = []
+    escaped = False
+    for character in pattern:
+        if escaped:
+            escaped = False
+        elif character == escape_char:
+            escaped = True
+            continue
+        elif character == wild_card:
+            result.append(target_wild_card)
+            continue
+        elif character == single_char:
+            result.append(target_single_char)
+            continue
+        if character in specials:
+            result.append(target_escape_char)
+        result.append(character)
+    return "".join(result)
+
+
+def _render_temporal_literal(value):
+    if "/" in value:
+        return {"interval": value.split("/", 1)}
+    if _DATE_PATTERN.match(value) is not None:
+        return {"date": value}
+    return {"timestamp": value}
+
+
+def _pop(stack, count):
+    """Remove and return the last ``count`` items of a stack"""
+    if count == 0:
+        return []
+    result = stack[-count:]
+    del stack[-count:]
+    return result
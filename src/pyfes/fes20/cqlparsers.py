@@ -0,0 +1,742 @@
+"""Parsing of OGC CQL2 text and ECQL filters.
+
+Filters are split into tokens by a single precompiled regular expression
+and then parsed by a Pratt parser. Each kind of token has a prefix handler,
+which parses the expressions that start with that token, and may have an
+infix handler, which extends the expression on its left. Infix handlers
+have a binding power, which resolves operator precedence. Both are looked
+up in tables, so parsing runs in linear time and chains of ``AND`` or
+``OR`` are built iteratively rather than recursively.
+
+The result is the same tree of ``operators`` as the one that
+``filterparsers.FesFilterParser`` builds for the equivalent XML filter.
+
+Supported constructs are:
+
+* Comparisons: ``=``, ``<>``, ``!=``, ``<``, ``<=``, ``>`` and ``>=``;
+* ``[NOT] LIKE``, ``[NOT] BETWEEN``, ``[NOT] IN`` and ``IS [NOT] NULL``;
+* ``AND``, ``OR``, ``NOT`` and parentheses;
+* Spatial predicates, either with the CQL2 ``S_`` prefix or without it,
+  and the ECQL ``BBOX``, ``DWITHIN`` and ``BEYOND`` predicates;
+* Temporal predicates, either as CQL2 ``T_`` functions or as the ECQL
+  ``BEFORE``, ``AFTER``, ``DURING`` and ``TEQUALS`` infix operators;
+* WKT geometries, ``BBOX`` and ``ENVELOPE`` literals;
+* Strings, numbers, booleans, ``DATE``, ``TIMESTAMP`` and ``INTERVAL``
+  literals, and ECQL timestamps and periods;
+* Functions and ECQL feature identifier filters, such as
+  ``IN ('river.1', 'river.2')``.
+
+Examples
+--------
+
+>>> operator = CqlParser().parse("DEPTH < 30 AND name LIKE 'Tag%'")
+>>> operator.operator_type.value
+'And'
+>>> operator.first_expression.second_expression.value
+30
+
+"""
+
+from collections import namedtuple
+import logging
+import re
+
+from . import expressions
+from . import operators
+from .. import errors
+from .. import geometries
+from ..utils import as_text
+from ..utils import string_type
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r"""
+    \s*(?:
+    (?P<datetime>\d{4}-\d{2}-\d{2}
+        (?:T\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[-+]\d{2}:?\d{2})?)?)
+    |(?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+    |(?P<string>'(?:[^']|'')*')
+    |(?P<quoted_name>"(?:[^"]|"")*")
+    |(?P<name>[A-Za-z_][\w.:]*)
+    |(?P<operator><>|<=|>=|!=|[=<>])
+    |(?P<punctuation>[(),/-])
+    )
+""", re.VERBOSE)
+
+_KEYED_TOKEN_KINDS = frozenset(["name", "operator", "punctuation"])
+
+_Token = namedtuple("_Token", "kind key value position")
+
+_END = _Token("end", None, None, None)
+
+_COMPARISONS = {
+    "=": operators.BinaryComparisonName.PROPERTY_IS_EQUAL_TO,
+    "<>": operators.BinaryComparisonName.PROPERTY_IS_NOT_EQUAL_TO,
+    "!=": operators.BinaryComparisonName.PROPERTY_IS_NOT_EQUAL_TO,
+    "<": operators.BinaryComparisonName.PROPERTY_IS_LESS_THAN,
+    "<=": operators.BinaryComparisonName.PROPERTY_IS_LESS_THAN_OR_EQUAL_TO,
+    ">": operators.BinaryComparisonName.PROPERTY_IS_GREATER_THAN,
+    ">=": operators.BinaryComparisonName.PROPERTY_IS_GREATER_THAN_OR_EQUAL_TO,
+}
+
+SPATIAL_PREDICATES = {
+    "INTERSECTS": operators.SpatialOperatorName.INTERSECTS,
+    "DISJOINT": operators.SpatialOperatorName.DISJOINT,
+    "CONTAINS": operators.SpatialOperatorName.CONTAINS,
+    "WITHIN": operators.SpatialOperatorName.WITHIN,
+    "TOUCHES": operators.SpatialOperatorName.TOUCHES,
+    "CROSSES": operators.SpatialOperatorName.CROSSES,
+    "OVERLAPS": operators.SpatialOperatorName.OVERLAPS,
+    "EQUALS": operators.SpatialOperatorName.EQUALS,
+}
+"""Spatial predicates, which may also be written with an ``S_`` prefix"""
+
+TEMPORAL_PREDICATES = {
+    "T_AFTER": operators.TemporalOperatorName.AFTER,
+    "T_BEFORE": operators.TemporalOperatorName.BEFORE,
+    "T_CONTAINS": operators.TemporalOperatorName.T_CONTAINS,
+    "T_DURING": operators.TemporalOperatorName.DURING,
+    "T_EQUALS": operators.TemporalOperatorName.T_EQUALS,
+    "T_FINISHEDBY": operators.TemporalOperatorName.ENDED_BY,
+    "T_INTERSECTS": operators.TemporalOperatorName.ANY_INTERACTS,
+    "T_MEETS": operators.TemporalOperatorName.MEETS,
+    "T_METBY": operators.TemporalOperatorName.MET_BY,
+    "T_OVERLAPPEDBY": operators.TemporalOperatorName.OVERLAPPED_BY,
+    "T_OVERLAPS": operators.TemporalOperatorName.T_OVERLAPS,
+    "T_STARTEDBY": operators.TemporalOperatorName.BEGUN_BY,
+    "T_STARTS": operators.TemporalOperatorName.BEGINS,
+}
+"""CQL2 temporal functions that have an FES equivalent"""
+
+TEMPORAL_INFIX_OPERATORS = {
+    "BEFORE": operators.TemporalOperatorName.BEFORE,
+    "AFTER": operators.TemporalOperatorName.AFTER,
+    "DURING": operators.TemporalOperatorName.DURING,
+    "TEQUALS": operators.TemporalOperatorName.T_EQUALS,
+}
+"""ECQL temporal operators"""
+
+DISTANCE_UNITS = {
+    "meters": "m",
+    "kilometers": "km",
+    "feet": "[ft_i]",
+    "statute miles": "[mi_i]",
+    "nautical miles": "[nmi_i]",
+}
+"""ECQL distance units and their unit of measure"""
+
+_INVERSE_SPATIAL_PREDICATES = {
+    operators.SpatialOperatorName.WITHIN: (
+        operators.SpatialOperatorName.CONTAINS),
+    operators.SpatialOperatorName.CONTAINS: (
+        operators.SpatialOperatorName.WITHIN),
+}
+
+_CALL_KEYWORDS = frozenset([
+    "IN", "BBOX", "ENVELOPE", "DWITHIN", "BEYOND", "DATE", "TIMESTAMP",
+    "INTERVAL",
+])
+
+_WKT_TYPES = frozenset(type_.name for type_ in geometries.GeometryType)
+
+# binding powers of the infix operators
+_OR_POWER = 10
+_AND_POWER = 20
+_NOT_POWER = 30
+_PREDICATE_POWER = 40
+
+
+def parse_cql(data, **kwargs):
+    """Parse a CQL2 text or ECQL filter.
+
+    Parameters
+    ----------
+    data: str
+        The filter to parse
+    kwargs:
+        Passed to ``CqlParser``
+
+    Returns
+    -------
+    operators.NonIdOperator or tuple of operators.ResourceId
+        The parsed filter
+
+    """
+
+    return CqlParser(**kwargs).parse(data)
+
+
+def tokenize(data):
+    """Split a CQL filter into tokens.
+
+    Returns
+    -------
+    list
+        ``_Token`` tuples with the kind of token, its upper case value for
+        names and operators, its value and its position in the input
+
+    """
+
+    tokens = []
+    position = 0
+    for found in _TOKEN_PATTERN.finditer(data):
+        if found.start() != position:
+            break
+        kind = found.lastgroup
+        value = found.group(kind)
+        key = value.upper() if kind in _KEYED_TOKEN_KINDS else None
+        tokens.append(_Token(kind, key, value, found.start(kind)))
+        position = found.end()
+    if position != len(data) and not data[position:].isspace():
+        position += len(data[position:]) - len(data[position:].lstrip())
+        raise errors.ValidationError(
+            "Unexpected character {!r} at position {}".format(
+                data[position], position))
+    return tokens
+
+
+class CqlParser(object):
+    """A Pratt parser of CQL2 text and ECQL filters.
+
+    Parameters
+    ----------
+    srs: str, optional
+        The SRS of geometry literals. CQL2 geometries are in longitude,
+        latitude order, so the name should imply x, y order, like
+        ``OGC:CRS84`` or ``EPSG:4326`` do
+
+    """
+
+    _PREFIX_HANDLERS = {
+        "(": "parse_group",
+        "-": "parse_negative_number",
+        "NOT": "parse_not",
+        "IN": "parse_resource_ids",
+        "TRUE": "parse_boolean",
+        "FALSE": "parse_boolean",
+        "BBOX": "parse_bbox",
+        "ENVELOPE": "parse_envelope",
+        "DWITHIN": "parse_distance_predicate",
+        "BEYOND": "parse_distance_predicate",
+        "DATE": "parse_typed_literal",
+        "TIMESTAMP": "parse_typed_literal",
+        "INTERVAL": "parse_interval",
+    }
+
+    _TOKEN_KIND_HANDLERS = {
+        "number": "parse_number",
+        "string": "parse_string",
+        "datetime": "parse_datetime",
+        "quoted_name": "parse_quoted_name",
+        "name": "parse_name",
+    }
+
+    _INFIX_HANDLERS = {
+        "OR": (_OR_POWER, "parse_logic_operator"),
+        "AND": (_AND_POWER, "parse_logic_operator"),
+        "NOT": (_PREDICATE_POWER, "parse_negated_predicate"),
+        "LIKE": (_PREDICATE_POWER, "parse_like"),
+        "BETWEEN": (_PREDICATE_POWER, "parse_between"),
+        "IN": (_PREDICATE_POWER, "parse_in"),
+        "IS": (_PREDICATE_POWER, "parse_is_null"),
+    }
+
+    def __init__(self, srs=None):
+        self.srs = srs
+        self._prefix_handlers = dict(
+            (key, getattr(self, name)) for key, name in
+            self._PREFIX_HANDLERS.items()
+        )
+        self._kind_handlers = dict(
+            (kind, getattr(self, name)) for kind, name in
+            self._TOKEN_KIND_HANDLERS.items()
+        )
+        self._infix_handlers = dict(
+            (key, (power, getattr(self, name))) for key, (power, name) in
+            self._INFIX_HANDLERS.items()
+        )
+        for key in _COMPARISONS:
+            self._infix_handlers[key] = (
+                _PREDICATE_POWER, self.parse_comparison)
+        for key in TEMPORAL_INFIX_OPERATORS:
+            self._infix_handlers[key] = (
+                _PREDICATE_POWER, self.parse_temporal_infix)
+        self._data = ""
+        self._tokens = []
+        self._position = 0
+
+    def parse(self, data):
+        """Parse a filter.
+
+        Parameters
+        ----------
+        data: str
+            The filter to parse
+
+        Returns
+        -------
+        operators.NonIdOperator or tuple of operators.ResourceId
+            The parsed filter
+
+        Raises
+        ------
+        errors.ValidationError
+            If the input is not a valid filter
+
+        """
+
+        self._data = data
+        self._tokens = tokenize(data)
+        self._position = 0
+        try:
+            result = self.parse_node(0)
+            token = self.peek()
+            if token is not _END:
+                raise self.error(token, "Unexpected {!r}".format(
+                    token.value))
+        finally:
+            self._data = ""
+            self._tokens = []
+        if not isinstance(result, (tuple, operators.NonIdOperator)):
+            raise errors.ValidationError("The filter is not a predicate")
+        return result
+
+    def parse_node(self, power):
+        """Parse the input until an operator that binds less tightly"""
+        token = self.next()
+        left = self._get_prefix_handler(token)(token)
+        while True:
+            token = self.peek()
+            infix = self._infix_handlers.get(token.key)
+            if infix is None or infix[0] <= power:
+                break
+            self._position += 1
+            left = infix[1](token, left)
+        return left
+
+    def parse_predicate(self, power):
+        node = self.parse_node(power)
+        if not isinstance(node, operators.NonIdOperator):
+            raise errors.ValidationError(
+                "Expected a predicate, got {!r}".format(node))
+        return node
+
+    def parse_expression(self, power=_PREDICATE_POWER):
+        node = self.parse_node(power)
+        if isinstance(node, geometries.Geometry):
+            node = expressions.Literal.trusted(node)
+        elif not isinstance(node, expressions.Expression):
+            raise errors.ValidationError(
+                "Expected an expression, got {!r}".format(node))
+        return node
+
+    def parse_group(self, token):
+        result = self.parse_node(0)
+        self.expect(")")
+        return result
+
+    def parse_not(self, token):
+        return operators.UnaryLogicOperator.trusted(
+            operator_type=operators.UnaryLogicType.NOT,
+            operand=self.parse_predicate(_NOT_POWER)
+        )
+
+    def parse_number(self, token):
+        return expressions.Literal.trusted(_to_number(token.value))
+
+    def parse_negative_number(self, token):
+        number = self.next()
+        if number.kind != "number":
+            raise self.error(number, "Expected a number")
+        return expressions.Literal.trusted(-_to_number(number.value))
+
+    def parse_string(self, token):
+        return expressions.Literal.trusted(_unquote(token.value, "'"))
+
+    def parse_boolean(self, token):
+        return expressions.Literal.trusted(token.key == "TRUE")
+
+    def parse_datetime(self, token):
+        value = token.value
+        if self.peek().key == "/":
+            self._position += 1
+            end = self.next()
+            if end.kind != "datetime":
+                raise self.error(end, "Expected the end of a period")
+            value = "{}/{}".format(value, end.value)
+        return expressions.Literal.trusted(value)
+
+    def parse_typed_literal(self, token):
+        """Parse ``DATE('...')`` and ``TIMESTAMP('...')`` literals"""
+        self.expect("(")
+        value = self.next()
+        if value.kind != "string":
+            raise self.error(value, "Expected a quoted date")
+        self.expect(")")
+        return expressions.Literal.trusted(_unquote(value.value, "'"))
+
+    def parse_interval(self, token):
+        """Parse an ``INTERVAL(start, end)`` literal into a period"""
+        arguments = self.parse_arguments()
+        values = [argument.value for argument in arguments if
+                  isinstance(argument, expressions.Literal)]
+        if len(values) != 2 or len(arguments) != 2:
+            raise self.error(token, "Invalid interval")
+        return expressions.Literal.trusted("{}/{}".format(*values))
+
+    def parse_quoted_name(self, token):
+        return expressions.ValueReference.trusted(_unquote(token.value, '"'))
+
+    def parse_name(self, token):
+        key = token.key
+        next_key = self.peek().key
+        if key in _WKT_TYPES and next_key in ("(", "Z", "M", "ZM", "EMPTY"):
+            return self.parse_wkt(token)
+        if next_key != "(":
+            return expressions.ValueReference.trusted(token.value)
+        unprefixed = key[2:] if key.startswith("S_") else key
+        if unprefixed in SPATIAL_PREDICATES:
+            result = self.parse_spatial_predicate(
+                SPATIAL_PREDICATES[unprefixed])
+        elif key in TEMPORAL_PREDICATES:
+            first, second = self.parse_arguments(count=2)
+            result = operators.TemporalOperator(
+                operator_type=TEMPORAL_PREDICATES[key],
+                first_operand=first,
+                second_operand=second
+            )
+        else:
+            result = expressions.Function.trusted(
+                name=token.value, arguments=self.parse_arguments())
+        return result
+
+    def parse_wkt(self, token):
+        """Parse a WKT geometry, which spans several tokens"""
+        depth = 0
+        while True:
+            current = self.next()
+            if current is _END:
+                raise self.error(token, "Unterminated geometry")
+            elif current.key == "(":
+                depth += 1
+            elif current.key == ")":
+                depth -= 1
+            if depth == 0:
+                if current.key in (")", "EMPTY"):
+                    break
+                elif current.key not in ("Z", "M", "ZM"):
+                    raise self.error(current, "Invalid geometry")
+        end = current.position + len(current.value)
+        return geometries.parse_wkt(self._data[token.position:end],
+                                    srs=self.srs)
+
+    def parse_spatial_predicate(self, operator_type):
+        first, second = self.parse_arguments(count=2, geometry=True)
+        if (isinstance(first, geometries.Geometry) and
+                isinstance(second, expressions.Expression)):
+            # put the geometry literal last, inverting the predicate
+            first, second = second, first
+            operator_type = _INVERSE_SPATIAL_PREDICATES.get(
+                operator_type, operator_type)
+        if not isinstance(first, expressions.Expression):
+            raise errors.ValidationError(
+                "Spatial predicates need an expression operand")
+        return operators.BinarySpatialOperator(
+            operator_type=operator_type,
+            first_operand=first,
+            second_operand=second
+        )
+
+    def parse_bbox(self, token):
+        """Parse the ECQL ``BBOX`` predicate or a CQL2 ``BBOX`` literal.
+
+        The predicate is ``BBOX(property, minx, miny, maxx, maxy[, srs])``
+        while the literal has no property: ``BBOX(minx, miny, maxx, maxy)``.
+        Literals with six numbers have z values, which are discarded.
+
+        """
+
+        arguments = self.parse_arguments(geometry=True)
+        srs = self.srs
+        if len(arguments) > 0 and isinstance(
+                arguments[-1], expressions.Literal) and isinstance(
+                    arguments[-1].value, string_type):
+            srs = arguments.pop().value
+        if len(arguments) == 5:
+            property_, numbers = arguments[0], arguments[1:]
+        else:
+            property_, numbers = None, arguments
+        values = _get_numbers(numbers)
+        if len(values) == 6:
+            values = values[0:2] + values[3:5]
+        if len(values) != 4:
+            raise self.error(token, "Invalid bounding box")
+        box = geometries.make_box(values[0], values[1], values[2],
+                                  values[3], srs)
+        if property_ is None:
+            return box
+        return operators.BinarySpatialOperator(
+            operator_type=operators.SpatialOperatorName.BBOX,
+            first_operand=property_,
+            second_operand=box
+        )
+
+    def parse_envelope(self, token):
+        """Parse an ``ENVELOPE(west, east, north, south)`` literal"""
+        values = _get_numbers(self.parse_arguments(count=4))
+        west, east, north, south = values
+        return geometries.make_box(west, south, east, north, self.srs)
+
+    def parse_distance_predicate(self, token):
+        """Parse ``DWITHIN`` and ``BEYOND``.
+
+        Their arguments are a property, a geometry, a distance and its
+        units, which are one of the ``DISTANCE_UNITS``. Distances without
+        units are in the units of the SRS of the geometry.
+
+        """
+
+        self.expect("(")
+        expression = self.parse_expression()
+        self.expect(",")
+        geometry = self.parse_node(_PREDICATE_POWER)
+        if not isinstance(geometry, geometries.Geometry):
+            raise self.error(token, "Expected a geometry")
+        self.expect(",")
+        distance = self.parse_expression()
+        uom = None
+        if self.peek().key == ",":
+            self._position += 1
+            uom = self.parse_distance_units()
+        self.expect(")")
+        return operators.DistanceOperator(
+            operator_type=(operators.DistanceOperatorName.DWITHIN if
+                           token.key == "DWITHIN" else
+                           operators.DistanceOperatorName.BEYOND),
+            expression=expression,
+            geometry=geometry,
+            distance=_get_numbers([distance])[0],
+            uom=uom
+        )
+
+    def parse_distance_units(self):
+        """Parse the units of a distance, which may span several words"""
+        start = self.peek()
+        names = []
+        while self.peek().kind == "name":
+            names.append(self.next().value.lower())
+        units = " ".join(names)
+        try:
+            result = DISTANCE_UNITS[units]
+        except KeyError:
+            raise self.error(
+                start, "Unknown distance units {!r}".format(units))
+        return result
+
+    def parse_resource_ids(self, token):
+        """Parse an ECQL feature identifier filter"""
+        arguments = self.parse_arguments()
+        result = []
+        for argument in arguments:
+            if not isinstance(argument, expressions.Literal):
+                raise self.error(token, "Invalid feature identifier")
+            result.append(operators.ResourceId(as_text(argument.value)))
+        return tuple(result)
+
+    def parse_logic_operator(self, token, left):
+        operator_type = (operators.BinaryLogicType.AND if
+                         token.key == "AND" else operators.BinaryLogicType.OR)
+        if not isinstance(left, operators.NonIdOperator):
+            raise self.error(token, "Expected a predicate before {}".format(
+                token.value))
+        power = self._infix_handlers[token.key][0]
+        return operators.BinaryLogicOperator.trusted(
+            operator_type=operator_type,
+            first_expression=left,
+            second_expression=self.parse_predicate(power)
+        )
+
+    def parse_comparison(self, token, left):
+        return operators.BinaryComparisonOperator.trusted(
+            operator_type=_COMPARISONS[token.key],
+            first_expression=self._check_expression(token, left),
+            second_expression=self.parse_expression()
+        )
+
+    def parse_negated_predicate(self, token, left):
+        """Parse ``NOT LIKE``, ``NOT BETWEEN`` and ``NOT IN``"""
+        negated = self.next()
+        if negated.key not in ("LIKE", "BETWEEN", "IN"):
+            raise self.error(negated, "Expected LIKE, BETWEEN or IN")
+        handler = self._infix_handlers[negated.key][1]
+        return operators.UnaryLogicOperator.trusted(
+            operator_type=operators.UnaryLogicType.NOT,
+            operand=handler(negated, left)
+        )
+
+    def parse_like(self, token, left):
+        return operators.LikeOperator.trusted(
+            first_expression=self._check_expression(token, left),
+            second_expression=self.parse_expression(),
+            wild_card="%",
+            single_char="_",
+            escape_char="\\"
+        )
+
+    def parse_between(self, token, left):
+        expression = self._check_expression(token, left)
+        lower = self.parse_expression()
+        self.expect("AND")
+        upper = self.parse_expression()
+        return operators.BetweenComparisonOperator.trusted(
+            expression=expression,
+            lower_boundary=lower,
+            upper_boundary=upper
+        )
+
+    def parse_in(self, token, left):
+        """Parse ``IN`` lists into equality tests joined with ``OR``"""
+        expression = self._check_expression(token, left)
+        result = None
+        for value in self.parse_arguments():
+            comparison = operators.BinaryComparisonOperator.trusted(
+                operator_type=_COMPARISONS["="],
+                first_expression=expression,
+                second_expression=value
+            )
+            if result is None:
+                result = comparison
+            else:
+                result = operators.BinaryLogicOperator.trusted(
+                    operator_type=operators.BinaryLogicType.OR,
+                    first_expression=result,
+                    second_expression=comparison
+                )
+        if result is None:
+            raise self.error(token, "Empty IN list")
+        return result
+
+    def parse_is_null(self, token, left):
+        expression = self._check_expression(token, left)
+        negated = self.peek().key == "NOT"
+        if negated:
+            self._position += 1
+        self.expect("NULL")
+        result = operators.NullOperator.trusted(expression=expression)
+        if negated:
+            result = operators.UnaryLogicOperator.trusted(
+                operator_type=operators.UnaryLogicType.NOT, operand=result)
+        return result
+
+    def parse_temporal_infix(self, token, left):
+        return operators.TemporalOperator(
+            operator_type=TEMPORAL_INFIX_OPERATORS[token.key],
+            first_operand=self._check_expression(token, left),
+            second_operand=self.parse_expression()
+        )
+
+    def parse_arguments(self, count=None, geometry=False):
+        """Parse a parenthesized list of arguments.
+
+        Parameters
+        ----------
+        count: int, optional
+            The number of arguments that are expected
+        geometry: bool, optional
+            Whether geometry literals are kept as ``geometries.Geometry``
+            rather than being wrapped in literals
+
+        """
+
+        start = self.expect("(")
+        arguments = []
+        if self.peek().key == ")":
+            self._position += 1
+        else:
+            while True:
+                if geometry:
+                    node = self.parse_node(_PREDICATE_POWER)
+                    if not isinstance(node, (geometries.Geometry,
+                                             expressions.Expression)):
+                        raise self.error(start, "Invalid argument")
+                else:
+                    node = self.parse_expression(_PREDICATE_POWER)
+                arguments.append(node)
+                token = self.next()
+                if token.key == ")":
+                    break
+                elif token.key != ",":
+                    raise self.error(token, "Expected ',' or ')'")
+        if count is not None and len(arguments) != count:
+            raise self.error(start, "Expected {} arguments, got {}".format(
+                count, len(arguments)))
+        return arguments
+
+    def next(self):
+        try:
+            token = self._tokens[self._position]
+        except IndexError:
+            return _END
+        self._position += 1
+        return token
+
+    def peek(self):
+        try:
+            return self._tokens[self._position]
+        except IndexError:
+            return _END
+
+    def expect(self, key):
+        token = self.next()
+        if token.key != key:
+            raise self.error(token, "Expected {!r}".format(key))
+        return token
+
+    def error(self, token, message):
+        if token is _END:
+            location = "at the end of the filter"
+        else:
+            location = "at position {}".format(token.position)
+        return errors.ValidationError("{} {}".format(message, location))
+
+    def _check_expression(self, token, node):
+        if not isinstance(node, expressions.Expression):
+            raise self.error(token, "Expected an expression before {}".format(
+                token.value))
+        return node
+
+    def _get_prefix_handler(self, token):
+        handler = self._prefix_handlers.get(token.key)
+        if token.key in _CALL_KEYWORDS and self.peek().key != "(":
+            # keywords that are not called are just property names
+            handler = None
+        if handler is None:
+            handler = self._kind_handlers.get(token.kind)
+        if token is _END:
+            raise errors.ValidationError("Unexpected end of the filter")
+        elif handler is None:
+            raise self.error(token, "Unexpected {!r}".format(token.value))
+        return handler
+
+
+def _to_number(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def _unquote(text, quote):
+    return text[1:-1].replace(quote * 2, quote)
+
+
+def _get_numbers(arguments):
+    values = []
+    for argument in arguments:
+        value = getattr(argument, "value", None)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise errors.ValidationError(
+                "Expected a number, got {!r}".format(argument))
+        values.append(float(value))
+    return values
+
@@ -0,0 +1,258 @@
+"""Extraction of bounding box prefilters from FES v2.0 filters.
+
+Exact geometry tests are expensive. Before running them, backends can use
+the envelope of a filter to do a cheap scan of their spatial index. Only
+the features whose geometries intersect the envelope may match the filter.
+
+Envelopes are ``(minx, miny, maxx, maxy)`` tuples. Filters that place no
+spatial restriction on features have an envelope of None, meaning that it
+is unbounded. Filters that cannot match any feature have the
+``EMPTY_ENVELOPE``.
+
+Examples
+--------
+
+>>> from pyfes.fes20 import expressions
+>>> operator = operators.BinarySpatialOperator(
+...     operator_type=operators.SpatialOperatorName.INTERSECTS,
+...     first_operand=expressions.ValueReference("geom"),
+...     second_operand="POLYGON ((0 0, 10 0, 10 5, 0 0))"
+... )
+>>> get_filter_envelope(operator)
+(0.0, 0.0, 10.0, 5.0)
+
+"""
+
+import logging
+
+from . import expressions
+from . import operators
+from .canonical import flatten_logic_operands
+from .. import errors
+from .. import geometries
+from ..utils import string_type
+
+logger = logging.getLogger(__name__)
+
+EMPTY_ENVELOPE = (
+    float("inf"), float("inf"), float("-inf"), float("-inf"))
+
+
+def get_filter_envelope(operator, property_name=None):
+    """Return a conservative envelope of the features matched by a filter.
+
+    Parameters
+    ----------
+    operator: operators.NonIdOperator or tuple of operators.ResourceId
+        The filter to analyse, as returned by ``parsers.parse_filter``
+    property_name: str, optional
+        Name of the geometry property that is being indexed. Spatial
+        operators on other properties are ignored. When None, all spatial
+        operators are assumed to refer to the same property
+
+    Returns
+    -------
+    tuple or None
+        A ``(minx, miny, maxx, maxy)`` tuple, or None when the filter is
+        spatially unbounded
+
+    """
+
+    return EnvelopeExtractor(property_name=property_name).extract(operator)
+
+
+def get_operand_envelope(operand):
+    """Return the envelope of the geometry operand of a spatial operator.
+
+    Returns None when the operand is not a literal geometry.
+
+    """
+
+    if isinstance(operand, geometries.Geometry):
+        result = operand.bounds
+    elif isinstance(operand, string_type):
+        try:
+            result = geometries.parse_wkt(operand).bounds
+        except errors.ValidationError:
+            result = None
+    else:
+        result = None
+    return result
+
+
+def get_points_envelope(points):
+    """Return the envelope of some ``(x, y)`` points.
+
+    The envelope of no points at all is the ``EMPTY_ENVELOPE``.
+
+    """
+
+    minx = miny = float("inf")
+    maxx = maxy = float("-inf")
+    for x, y in points:
+        minx = min(minx, x)
+        miny = min(miny, y)
+        maxx = max(maxx, x)
+        maxy = max(maxy, y)
+    return (minx, miny, maxx, maxy)
+
+
+def is_empty_envelope(envelope):
+    return envelope is not None and (
+        envelope[0] > envelope[2] or envelope[1] > envelope[3])
+
+
+def intersect_envelopes(first, second):
+    """Return the intersection of two envelopes.
+
+    Unbounded envelopes, represented as None, do not restrict the result.
+
+    """
+
+    if first is None:
+        result = second
+    elif second is None:
+        result = first
+    else:
+        result = (max(first[0], second[0]), max(first[1], second[1]),
+                  min(first[2], second[2]), min(first[3], second[3]))
+        if is_empty_envelope(result):
+            result = EMPTY_ENVELOPE
+    return result
+
+
+def union_envelopes(first, second):
+    """Return the smallest envelope that covers both input envelopes"""
+    if first is None or second is None:
+        result = None
+    elif is_empty_envelope(first):
+        result = second
+    elif is_empty_envelope(second):
+        result = first
+    else:
+        result = (min(first[0], second[0]), min(first[1], second[1]),
+                  max(first[2], second[2]), max(first[3], second[3]))
+    return result
+
+
+def expand_envelope(envelope, distance):
+    if envelope is None or is_empty_envelope(envelope):
+        result = envelope
+    else:
+        result = (envelope[0] - distance, envelope[1] - distance,
+                  envelope[2] + distance, envelope[3] + distance)
+    return result
+
+
+def envelope_contains(outer, inner):
+    """Check whether the inner envelope lies within the outer one"""
+    if outer is None:
+        result = True
+    elif inner is None:
+        result = False
+    elif is_empty_envelope(inner):
+        result = True
+    else:
+        result = (outer[0] <= inner[0] and outer[1] <= inner[1] and
+                  outer[2] >= inner[2] and outer[3] >= inner[3])
+    return result
+
+
+def envelopes_intersect(first, second):
+    return not is_empty_envelope(intersect_envelopes(first, second))
+
+
+class EnvelopeExtractor(object):
+    """Computes conservative envelopes for operator trees.
+
+    Every spatial operator other than ``Disjoint`` and ``Beyond`` can only
+    match features whose geometries intersect the envelope of its
+    geometry operand. ``fes:And`` intersects the envelopes of its operands
+    and ``fes:Or`` joins them. ``fes:Not`` and every non-spatial operator
+    are unbounded.
+
+    Parameters
+    ----------
+    property_name: str, optional
+        Name of the geometry property that is being indexed. When None,
+        all spatial operators are assumed to refer to the same property
+
+    """
+
+    _OPERATOR_EXTRACTOR_HANDLERS = {
+        operators.BinarySpatialOperator: "extract_binary_spatial_operator",
+        operators.DistanceOperator: "extract_distance_operator",
+        operators.BinaryLogicOperator: "extract_binary_logic_operator",
+    }
+
+    def __init__(self, property_name=None):
+        self.property_name = property_name
+
+    def extract(self, operator):
+        """Return the envelope of the input operator, or None"""
+        if isinstance(operator, (list, tuple)):
+            result = None
+        else:
+            handler = self._get_handler(operator)
+            result = None if handler is None else handler(operator)
+        return result
+
+    def extract_binary_spatial_operator(self, operator):
+        excluded = operator.operator_type == (
+            operators.SpatialOperatorName.DISJOINT)
+        if excluded or not self._refers_to_property(operator.expression):
+            result = None
+        else:
+            result = get_operand_envelope(operator.second_operand)
+        return result
+
+    def extract_distance_operator(self, operator):
+        """Extract the envelope of a distance operator.
+
+        The distance is converted into the units of the coordinate
+        reference system of the geometry.
+
+        """
+
+        excluded = operator.operator_type == (
+            operators.DistanceOperatorName.BEYOND)
+        if excluded or not self._refers_to_property(operator.expression):
+            return None
+        try:
+            distance = operator.get_srs_distance()
+        except errors.PyFesError:
+            result = None
+        else:
+            result = expand_envelope(
+                get_operand_envelope(operator.geometry), distance)
+        return result
+
+    def extract_binary_logic_operator(self, operator):
+        operator_type = operator.operator_type
+        operands = flatten_logic_operands(operator, operator_type)
+        if operator_type == operators.BinaryLogicType.AND:
+            result = None
+            for operand in operands:
+                result = intersect_envelopes(result, self.extract(operand))
+        else:
+            result = EMPTY_ENVELOPE
+            for operand in operands:
+                result = union_envelopes(result, self.extract(operand))
+                if result is None:
+                    break
+        return result
+
+    def _refers_to_property(self, expression):
+        if self.property_name is None:
+            result = True
+        else:
+            result = (isinstance(expression, expressions.ValueReference) and
+                      expression.value == self.property_name)
+        return result
+
+    def _get_handler(self, operator):
+        for type_ in type(operator).__mro__:
+            handler_name = self._OPERATOR_EXTRACTOR_HANDLERS.get(type_)
+            if handler_name is not None:
+                return getattr(self, handler_name)
+        return None
@@ -0,0 +1,498 @@
+"""Vectorized evaluation of FES v2.0 filters over columnar feature batches.
+
+A batch is either a mapping of property names to numpy arrays or a numpy
+structured array. Evaluating a filter over a batch returns a boolean mask
+with one element per feature. Each node of the operator tree is evaluated
+with a single array operation, instead of once for each feature.
+
+This module requires numpy, which is an optional dependency of pyfes.
+
+Examples
+--------
+
+>>> import numpy
+>>> from pyfes.fes20 import expressions
+>>> operator = operators.BinaryComparisonOperator(
+...     operator_type=operators.BinaryComparisonName.PROPERTY_IS_LESS_THAN,
+...     first_expression=expressions.ValueReference("DEPTH"),
+...     second_expression=expressions.Literal("30")
+... )
+>>> evaluate_batch(operator, {"DEPTH": numpy.array([10, 50])}).tolist()
+[True, False]
+
+"""
+
+import logging
+
+try:
+    import numpy as np
+except ImportError:  # numpy is an optional dependency
+    np = None
+
+from . import expressions
+from . import operators
+from .compilers import COMPARISON_FUNCTIONS
+from .compilers import TEMPORAL_FUNCTIONS
+from .compilers import as_bool
+from .compilers import as_number
+from .compilers import build_literal_comparison
+from .compilers import build_runtime_comparison
+from .compilers import get_period
+from .compilers import is_between
+from .compilers import is_number
+from .compilers import like_pattern_to_regex
+from .. import errors
+from .. import instrumentation
+from ..utils import as_text
+from ..utils import string_type
+
+logger = logging.getLogger(__name__)
+
+
+def evaluate_batch(operator, batch, **kwargs):
+    """Evaluate a filter over a columnar batch of features.
+
+    Parameters
+    ----------
+    operator: operators.NonIdOperator or tuple of operators.ResourceId
+        The filter to evaluate, as returned by ``parsers.parse_filter``
+    batch: dict or numpy.ndarray
+        Either a mapping of property names to arrays or a structured array
+    kwargs:
+        Passed to ``ArrayEvaluator``
+
+    Returns
+    -------
+    numpy.ndarray
+        A boolean mask with the features that match the filter
+
+    """
+
+    with instrumentation.timer("evaluate.batch"):
+        result = ArrayEvaluator(**kwargs).evaluate(operator, batch)
+    instrumentation.increment("evaluate.rows", len(result))
+    return result
+
+
+class ArrayEvaluator(object):
+    """Evaluates FES operators over columnar batches of features.
+
+    Parameters
+    ----------
+    functions: dict, optional
+        Maps FES function names to python callables that accept and return
+        numpy arrays
+    id_property: str, optional
+        Name of the column that holds the feature identifiers, which is used
+        when evaluating ``fes:ResourceId`` filters
+
+    """
+
+    _OPERATOR_EVALUATOR_HANDLERS = {
+        operators.BinaryComparisonOperator: (
+            "evaluate_binary_comparison_operator"),
+        operators.LikeOperator: "evaluate_like_operator",
+        operators.BetweenComparisonOperator: (
+            "evaluate_between_comparison_operator"),
+        operators.NullOperator: "evaluate_null_operator",
+        operators.NilOperator: "evaluate_nil_operator",
+        operators.TemporalOperator: "evaluate_temporal_operator",
+        operators.BinaryLogicOperator: "evaluate_binary_logic_operator",
+        operators.UnaryLogicOperator: "evaluate_unary_logic_operator",
+        operators.ResourceId: "evaluate_resource_id",
+    }
+
+    _EXPRESSION_EVALUATOR_HANDLERS = {
+        expressions.ValueReference: "evaluate_value_reference",
+        expressions.Literal: "evaluate_literal",
+        expressions.Function: "evaluate_function",
+    }
+
+    def __init__(self, functions=None, id_property="id"):
+        if np is None:
+            raise errors.PyFesError(
+                "numpy is required for evaluating filters over batches")
+        self.functions = dict(functions) if functions is not None else {}
+        self.id_property = id_property
+
+    def evaluate(self, operator, batch):
+        """Evaluate the input operator over a batch of features.
+
+        Parameters
+        ----------
+        operator: operators.NonIdOperator or tuple of operators.ResourceId
+            The operator tree to evaluate
+        batch: dict or numpy.ndarray
+            Either a mapping of property names to arrays or a structured
+            array
+
+        Returns
+        -------
+        numpy.ndarray
+            A boolean mask with one element per feature
+
+        """
+
+        size = _get_batch_size(batch)
+        if isinstance(operator, (list, tuple)):
+            result = self.evaluate_resource_ids(operator, batch, size)
+        elif isinstance(operator, expressions.Expression):
+            value = self.evaluate_expression(operator, batch, size)
+            result = np.broadcast_to(
+                np.asarray(value).astype(bool), (size,)).copy()
+        else:
+            handler = self._get_handler(
+                operator, self._OPERATOR_EVALUATOR_HANDLERS)
+            result = handler(operator, batch, size)
+        return result
+
+    def evaluate_expression(self, expression, batch, size):
+        """Evaluate an expression into an array or a scalar value"""
+        handler = self._get_handler(
+            expression, self._EXPRESSION_EVALUATOR_HANDLERS)
+        return handler(expression, batch, size)
+
+    def evaluate_value_reference(self, value_reference, batch, size):
+        """Return the column referenced by the expression.
+
+        Missing columns are returned as an array of nulls.
+
+        """
+
+        try:
+            result = batch[value_reference.value]
+        except (KeyError, ValueError):
+            result = np.full(size, None, dtype=object)
+        if not np.ma.isMaskedArray(result):
+            result = np.asarray(result)
+        return result
+
+    def evaluate_literal(self, literal, batch, size):
+        return literal.value
+
+    def evaluate_function(self, function, batch, size):
+        try:
+            implementation = self.functions[function.name]
+        except KeyError:
+            raise errors.InvalidExpressionError(
+                "Unknown function: {!r}".format(function.name))
+        arguments = [self.evaluate_expression(argument, batch, size) for
+                     argument in function.arguments]
+        return implementation(*arguments)
+
+    def evaluate_binary_comparison_operator(self, operator, batch, size):
+        """Compare two expressions with the same rules as the compiler.
+
+        Numeric columns compared with numbers, and text columns compared
+        with text, are compared with a single array operation. Any other
+        combination is compared one element at a time, with the tests of
+        ``compilers.PredicateCompiler``.
+
+        """
+
+        compare = COMPARISON_FUNCTIONS[operator.operator_type]
+        match_case = as_bool(operator.match_case)
+        first = self.evaluate_expression(
+            operator.first_expression, batch, size)
+        second = self.evaluate_expression(
+            operator.second_expression, batch, size)
+        _check_comparable(first, second)
+        if (isinstance(operator.first_expression,
+                       expressions.ValueReference) and
+                isinstance(operator.second_expression, expressions.Literal)):
+            literal_test = build_literal_comparison(
+                compare, operator.second_expression.value, match_case)
+            test = lambda value, other: literal_test(value)
+        else:
+            test = build_runtime_comparison(compare, match_case)
+        first_cast, second_cast = _cast_operands(first, second)
+        if first_cast is None:
+            result = _apply(test, first, second)
+        else:
+            if not match_case:
+                first_cast = _lower(first_cast)
+                second_cast = _lower(second_cast)
+            with np.errstate(invalid="ignore"):
+                result = _fill_masked(compare(first_cast, second_cast))
+        return np.broadcast_to(np.asarray(result, dtype=bool), (size,)).copy()
+
+    def evaluate_like_operator(self, operator, batch, size):
+        pattern = operator.second_expression
+        if not isinstance(pattern, expressions.Literal):
+            raise errors.InvalidOperatorError(
+                "PropertyIsLike patterns must be literals")
+        match = like_pattern_to_regex(
+            as_text(pattern.value),
+            wild_card=operator.wild_card,
+            single_char=operator.single_char,
+            escape_char=operator.escape_char
+        ).match
+        values = self.evaluate_expression(
+            operator.first_expression, batch, size)
+
+        def is_match(value):
+            return value is not None and match(as_text(value)) is not None
+
+        matcher = np.frompyfunc(is_match, 1, 1)
+        return _fill_masked(matcher(values)).astype(bool)
+
+    def evaluate_between_comparison_operator(self, operator, batch, size):
+        values = self.evaluate_expression(operator.expression, batch, size)
+        lower = self.evaluate_expression(operator.lower_boundary, batch, size)
+        upper = self.evaluate_expression(operator.upper_boundary, batch, size)
+        _check_comparable(values, lower)
+        _check_comparable(values, upper)
+        values_cast, lower_cast = _cast_operands(values, lower)
+        upper_cast = _cast_operands(values, upper)[1]
+        if values_cast is None or upper_cast is None:
+            result = _apply(is_between, values, lower, upper)
+        else:
+            with np.errstate(invalid="ignore"):
+                result = _fill_masked(
+                    (values_cast >= lower_cast) & (values_cast <= upper_cast))
+        return np.broadcast_to(np.asarray(result, dtype=bool), (size,)).copy()
+
+    def evaluate_null_operator(self, operator, batch, size):
+        values = self.evaluate_expression(operator.expression, batch, size)
+        return _null_mask(values, size)
+
+    def evaluate_nil_operator(self, operator, batch, size):
+        """Evaluate ``PropertyIsNil`` with the same rules as the compiler.
+
+        Only the null values of existing properties are nil. Missing columns
+        do not match and neither do NaN values, which are numbers.
+
+        """
+
+        expression = operator.expression
+        if isinstance(expression, expressions.ValueReference):
+            try:
+                batch[expression.value]
+            except (KeyError, ValueError):
+                return np.zeros(size, dtype=bool)
+        values = self.evaluate_expression(expression, batch, size)
+        return _null_mask(values, size, nan_is_null=False)
+
+    def evaluate_temporal_operator(self, operator, batch, size):
+        """Evaluate a temporal operator over columns of times.
+
+        Columns of ``datetime64`` values or of integer nanoseconds since
+        the Unix epoch are compared directly. Two dimensional columns hold
+        the begin and end of a period in each row. Other columns have each
+        of their values converted with ``temporal.as_period``. Missing,
+        masked and invalid times do not match.
+
+        """
+
+        relate = TEMPORAL_FUNCTIONS[operator.operator_type]
+        begins, ends, valid = _get_intervals(
+            self.evaluate_expression(operator.expression, batch, size))
+        second = operator.second_operand
+        if isinstance(second, expressions.Literal):
+            second = get_period(second.value)
+            if second is None:
+                raise errors.InvalidExpressionError(
+                    "Invalid time: {!r}".format(
+                        operator.second_operand.value))
+        elif isinstance(second, expressions.Expression):
+            second = self.evaluate_expression(second, batch, size)
+        other_begins, other_ends, other_valid = _get_intervals(second)
+        result = (relate(begins, ends, other_begins, other_ends) & valid &
+                  other_valid)
+        return np.broadcast_to(np.asarray(result, dtype=bool), (size,)).copy()
+
+    def evaluate_binary_logic_operator(self, operator, batch, size):
+        first = self.evaluate(operator.first_expression, batch)
+        second = self.evaluate(operator.second_expression, batch)
+        if operator.operator_type == operators.BinaryLogicType.AND:
+            result = first & second
+        else:
+            result = first | second
+        return result
+
+    def evaluate_unary_logic_operator(self, operator, batch, size):
+        return ~self.evaluate(operator.expression, batch)
+
+    def evaluate_resource_id(self, operator, batch, size):
+        return self.evaluate_resource_ids([operator], batch, size)
+
+    def evaluate_resource_ids(self, resource_ids, batch, size):
+        identifiers = self.evaluate_value_reference(
+            expressions.ValueReference(self.id_property), batch, size)
+        return np.isin(identifiers.astype(str),
+                       [item.rid for item in resource_ids])
+
+    def _get_handler(self, item, handlers):
+        for type_ in type(item).__mro__:
+            handler_name = handlers.get(type_)
+            if handler_name is not None:
+                break
+        else:
+            raise errors.InvalidOperatorError(
+                "Cannot evaluate {!r}".format(item))
+        return getattr(self, handler_name)
+
+
+def _get_batch_size(batch):
+    if isinstance(batch, np.ndarray):
+        result = len(batch)
+    else:
+        sizes = set(len(column) for column in batch.values())
+        if len(sizes) > 1:
+            raise errors.PyFesError("All batch columns must have the same "
+                                    "length")
+        result = sizes.pop() if len(sizes) > 0 else 0
+    return result
+
+
+def _is_numeric(values):
+    return values.dtype.kind in "iuf"
+
+
+def _check_comparable(first, second):
+    for values in (first, second):
+        if isinstance(values, np.ndarray) and values.dtype.kind in "mM":
+            raise errors.InvalidExpressionError(
+                "Columns of times can only be compared with temporal "
+                "operators")
+
+
+def _cast_operands(first, second):
+    """Cast two operands so that numpy compares them like the compiler.
+
+    Returns a pair of Nones when the operands have to be compared one
+    element at a time instead.
+
+    """
+
+    first_is_array = isinstance(first, np.ndarray)
+    second_is_array = isinstance(second, np.ndarray)
+    if first_is_array and second_is_array:
+        if ((_is_numeric(first) and _is_numeric(second)) or
+                (first.dtype.kind == "U" and second.dtype.kind == "U")):
+            return first, second
+    elif first_is_array:
+        scalar = _cast_scalar(second, first)
+        if scalar is not None:
+            return first, scalar
+    elif second_is_array:
+        scalar = _cast_scalar(first, second)
+        if scalar is not None:
+            return scalar, second
+    return None, None
+
+
+def _cast_scalar(value, values):
+    """Cast a scalar so that it compares with an array like the compiler.
+
+    Numbers, and text that can be read as a number, compare numerically
+    with numeric arrays and text compares as text with arrays of text.
+    Returns None for any other combination.
+
+    """
+
+    if _is_numeric(values):
+        result = value if is_number(value) else (
+            as_number(value) if isinstance(value, string_type) else None)
+    elif values.dtype.kind == "U" and isinstance(value, string_type):
+        result = value
+    else:
+        result = None
+    return result
+
+
+def _apply(test, *operands):
+    """Apply a python test to each element of the operands.
+
+    Masked elements do not match.
+
+    """
+
+    with np.errstate(invalid="ignore"):
+        result = np.frompyfunc(test, len(operands), 1)(*[
+            np.ma.getdata(operand) if isinstance(operand, np.ndarray) else
+            operand for operand in operands
+        ])
+    result = np.asarray(result, dtype=bool)
+    for operand in operands:
+        if np.ma.isMaskedArray(operand):
+            result = result & ~np.ma.getmaskarray(operand)
+    return result
+
+
+def _lower(values):
+    if isinstance(values, string_type):
+        result = values.lower()
+    elif isinstance(values, np.ndarray) and values.dtype.kind in "US":
+        result = np.char.lower(values)
+    elif isinstance(values, np.ndarray) and values.dtype == object:
+        result = np.frompyfunc(
+            lambda item: (
+                item.lower() if isinstance(item, string_type) else item),
+            1, 1
+        )(values)
+    else:
+        result = values
+    return result
+
+
+def _null_mask(values, size, nan_is_null=True):
+    if not isinstance(values, np.ndarray):
+        result = np.full(size, values is None, dtype=bool)
+    else:
+        if values.dtype == object:
+            result = np.equal(values, None)
+        elif values.dtype.kind in "fc" and nan_is_null:
+            result = np.isnan(values)
+        else:
+            result = np.zeros(size, dtype=bool)
+        if np.ma.isMaskedArray(values):
+            result = np.ma.getdata(result) | np.ma.getmaskarray(values)
+    return np.asarray(result, dtype=bool)
+
+
+def _get_intervals(values):
+    """Return the begins, ends and validity of time values.
+
+    Begins and ends are in nanoseconds since the Unix epoch. They are
+    arrays for arrays of times and scalars for a single time.
+
+    """
+
+    if not isinstance(values, np.ndarray):
+        period = get_period(values)
+        if period is None:
+            return 0, 0, False
+        return period.begin, period.end, True
+    data = np.ma.getdata(values)
+    if data.dtype.kind == "M":
+        valid = ~np.isnat(data)
+        data = data.astype("datetime64[ns]").view(np.int64)
+    elif data.dtype.kind in "iu":
+        valid = np.ones(data.shape, dtype=bool)
+        data = data.astype(np.int64)
+    else:
+        items = ([tuple(row) for row in data] if data.ndim == 2 else
+                 data.tolist())
+        periods = [get_period(item) for item in items]
+        valid = np.array([period is not None for period in periods],
+                         dtype=bool)
+        data = np.array([(period.begin, period.end) if period is not None
+                         else (0, 0) for period in periods],
+                        dtype=np.int64).reshape(len(periods), 2)
+    if data.ndim == 2:
+        begins, ends = data[:, 0], data[:, 1]
+        if valid.ndim == 2:
+            valid = valid.all(axis=1)
+    else:
+        begins = ends = data
+    if np.ma.isMaskedArray(values):
+        mask = np.ma.getmaskarray(values)
+        valid = valid & ~(mask.any(axis=1) if mask.ndim == 2 else mask)
+    return begins, ends, valid
+
+
+def _fill_masked(values):
+    if np.ma.isMaskedArray(values):
+        values = values.filled(False)
+    return values
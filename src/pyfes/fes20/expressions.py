@@ -1,16 +1,22 @@
 """Expression types for FES version 2.0"""
 
-from itertools import product
+try:
+    from sys import intern
+except ImportError:  # python 2 has intern as a builtin
+    pass
 
 from .. import errors
+from ..utils import Freezable
 from ..utils import ReadOnlyList
 
 
-class Expression(object):
+class Expression(Freezable):
     """Base class for FES v2.0 expression types"""
 
+    __slots__ = ("validators",)
+
     def __init__(self, validators=None):
-        self.validators = list(validators) if validators is not None else []
+        self.validators = tuple(validators) if validators is not None else ()
 
 
 class Literal(Expression):
@@ -25,8 +31,7 @@ class Literal(Expression):
 
     """
 
-    _value = None
-    _type = None
+    __slots__ = ("_value",)
 
     @property
     def value(self):
@@ -37,22 +42,29 @@ class Literal(Expression):
         for validator in self.validators:
                 validator(new_value)
         self._value = new_value
-        self._type = type(new_value)
 
     @property
     def type_(self):
-        return self._type
+        return type(self._value)
 
     def __init__(self, value, validators=None):
         super(Literal, self).__init__(validators=validators)
         self.value = value
 
+    @classmethod
+    def trusted(cls, value):
+        """Create a literal without running any validators"""
+        return cls.from_slots(_value=value, validators=())
+
     def __eq__(self, other):
         if isinstance(other, Literal):
             return self.value == other.value
         else:
             return NotImplemented
 
+    def __hash__(self):
+        return hash((Literal, self._value))
+
     def __str__(self):
         return "{0.__class__.__name__} <{0.value}, {0.type_}>".format(self)
 
@@ -62,7 +74,14 @@ class Literal(Expression):
 
 
 class ValueReference(Expression):
-    _value = ""
+    """FES ValueReference type.
+
+    Filters tend to reference the same few properties over and over, so
+    the names of value references are interned.
+
+    """
+
+    __slots__ = ("_value",)
 
     @property
     def value(self):
@@ -73,18 +92,29 @@ class ValueReference(Expression):
         value_str = str(new_value)
         for validator in self.validators:
             validator(value_str)
-        self._value = value_str
+        self._value = intern(value_str)
 
     def __init__(self, value, validators=None):
         super(ValueReference, self).__init__(validators=validators)
         self.value = value
 
+    @classmethod
+    def trusted(cls, value):
+        """Create a value reference without running any validators"""
+        return cls.from_slots(_value=intern(str(value)), validators=())
+
     def __eq__(self, other):
         if isinstance(other, ValueReference):
             return self.value == other.value
         else:
             return NotImplemented
 
+    def __hash__(self):
+        return hash((ValueReference, self._value))
+
+    def __repr__(self):
+        return "{0.__class__.__name__}(value={0.value!r})".format(self)
+
 
 class Function(Expression):
     """FES Function type.
@@ -100,8 +130,7 @@ class Function(Expression):
 
     """
 
-    _name = ""
-    _arguments = ReadOnlyList()
+    __slots__ = ("_name", "_arguments")
 
     @property
     def name(self):
@@ -120,19 +149,25 @@ class Function(Expression):
     @arguments.setter
     def arguments(self, new_arguments):
         self._arguments = ReadOnlyList()
-        if len(self.validators) > 0:
-            for argument, validator in product(new_arguments, self.validators):
+        for argument in new_arguments:
+            for validator in self.validators:
                 validator(argument)
-                self.add_argument(argument)
-        else:
-            for argument in new_arguments:
-                self.add_argument(argument)
+            self.add_argument(argument)
 
     def __init__(self, name, arguments=None, validators=None):
         super(Function, self).__init__(validators=validators)
         self.name = name
         self.arguments = list(arguments) if arguments is not None else []
 
+    @classmethod
+    def trusted(cls, name, arguments=None):
+        """Create a function without running any validators"""
+        return cls.from_slots(
+            _name=name,
+            _arguments=ReadOnlyList(arguments),
+            validators=()
+        )
+
     def __eq__(self, other):
         if isinstance(other, Function):
             return (self.name == other.name and
@@ -142,10 +177,24 @@ class Function(Expression):
         else:
             return NotImplemented
 
+    def __hash__(self):
+        return hash((Function, self._name, tuple(self._arguments)))
+
+    def __repr__(self):
+        return ("{0.__class__.__name__}(name={0.name!r}, "
+                "arguments={0.arguments!r})".format(self))
+
     def add_argument(self, argument):
+        self._check_not_frozen()
         if not isinstance(argument, Expression):
             raise errors.InvalidExpressionError
         self._arguments._data.append(argument)
 
     def remove_argument(self, argument):
+        self._check_not_frozen()
         self._arguments._data.remove(argument)
+
+    def _check_not_frozen(self):
+        if self.frozen:
+            raise errors.ImmutableObjectError(
+                "Cannot change the arguments of a frozen function")
@@ -0,0 +1,135 @@
+"""Evaluation of FES v2.0 filters over indexed feature collections.
+
+``FeatureIndex`` walks the logic operators of a filter and narrows down a
+set of candidate features as it goes. Subclasses answer the operators that
+their index supports by querying it, while every other operator is
+evaluated with the predicates of ``compilers.PredicateCompiler``, but only
+on the features that are still candidates at that point of the filter.
+
+"""
+
+import logging
+
+from . import compilers
+from . import operators
+from .canonical import flatten_logic_operands
+
+logger = logging.getLogger(__name__)
+
+
+class FeatureIndex(object):
+    """Base class for indexes that evaluate filters over features.
+
+    Parameters
+    ----------
+    features: iterable
+        The features to index. Features are mappings, just like the ones
+        that are accepted by the predicates of ``compilers.compile_filter``
+    kwargs:
+        Passed to ``compilers.PredicateCompiler``
+
+    """
+
+    _OPERATOR_SELECTOR_HANDLERS = {
+        operators.BinaryLogicOperator: "select_binary_logic_operator",
+        operators.UnaryLogicOperator: "select_unary_logic_operator",
+    }
+
+    def __init__(self, features, **kwargs):
+        self.features = list(features)
+        self.compiler = compilers.PredicateCompiler(**kwargs)
+
+    def __len__(self):
+        return len(self.features)
+
+    def filter(self, operator):
+        """Return the features that match the input filter.
+
+        Parameters
+        ----------
+        operator: operators.NonIdOperator or tuple of operators.ResourceId
+            The filter to evaluate, as returned by ``parsers.parse_filter``
+
+        Returns
+        -------
+        list
+            The matching features, in their original order
+
+        """
+
+        return [self.features[position] for position in self.select(operator)]
+
+    def select(self, operator):
+        """Return the sorted positions of the features that match a filter"""
+        return sorted(self.select_candidates(operator, None))
+
+    def select_candidates(self, operator, candidates):
+        """Return the candidate positions that match the input operator.
+
+        Parameters
+        ----------
+        operator: operators.NonIdOperator or tuple of operators.ResourceId
+            The operator to evaluate
+        candidates: set or None
+            Positions of the features that are still being considered. None
+            means all of the features
+
+        Returns
+        -------
+        set
+            The positions of the matching features
+
+        """
+
+        handler = self._get_handler(operator)
+        if handler is None:
+            result = self.scan(operator, candidates)
+        else:
+            result = handler(operator, candidates)
+        return result
+
+    def select_binary_logic_operator(self, operator, candidates):
+        operands = flatten_logic_operands(operator, operator.operator_type)
+        if operator.operator_type == operators.BinaryLogicType.AND:
+            # operands that can use the index go first, since they are the
+            # cheapest way to narrow down the candidates
+            operands.sort(key=lambda operand: not self._uses_index(operand))
+            result = candidates
+            for operand in operands:
+                result = self.select_candidates(operand, result)
+                if len(result) == 0:
+                    break
+        else:
+            result = set()
+            for operand in operands:
+                result |= self.select_candidates(operand, candidates)
+        return result
+
+    def select_unary_logic_operator(self, operator, candidates):
+        selected = self.select_candidates(operator.expression, candidates)
+        return self._all_if_none(candidates) - selected
+
+    def scan(self, operator, candidates):
+        """Evaluate an operator on each candidate, without the index"""
+        predicate = self.compiler.compile(operator)
+        features = self.features
+        return set(position for position in self._all_if_none(candidates) if
+                   predicate(features[position]))
+
+    def _uses_index(self, operator):
+        """Whether an operator is answered by querying the index"""
+        return False
+
+    def _all_if_none(self, candidates):
+        if candidates is None:
+            result = set(range(len(self.features)))
+        else:
+            result = candidates
+        return result
+
+    def _get_handler(self, operator):
+        for type_ in type(operator).__mro__:
+            handler_name = self._OPERATOR_SELECTOR_HANDLERS.get(type_)
+            if handler_name is not None:
+                return getattr(self, handler_name)
+        return None
@@ -4,57 +4,285 @@ from lxml import etree
 
 from . import expressions
 from . import operators
+from . import schemaparsers
 from . namespaces import NAMESPACES
 from .. import errors
+from .. import geometries
+from .. import instrumentation
+from .. import temporal
 from ..utils import XML_PARSER
+from ..utils import lazy_load
+from ..utils import string_type
 from ..geometries import parse_gml
 
 logger = logging.getLogger(__name__)
 
+_LOGIC_OPERAND_TYPES = operators.BinaryLogicOperator._allowed_operand_types
+_SPATIAL_OPERAND_TYPES = (expressions.Expression, geometries.Geometry)
+_TEMPORAL_OPERAND_TYPES = (expressions.Expression, temporal.TimePeriod)
+# fes:Distance elements are built as (value, uom) tuples
+_DISTANCE_OPERAND_TYPES = _SPATIAL_OPERAND_TYPES + (tuple,)
+_TYPED_LITERALS = frozenset([
+    "xs:int", "xs:long", "xs:integer", "xs:float", "xs:boolean"])
+
 
 class BaseFilterParser(object):
     PARSER_TYPE = "FILTER_PARSER"
+    FORMAT = None
+    """The input format that the parser accepts, either xml or text"""
+
+    NAMESPACE = None
+    """The XML namespace of the filters that the parser accepts, if any"""
+
+    def parse_filter(self, data):
+        raise NotImplementedError
 
 
 class FesFilterParser(BaseFilterParser):
     """Parses XML elements encoded following the rules described in OGC FES.
 
+    Each element of the filter is turned into an operator or expression by
+    a builder method that receives the element itself, for its attributes
+    and text, the already built nodes of its child elements and the
+    operator type that corresponds to the element's name, if any. The same
+    builders are used both when parsing a whole document and when
+    streaming it with ``parse_filter_stream``.
+
+    Builders are looked up by qualified element name in an index that is
+    computed once per class. Additional operators can be plugged in with
+    ``register_operator``.
+
     Parameters
     ----------
     etree_parser: lxml.etree.XMLParser, optional
         A parser for XML data.
+    validate: bool, optional
+        Whether ``parse_filter`` should validate the parsed document
+        against the FES schema before building the filter. The schema is
+        compiled once per process, the first time that it is needed.
+    schema_parser: pyfes.fes20.schemaparsers.SchemaParser, optional
+        The schema parser used for validation. Defaults to the one shared
+        by the whole process.
 
     """
 
     VERSION = "2.0.2"
+    FORMAT = "xml"
+    NAMESPACE = NAMESPACES["fes"]
+    STREAM_CHUNK_SIZE = 64 * 1024
 
     _OPERATOR_PARSER_HANDLERS = {
-        operators.BinaryComparisonName: "parse_binary_comparison_operator",
-        operators.BinaryLogicType: "parse_binary_logic_operator",
-        operators.DistanceOperatorName: "parse_distance_operator",
-        operators.SpatialOperatorName: "parse_binary_spatial_operator",
-        operators.UnaryLogicType: "parse_unary_logic_operator",
-        operators.TemporalOperatorName: "parse_temporal_operator",
+        operators.BinaryComparisonName: "build_binary_comparison_operator",
+        operators.BinaryLogicType: "build_binary_logic_operator",
+        operators.DistanceOperatorName: "build_distance_operator",
+        operators.SpatialOperatorName: "build_binary_spatial_operator",
+        operators.UnaryLogicType: "build_unary_logic_operator",
+        operators.TemporalOperatorName: "build_temporal_operator",
+    }
+
+    _ELEMENT_PARSER_HANDLERS = {
+        "PropertyIsLike": "build_like_operator",
+        "PropertyIsBetween": "build_between_comparison_operator",
+        "PropertyIsNull": "build_null_operator",
+        "PropertyIsNil": "build_nil_operator",
+        "ResourceId": "build_resource_id",
+        "ValueReference": "build_value_reference_expression",
+        "Literal": "build_literal_expression",
+        "Function": "build_function_expression",
+        "LowerBoundary": "build_boundary",
+        "UpperBoundary": "build_boundary",
+        "Distance": "build_distance",
     }
 
-    def __init__(self, etree_parser=None):
+    _EXPRESSION_ELEMENTS = ("ValueReference", "Literal", "Function")
+
+    _FES_PREFIX = "{{{}}}".format(NAMESPACES["fes"])
+    _FILTER_TAG = _FES_PREFIX + "Filter"
+
+    _handler_index = None
+
+    def __init__(self, etree_parser=None, validate=False,
+                 schema_parser=None):
         self.etree_parser = etree_parser or XML_PARSER
+        self.validate = validate
+        self.schema_parser = schema_parser or schemaparsers.schema_parser
+
+    @classmethod
+    def register_operator(cls, qualified_name, handler, operator_type=None):
+        """Register a builder for an additional operator or expression.
+
+        Parameters
+        ----------
+        qualified_name: str or lxml.etree.QName
+            Qualified name of the XML element, in ``{namespace}name`` form
+        handler: str or callable
+            Name of a builder method of the parser, or a function accepting
+            the parser, the element, the list of its built children and
+            the operator type
+        operator_type: enum.Enum, optional
+            Passed to the handler as its operator type
+
+        Examples
+        --------
+
+        >>> class CustomParser(FesFilterParser):
+        ...     pass
+        >>> CustomParser.register_operator(
+        ...     "{http://www.opengis.net/fes/2.0}PropertyIsFuzzy",
+        ...     lambda parser, element, children, operator_type: children[0]
+        ... )
+
+        """
+
+        if "_registered_handlers" not in cls.__dict__:
+            cls._registered_handlers = {}
+        cls._registered_handlers[str(qualified_name)] = (
+            operator_type, handler)
+        pending = [cls]
+        while len(pending) > 0:
+            current = pending.pop()
+            current._handler_index = None
+            pending.extend(current.__subclasses__())
+
+    @classmethod
+    def get_handler_index(cls):
+        """Return the index of builders for each known element.
+
+        The index maps qualified element names to tuples with the operator
+        type and the builder function. It is computed once per class.
+
+        """
+
+        index = cls.__dict__.get("_handler_index")
+        if index is None:
+            index = {}
+            for enum_class, name in cls._OPERATOR_PARSER_HANDLERS.items():
+                builder = getattr(cls, name)
+                for member in enum_class:
+                    index[cls._FES_PREFIX + member.value] = (member, builder)
+            for localname, name in cls._ELEMENT_PARSER_HANDLERS.items():
+                index[cls._FES_PREFIX + localname] = (
+                    None, getattr(cls, name))
+            for class_ in reversed(cls.__mro__):
+                registered = class_.__dict__.get("_registered_handlers", {})
+                for qname, (operator_type, handler) in registered.items():
+                    if not callable(handler):
+                        handler = getattr(cls, handler)
+                    index[qname] = (operator_type, handler)
+            cls._handler_index = index
+        return index
 
     def parse_filter(self, data):
         """Parse the input filter.
 
         Parameters
         ----------
-        data: str
+        data: str or bytes
             The fes:Filter string to parse
 
+        Raises
+        ------
+        pyfes.errors.ValidationError
+            If validation is enabled and the filter is not valid
+
         """
-        data_element = etree.fromstring(data, parser=self.etree_parser)
-        qualified_name = etree.QName(data_element)
-        if not qualified_name == etree.QName(NAMESPACES["fes"], "Filter"):
+        with instrumentation.timer("fes.tokenize"):
+            data_element = etree.fromstring(data, parser=self.etree_parser)
+        if data_element.tag != self._FILTER_TAG:
+            raise RuntimeError("Invalid filter element")
+        if self.validate:
+            self.schema_parser.validate_xml(data_element)
+        with instrumentation.timer("fes.build"):
+            result = self.build_filter(data_element,
+                                       self._parse_children(data_element))
+        if instrumentation.is_enabled():
+            instrumentation.increment(
+                "fes.elements",
+                sum(1 for _ in data_element.iter(etree.Element)))
+        return result
+
+    def parse_filter_stream(self, source, chunk_size=None):
+        """Parse the input filter incrementally.
+
+        Operators are built as soon as their XML elements are closed and
+        the consumed elements are discarded right away. Peak memory usage
+        thus depends on the depth of the filter rather than on its size,
+        which is useful for large, machine generated filters.
+
+        Parameters
+        ----------
+        source: str, bytes, file-like object or iterable of bytes
+            The fes:Filter to parse. File-like objects are read in chunks
+        chunk_size: int, optional
+            Size of the chunks read from file-like objects
+
+        """
+
+        pull_parser = etree.XMLPullParser(
+            events=("start", "end"), resolve_entities=False)
+        built_children = [[]]
+        result = None
+        elements = 0
+        with instrumentation.timer("fes.stream"):
+            for chunk in _iter_chunks(source, chunk_size or
+                                      self.STREAM_CHUNK_SIZE):
+                pull_parser.feed(chunk)
+                for event, element in pull_parser.read_events():
+                    if event == "start":
+                        built_children.append([])
+                        elements += 1
+                    else:
+                        result = self._build_streamed_element(
+                            element, built_children)
+            pull_parser.close()
+        instrumentation.increment("fes.elements", elements)
+        if result is None:
             raise RuntimeError("Invalid filter element")
-        filter_predicate = data_element[0]
-        return self._parse_predicate(filter_predicate)
+        return result
+
+    def _build_streamed_element(self, element, built_children):
+        children = built_children.pop()
+        parent = element.getparent()
+        index = self.get_handler_index()
+        if parent is None:
+            if element.tag != self._FILTER_TAG:
+                raise RuntimeError("Invalid filter element")
+            result = self.build_filter(element, children)
+        elif element.tag in index or element.tag.startswith(
+                self._FES_PREFIX):
+            result = self._build_node(element, children)
+        elif parent.tag in index or parent.getparent() is None:
+            # the root of an embedded GML geometry or temporal object
+            result = _parse_gml_object(element)
+        else:
+            # nested GML elements are parsed together with their root
+            return None
+        built_children[-1].append(result)
+        element.clear()
+        while element.getprevious() is not None:
+            del parent[0]
+        return result
+
+    def _parse_node(self, element):
+        tag = element.tag
+        if tag in self.get_handler_index() or tag.startswith(
+                self._FES_PREFIX):
+            result = self._build_node(element, self._parse_children(element))
+        else:
+            result = _parse_gml_object(element)
+        return result
+
+    def _parse_children(self, element):
+        return [self._parse_node(child) for child in
+                element.iterchildren(tag=etree.Element)]
+
+    def _build_node(self, element, children):
+        try:
+            operator_type, builder = self.get_handler_index()[element.tag]
+        except KeyError:
+            raise RuntimeError(
+                "Unrecognized operator: {!r}".format(element.tag))
+        return builder(self, element, children, operator_type)
 
     def _parse_predicate(self, filter_predicate):
         """Parse the input data string.
@@ -65,50 +293,177 @@ class FesFilterParser(BaseFilterParser):
 
         """
 
-        predicate_qname = etree.QName(filter_predicate)
-        if predicate_qname.namespace != NAMESPACES["fes"]:
+        if not filter_predicate.tag.startswith(self._FES_PREFIX):
             raise RuntimeError("Invalid operator element")
-        predicate_name = predicate_qname.localname
-        operator_type = self._get_operator_type(predicate_name)
-        handler = getattr(self, self._OPERATOR_PARSER_HANDLERS[operator_type])
-        return handler(filter_predicate)
+        return self._parse_node(filter_predicate)
+
+    def build_filter(self, filter_element, children):
+        """Build the result of a fes:Filter element.
+
+        A filter holds either a single predicate or one or more resource
+        identifiers. The latter are returned as a tuple.
+
+        """
+
+        if len(children) == 0:
+            raise RuntimeError("Empty filter element")
+        if all(isinstance(child, operators.ResourceId) for
+               child in children):
+            result = tuple(children)
+        elif len(children) == 1:
+            result = children[0]
+        else:
+            raise RuntimeError("A filter may only hold a single predicate")
+        return result
 
     def parse_binary_comparison_operator(self, operator_element):
-        return operators.BinaryComparisonOperator(
-            operator_type=operators.BinaryComparisonName(
-                etree.QName(operator_element).localname),
-            first_expression=self.parse_expression(operator_element[0]),
-            second_expression=self.parse_expression(operator_element[1]),
-            match_case=operator_element.get("matchCase", True),
-            match_action=operators.MatchAction(
-                operator_element.get("matchAction", operators.MatchAction.ANY)
-            )
+        return self._parse_predicate(operator_element)
+
+    def build_binary_comparison_operator(self, operator_element, children,
+                                         operator_type):
+        _check_operands(operator_element, children, 2)
+        try:
+            match_action = operators.MatchAction(
+                operator_element.get("matchAction", "Any"))
+        except ValueError:
+            raise ValueError("Invalid match_action")
+        return operators.BinaryComparisonOperator.trusted(
+            operator_type=operator_type,
+            first_expression=children[0],
+            second_expression=children[1],
+            match_case=_parse_boolean(operator_element.get("matchCase"),
+                                      default=True),
+            match_action=match_action
+        )
+
+    def build_like_operator(self, operator_element, children,
+                            operator_type):
+        _check_operands(operator_element, children, 2)
+        return operators.LikeOperator.trusted(
+            first_expression=children[0],
+            second_expression=children[1],
+            wild_card=operator_element.get("wildCard", ""),
+            single_char=operator_element.get("singleChar", ""),
+            escape_char=operator_element.get("escapeChar", ""),
+        )
+
+    def build_between_comparison_operator(self, operator_element, children,
+                                          operator_type):
+        _check_operands(operator_element, children, 3)
+        return operators.BetweenComparisonOperator.trusted(
+            expression=children[0],
+            lower_boundary=children[1],
+            upper_boundary=children[2],
+        )
+
+    def build_boundary(self, boundary_element, children, operator_type):
+        _check_operands(boundary_element, children, 1)
+        return children[0]
+
+    def build_null_operator(self, operator_element, children,
+                            operator_type):
+        _check_operands(operator_element, children, 1)
+        return operators.NullOperator.trusted(expression=children[0])
+
+    def build_nil_operator(self, operator_element, children, operator_type):
+        _check_operands(operator_element, children, 1)
+        return operators.NilOperator.trusted(
+            expression=children[0],
+            nil_reason=operator_element.get("nilReason", "")
         )
 
     def parse_distance_operator(self, operator_element):
-        raise NotImplementedError
+        return self._parse_predicate(operator_element)
+
+    def build_distance_operator(self, operator_element, children,
+                                operator_type):
+        _check_operands(operator_element, children, 3,
+                        allowed_types=_DISTANCE_OPERAND_TYPES)
+        distance, uom = children[2]
+        return operators.DistanceOperator(
+            operator_type=operator_type,
+            expression=children[0],
+            geometry=children[1],
+            distance=distance,
+            uom=uom,
+        )
+
+    def build_distance(self, distance_element, children, operator_type):
+        """Build the distance of a distance operator.
+
+        Returns a ``(value, uom)`` tuple, as the unit of measure that FES
+        requires on fes:Distance is needed to interpret the value.
+
+        """
+
+        uom = (distance_element.get("uom") or "").strip()
+        if uom == "":
+            raise errors.InvalidOperatorError(
+                "Distance elements need a unit of measure")
+        try:
+            value = float(distance_element.text)
+        except (TypeError, ValueError):
+            raise errors.InvalidOperatorError(
+                "Invalid distance: {!r}".format(distance_element.text))
+        return value, uom
 
     def parse_binary_spatial_operator(self, operator_element):
+        return self._parse_predicate(operator_element)
+
+    def build_binary_spatial_operator(self, operator_element, children,
+                                      operator_type):
+        _check_operands(operator_element, children, 2,
+                        allowed_types=_SPATIAL_OPERAND_TYPES)
         return operators.BinarySpatialOperator(
-            operator_type=operators.SpatialOperatorName(
-                etree.QName(operator_element).localname),
-            first_operand=self.parse_expression(operator_element[0]),
-            second_operand=self.parse_spatial_description(operator_element[1])
+            operator_type=operator_type,
+            first_operand=children[0],
+            second_operand=children[1]
+        )
+
+    def build_temporal_operator(self, operator_element, children,
+                                operator_type):
+        _check_operands(operator_element, children, 2,
+                        allowed_types=_TEMPORAL_OPERAND_TYPES)
+        return operators.TemporalOperator(
+            operator_type=operator_type,
+            first_operand=children[0],
+            second_operand=children[1]
         )
 
     def parse_binary_logic_operator(self, operator_element):
-        raise NotImplementedError
+        return self._parse_predicate(operator_element)
+
+    def build_binary_logic_operator(self, operator_element, children,
+                                    operator_type):
+        """Build a logic operator out of its operands.
+
+        FES allows ``fes:And`` and ``fes:Or`` to have more than two
+        operands. These are folded into nested binary operators.
+
+        """
+
+        if len(children) < 2:
+            raise errors.InvalidOperatorError(
+                "Binary logic operators need at least two operands")
+        _check_operands(operator_element, children, len(children),
+                        allowed_types=_LOGIC_OPERAND_TYPES)
+        result = children[0]
+        for operand in children[1:]:
+            result = operators.BinaryLogicOperator.trusted(
+                operator_type=operator_type,
+                first_expression=result,
+                second_expression=operand
+            )
+        return result
 
     def parse_expression(self, expression_element):
-        qname = etree.QName(expression_element)
-        if qname.namespace != NAMESPACES["fes"]:
+        tag = expression_element.tag
+        if not tag.startswith(self._FES_PREFIX):
             raise errors.ValidationError("Invalid expression namespace")
-        parser = {
-            "ValueReference": self.parse_value_reference_expression,
-            "Literal": self.parse_literal_expression,
-            "Function": self.parse_function_expression,
-        }[qname.localname]
-        return parser(expression_element)
+        if tag[len(self._FES_PREFIX):] not in self._EXPRESSION_ELEMENTS:
+            raise errors.ValidationError(
+                "Invalid expression: {!r}".format(tag))
+        return self._parse_node(expression_element)
 
     def parse_spatial_description(self, element):
         """Parse a spatial description element.
@@ -119,51 +474,196 @@ class FesFilterParser(BaseFilterParser):
         * A geometry type described using GML (any version).
 
         """
-        try:
-            result = self.parse_expression(element)
-        except (KeyError, errors.ValidationError):
-            result = parse_gml(element)
-        return result
+        return self._parse_node(element)
 
     def parse_value_reference_expression(self, value_reference_element):
-        return expressions.ValueReference(value=value_reference_element.text)
+        return self.parse_expression(value_reference_element)
+
+    def build_value_reference_expression(self, value_reference_element,
+                                         children, operator_type):
+        return expressions.ValueReference.trusted(
+            value=value_reference_element.text)
 
-    # TODO - Add type casts for primitive types, datetimes and GML geometries
     def parse_literal_expression(self, literal_element):
+        return self.parse_expression(literal_element)
+
+    # TODO - Add type casts for datetimes and GML geometries
+    def build_literal_expression(self, literal_element, children,
+                                 operator_type):
         declared_type = literal_element.get("type")
-        if declared_type == "xs:int":
-            value = int(literal_element.text)
-        elif declared_type == "xs:float":
-            value = float(literal_element.text)
-        else:
-            value = literal_element.text
-        return expressions.Literal(
-            value=value
-        )
+        text = literal_element.text
+        if declared_type in _TYPED_LITERALS and (text or "").strip() == "":
+            raise errors.InvalidExpressionError(
+                "Empty {} literal".format(declared_type))
+        try:
+            if declared_type in ("xs:int", "xs:long", "xs:integer"):
+                value = int(text)
+            elif declared_type == "xs:float":
+                value = float(text)
+            elif declared_type == "xs:boolean":
+                value = _parse_boolean(text, default=False)
+            else:
+                value = text
+        except ValueError:
+            raise errors.InvalidExpressionError(
+                "Invalid {} literal: {!r}".format(declared_type, text))
+        return expressions.Literal.trusted(value=value)
 
     def parse_function_expression(self, function_element):
-        return expressions.Function(
-            name=function_element.text
+        return self.parse_expression(function_element)
+
+    def build_function_expression(self, function_element, children,
+                                  operator_type):
+        _check_operands(function_element, children, len(children))
+        return expressions.Function.trusted(
+            name=function_element.get("name"),
+            arguments=children
         )
 
     def parse_unary_logic_operator(self, operator_element):
-        return operators.UnaryLogicOperator(
-            operator_type=operators.UnaryLogicType(
-                etree.QName(operator_element).localname),
-            operand=self._parse_predicate(operator_element[0])
+        return self._parse_predicate(operator_element)
+
+    def build_unary_logic_operator(self, operator_element, children,
+                                   operator_type):
+        _check_operands(operator_element, children, 1,
+                        allowed_types=_LOGIC_OPERAND_TYPES)
+        return operators.UnaryLogicOperator.trusted(
+            operator_type=operator_type,
+            operand=children[0]
         )
 
-    def _get_operator_type(self, name):
-        for type_ in self._OPERATOR_PARSER_HANDLERS.keys():
-            if name in (item.value for item in type_):
-                result = type_
-                break
-        else:
-            raise RuntimeError(
-                "Unrecognized operator: {!r}".format(name))
-        return result
+    def build_resource_id(self, resource_id_element, children,
+                          operator_type):
+        return operators.ResourceId(
+            rid=resource_id_element.get("rid"),
+            previous_rid=resource_id_element.get("previousRid", ""),
+            version=resource_id_element.get("version"),
+            start_time=resource_id_element.get("startDate"),
+            end_time=resource_id_element.get("endDate"),
+        )
 
 
 class OgcCqlParser(BaseFilterParser):
-    """Parses OGC CQL expressions."""
+    """Parses OGC CQL2 text and ECQL expressions.
+
+    Parsing is done by a ``cqlparsers.CqlParser``, which builds the same
+    operators as ``FesFilterParser`` does for the equivalent XML filter.
+
+    Parameters
+    ----------
+    srs: str, optional
+        The SRS of geometry literals
+
+    """
+
     VERSION = "0.0.1"
+    FORMAT = "text"
+
+    def __init__(self, srs=None):
+        parser_class = lazy_load(".fes20.cqlparsers.CqlParser")
+        self.cql_parser = parser_class(srs=srs)
+
+    def parse_filter(self, data):
+        """Parse the input filter.
+
+        Parameters
+        ----------
+        data: str or bytes
+            The CQL filter to parse
+
+        """
+
+        if isinstance(data, bytes):
+            data = data.decode("utf-8")
+        return self.cql_parser.parse(data.lstrip(u"\ufeff"))
+
+
+class Cql2JsonFilterParser(BaseFilterParser):
+    """Parses OGC CQL2-JSON filters.
+
+    Parsing is done by a ``cql2json.Cql2JsonParser``, which builds the same
+    operators as ``FesFilterParser`` does for the equivalent XML filter.
+
+    Parameters
+    ----------
+    srs: str, optional
+        The SRS of geometry literals
+
+    """
+
+    VERSION = "0.0.1"
+    FORMAT = "json"
+
+    def __init__(self, srs=None):
+        parser_class = lazy_load(".fes20.cql2json.Cql2JsonParser")
+        self.json_parser = parser_class(srs=srs)
+
+    def parse_filter(self, data):
+        """Parse the input filter.
+
+        Parameters
+        ----------
+        data: str, bytes or dict
+            The CQL2-JSON filter to parse
+
+        """
+
+        if isinstance(data, bytes):
+            data = data.decode("utf-8")
+        if isinstance(data, string_type):
+            data = data.lstrip(u"\ufeff")
+        return self.json_parser.parse(data)
+
+
+def _check_operands(element, operands, count,
+                    allowed_types=(expressions.Expression,)):
+    """Validate the operands of an element before building it.
+
+    Builders create their nodes through the ``trusted`` constructors, which
+    skip validation, so this is where malformed input gets rejected.
+
+    """
+
+    if len(operands) != count:
+        raise errors.InvalidOperatorError(
+            "{} expects {} operands, got {}".format(
+                etree.QName(element).localname, count, len(operands)))
+    for operand in operands:
+        operators.validate_operand(operand, allowed_types=allowed_types)
+
+
+def _parse_gml_object(element):
+    """Parse an embedded GML geometry or temporal object"""
+    if etree.QName(element).localname in temporal.GML_TIME_ELEMENTS:
+        result = temporal.parse_gml_time(element)
+    else:
+        result = parse_gml(element)
+    return result
+
+
+def _parse_boolean(value, default):
+    if value is None:
+        result = default
+    else:
+        result = value.strip().lower() not in ("false", "0")
+    return result
+
+
+def _iter_chunks(source, chunk_size):
+    """Yield the input source as a sequence of byte chunks"""
+    if isinstance(source, string_type) and not isinstance(source, bytes):
+        source = source.encode("utf-8")
+    if isinstance(source, bytes):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+    elif hasattr(source, "read"):
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            if not isinstance(chunk, bytes):
+                chunk = chunk.encode("utf-8")
+            yield chunk
+    else:
+        for chunk in source:
+            yield chunk
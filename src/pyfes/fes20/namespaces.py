@@ -3,6 +3,7 @@ Namespaces used in the context of the FES standard.
 """
 
 NAMESPACES = {
+    "xs": "http://www.w3.org/2001/XMLSchema",
     "xsi": "http://www.w3.org/2001/XMLSchema-instance",
     "fes": "http://www.opengis.net/fes/2.0",
     "gml": "http://www.opengis.net/gml/3.2",
@@ -9,7 +9,10 @@ from enum import Enum
 from . import expressions
 from .. import geometries
 from .. import errors
+from .. import srs
 from .. import validators
+from ..utils import Freezable
+from ..utils import get_slot_names
 
 
 class MatchAction(Enum):
@@ -74,25 +77,83 @@ def validate_operand(operand, allowed_types=(expressions.Expression,)):
         raise errors.InvalidExpressionError
 
 
-class NonIdOperator(object):
-    _allowed_operand_types = (expressions.Expression,)
+def _get_operator_type(enum_class, type_):
+    if type_.__class__ is enum_class:
+        result = type_
+    else:
+        try:
+            result = enum_class(type_)
+        except ValueError:
+            raise errors.InvalidOperatorError
+    return result
 
-    # TODO - It would be nice to implement equality comparisons
-    pass
 
+def _walk_operator(operator):
+    """Yield the types and field values of an operator tree in pre-order.
 
-class SingleExpressionOperator(NonIdOperator):
-    _expression = None
+    The tree is walked iteratively, which allows comparing and hashing
+    deeply nested operators without hitting the recursion limit.
+
+    """
+
+    pending = [operator]
+    while len(pending) > 0:
+        current = pending.pop()
+        if isinstance(current, NonIdOperator):
+            yield type(current)
+            pending.extend(reversed(current._get_key()))
+        else:
+            yield current
 
-    def __init__(self, expression):
-        self.expression = expression
+
+class NonIdOperator(Freezable):
+    """Base class for FES v2.0 operators other than resource identifiers.
+
+    Operators use ``__slots__`` and can be frozen. Besides their regular
+    constructor, which validates its input, most operators also provide a
+    ``trusted`` classmethod that skips validation. It is meant for filter
+    parsers, which already guarantee the validity of what they build.
+
+    """
+
+    __slots__ = ()
+    _allowed_operand_types = (expressions.Expression,)
 
     def __eq__(self, other):
-        if isinstance(other, SingleExpressionOperator):
-            return self.expression == other.expression
+        if isinstance(other, NonIdOperator):
+            # nodes of the same type have the same number of fields, so the
+            # walks only differ in length after they have differed in value
+            return all(first == second for first, second in
+                       zip(_walk_operator(self), _walk_operator(other)))
         else:
             return NotImplemented
 
+    def __hash__(self):
+        return hash(tuple(_walk_operator(self)))
+
+    def __repr__(self):
+        return "{}({})".format(
+            self.__class__.__name__,
+            ", ".join("{}={!r}".format(name.lstrip("_"), value) for
+                      name, value in zip(self._get_field_names(),
+                                         self._get_key()))
+        )
+
+    def _get_field_names(self):
+        return tuple(name for name in get_slot_names(type(self)) if
+                     name != "_frozen")
+
+    def _get_key(self):
+        """Return the values that make up the identity of the operator"""
+        return tuple(getattr(self, name) for name in self._get_field_names())
+
+
+class SingleExpressionOperator(NonIdOperator):
+    __slots__ = ("_expression",)
+
+    def __init__(self, expression):
+        self.expression = expression
+
     @property
     def expression(self):
         return self._expression
@@ -104,20 +165,12 @@ class SingleExpressionOperator(NonIdOperator):
 
 
 class DoubleExpressionOperator(NonIdOperator):
-    _first_expression = None
-    _second_expression = None
+    __slots__ = ("_first_expression", "_second_expression")
 
     def __init__(self, first_expression, second_expression):
         self.first_expression = first_expression
         self.second_expression = second_expression
 
-    def __eq__(self, other):
-        if isinstance(other, DoubleExpressionOperator):
-            return (self.first_expression == other.first_expression and
-                    self.second_expression == other.second_expression)
-        else:
-            return NotImplemented
-
     @property
     def first_expression(self):
         return self._first_expression
@@ -138,9 +191,7 @@ class DoubleExpressionOperator(NonIdOperator):
 
 
 class BinaryComparisonOperator(DoubleExpressionOperator):
-    match_case = True
-    _operator_type = None
-    _match_action = MatchAction.ANY
+    __slots__ = ("_operator_type", "match_case", "_match_action")
 
     def __init__(self, operator_type, first_expression, second_expression,
                  match_case=True, match_action=MatchAction.ANY):
@@ -152,13 +203,16 @@ class BinaryComparisonOperator(DoubleExpressionOperator):
         self.match_case = match_case
         self.match_action = match_action
 
-    def __eq__(self, other):
-        if isinstance(other, BinaryComparisonOperator):
-            return (super(BinaryComparisonOperator, self).__eq__(other) and
-                    self.match_action == other.match_action and
-                    self.match_case == other.match_case)
-        else:
-            return NotImplemented
+    @classmethod
+    def trusted(cls, operator_type, first_expression, second_expression,
+                match_case=True, match_action=MatchAction.ANY):
+        return cls.from_slots(
+            _operator_type=operator_type,
+            _first_expression=first_expression,
+            _second_expression=second_expression,
+            match_case=match_case,
+            _match_action=match_action
+        )
 
     @property
     def operator_type(self):
@@ -166,10 +220,7 @@ class BinaryComparisonOperator(DoubleExpressionOperator):
 
     @operator_type.setter
     def operator_type(self, type_):
-        try:
-            self._operator_type = BinaryComparisonName(type_)
-        except ValueError:
-            raise errors.InvalidOperatorError
+        self._operator_type = _get_operator_type(BinaryComparisonName, type_)
 
     @property
     def match_action(self):
@@ -184,9 +235,7 @@ class BinaryComparisonOperator(DoubleExpressionOperator):
 
 
 class LikeOperator(DoubleExpressionOperator):
-    wild_card = ""
-    single_char = ""
-    escape_char = ""
+    __slots__ = ("wild_card", "single_char", "escape_char")
 
     def __init__(self, first_expression, second_expression,
                  wild_card="", single_char="", escape_char=""):
@@ -198,6 +247,17 @@ class LikeOperator(DoubleExpressionOperator):
         self.single_char = str(single_char)
         self.escape_char = str(escape_char)
 
+    @classmethod
+    def trusted(cls, first_expression, second_expression,
+                wild_card="", single_char="", escape_char=""):
+        return cls.from_slots(
+            _first_expression=first_expression,
+            _second_expression=second_expression,
+            wild_card=wild_card,
+            single_char=single_char,
+            escape_char=escape_char
+        )
+
 
 class BetweenComparisonOperator(SingleExpressionOperator):
     """
@@ -207,14 +267,21 @@ class BetweenComparisonOperator(SingleExpressionOperator):
 
     """
 
-    _lower_boundary = None
-    _upper_boundary = None
+    __slots__ = ("_lower_boundary", "_upper_boundary")
 
     def __init__(self, expression, lower_boundary, upper_boundary):
         super(BetweenComparisonOperator, self).__init__(expression=expression)
         self.lower_boundary = lower_boundary
         self.upper_boundary = upper_boundary
 
+    @classmethod
+    def trusted(cls, expression, lower_boundary, upper_boundary):
+        return cls.from_slots(
+            _expression=expression,
+            _lower_boundary=lower_boundary,
+            _upper_boundary=upper_boundary
+        )
+
     @property
     def lower_boundary(self):
         return self._lower_boundary
@@ -229,7 +296,7 @@ class BetweenComparisonOperator(SingleExpressionOperator):
         return self._upper_boundary
 
     @upper_boundary.setter
-    def lower_boundary(self, expression):
+    def upper_boundary(self, expression):
         validate_operand(expression, allowed_types=self._allowed_operand_types)
         self._upper_boundary = expression
 
@@ -241,9 +308,15 @@ class NullOperator(SingleExpressionOperator):
     whether the property exists in the real-world.
     """
 
+    __slots__ = ()
+
     def __init__(self, expression):
         super(NullOperator, self).__init__(expression=expression)
 
+    @classmethod
+    def trusted(cls, expression):
+        return cls.from_slots(_expression=expression)
+
 
 class NilOperator(SingleExpressionOperator):
     """
@@ -253,23 +326,34 @@ class NilOperator(SingleExpressionOperator):
     is "equals".
     """
 
-    nil_reason = ""
+    __slots__ = ("nil_reason",)
 
     def __init__(self, expression, nil_reason=""):
         super(NilOperator, self).__init__(expression=expression)
         self.nil_reason = nil_reason
 
+    @classmethod
+    def trusted(cls, expression, nil_reason=""):
+        return cls.from_slots(_expression=expression, nil_reason=nil_reason)
+
 
 class DistanceOperator(SingleExpressionOperator):
-    distance = 0.0
-    _geometry = None
-    _operator_type = None
+    """
+    The DWithin and Beyond operators test whether the specified property
+    lies within, or beyond, a distance of a geometry. The unit of measure
+    of the distance is given by ``uom``, such as ``m`` or ``km``. Distances
+    without a unit of measure are in the units of the SRS of the geometry.
+    """
 
-    def __init__(self, operator_type, expression, geometry, distance):
+    __slots__ = ("_operator_type", "_geometry", "distance", "uom")
+
+    def __init__(self, operator_type, expression, geometry, distance,
+                 uom=None):
         super(DistanceOperator, self).__init__(expression=expression)
         self.operator_type = operator_type
         self.geometry = geometry
         self.distance = float(distance)
+        self.uom = uom
 
     @property
     def operator_type(self):
@@ -277,10 +361,7 @@ class DistanceOperator(SingleExpressionOperator):
 
     @operator_type.setter
     def operator_type(self, type_):
-        try:
-            self._operator_type = DistanceOperatorName(type_)
-        except ValueError:
-            raise errors.InvalidOperatorError
+        self._operator_type = _get_operator_type(DistanceOperatorName, type_)
 
     @property
     def geometry(self):
@@ -288,13 +369,31 @@ class DistanceOperator(SingleExpressionOperator):
 
     @geometry.setter
     def geometry(self, new_geometry):
-        validators.validate_wkt(new_geometry)
+        if not isinstance(new_geometry, geometries.Geometry):
+            validators.validate_wkt(new_geometry)
         self._geometry = new_geometry
 
+    def get_srs_distance(self):
+        """Return the distance in the units of the SRS of the geometry.
+
+        WKT geometries, and geometries that have no SRS, are in
+        ``geometries.DEFAULT_SRS``.
+
+        Raises
+        ------
+        errors.PyFesError
+            If the distance cannot be converted, as described in
+            ``srs.convert_distance``
+
+        """
+
+        srs_name = (getattr(self._geometry, "srs", None) or
+                    geometries.DEFAULT_SRS)
+        return srs.convert_distance(self.distance, self.uom, srs_name)
+
 
 class BinarySpatialOperator(SingleExpressionOperator):
-    _second_operand = None
-    _operator_type = None
+    __slots__ = ("_operator_type", "_second_operand")
 
     def __init__(self, operator_type, first_operand, second_operand):
         super(BinarySpatialOperator, self).__init__(expression=first_operand)
@@ -307,10 +406,7 @@ class BinarySpatialOperator(SingleExpressionOperator):
 
     @operator_type.setter
     def operator_type(self, type_):
-        try:
-            self._operator_type = SpatialOperatorName(type_)
-        except ValueError:
-            raise errors.InvalidOperatorError
+        self._operator_type = _get_operator_type(SpatialOperatorName, type_)
 
     @property
     def second_operand(self):
@@ -318,7 +414,7 @@ class BinarySpatialOperator(SingleExpressionOperator):
 
     @second_operand.setter
     def second_operand(self, operand):
-        if isinstance(operand, expressions.Expression):
+        if isinstance(operand, (expressions.Expression, geometries.Geometry)):
             result = operand
         else:
             try:
@@ -330,8 +426,7 @@ class BinarySpatialOperator(SingleExpressionOperator):
 
 
 class TemporalOperator(SingleExpressionOperator):
-    _second_operand = None
-    _operator_type = None
+    __slots__ = ("_operator_type", "_second_operand")
 
     def __init__(self, operator_type, first_operand, second_operand):
         super(TemporalOperator, self).__init__(expression=first_operand)
@@ -344,10 +439,7 @@ class TemporalOperator(SingleExpressionOperator):
 
     @operator_type.setter
     def operator_type(self, type_):
-        try:
-            self._operator_type = TemporalOperatorName(type_)
-        except ValueError:
-            raise errors.InvalidOperatorError
+        self._operator_type = _get_operator_type(TemporalOperatorName, type_)
 
     @property
     def second_operand(self):
@@ -367,7 +459,7 @@ class TemporalOperator(SingleExpressionOperator):
 
 
 class BinaryLogicOperator(DoubleExpressionOperator):
-    _operator_type = None
+    __slots__ = ("_operator_type",)
     _allowed_operand_types = (expressions.Expression, NonIdOperator,)
 
     def __init__(self, operator_type, first_expression, second_expression):
@@ -377,53 +469,77 @@ class BinaryLogicOperator(DoubleExpressionOperator):
         )
         self.operator_type = operator_type
 
+    @classmethod
+    def trusted(cls, operator_type, first_expression, second_expression):
+        return cls.from_slots(
+            _operator_type=operator_type,
+            _first_expression=first_expression,
+            _second_expression=second_expression
+        )
+
     @property
     def operator_type(self):
         return self._operator_type
 
     @operator_type.setter
     def operator_type(self, type_):
-        try:
-            self._operator_type = BinaryLogicType(type_)
-        except ValueError:
-            raise errors.InvalidOperatorError
+        self._operator_type = _get_operator_type(BinaryLogicType, type_)
 
 
 class UnaryLogicOperator(SingleExpressionOperator):
-    _operator_type = None
+    __slots__ = ("_operator_type",)
     _allowed_operand_types = (expressions.Expression, NonIdOperator,)
 
     def __init__(self, operator_type, operand):
         super(UnaryLogicOperator, self).__init__(expression=operand)
         self.operator_type = operator_type
 
+    @classmethod
+    def trusted(cls, operator_type, operand):
+        return cls.from_slots(
+            _operator_type=operator_type, _expression=operand)
+
     @property
     def operator_type(self):
         return self._operator_type
 
     @operator_type.setter
     def operator_type(self, type_):
-        try:
-            self._operator_type = UnaryLogicType(type_)
-        except ValueError:
-            raise errors.InvalidOperatorError
+        self._operator_type = _get_operator_type(UnaryLogicType, type_)
 
 
-class IdentifierOperator(object):
-    pass
+class IdentifierOperator(Freezable):
+    __slots__ = ()
 
 
 class ResourceId(IdentifierOperator):
-    _rid = ""
+    __slots__ = ("_rid", "previous_rid", "version", "start_time", "end_time")
 
     def __init__(self, rid, previous_rid="", version=None,
                  start_time=None, end_time=None):
         self.rid = rid
         self.previous_rid = previous_rid
+        self.version = version
+        self.start_time = start_time
+        self.end_time = end_time
         # TODO- validate previous rid too
-        # TODO- add support for version
-        # TODO- add support for start_time
-        # TODO- add support for end_time
+
+    def __eq__(self, other):
+        if isinstance(other, ResourceId):
+            return (self.rid == other.rid and
+                    self.previous_rid == other.previous_rid and
+                    self.version == other.version and
+                    self.start_time == other.start_time and
+                    self.end_time == other.end_time)
+        else:
+            return NotImplemented
+
+    def __hash__(self):
+        return hash((ResourceId, self._rid, self.previous_rid, self.version,
+                     self.start_time, self.end_time))
+
+    def __repr__(self):
+        return "{0.__class__.__name__}(rid={0.rid!r})".format(self)
 
     @property
     def rid(self):
@@ -436,7 +552,10 @@ class ResourceId(IdentifierOperator):
 
 
 class SpatialDescription(object):
-    _value = None
+    __slots__ = ("_value",)
+
+    def __init__(self):
+        self._value = None
 
     @property
     def value(self):
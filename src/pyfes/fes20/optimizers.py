@@ -0,0 +1,463 @@
+"""Simplification of FES v2.0 filters.
+
+Machine generated filters are often redundant. The ``FilterOptimizer``
+rewrites an operator tree into a simpler tree that matches the same
+features:
+
+* Double negations are removed;
+* Nested ``fes:And`` and ``fes:Or`` operators are flattened and their
+  duplicate operands are dropped;
+* Comparisons between literals are evaluated. A ``fes:And`` or ``fes:Or``
+  operator is replaced by such a comparison when it decides its result,
+  and drops it otherwise;
+* Optionally, range comparisons on the same property that are combined
+  with ``fes:And`` are merged, keeping only the tightest bounds. Ranges
+  that are closed on both ends become a ``fes:PropertyIsBetween`` operator;
+* ``fes:BBOX`` operators that are implied by another spatial operator on
+  the same property are dropped;
+* The operands of ``fes:And`` and ``fes:Or`` are sorted so that cheap and
+  selective tests come first, which lets both the compiled predicates and
+  the database short-circuit sooner.
+
+Examples
+--------
+
+>>> from pyfes.fes20 import expressions
+>>> depth = expressions.ValueReference("DEPTH")
+>>> operator = operators.BinaryLogicOperator(
+...     operator_type="And",
+...     first_expression=operators.BinaryComparisonOperator(
+...         "PropertyIsGreaterThanOrEqualTo", depth, expressions.Literal(10)),
+...     second_expression=operators.BinaryComparisonOperator(
+...         "PropertyIsLessThanOrEqualTo", depth, expressions.Literal(30))
+... )
+>>> optimized = optimize_filter(operator, merge_ranges=True)
+>>> optimized == operators.BetweenComparisonOperator(
+...     depth, expressions.Literal(10), expressions.Literal(30))
+True
+
+"""
+
+from collections import namedtuple
+from collections import OrderedDict
+import logging
+
+from . import expressions
+from . import operators
+from .. import errors
+from .canonical import canonical_text
+from .canonical import flatten_logic_operands
+from .compilers import PredicateCompiler
+from .compilers import is_number
+from .envelopes import envelope_contains
+from .envelopes import get_operand_envelope
+
+logger = logging.getLogger(__name__)
+
+_RangeBound = namedtuple("_RangeBound", "value inclusive literal")
+
+_LOWER_BOUNDS = {
+    operators.BinaryComparisonName.PROPERTY_IS_GREATER_THAN: False,
+    operators.BinaryComparisonName.PROPERTY_IS_GREATER_THAN_OR_EQUAL_TO: True,
+}
+
+_UPPER_BOUNDS = {
+    operators.BinaryComparisonName.PROPERTY_IS_LESS_THAN: False,
+    operators.BinaryComparisonName.PROPERTY_IS_LESS_THAN_OR_EQUAL_TO: True,
+}
+
+_CONSTANT_OPERATOR_TYPES = (
+    operators.BinaryComparisonOperator,
+    operators.BetweenComparisonOperator,
+    operators.LikeOperator,
+    operators.NullOperator,
+    operators.NilOperator,
+)
+
+_SWAPPED_COMPARISONS = {
+    operators.BinaryComparisonName.PROPERTY_IS_GREATER_THAN: (
+        operators.BinaryComparisonName.PROPERTY_IS_LESS_THAN),
+    operators.BinaryComparisonName.PROPERTY_IS_GREATER_THAN_OR_EQUAL_TO: (
+        operators.BinaryComparisonName.PROPERTY_IS_LESS_THAN_OR_EQUAL_TO),
+    operators.BinaryComparisonName.PROPERTY_IS_LESS_THAN: (
+        operators.BinaryComparisonName.PROPERTY_IS_GREATER_THAN),
+    operators.BinaryComparisonName.PROPERTY_IS_LESS_THAN_OR_EQUAL_TO: (
+        operators.BinaryComparisonName.PROPERTY_IS_GREATER_THAN_OR_EQUAL_TO),
+}
+
+
+def optimize_filter(operator, **kwargs):
+    """Simplify a filter.
+
+    Parameters
+    ----------
+    operator: operators.NonIdOperator or tuple of operators.ResourceId
+        The filter to optimize, as returned by ``parsers.parse_filter``
+    kwargs:
+        Passed to ``FilterOptimizer``
+
+    Returns
+    -------
+    operators.NonIdOperator or tuple of operators.ResourceId
+        A new filter that matches the same features as the input
+
+    """
+
+    return FilterOptimizer(**kwargs).optimize(operator)
+
+
+class FilterOptimizer(object):
+    """Rewrites operator trees into simpler equivalent trees.
+
+    The input tree is never modified. Nodes that do not change are shared
+    between the input and the result.
+
+    Parameters
+    ----------
+    merge_ranges: bool, optional
+        Whether to merge range comparisons on the same property. Merging
+        assumes that properties hold a single value, so it is disabled by
+        default. It must not be enabled for filters on multi-valued
+        properties, where each comparison may be satisfied by a different
+        value
+    reorder: bool, optional
+        Whether to sort the operands of logic operators by their cost
+
+    """
+
+    OPERATOR_COSTS = {
+        operators.BinaryComparisonOperator: 2,
+        operators.BetweenComparisonOperator: 2,
+        operators.NullOperator: 1,
+        operators.NilOperator: 1,
+        operators.LikeOperator: 4,
+        operators.TemporalOperator: 8,
+        operators.BinarySpatialOperator: 20,
+        operators.DistanceOperator: 25,
+    }
+    """Relative cost of evaluating each type of operator"""
+
+    FUNCTION_COST = 5
+    """Additional cost of each function that an operator calls"""
+
+    _OPERATOR_OPTIMIZER_HANDLERS = {
+        operators.BinaryLogicOperator: "optimize_binary_logic_operator",
+        operators.UnaryLogicOperator: "optimize_unary_logic_operator",
+    }
+
+    def __init__(self, merge_ranges=False, reorder=True):
+        self.merge_ranges = merge_ranges
+        self.reorder = reorder
+
+    def optimize(self, operator):
+        """Return a simplified version of the input operator"""
+        if isinstance(operator, (list, tuple)):
+            result = operator
+        else:
+            handler = self._get_handler(operator)
+            result = operator if handler is None else handler(operator)
+        return result
+
+    def optimize_unary_logic_operator(self, operator):
+        operand = self.optimize(operator.expression)
+        if isinstance(operand, operators.UnaryLogicOperator):
+            result = operand.expression
+        elif operand is operator.expression:
+            result = operator
+        else:
+            result = operators.UnaryLogicOperator.trusted(
+                operator_type=operator.operator_type, operand=operand)
+        return result
+
+    def optimize_binary_logic_operator(self, operator):
+        operator_type = operator.operator_type
+        operands = []
+        for operand in flatten_logic_operands(operator, operator_type):
+            optimized = self.optimize(operand)
+            operands.extend(flatten_logic_operands(optimized, operator_type))
+        operands = _remove_duplicates(operands)
+        operands = _fold_constants(operands, operator_type)
+        if operator_type == operators.BinaryLogicType.AND:
+            if self.merge_ranges:
+                operands = _merge_ranges(operands)
+            operands = _remove_implied_bboxes(operands)
+        if self.reorder:
+            operands.sort(key=self.get_cost)
+        result = operands[0]
+        for operand in operands[1:]:
+            result = operators.BinaryLogicOperator.trusted(
+                operator_type=operator_type,
+                first_expression=result,
+                second_expression=operand
+            )
+        return result
+
+    def get_cost(self, operator):
+        """Estimate the relative cost of evaluating an operator"""
+        if isinstance(operator, operators.BinaryLogicOperator):
+            result = sum(self.get_cost(operand) for operand in
+                         flatten_logic_operands(operator,
+                                                operator.operator_type))
+        elif isinstance(operator, operators.UnaryLogicOperator):
+            result = self.get_cost(operator.expression)
+        elif isinstance(operator, expressions.Expression):
+            result = self._get_expression_cost(operator)
+        else:
+            result = 0
+            for type_ in type(operator).__mro__:
+                if type_ in self.OPERATOR_COSTS:
+                    result = self.OPERATOR_COSTS[type_]
+                    break
+            is_equality = getattr(operator, "operator_type", None) == (
+                operators.BinaryComparisonName.PROPERTY_IS_EQUAL_TO)
+            if is_equality:
+                # equality tests tend to be the most selective ones
+                result -= 1
+            result += sum(self._get_expression_cost(value) for value in
+                          operator._get_key() if
+                          isinstance(value, expressions.Expression))
+        return result
+
+    def _get_expression_cost(self, expression):
+        result = 0
+        pending = [expression]
+        while len(pending) > 0:
+            current = pending.pop()
+            if isinstance(current, expressions.Function):
+                result += self.FUNCTION_COST
+                pending.extend(current.arguments)
+        return result
+
+    def _get_handler(self, operator):
+        for type_ in type(operator).__mro__:
+            handler_name = self._OPERATOR_OPTIMIZER_HANDLERS.get(type_)
+            if handler_name is not None:
+                return getattr(self, handler_name)
+        return None
+
+
+def _remove_duplicates(operands):
+    unique = OrderedDict()
+    for operand in operands:
+        unique.setdefault(canonical_text(operand), operand)
+    return list(unique.values())
+
+
+def _fold_constants(operands, operator_type):
+    """Drop the constant operands of a logic operator.
+
+    A constant operand that decides the result of the operator, like a
+    false one in ``fes:And``, replaces all of the operands instead.
+
+    """
+
+    deciding_value = operator_type == operators.BinaryLogicType.OR
+    result = []
+    constants = []
+    for operand in operands:
+        value = _get_constant(operand)
+        if value is None:
+            result.append(operand)
+        elif value == deciding_value:
+            logger.debug("Folding %r into %r", operator_type.value, operand)
+            return [operand]
+        else:
+            constants.append(operand)
+    return result or constants[:1]
+
+
+def _get_constant(operator):
+    """Return the result of an operator that only compares literals.
+
+    The result is computed with the compiler, so that it is the same as
+    when the operator is evaluated. Returns None for any other operator.
+
+    """
+
+    negated = False
+    while isinstance(operator, operators.UnaryLogicOperator):
+        operator = operator.expression
+        negated = not negated
+    if not isinstance(operator, _CONSTANT_OPERATOR_TYPES):
+        return None
+    is_constant = all(
+        isinstance(value, expressions.Literal) for value in
+        operator._get_key() if isinstance(value, expressions.Expression))
+    if not is_constant:
+        return None
+    try:
+        value = PredicateCompiler().compile(operator)({})
+    except (errors.PyFesError, ValueError):
+        return None
+    return value != negated
+
+
+def _get_range(operator):
+    """Return the property and the bounds of a range comparison.
+
+    Returns None if the operator is not a comparison of a property against
+    a literal number.
+
+    """
+
+    if isinstance(operator, operators.BetweenComparisonOperator):
+        name = _get_property_name(operator.expression)
+        lower = _get_bound(operator.lower_boundary, inclusive=True)
+        upper = _get_bound(operator.upper_boundary, inclusive=True)
+        if None in (name, lower, upper):
+            return None
+        return name, lower, upper
+    if not isinstance(operator, operators.BinaryComparisonOperator):
+        return None
+    if operator.match_action != operators.MatchAction.ANY:
+        return None
+    operator_type = operator.operator_type
+    name = _get_property_name(operator.first_expression)
+    literal = operator.second_expression
+    if name is None:
+        name = _get_property_name(operator.second_expression)
+        literal = operator.first_expression
+        operator_type = _SWAPPED_COMPARISONS.get(operator_type)
+    if name is None or operator_type is None:
+        return None
+    lower = upper = None
+    if operator_type in _LOWER_BOUNDS:
+        lower = _get_bound(literal, _LOWER_BOUNDS[operator_type])
+        if lower is None:
+            return None
+    elif operator_type in _UPPER_BOUNDS:
+        upper = _get_bound(literal, _UPPER_BOUNDS[operator_type])
+        if upper is None:
+            return None
+    else:
+        return None
+    return name, lower, upper
+
+
+def _get_property_name(expression):
+    if isinstance(expression, expressions.ValueReference):
+        return expression.value
+    return None
+
+
+def _get_bound(expression, inclusive):
+    # text literals are compared as text with text values, so only numbers
+    # are ordered the same way that they are compared at runtime
+    if not (isinstance(expression, expressions.Literal) and
+            is_number(expression.value)):
+        return None
+    value = expression.value
+    if value != value:  # NaN cannot be used as a bound
+        return None
+    return _RangeBound(value=value, inclusive=inclusive, literal=expression)
+
+
+def _merge_ranges(operands):
+    """Merge the range comparisons on each property into a single range.
+
+    The merged range takes the place of the first comparison on its
+    property.
+
+    """
+
+    ranges = OrderedDict()
+    result = []
+    for operand in operands:
+        range_ = _get_range(operand)
+        if range_ is None:
+            result.append([operand])
+        else:
+            name, lower, upper = range_
+            if name not in ranges:
+                ranges[name] = (len(result), [])
+                result.append(None)
+            ranges[name][1].append((operand, lower, upper))
+    for name, (position, items) in ranges.items():
+        if len(items) == 1:
+            result[position] = [items[0][0]]
+            continue
+        lowers = [lower for operand, lower, upper in items if
+                  lower is not None]
+        uppers = [upper for operand, lower, upper in items if
+                  upper is not None]
+        lower = max(lowers, key=lambda bound: (
+            bound.value, not bound.inclusive)) if lowers else None
+        upper = min(uppers, key=lambda bound: (
+            bound.value, bound.inclusive)) if uppers else None
+        logger.debug("Merging %d comparisons on %r", len(items), name)
+        result[position] = _build_range(name, lower, upper)
+    return [operand for merged in result for operand in merged]
+
+
+def _build_range(name, lower, upper):
+    reference = expressions.ValueReference.trusted(name)
+    if lower is not None and upper is not None and (
+            lower.inclusive and upper.inclusive):
+        return [operators.BetweenComparisonOperator.trusted(
+            expression=reference,
+            lower_boundary=lower.literal,
+            upper_boundary=upper.literal
+        )]
+    result = []
+    if lower is not None:
+        result.append(operators.BinaryComparisonOperator.trusted(
+            operator_type=(
+                operators.BinaryComparisonName.
+                PROPERTY_IS_GREATER_THAN_OR_EQUAL_TO if lower.inclusive else
+                operators.BinaryComparisonName.PROPERTY_IS_GREATER_THAN
+            ),
+            first_expression=reference,
+            second_expression=lower.literal
+        ))
+    if upper is not None:
+        result.append(operators.BinaryComparisonOperator.trusted(
+            operator_type=(
+                operators.BinaryComparisonName.
+                PROPERTY_IS_LESS_THAN_OR_EQUAL_TO if upper.inclusive else
+                operators.BinaryComparisonName.PROPERTY_IS_LESS_THAN
+            ),
+            first_expression=reference,
+            second_expression=upper.literal
+        ))
+    return result
+
+
+def _remove_implied_bboxes(operands):
+    """Remove the BBOX operators that are implied by other operands.
+
+    A ``BBOX`` test is implied by any other spatial operator, except for
+    ``Disjoint``, that compares the same property with a geometry whose
+    envelope lies within the box.
+
+    """
+
+    implying_envelopes = []
+    for operand in operands:
+        is_implying = (
+            isinstance(operand, operators.BinarySpatialOperator) and
+            operand.operator_type not in (
+                operators.SpatialOperatorName.BBOX,
+                operators.SpatialOperatorName.DISJOINT
+            )
+        )
+        if is_implying:
+            envelope = get_operand_envelope(operand.second_operand)
+            if envelope is not None:
+                implying_envelopes.append((operand.expression, envelope))
+    result = []
+    for operand in operands:
+        is_bbox = (
+            isinstance(operand, operators.BinarySpatialOperator) and
+            operand.operator_type == operators.SpatialOperatorName.BBOX
+        )
+        box = (get_operand_envelope(operand.second_operand) if is_bbox else
+               None)
+        is_implied = box is not None and any(
+            expression == operand.expression and
+            envelope_contains(box, envelope) for
+            expression, envelope in implying_envelopes
+        )
+        if not is_implied:
+            result.append(operand)
+    return result
+
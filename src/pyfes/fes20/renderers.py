@@ -1,12 +1,421 @@
+"""Render FES v2.0 filters as XML.
+
+The ``FesFilterRenderer`` writes operator trees straight into a byte
+stream with lxml's incremental ``etree.xmlfile`` writer, so no intermediate
+element tree is ever built, no matter how large the filter is.
+
+The output only depends on the filter: attributes are always written in
+the same order, default attribute values are left out and numbers are
+formatted with ``repr``. Rendering the same filter twice thus yields the
+same bytes, which can be used as a cache key.
+
+Examples
+--------
+
+>>> from pyfes.fes20 import expressions
+>>> operator = operators.BinaryComparisonOperator(
+...     operator_type=operators.BinaryComparisonName.PROPERTY_IS_LESS_THAN,
+...     first_expression=expressions.ValueReference("DEPTH"),
+...     second_expression=expressions.Literal(30)
+... )
+>>> element = FesFilterRenderer().render_element(operator)
+>>> print(etree.tostring(element, pretty_print=True).decode("utf-8"))
+... # doctest: +ELLIPSIS
+<fes:Filter ...>
+  <fes:PropertyIsLessThan>
+    <fes:ValueReference>DEPTH</fes:ValueReference>
+    <fes:Literal type="xs:int">30</fes:Literal>
+  </fes:PropertyIsLessThan>
+</fes:Filter>
+<BLANKLINE>
+
+"""
+
+from collections import OrderedDict
+import datetime as dt
+import io
+import logging
+
 from lxml import etree
 
+from . import expressions
+from . import operators
+from .canonical import flatten_logic_operands
 from .namespaces import NAMESPACES
+from .. import errors
+from .. import geometries
+from .. import temporal
+from ..utils import as_text
+
+logger = logging.getLogger(__name__)
+
+_FES = "{{{}}}".format(NAMESPACES["fes"])
+_GML = "{{{}}}".format(NAMESPACES["gml"])
+
+
+def render_filter(operator, **kwargs):
+    """Render a filter as a fes:Filter XML document.
+
+    Parameters
+    ----------
+    operator: operators.NonIdOperator or tuple of operators.ResourceId
+        The filter to render, as returned by ``parsers.parse_filter``
+    kwargs:
+        Passed to ``FesFilterRenderer``
+
+    Returns
+    -------
+    bytes
+        The UTF-8 encoded filter
+
+    """
+
+    return FesFilterRenderer(**kwargs).render(operator)
 
 
 class FesFilterRenderer(object):
+    """Renders FES v2.0 operators as XML.
+
+    Parameters
+    ----------
+    distance_units: str, optional
+        Value of the ``uom`` attribute of the ``fes:Distance`` elements of
+        distance operators that have no unit of measure
+    xml_declaration: bool, optional
+        Whether to start the output with an XML declaration
+    gml_id_prefix: str, optional
+        Prefix of the ``gml:id`` of rendered geometries. Ids are numbered
+        in document order, so they are the same each time that a filter
+        is rendered
+    default_srs: str, optional
+        The ``srsName`` of geometries that have no SRS, including WKT
+        operands. Their coordinates are written in x, y order, so the name
+        should imply that order. By default, those geometries are written
+        without an ``srsName``
+
+    """
+
+    FILTER_NAMESPACES = OrderedDict([
+        ("fes", NAMESPACES["fes"]),
+        ("gml", NAMESPACES["gml"]),
+        ("xs", NAMESPACES["xs"]),
+    ])
+    """Namespaces declared on the fes:Filter element"""
+
+    _OPERATOR_RENDERER_HANDLERS = {
+        operators.BinaryComparisonOperator: (
+            "write_binary_comparison_operator"),
+        operators.LikeOperator: "write_like_operator",
+        operators.BetweenComparisonOperator: (
+            "write_between_comparison_operator"),
+        operators.NullOperator: "write_null_operator",
+        operators.NilOperator: "write_nil_operator",
+        operators.DistanceOperator: "write_distance_operator",
+        operators.BinarySpatialOperator: "write_binary_spatial_operator",
+        operators.TemporalOperator: "write_temporal_operator",
+        operators.BinaryLogicOperator: "write_binary_logic_operator",
+        operators.UnaryLogicOperator: "write_unary_logic_operator",
+        expressions.ValueReference: "write_value_reference",
+        expressions.Literal: "write_literal",
+        expressions.Function: "write_function",
+        geometries.Geometry: "write_geometry",
+        temporal.TimePeriod: "write_time_period",
+    }
+
+    _GEOMETRY_WRITERS = {
+        geometries.GeometryType.POINT: "_write_gml_point",
+        geometries.GeometryType.LINESTRING: "_write_gml_linestring",
+        geometries.GeometryType.POLYGON: "_write_gml_polygon",
+        geometries.GeometryType.MULTIPOINT: "_write_gml_multi_geometry",
+        geometries.GeometryType.MULTILINESTRING: "_write_gml_multi_geometry",
+        geometries.GeometryType.MULTIPOLYGON: "_write_gml_multi_geometry",
+        geometries.GeometryType.GEOMETRYCOLLECTION: (
+            "_write_gml_geometry_collection"),
+    }
+
+    _GML_MULTI_GEOMETRIES = {
+        geometries.GeometryType.MULTIPOINT: ("MultiPoint", "pointMember"),
+        geometries.GeometryType.MULTILINESTRING: ("MultiCurve",
+                                                  "curveMember"),
+        geometries.GeometryType.MULTIPOLYGON: ("MultiSurface",
+                                               "surfaceMember"),
+    }
+
+    def __init__(self, distance_units="m", xml_declaration=False,
+                 gml_id_prefix="pyfes.", default_srs=None):
+        self.distance_units = distance_units
+        self.xml_declaration = xml_declaration
+        self.gml_id_prefix = gml_id_prefix
+        self.default_srs = default_srs
+        self._gml_ids = 0
 
     def render(self, operator):
-        raise NotImplementedError
+        """Render a filter as a fes:Filter XML document.
+
+        Parameters
+        ----------
+        operator: operators.NonIdOperator or tuple of operators.ResourceId
+            The filter to render
+
+        Returns
+        -------
+        bytes
+            The UTF-8 encoded filter
+
+        """
+
+        output = io.BytesIO()
+        self.write(output, operator)
+        return output.getvalue()
+
+    def render_element(self, operator):
+        """Render a filter as an ``etree.Element``"""
+        return etree.fromstring(self.render(operator))
+
+    def write(self, output, operator):
+        """Write a filter to a binary file-like object.
+
+        Parameters
+        ----------
+        output: file-like object
+            A binary stream, such as an open file or a socket's file
+        operator: operators.NonIdOperator or tuple of operators.ResourceId
+            The filter to render
+
+        """
+
+        self._gml_ids = 0
+        with etree.xmlfile(output, encoding="utf-8") as xml_file:
+            if self.xml_declaration:
+                xml_file.write_declaration()
+            with xml_file.element(_FES + "Filter",
+                                  nsmap=self.FILTER_NAMESPACES):
+                if isinstance(operator, (list, tuple)):
+                    for resource_id in operator:
+                        self.write_resource_id(xml_file, resource_id)
+                else:
+                    self.write_node(xml_file, operator)
+
+    def write_node(self, xml_file, node):
+        """Write an operator, expression or geometry"""
+        handler = self._get_handler(node)
+        if handler is None:
+            raise errors.PyFesError(
+                "Cannot render {!r} as FES".format(node))
+        handler(xml_file, node)
+
+    def write_binary_comparison_operator(self, xml_file, operator):
+        attributes = OrderedDict()
+        if not operator.match_case:
+            attributes["matchCase"] = "false"
+        if operator.match_action != operators.MatchAction.ANY:
+            attributes["matchAction"] = operator.match_action.value
+        with xml_file.element(_FES + operator.operator_type.value,
+                              attributes):
+            self.write_node(xml_file, operator.first_expression)
+            self.write_node(xml_file, operator.second_expression)
+
+    def write_like_operator(self, xml_file, operator):
+        attributes = OrderedDict([
+            ("wildCard", operator.wild_card),
+            ("singleChar", operator.single_char),
+            ("escapeChar", operator.escape_char),
+        ])
+        with xml_file.element(_FES + "PropertyIsLike", attributes):
+            self.write_node(xml_file, operator.first_expression)
+            self.write_node(xml_file, operator.second_expression)
+
+    def write_between_comparison_operator(self, xml_file, operator):
+        with xml_file.element(_FES + "PropertyIsBetween"):
+            self.write_node(xml_file, operator.expression)
+            with xml_file.element(_FES + "LowerBoundary"):
+                self.write_node(xml_file, operator.lower_boundary)
+            with xml_file.element(_FES + "UpperBoundary"):
+                self.write_node(xml_file, operator.upper_boundary)
+
+    def write_null_operator(self, xml_file, operator):
+        with xml_file.element(_FES + "PropertyIsNull"):
+            self.write_node(xml_file, operator.expression)
+
+    def write_nil_operator(self, xml_file, operator):
+        attributes = OrderedDict()
+        if operator.nil_reason:
+            attributes["nilReason"] = operator.nil_reason
+        with xml_file.element(_FES + "PropertyIsNil", attributes):
+            self.write_node(xml_file, operator.expression)
+
+    def write_distance_operator(self, xml_file, operator):
+        with xml_file.element(_FES + operator.operator_type.value):
+            self.write_node(xml_file, operator.expression)
+            self.write_spatial_operand(xml_file, operator.geometry)
+            uom = operator.uom or self.distance_units
+            with xml_file.element(_FES + "Distance", {"uom": uom}):
+                xml_file.write(geometries.format_number(operator.distance))
+
+    def write_binary_spatial_operator(self, xml_file, operator):
+        with xml_file.element(_FES + operator.operator_type.value):
+            self.write_node(xml_file, operator.expression)
+            self.write_spatial_operand(xml_file, operator.second_operand)
+
+    def write_temporal_operator(self, xml_file, operator):
+        with xml_file.element(_FES + operator.operator_type.value):
+            self.write_node(xml_file, operator.expression)
+            self.write_node(xml_file, operator.second_operand)
+
+    def write_binary_logic_operator(self, xml_file, operator):
+        # fes:And and fes:Or accept any number of operands, so nested
+        # operators of the same type are written as a single element
+        with xml_file.element(_FES + operator.operator_type.value):
+            for operand in flatten_logic_operands(operator,
+                                                  operator.operator_type):
+                self.write_node(xml_file, operand)
+
+    def write_unary_logic_operator(self, xml_file, operator):
+        with xml_file.element(_FES + operator.operator_type.value):
+            self.write_node(xml_file, operator.expression)
+
+    def write_resource_id(self, xml_file, resource_id):
+        attributes = OrderedDict([("rid", resource_id.rid)])
+        for name, value in (("previousRid", resource_id.previous_rid),
+                            ("version", resource_id.version),
+                            ("startDate", resource_id.start_time),
+                            ("endDate", resource_id.end_time)):
+            if value:
+                attributes[name] = _format_value(value)
+        with xml_file.element(_FES + "ResourceId", attributes):
+            pass
+
+    def write_value_reference(self, xml_file, value_reference):
+        with xml_file.element(_FES + "ValueReference"):
+            xml_file.write(value_reference.value)
+
+    def write_literal(self, xml_file, literal):
+        value = literal.value
+        attributes = OrderedDict()
+        if isinstance(value, bool):
+            attributes["type"] = "xs:boolean"
+        elif isinstance(value, int):
+            attributes["type"] = _get_integer_type(value)
+        elif isinstance(value, float):
+            attributes["type"] = "xs:float"
+        with xml_file.element(_FES + "Literal", attributes):
+            if isinstance(value, geometries.Geometry):
+                self.write_geometry(xml_file, value)
+            elif value is not None:
+                xml_file.write(_format_value(value))
+
+    def write_function(self, xml_file, function):
+        with xml_file.element(_FES + "Function", {"name": function.name}):
+            for argument in function.arguments:
+                self.write_node(xml_file, argument)
+
+    def write_spatial_operand(self, xml_file, operand):
+        """Write the geometry operand of a spatial or distance operator.
+
+        WKT operands are converted into GML, since FES has no encoding for
+        them.
+
+        """
+
+        if isinstance(operand, geometries.Geometry):
+            self.write_geometry(xml_file, operand)
+        elif isinstance(operand, expressions.Expression):
+            self.write_node(xml_file, operand)
+        else:
+            self.write_geometry(xml_file, geometries.parse_wkt(operand))
+
+    def write_geometry(self, xml_file, geometry, is_member=False):
+        """Write a geometry as GML 3.2"""
+        writer = getattr(self, self._GEOMETRY_WRITERS[geometry.type_])
+        writer(xml_file, geometry, is_member)
+
+    def _write_gml_point(self, xml_file, geometry, is_member):
+        with self._gml_element(xml_file, "Point", geometry, is_member):
+            with xml_file.element(_GML + "pos"):
+                xml_file.write(_format_coordinates(
+                    geometry.coordinates[:geometry.dimensions]))
+
+    def _write_gml_linestring(self, xml_file, geometry, is_member):
+        with self._gml_element(xml_file, "LineString", geometry, is_member):
+            self._write_gml_pos_list(xml_file, geometry, 0)
+
+    def _write_gml_polygon(self, xml_file, geometry, is_member):
+        with self._gml_element(xml_file, "Polygon", geometry, is_member):
+            for index in range(len(geometry.part_offsets) - 1):
+                ring_name = "exterior" if index == 0 else "interior"
+                with xml_file.element(_GML + ring_name):
+                    with xml_file.element(_GML + "LinearRing"):
+                        self._write_gml_pos_list(xml_file, geometry, index)
+
+    def _write_gml_multi_geometry(self, xml_file, geometry, is_member):
+        name, member_name = self._GML_MULTI_GEOMETRIES[geometry.type_]
+        with self._gml_element(xml_file, name, geometry, is_member):
+            for member in geometry.iter_members():
+                with xml_file.element(_GML + member_name):
+                    self.write_geometry(xml_file, member, is_member=True)
+
+    def _write_gml_geometry_collection(self, xml_file, geometry, is_member):
+        with self._gml_element(xml_file, "MultiGeometry", geometry,
+                               is_member):
+            for member in geometry.members:
+                with xml_file.element(_GML + "geometryMember"):
+                    self.write_geometry(xml_file, member, is_member=True)
+
+    def _write_gml_pos_list(self, xml_file, geometry, part):
+        dimensions = geometry.dimensions
+        start = geometry.part_offsets[part] * dimensions
+        end = geometry.part_offsets[part + 1] * dimensions
+        with xml_file.element(_GML + "posList"):
+            xml_file.write(_format_coordinates(
+                geometry.coordinates[start:end]))
+
+    def write_time_period(self, xml_file, period):
+        """Write a time period as a GML 3.2 TimeInstant or TimePeriod"""
+        if period.is_instant:
+            with self._gml_time_element(xml_file, "TimeInstant"):
+                self._write_gml_time_position(
+                    xml_file, "timePosition", period.begin)
+        else:
+            with self._gml_time_element(xml_file, "TimePeriod"):
+                self._write_gml_time_position(
+                    xml_file, "beginPosition", period.begin)
+                self._write_gml_time_position(
+                    xml_file, "endPosition", period.end)
+
+    def _write_gml_time_position(self, xml_file, name, value):
+        if value in (temporal.MIN_TIME, temporal.MAX_TIME):
+            with xml_file.element(_GML + name,
+                                  {"indeterminatePosition": "unknown"}):
+                pass
+        else:
+            with xml_file.element(_GML + name):
+                xml_file.write(temporal.format_time(value))
+
+    def _gml_time_element(self, xml_file, name):
+        attributes = OrderedDict([(_GML + "id", self._get_next_gml_id())])
+        return xml_file.element(_GML + name, attributes)
+
+    def _gml_element(self, xml_file, name, geometry, is_member):
+        attributes = OrderedDict([(_GML + "id", self._get_next_gml_id())])
+        # members inherit the srsName and srsDimension of their parent
+        if not is_member:
+            srs = geometry.srs or self.default_srs
+            if srs is not None:
+                attributes["srsName"] = srs
+            if geometry.dimensions != 2:
+                attributes["srsDimension"] = str(geometry.dimensions)
+        return xml_file.element(_GML + name, attributes)
+
+    def _get_next_gml_id(self):
+        self._gml_ids += 1
+        return "{}{}".format(self.gml_id_prefix, self._gml_ids)
+
+    def _get_handler(self, node):
+        for type_ in type(node).__mro__:
+            handler_name = self._OPERATOR_RENDERER_HANDLERS.get(type_)
+            if handler_name is not None:
+                return getattr(self, handler_name)
+        return None
 
     def _render_value_reference(self, value_reference):
         element = etree.Element(
@@ -15,3 +424,30 @@ class FesFilterRenderer(object):
         )
         element.text = value_reference.value
         return element
+
+
+def _format_coordinates(values):
+    return " ".join(geometries.format_number(value) for value in values)
+
+
+def _get_integer_type(value):
+    """Return the narrowest of the XML schema integer types for a value"""
+    if -2 ** 31 <= value < 2 ** 31:
+        result = "xs:int"
+    elif -2 ** 63 <= value < 2 ** 63:
+        result = "xs:long"
+    else:
+        result = "xs:integer"
+    return result
+
+
+def _format_value(value):
+    if isinstance(value, bool):
+        result = "true" if value else "false"
+    elif isinstance(value, float):
+        result = geometries.format_number(value)
+    elif isinstance(value, (dt.datetime, dt.date, dt.time)):
+        result = value.isoformat()
+    else:
+        result = as_text(value)
+    return result
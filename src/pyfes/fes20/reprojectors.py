@@ -0,0 +1,170 @@
+"""Reprojection of the geometries of FES v2.0 filters.
+
+Filters may carry geometries in any SRS, while the features that they are
+evaluated against are usually stored in a single one. The
+``FilterReprojector`` rewrites a filter once so that all of its
+``geometries.Geometry`` operands are in the storage SRS, which saves
+transforming the stored geometries for each evaluation.
+
+Reprojection requires pyproj. WKT operands carry no SRS, so they are left
+as they are. The distances of ``fes:DWithin`` and ``fes:Beyond`` keep
+their unit of measure. Distances without one are in the units of the SRS
+of their geometry, so they are converted into the units of the target
+SRS, which is only possible when both reference systems have linear
+units or both have angular units.
+
+Examples
+--------
+
+>>> from pyfes import geometries
+>>> from pyfes.fes20 import expressions
+>>> operator = operators.BinarySpatialOperator(
+...     operator_type="Intersects",
+...     first_operand=expressions.ValueReference("geom"),
+...     second_operand=geometries.Geometry(
+...         "Point", [1, 2], srs="EPSG:4326")
+... )
+>>> reproject_filter(operator, "EPSG:4326") is operator
+True
+
+"""
+
+import logging
+
+from . import operators
+from .. import geometries
+from .. import srs
+
+logger = logging.getLogger(__name__)
+
+
+def reproject_filter(operator, target_srs):
+    """Transform the geometries of a filter into another SRS.
+
+    Parameters
+    ----------
+    operator: operators.NonIdOperator or tuple of operators.ResourceId
+        The filter to reproject, as returned by ``parsers.parse_filter``
+    target_srs: str
+        Name of the SRS to transform the geometries into
+
+    Returns
+    -------
+    operators.NonIdOperator or tuple of operators.ResourceId
+        A new filter whose geometries are in the target SRS
+
+    """
+
+    return FilterReprojector(target_srs).reproject(operator)
+
+
+class FilterReprojector(object):
+    """Rewrites operator trees so that their geometries share an SRS.
+
+    The input tree is never modified. Nodes that do not change are shared
+    between the input and the result.
+
+    Parameters
+    ----------
+    target_srs: str
+        Name of the SRS to transform the geometries into
+
+    """
+
+    _OPERATOR_REPROJECTOR_HANDLERS = {
+        operators.BinarySpatialOperator: "reproject_binary_spatial_operator",
+        operators.DistanceOperator: "reproject_distance_operator",
+        operators.BinaryLogicOperator: "reproject_binary_logic_operator",
+        operators.UnaryLogicOperator: "reproject_unary_logic_operator",
+    }
+
+    def __init__(self, target_srs):
+        self.target_srs = target_srs
+
+    def reproject(self, operator):
+        """Return a version of the input operator in the target SRS"""
+        if isinstance(operator, (list, tuple)):
+            result = operator
+        else:
+            handler = self._get_handler(operator)
+            result = operator if handler is None else handler(operator)
+        return result
+
+    def reproject_binary_spatial_operator(self, operator):
+        operand = self.reproject_geometry(operator.second_operand)
+        if operand is operator.second_operand:
+            result = operator
+        else:
+            result = operators.BinarySpatialOperator(
+                operator_type=operator.operator_type,
+                first_operand=operator.expression,
+                second_operand=operand
+            )
+        return result
+
+    def reproject_distance_operator(self, operator):
+        """Reproject the geometry of a distance operator.
+
+        A distance without a unit of measure is in the units of the SRS of
+        the geometry, so it is converted into the units of the target SRS
+        as well.
+
+        """
+
+        geometry = self.reproject_geometry(operator.geometry)
+        if geometry is operator.geometry:
+            result = operator
+        else:
+            if operator.uom is None:
+                factor = srs.get_distance_factor(
+                    operator.geometry.srs or geometries.DEFAULT_SRS,
+                    self.target_srs
+                )
+            else:
+                factor = 1.0
+            result = operators.DistanceOperator(
+                operator_type=operator.operator_type,
+                expression=operator.expression,
+                geometry=geometry,
+                distance=operator.distance * factor,
+                uom=operator.uom
+            )
+        return result
+
+    def reproject_binary_logic_operator(self, operator):
+        first = self.reproject(operator.first_expression)
+        second = self.reproject(operator.second_expression)
+        if (first is operator.first_expression and
+                second is operator.second_expression):
+            result = operator
+        else:
+            result = operators.BinaryLogicOperator.trusted(
+                operator_type=operator.operator_type,
+                first_expression=first,
+                second_expression=second
+            )
+        return result
+
+    def reproject_unary_logic_operator(self, operator):
+        operand = self.reproject(operator.expression)
+        if operand is operator.expression:
+            result = operator
+        else:
+            result = operators.UnaryLogicOperator.trusted(
+                operator_type=operator.operator_type, operand=operand)
+        return result
+
+    def reproject_geometry(self, geometry):
+        """Reproject a geometry operand, leaving other operands untouched"""
+        if isinstance(geometry, geometries.Geometry):
+            result = geometries.reproject(geometry, self.target_srs)
+        else:
+            result = geometry
+        return result
+
+    def _get_handler(self, operator):
+        for type_ in type(operator).__mro__:
+            handler_name = self._OPERATOR_REPROJECTOR_HANDLERS.get(type_)
+            if handler_name is not None:
+                return getattr(self, handler_name)
+        return None
@@ -1,52 +1,299 @@
-"""Schema parser for pyfes"""
+"""Schema parser for pyfes
+
+The FES 2.0 and GML 3.2.1 schemas are bundled with pyfes, together with an
+OASIS XML catalog that maps their official locations onto the local
+copies. This means filters can be validated without network access.
+
+The schema is read lazily, the first time it is needed. Compiled schemas
+keep the errors of their last validation, so each thread compiles its own
+one from the schema document that was read.
+
+"""
 
 import logging
 import os
+import sys
+import threading
 
 from lxml import etree
 
+from .. import errors
+from .. import instrumentation
+from ..utils import make_lazy_getattr
+
 logger = logging.getLogger(__name__)
 
+SCHEMAS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "schemas")
+DEFAULT_SCHEMA_PATH = os.path.join(SCHEMAS_DIR, "pyfes.xsd")
+DEFAULT_CATALOG_PATH = os.path.join(SCHEMAS_DIR, "catalog.xml")
+
+CATALOG_NAMESPACE = "urn:oasis:names:tc:entity:xmlns:xml:catalog"
+
+
+class SchemaCatalog(object):
+    """Maps schema locations to local files.
+
+    Locations are looked up first among the exact entries and then among
+    the prefix entries, where the longest matching prefix wins, as
+    described by the OASIS XML catalogs specification.
+
+    Parameters
+    ----------
+    entries: dict, optional
+        Maps exact locations to the paths of local files
+    rewrites: dict, optional
+        Maps location prefixes to the prefixes of local paths that should
+        replace them
+
+    """
+
+    _ENTRY_ATTRIBUTES = {
+        "system": ("systemId", "uri"),
+        "uri": ("name", "uri"),
+    }
+
+    _REWRITE_ATTRIBUTES = {
+        "rewriteSystem": ("systemIdStartString", "rewritePrefix"),
+        "rewriteURI": ("uriStartString", "rewritePrefix"),
+    }
+
+    def __init__(self, entries=None, rewrites=None):
+        self.entries = dict(entries or {})
+        self.rewrites = sorted((rewrites or {}).items(),
+                               key=lambda item: len(item[0]), reverse=True)
+
+    @classmethod
+    def from_file(cls, path):
+        """Read an OASIS XML catalog.
+
+        Only the ``system``, ``uri``, ``rewriteSystem`` and ``rewriteURI``
+        entries are supported. Relative paths are taken relative to the
+        directory of the catalog.
+
+        Parameters
+        ----------
+        path: str
+            Path to the catalog file
+
+        """
+
+        base = os.path.dirname(os.path.abspath(path))
+        parser = etree.XMLParser(resolve_entities=False, no_network=True)
+        root = etree.parse(path, parser=parser).getroot()
+        entries = {}
+        rewrites = {}
+        for element in root.iter("{{{}}}*".format(CATALOG_NAMESPACE)):
+            name = etree.QName(element).localname
+            if name in cls._ENTRY_ATTRIBUTES:
+                key, target = cls._ENTRY_ATTRIBUTES[name]
+                entries[element.get(key)] = os.path.join(
+                    base, element.get(target))
+            elif name in cls._REWRITE_ATTRIBUTES:
+                key, target = cls._REWRITE_ATTRIBUTES[name]
+                rewrites[element.get(key)] = os.path.join(
+                    base, element.get(target))
+        return cls(entries=entries, rewrites=rewrites)
+
+    def resolve(self, location):
+        """Return the local path for a schema location, or None"""
+        try:
+            result = self.entries[location]
+        except KeyError:
+            result = None
+            for prefix, replacement in self.rewrites:
+                if location.startswith(prefix):
+                    result = replacement + location[len(prefix):]
+                    break
+        return result
+
+
+class CatalogResolver(etree.Resolver):
+    """Resolves schema imports and includes by looking them up in a catalog.
+
+    Locations that are not in the catalog are left to lxml, which will
+    only load them if they are local files when used together with a
+    parser that has network access disabled.
+
+    """
+
+    def __init__(self, catalog):
+        super(CatalogResolver, self).__init__()
+        self.catalog = catalog
+
+    def resolve(self, url, pubid, context):
+        path = self.catalog.resolve(url)
+        if path is not None:
+            logger.debug("Resolved %s to %s", url, path)
+            return self.resolve_filename(path, context)
+
 
 class SchemaParser(object):
-    _schema = None
+    """Validates XML elements against the FES schema.
+
+    The schema document is read the first time it is needed and reading it
+    happens only once, even if several threads ask for it at the same
+    time. Each thread then compiles the document into its own schema, so
+    threads can validate elements concurrently.
+
+    Parameters
+    ----------
+    schema_path: str, optional
+        Path to the main schema file. If not provided, the
+        ``PYFES_SCHEMA_PATH`` environment variable is used, if available,
+        and otherwise the schemas bundled with pyfes.
+    catalog_path: str, optional
+        Path to an OASIS XML catalog used to resolve the locations of
+        imported schemas. If not provided, the ``PYFES_SCHEMA_CATALOG``
+        environment variable is used, if available, and otherwise the
+        catalog bundled with pyfes.
+
+    """
+
+    def __init__(self, schema_path=None, catalog_path=None):
+        self.schema_path = schema_path
+        self.catalog_path = catalog_path
+        self._schema_document = None
+        self._is_read = False
+        self._read_lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def schema_document(self):
+        """The schema document, or None if it could not be read"""
+        if not self._is_read:
+            with self._read_lock:
+                if not self._is_read:
+                    self._schema_document = self.parse_schema_document()
+                    self._is_read = True
+        return self._schema_document
 
     @property
     def schema(self):
-        return self._schema
+        """The compiled schema of the current thread.
+
+        This is None if the schema could not be read or compiled.
 
-    def __init__(self, schema_path=None):
         """
-        Create a parser for XML data.
 
-        This class is flexible in how it tries to find the XML schema
-        document, if the input `schema_path` is provided, it is used.
-        Alternatively, if `schema_path` is not provided the `PYFES_SCHEMA_PATH`
-        environment variable is used, if available.
+        try:
+            result = self._local.schema
+        except AttributeError:
+            document = self.schema_document
+            result = (self.compile_schema(document) if
+                      document is not None else None)
+            self._local.schema = result
+        return result
+
+    def get_etree_parser(self):
+        """Return a parser that resolves schema locations offline"""
+        catalog_path = (self.catalog_path or
+                        os.getenv("PYFES_SCHEMA_CATALOG") or
+                        DEFAULT_CATALOG_PATH)
+        parser = etree.XMLParser(resolve_entities=False, no_network=True)
+        parser.resolvers.add(
+            CatalogResolver(SchemaCatalog.from_file(catalog_path)))
+        return parser
+
+    def parse_schema(self, schema_path=None):
+        """Read and compile the schema.
+
+        Parameters
+        ----------
+        schema_path: str, optional
+            Path to the main schema file. Defaults to the one that was
+            given when creating the schema parser.
+
+        Returns
+        -------
+        lxml.etree.XMLSchema or None
+            The compiled schema, or None if it could not be compiled
+
+        """
+
+        document = self.parse_schema_document(schema_path)
+        return self.compile_schema(document) if document is not None else None
+
+    def parse_schema_document(self, schema_path=None):
+        """Read the main schema file.
+
+        Parameters
+        ----------
+        schema_path: str, optional
+            Path to the main schema file. Defaults to the one that was
+            given when creating the schema parser.
+
+        Returns
+        -------
+        lxml.etree._ElementTree or None
+            The schema document, or None if it could not be read. The
+            document resolves the locations of imported schemas through
+            the catalog when it is compiled
+
+        """
+
+        schema_path = (schema_path or self.schema_path or
+                       os.getenv("PYFES_SCHEMA_PATH") or DEFAULT_SCHEMA_PATH)
+        try:
+            result = etree.parse(schema_path, parser=self.get_etree_parser())
+        except (IOError, etree.XMLSyntaxError):
+            logger.warning("Could not parse {}".format(schema_path),
+                           exc_info=True)
+            result = None
+        return result
+
+    def compile_schema(self, document):
+        """Compile a schema document.
+
+        Returns
+        -------
+        lxml.etree.XMLSchema or None
+            The compiled schema, or None if it could not be compiled
 
-        :arg schema_path: The full path to the main fes schema file.
-        :type schema_path: str
         """
-        schema_path = schema_path or os.getenv("PYFES_SCHEMA_PATH")
-        if schema_path is not None:
-            self.parse_schema(schema_path)
 
-    def parse_schema(self, schema_path):
-        """Parse an xsd path"""
         try:
-            self._schema = etree.XMLSchema(file=schema_path)
-        except Exception:  # replace with more specific exception
-            logger.warning("Could not parse {}".format(schema_path))
-        return self._schema
+            with instrumentation.timer("schema.compile"):
+                result = etree.XMLSchema(document)
+        except etree.XMLSchemaParseError:
+            logger.warning("Could not compile {}".format(document.docinfo.URL),
+                           exc_info=True)
+            result = None
+        return result
 
     def validate_xml(self, element):
-        """Validate an XML element"""
-        if self._schema is not None:
-            self._schema.assertValid(element)
-        else:
-            logger.warning("Cannot validate element. No schema parser "
-                           "available.")
+        """Validate an XML element.
+
+        Parameters
+        ----------
+        element: lxml.etree._Element
+            The element to validate. It is not parsed again.
+
+        Raises
+        ------
+        pyfes.errors.ValidationError
+            If the element is not valid
+        pyfes.errors.PyFesError
+            If the schema is not available
+
+        """
+
+        schema = self.schema
+        if schema is None:
+            raise errors.PyFesError(
+                "Cannot validate element. No schema available.")
+        with instrumentation.timer("schema.validate"):
+            is_valid = schema.validate(element)
+            error = schema.error_log.last_error
+        if not is_valid:
+            instrumentation.increment("schema.invalid")
+            raise errors.ValidationError(
+                "Invalid filter: {}".format(error.message if error else ""))
+
 
+# ``schema_parser``, a singleton-like instance to perform schema parsing on
+# xml elements, is created the first time that it is accessed
+__getattr__ = make_lazy_getattr(__name__, {"schema_parser": SchemaParser})
 
-schema_parser = SchemaParser()
-"""A singleton-like instance to perform schema parsing on exml elements"""
+if sys.version_info < (3, 7):  # modules cannot define __getattr__
+    schema_parser = SchemaParser()
@@ -0,0 +1,848 @@
+"""Compact binary serialization of FES v2.0 filters.
+
+``dumps`` encodes a parsed filter with a small versioned binary format,
+meant for storing filters in caches and for sending them between worker
+processes. ``loads`` builds the operator tree straight from the encoded
+values, through the ``trusted`` constructors, so none of the validators
+are run again.
+
+An encoded filter is made of:
+
+* a fixed size header, with a magic number, the format version and the
+  sizes of the sections that follow;
+* a table with the strings of the filter, each stored only once;
+* the nodes of the filter in post-order. A node is a tag byte followed by
+  varint fields and it takes its children from the values that the
+  preceding nodes produced, so neither encoding nor decoding recurse;
+* the coordinates of all geometries, as little-endian doubles that start
+  on an 8 byte boundary. They can be read without copying them, as
+  ``memoryview`` objects over the input buffer.
+
+Examples
+--------
+
+>>> from pyfes.fes20 import expressions
+>>> operator = operators.BinaryComparisonOperator(
+...     operator_type=operators.BinaryComparisonName.PROPERTY_IS_LESS_THAN,
+...     first_expression=expressions.ValueReference("DEPTH"),
+...     second_expression=expressions.Literal(30)
+... )
+>>> data = dumps(operator)
+>>> len(data)
+40
+>>> loads(data) == operator
+True
+
+"""
+
+from array import array
+import datetime as dt
+import logging
+import struct
+import sys
+
+from . import expressions
+from . import operators
+from .. import errors
+from .. import geometries
+from .. import temporal
+from ..utils import string_type
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 2
+"""Version of the format written by ``dumps``"""
+
+MAGIC = b"PYFES"
+
+_HEADER = struct.Struct("<5sBHIII")
+_DOUBLE = struct.Struct("<d")
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+# node tags. Values are leaves that push a plain python value, which the
+# nodes that follow them use as a literal value or as an operator field
+_NONE = 0
+_TRUE = 1
+_FALSE = 2
+_INTEGER = 3
+_NEGATIVE_INTEGER = 4
+_FLOAT = 5
+_STRING = 6
+_DATETIME = 7
+_AWARE_DATETIME = 8
+_LITERAL = 16
+_VALUE_REFERENCE = 17
+_FUNCTION = 18
+_GEOMETRY = 19
+_TIME_PERIOD = 20
+_BINARY_COMPARISON = 32
+_LIKE = 33
+_BETWEEN = 34
+_NULL = 35
+_NIL = 36
+_DISTANCE = 37
+_BINARY_SPATIAL = 38
+_TEMPORAL = 39
+_BINARY_LOGIC = 40
+_UNARY_LOGIC = 41
+_RESOURCE_ID = 48
+_RESOURCE_IDS = 49
+
+_BINARY_COMPARISON_NAMES = tuple(operators.BinaryComparisonName)
+_MATCH_ACTIONS = tuple(operators.MatchAction)
+_DISTANCE_OPERATOR_NAMES = tuple(operators.DistanceOperatorName)
+_SPATIAL_OPERATOR_NAMES = tuple(operators.SpatialOperatorName)
+_TEMPORAL_OPERATOR_NAMES = tuple(operators.TemporalOperatorName)
+_BINARY_LOGIC_TYPES = tuple(operators.BinaryLogicType)
+_UNARY_LOGIC_TYPES = tuple(operators.UnaryLogicType)
+_GEOMETRY_TYPES = tuple(geometries.GeometryType)
+
+_MICROSECONDS_PER_DAY = 86400 * 10 ** 6
+# utc offsets are stored shifted by a day, which they are always less than
+_UTC_OFFSET_SHIFT = 86400
+
+try:
+    _FixedOffsetTimezone = dt.timezone
+except AttributeError:  # python 2 has no fixed offset timezones
+    _FixedOffsetTimezone = None
+
+_ORDINALS = dict(
+    (member, index) for members in (
+        _BINARY_COMPARISON_NAMES,
+        _MATCH_ACTIONS,
+        _DISTANCE_OPERATOR_NAMES,
+        _SPATIAL_OPERATOR_NAMES,
+        _TEMPORAL_OPERATOR_NAMES,
+        _BINARY_LOGIC_TYPES,
+        _UNARY_LOGIC_TYPES,
+        _GEOMETRY_TYPES,
+    ) for index, member in enumerate(members)
+)
+
+
+def dumps(operator):
+    """Encode a filter with the pyfes binary format.
+
+    Parameters
+    ----------
+    operator: operators.NonIdOperator or tuple of operators.ResourceId
+        The filter to encode, as returned by ``parsers.parse_filter``
+
+    Returns
+    -------
+    bytes
+        The encoded filter
+
+    """
+
+    return FilterSerializer().dumps(operator)
+
+
+def loads(data, copy=False):
+    """Decode a filter that has been encoded with ``dumps``.
+
+    Parameters
+    ----------
+    data: bytes or bytes-like object
+        The encoded filter
+    copy: bool, optional
+        Whether to copy the coordinates of geometries out of ``data``. By
+        default they are ``memoryview`` objects over ``data``, which is
+        then kept alive by the geometries
+
+    Returns
+    -------
+    operators.NonIdOperator or tuple of operators.ResourceId
+        The decoded filter
+
+    """
+
+    return FilterDeserializer(copy=copy).loads(data)
+
+
+class FilterSerializer(object):
+    """Encodes filters with the pyfes binary format.
+
+    Each kind of node is encoded by a method that returns the children of
+    the node, its tag and its integer fields. Children are encoded before
+    their parents.
+
+    """
+
+    _NODE_ENCODER_HANDLERS = {
+        operators.BinaryComparisonOperator: (
+            "encode_binary_comparison_operator"),
+        operators.LikeOperator: "encode_like_operator",
+        operators.BetweenComparisonOperator: (
+            "encode_between_comparison_operator"),
+        operators.NullOperator: "encode_null_operator",
+        operators.NilOperator: "encode_nil_operator",
+        operators.DistanceOperator: "encode_distance_operator",
+        operators.BinarySpatialOperator: "encode_binary_spatial_operator",
+        operators.TemporalOperator: "encode_temporal_operator",
+        operators.BinaryLogicOperator: "encode_binary_logic_operator",
+        operators.UnaryLogicOperator: "encode_unary_logic_operator",
+        operators.ResourceId: "encode_resource_id",
+        tuple: "encode_resource_ids",
+        list: "encode_resource_ids",
+        expressions.ValueReference: "encode_value_reference",
+        expressions.Literal: "encode_literal",
+        expressions.Function: "encode_function",
+        geometries.Geometry: "encode_geometry",
+        temporal.TimePeriod: "encode_time_period",
+    }
+
+    _VALUE_WRITER_HANDLERS = {
+        type(None): "write_none",
+        bool: "write_boolean",
+        int: "write_integer",
+        float: "write_float",
+        string_type: "write_string",
+        dt.datetime: "write_datetime",
+    }
+
+    # literal values that are encoded as nodes rather than as plain values
+    _LITERAL_NODE_TYPES = (geometries.Geometry, temporal.TimePeriod)
+
+    def __init__(self):
+        self._strings = {}
+        self._nodes = bytearray()
+        self._coordinates = []
+        self._coordinates_count = 0
+
+    def dumps(self, operator):
+        """Encode a filter with the pyfes binary format"""
+        self._strings = {}
+        self._nodes = bytearray()
+        self._coordinates = []
+        self._coordinates_count = 0
+        self.write_node(operator)
+        strings = bytearray()
+        for string in sorted(self._strings, key=self._strings.get):
+            encoded = string.encode("utf-8")
+            _write_varint(strings, len(encoded))
+            strings.extend(encoded)
+        header = _HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(strings),
+                              len(self._nodes), self._coordinates_count)
+        size = len(header) + len(strings) + len(self._nodes)
+        chunks = [header, bytes(strings), bytes(self._nodes),
+                  b"\x00" * (-size % _DOUBLE.size)]
+        for coordinates in self._coordinates:
+            if not _LITTLE_ENDIAN:
+                coordinates.byteswap()
+            chunks.append(_to_bytes(coordinates))
+        return b"".join(chunks)
+
+    def write_node(self, node):
+        """Encode a node and all of its descendants, children first"""
+        pending = [(node, False)]
+        while len(pending) > 0:
+            current, is_expanded = pending.pop()
+            if is_expanded:
+                self._write_fields(*current)
+                continue
+            value_writer = self._get_handler(current,
+                                             self._VALUE_WRITER_HANDLERS)
+            if value_writer is not None:
+                value_writer(current)
+                continue
+            encoder = self._get_handler(current, self._NODE_ENCODER_HANDLERS)
+            if encoder is None:
+                raise errors.SerializationError(
+                    "Cannot serialize {!r}".format(current))
+            children, tag, fields = encoder(current)
+            pending.append(((tag, fields), True))
+            pending.extend((child, False) for child in reversed(children))
+
+    def encode_binary_comparison_operator(self, operator):
+        return (
+            (operator.first_expression, operator.second_expression),
+            _BINARY_COMPARISON,
+            (
+                _ORDINALS[operator.operator_type],
+                int(bool(operator.match_case)),
+                _ORDINALS[operator.match_action],
+            )
+        )
+
+    def encode_like_operator(self, operator):
+        children = (operator.first_expression, operator.second_expression,
+                    operator.wild_card, operator.single_char,
+                    operator.escape_char)
+        return children, _LIKE, ()
+
+    def encode_between_comparison_operator(self, operator):
+        children = (operator.expression, operator.lower_boundary,
+                    operator.upper_boundary)
+        return children, _BETWEEN, ()
+
+    def encode_null_operator(self, operator):
+        return (operator.expression,), _NULL, ()
+
+    def encode_nil_operator(self, operator):
+        return (operator.expression, operator.nil_reason), _NIL, ()
+
+    def encode_distance_operator(self, operator):
+        children = (operator.expression, operator.geometry,
+                    float(operator.distance), operator.uom)
+        return children, _DISTANCE, (_ORDINALS[operator.operator_type],)
+
+    def encode_binary_spatial_operator(self, operator):
+        children = (operator.expression, operator.second_operand)
+        return children, _BINARY_SPATIAL, (_ORDINALS[operator.operator_type],)
+
+    def encode_temporal_operator(self, operator):
+        children = (operator.expression, operator.second_operand)
+        return children, _TEMPORAL, (_ORDINALS[operator.operator_type],)
+
+    def encode_binary_logic_operator(self, operator):
+        children = (operator.first_expression, operator.second_expression)
+        return children, _BINARY_LOGIC, (_ORDINALS[operator.operator_type],)
+
+    def encode_unary_logic_operator(self, operator):
+        return (
+            (operator.expression,),
+            _UNARY_LOGIC,
+            (_ORDINALS[operator.operator_type],)
+        )
+
+    def encode_resource_id(self, resource_id):
+        children = (resource_id.rid, resource_id.previous_rid,
+                    resource_id.version, resource_id.start_time,
+                    resource_id.end_time)
+        return children, _RESOURCE_ID, ()
+
+    def encode_resource_ids(self, resource_ids):
+        for resource_id in resource_ids:
+            if not isinstance(resource_id, operators.ResourceId):
+                raise errors.SerializationError(
+                    "Cannot serialize {!r}".format(resource_id))
+        return resource_ids, _RESOURCE_IDS, (len(resource_ids),)
+
+    def encode_value_reference(self, value_reference):
+        return (), _VALUE_REFERENCE, (self._get_string_index(
+            value_reference.value),)
+
+    def encode_literal(self, literal):
+        value = literal.value
+        is_supported = (
+            isinstance(value, self._LITERAL_NODE_TYPES) or
+            self._get_handler(value, self._VALUE_WRITER_HANDLERS) is not None
+        )
+        if not is_supported:
+            raise errors.SerializationError(
+                "Cannot serialize literal value {!r}".format(value))
+        return (value,), _LITERAL, ()
+
+    def encode_function(self, function):
+        arguments = tuple(function.arguments)
+        return (
+            arguments,
+            _FUNCTION,
+            (self._get_string_index(function.name), len(arguments))
+        )
+
+    def encode_geometry(self, geometry):
+        """Encode a geometry, keeping its coordinates aside.
+
+        The fields of a geometry are its type, its dimensions, its SRS, the
+        position of its bounds and the position and count of its
+        coordinates, followed by its offsets and by the number of members
+        that precede it. Bounds are stored along with the coordinates, so
+        that they need not be computed again.
+
+        """
+
+        if geometry.bounds is not None:
+            bounds_start = self._add_coordinates(
+                array("d", geometry.bounds)) + 1
+        else:
+            bounds_start = 0
+        coordinates = array("d", geometry.coordinates)
+        fields = [
+            _ORDINALS[geometry.type_],
+            geometry.dimensions,
+            (self._get_string_index(geometry.srs) + 1 if
+             geometry.srs is not None else 0),
+            bounds_start,
+            self._add_coordinates(coordinates),
+            len(coordinates),
+            len(geometry.part_offsets),
+        ]
+        fields.extend(geometry.part_offsets)
+        fields.append(len(geometry.polygon_offsets))
+        fields.extend(geometry.polygon_offsets)
+        fields.append(len(geometry.members))
+        return geometry.members, _GEOMETRY, fields
+
+    def encode_time_period(self, period):
+        return (period.begin, period.end), _TIME_PERIOD, ()
+
+    def write_none(self, value):
+        self._nodes.append(_NONE)
+
+    def write_boolean(self, value):
+        self._nodes.append(_TRUE if value else _FALSE)
+
+    def write_integer(self, value):
+        if value < 0:
+            self._nodes.append(_NEGATIVE_INTEGER)
+            _write_varint(self._nodes, -value)
+        else:
+            self._nodes.append(_INTEGER)
+            _write_varint(self._nodes, value)
+
+    def write_float(self, value):
+        self._nodes.append(_FLOAT)
+        self._nodes.extend(_DOUBLE.pack(value))
+
+    def write_string(self, value):
+        self._nodes.append(_STRING)
+        _write_varint(self._nodes, self._get_string_index(value))
+
+    def write_datetime(self, value):
+        """Write a datetime as its day and the microseconds into that day.
+
+        Aware datetimes also keep their UTC offset, so they are decoded
+        with a fixed offset timezone, whatever their original one was.
+
+        """
+
+        offset = value.utcoffset()
+        if offset is None:
+            self._nodes.append(_DATETIME)
+        else:
+            self._nodes.append(_AWARE_DATETIME)
+        time_of_day = (
+            (value.hour * 3600 + value.minute * 60 + value.second) * 10 ** 6 +
+            value.microsecond
+        )
+        _write_varint(self._nodes, value.toordinal())
+        _write_varint(self._nodes, time_of_day)
+        if offset is not None:
+            _write_varint(
+                self._nodes,
+                offset.days * 86400 + offset.seconds + _UTC_OFFSET_SHIFT
+            )
+
+    def _write_fields(self, tag, fields):
+        nodes = self._nodes
+        nodes.append(tag)
+        for field in fields:
+            _write_varint(nodes, field)
+
+    def _add_coordinates(self, coordinates):
+        """Keep coordinates aside and return their position"""
+        start = self._coordinates_count
+        self._coordinates.append(coordinates)
+        self._coordinates_count += len(coordinates)
+        return start
+
+    def _get_string_index(self, string):
+        try:
+            result = self._strings[string]
+        except KeyError:
+            result = len(self._strings)
+            self._strings[string] = result
+        return result
+
+    def _get_handler(self, node, handlers):
+        for type_ in type(node).__mro__:
+            handler_name = handlers.get(type_)
+            if handler_name is not None:
+                return getattr(self, handler_name)
+        return None
+
+
+class FilterDeserializer(object):
+    """Decodes filters that have been encoded with the pyfes binary format.
+
+    Each tag has a method that reads the fields of its node, takes the
+    children of the node from the top of a stack of decoded values and
+    pushes the new node onto the stack.
+
+    Parameters
+    ----------
+    copy: bool, optional
+        Whether to copy the coordinates of geometries out of the input
+        data, rather than using ``memoryview`` objects over it. Coordinates
+        are always copied when they can not be viewed as native doubles
+
+    """
+
+    _TAG_READER_HANDLERS = {
+        _NONE: "read_none",
+        _TRUE: "read_true",
+        _FALSE: "read_false",
+        _INTEGER: "read_integer",
+        _NEGATIVE_INTEGER: "read_negative_integer",
+        _FLOAT: "read_float",
+        _STRING: "read_string",
+        _DATETIME: "read_datetime",
+        _AWARE_DATETIME: "read_aware_datetime",
+        _LITERAL: "read_literal",
+        _VALUE_REFERENCE: "read_value_reference",
+        _FUNCTION: "read_function",
+        _GEOMETRY: "read_geometry",
+        _TIME_PERIOD: "read_time_period",
+        _BINARY_COMPARISON: "read_binary_comparison_operator",
+        _LIKE: "read_like_operator",
+        _BETWEEN: "read_between_comparison_operator",
+        _NULL: "read_null_operator",
+        _NIL: "read_nil_operator",
+        _DISTANCE: "read_distance_operator",
+        _BINARY_SPATIAL: "read_binary_spatial_operator",
+        _TEMPORAL: "read_temporal_operator",
+        _BINARY_LOGIC: "read_binary_logic_operator",
+        _UNARY_LOGIC: "read_unary_logic_operator",
+        _RESOURCE_ID: "read_resource_id",
+        _RESOURCE_IDS: "read_resource_ids",
+    }
+
+    def __init__(self, copy=False):
+        self.copy = copy
+        self._readers = dict(
+            (tag, getattr(self, name)) for tag, name in
+            self._TAG_READER_HANDLERS.items()
+        )
+        self._strings = []
+        self._coordinates = None
+
+    def loads(self, data):
+        """Decode a filter that has been encoded with ``dumps``"""
+        view = memoryview(data)
+        if view.ndim != 1 or view.itemsize != 1:
+            view = view.cast("B")
+        try:
+            result = self._loads(view)
+        except (IndexError, KeyError, ValueError, struct.error) as err:
+            raise errors.SerializationError(
+                "Invalid serialized filter: {}".format(err))
+        finally:
+            self._strings = []
+            self._coordinates = None
+        return result
+
+    def _loads(self, view):
+        if len(view) < _HEADER.size:
+            raise errors.SerializationError("Truncated serialized filter")
+        magic, version, flags, strings_size, nodes_size, coordinates_count = (
+            _HEADER.unpack(view[:_HEADER.size].tobytes()))
+        if magic != MAGIC:
+            raise errors.SerializationError("Not a serialized filter")
+        if version != FORMAT_VERSION:
+            raise errors.SerializationError(
+                "Unsupported serialization format version {}".format(version))
+        nodes_start = _HEADER.size + strings_size
+        nodes_end = nodes_start + nodes_size
+        coordinates_start = nodes_end + (-nodes_end % _DOUBLE.size)
+        coordinates_end = coordinates_start + coordinates_count * _DOUBLE.size
+        if len(view) < coordinates_end:
+            raise errors.SerializationError("Truncated serialized filter")
+        head = bytearray(view[:nodes_end])
+        self._strings = _read_strings(head, _HEADER.size, nodes_start)
+        self._coordinates = self._get_coordinates(
+            view[coordinates_start:coordinates_end])
+        stack = []
+        readers = self._readers
+        position = nodes_start
+        while position < nodes_end:
+            position = readers[head[position]](head, position + 1, stack)
+        if position != nodes_end or len(stack) != 1:
+            raise errors.SerializationError("Invalid serialized filter")
+        return stack[0]
+
+    def read_none(self, data, position, stack):
+        stack.append(None)
+        return position
+
+    def read_true(self, data, position, stack):
+        stack.append(True)
+        return position
+
+    def read_false(self, data, position, stack):
+        stack.append(False)
+        return position
+
+    def read_integer(self, data, position, stack):
+        value, position = _read_varint(data, position)
+        stack.append(value)
+        return position
+
+    def read_negative_integer(self, data, position, stack):
+        value, position = _read_varint(data, position)
+        stack.append(-value)
+        return position
+
+    def read_float(self, data, position, stack):
+        end = position + _DOUBLE.size
+        stack.append(_DOUBLE.unpack(bytes(data[position:end]))[0])
+        return end
+
+    def read_string(self, data, position, stack):
+        index, position = _read_varint(data, position)
+        stack.append(self._strings[index])
+        return position
+
+    def read_datetime(self, data, position, stack):
+        (day, time_of_day), position = _read_varints(data, position, 2)
+        stack.append(_build_datetime(day, time_of_day))
+        return position
+
+    def read_aware_datetime(self, data, position, stack):
+        fields, position = _read_varints(data, position, 3)
+        day, time_of_day, offset = fields
+        if _FixedOffsetTimezone is None:
+            raise errors.SerializationError(
+                "Aware datetimes cannot be decoded on this version of python")
+        timezone = _FixedOffsetTimezone(
+            dt.timedelta(seconds=offset - _UTC_OFFSET_SHIFT))
+        stack.append(_build_datetime(day, time_of_day, timezone))
+        return position
+
+    def read_literal(self, data, position, stack):
+        stack[-1] = expressions.Literal.trusted(value=stack[-1])
+        return position
+
+    def read_value_reference(self, data, position, stack):
+        index, position = _read_varint(data, position)
+        stack.append(expressions.ValueReference.trusted(self._strings[index]))
+        return position
+
+    def read_function(self, data, position, stack):
+        index, position = _read_varint(data, position)
+        count, position = _read_varint(data, position)
+        arguments = _pop(stack, count)
+        stack.append(expressions.Function.trusted(
+            name=self._strings[index], arguments=arguments))
+        return position
+
+    def read_geometry(self, data, position, stack):
+        fields, position = _read_varints(data, position, 7)
+        type_, dimensions, srs, bounds, start, count, parts_count = fields
+        part_offsets, position = _read_varints(data, position, parts_count)
+        polygons_count, position = _read_varint(data, position)
+        polygon_offsets, position = _read_varints(data, position,
+                                                  polygons_count)
+        members_count, position = _read_varint(data, position)
+        coordinates = self._coordinates[start:start + count]
+        if len(coordinates) != count:
+            raise errors.SerializationError("Invalid geometry coordinates")
+        stack.append(geometries.Geometry.trusted(
+            type_=_GEOMETRY_TYPES[type_],
+            coordinates=coordinates,
+            part_offsets=tuple(part_offsets),
+            polygon_offsets=tuple(polygon_offsets),
+            srs=self._strings[srs - 1] if srs > 0 else None,
+            dimensions=dimensions,
+            members=tuple(_pop(stack, members_count)),
+            bounds=(self._get_bounds(bounds - 1) if bounds > 0 else None)
+        ))
+        return position
+
+    def read_time_period(self, data, position, stack):
+        begin, end = _pop(stack, 2)
+        stack.append(temporal.TimePeriod.trusted(begin, end))
+        return position
+
+    def read_binary_comparison_operator(self, data, position, stack):
+        fields, position = _read_varints(data, position, 3)
+        operator_type, match_case, match_action = fields
+        second_expression = stack.pop()
+        stack[-1] = operators.BinaryComparisonOperator.trusted(
+            operator_type=_BINARY_COMPARISON_NAMES[operator_type],
+            first_expression=stack[-1],
+            second_expression=second_expression,
+            match_case=bool(match_case),
+            match_action=_MATCH_ACTIONS[match_action]
+        )
+        return position
+
+    def read_like_operator(self, data, position, stack):
+        first, second, wild_card, single_char, escape_char = _pop(stack, 5)
+        stack.append(operators.LikeOperator.trusted(
+            first_expression=first,
+            second_expression=second,
+            wild_card=wild_card,
+            single_char=single_char,
+            escape_char=escape_char
+        ))
+        return position
+
+    def read_between_comparison_operator(self, data, position, stack):
+        expression, lower_boundary, upper_boundary = _pop(stack, 3)
+        stack.append(operators.BetweenComparisonOperator.trusted(
+            expression=expression,
+            lower_boundary=lower_boundary,
+            upper_boundary=upper_boundary
+        ))
+        return position
+
+    def read_null_operator(self, data, position, stack):
+        stack[-1] = operators.NullOperator.trusted(expression=stack[-1])
+        return position
+
+    def read_nil_operator(self, data, position, stack):
+        nil_reason = stack.pop()
+        stack[-1] = operators.NilOperator.trusted(
+            expression=stack[-1], nil_reason=nil_reason)
+        return position
+
+    def read_distance_operator(self, data, position, stack):
+        operator_type, position = _read_varint(data, position)
+        expression, geometry, distance, uom = _pop(stack, 4)
+        stack.append(operators.DistanceOperator.from_slots(
+            _operator_type=_DISTANCE_OPERATOR_NAMES[operator_type],
+            _expression=expression,
+            _geometry=geometry,
+            distance=distance,
+            uom=uom
+        ))
+        return position
+
+    def read_binary_spatial_operator(self, data, position, stack):
+        operator_type, position = _read_varint(data, position)
+        second_operand = stack.pop()
+        stack[-1] = operators.BinarySpatialOperator.from_slots(
+            _operator_type=_SPATIAL_OPERATOR_NAMES[operator_type],
+            _expression=stack[-1],
+            _second_operand=second_operand
+        )
+        return position
+
+    def read_temporal_operator(self, data, position, stack):
+        operator_type, position = _read_varint(data, position)
+        second_operand = stack.pop()
+        stack[-1] = operators.TemporalOperator.from_slots(
+            _operator_type=_TEMPORAL_OPERATOR_NAMES[operator_type],
+            _expression=stack[-1],
+            _second_operand=second_operand
+        )
+        return position
+
+    def read_binary_logic_operator(self, data, position, stack):
+        operator_type, position = _read_varint(data, position)
+        second_expression = stack.pop()
+        stack[-1] = operators.BinaryLogicOperator.trusted(
+            operator_type=_BINARY_LOGIC_TYPES[operator_type],
+            first_expression=stack[-1],
+            second_expression=second_expression
+        )
+        return position
+
+    def read_unary_logic_operator(self, data, position, stack):
+        operator_type, position = _read_varint(data, position)
+        stack[-1] = operators.UnaryLogicOperator.trusted(
+            operator_type=_UNARY_LOGIC_TYPES[operator_type],
+            operand=stack[-1]
+        )
+        return position
+
+    def read_resource_id(self, data, position, stack):
+        rid, previous_rid, version, start_time, end_time = _pop(stack, 5)
+        stack.append(operators.ResourceId.from_slots(
+            _rid=rid,
+            previous_rid=previous_rid,
+            version=version,
+            start_time=start_time,
+            end_time=end_time
+        ))
+        return position
+
+    def read_resource_ids(self, data, position, stack):
+        count, position = _read_varint(data, position)
+        stack.append(tuple(_pop(stack, count)))
+        return position
+
+    def _get_bounds(self, start):
+        bounds = self._coordinates[start:start + 4]
+        if len(bounds) != 4:
+            raise errors.SerializationError("Invalid geometry bounds")
+        return tuple(bounds)
+
+    def _get_coordinates(self, view):
+        can_view = (not self.copy and _LITTLE_ENDIAN and
+                    hasattr(view, "cast"))
+        if can_view:
+            result = view.cast("d")
+        else:
+            result = array("d")
+            _from_bytes(result, view.tobytes())
+            if not _LITTLE_ENDIAN:
+                result.byteswap()
+        return result
+
+
+def _write_varint(output, value):
+    while value > 0x7f:
+        output.append((value & 0x7f) | 0x80)
+        value >>= 7
+    output.append(value)
+
+
+def _read_varint(data, position):
+    byte = data[position]
+    if byte < 0x80:
+        return byte, position + 1
+    result = byte & 0x7f
+    shift = 7
+    while True:
+        position += 1
+        byte = data[position]
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, position + 1
+        shift += 7
+
+
+def _read_varints(data, position, count):
+    values = []
+    for _ in range(count):
+        value, position = _read_varint(data, position)
+        values.append(value)
+    return values, position
+
+
+def _read_strings(data, start, end):
+    strings = []
+    position = start
+    while position < end:
+        size, position = _read_varint(data, position)
+        strings.append(data[position:position + size].decode("utf-8"))
+        position += size
+    if position != end:
+        raise errors.SerializationError("Invalid string table")
+    return strings
+
+
+def _build_datetime(day, time_of_day, timezone=None):
+    if time_of_day >= _MICROSECONDS_PER_DAY:
+        raise errors.SerializationError("Invalid time of day")
+    midnight = dt.datetime.combine(dt.date.fromordinal(day), dt.time())
+    result = midnight + dt.timedelta(microseconds=time_of_day)
+    return result.replace(tzinfo=timezone)
+
+
+def _pop(stack, count):
+    """Remove and return the last ``count`` items of a stack"""
+    if count > len(stack):
+        raise errors.SerializationError("Missing node children")
+    if count == 0:
+        return []
+    result = stack[-count:]
+    del stack[-count:]
+    return result
+
+
+def _to_bytes(values):
+    try:
+        return values.tobytes()
+    except AttributeError:  # python 2 arrays have no tobytes()
+        return values.tostring()
+
+
+def _from_bytes(values, data):
+    try:
+        values.frombytes(data)
+    except AttributeError:  # python 2 arrays have no frombytes()
+        values.fromstring(data)
@@ -0,0 +1,175 @@
+"""Evaluation of FES v2.0 filters over indexed feature collections.
+
+A ``SpatialIndex`` reads the geometries of a feature collection once and
+packs their envelopes into an R-tree. Spatial operators on the indexed
+geometry property are then answered by querying the tree for candidate
+features and running the exact spatial test on those candidates only.
+Other operators are evaluated with the predicates of
+``compilers.PredicateCompiler``, but only on the features that are still
+candidates at that point of the filter.
+
+The index does not change after it has been built, so it can be reused for
+any number of filters.
+
+Examples
+--------
+
+>>> from pyfes.fes20 import expressions
+>>> index = SpatialIndex([
+...     {"id": "a", "geom": "POINT (1 1)"},
+...     {"id": "b", "geom": "POINT (50 50)"},
+... ], geometry_property="geom")
+>>> operator = operators.BinarySpatialOperator(
+...     operator_type=operators.SpatialOperatorName.WITHIN,
+...     first_operand=expressions.ValueReference("geom"),
+...     second_operand="POLYGON ((0 0, 10 0, 10 10, 0 10, 0 0))"
+... )
+>>> [feature["id"] for feature in index.filter(operator)]
+['a']
+
+"""
+
+import logging
+
+from . import compilers
+from . import expressions
+from . import operators
+from .envelopes import expand_envelope
+from .envelopes import is_empty_envelope
+from .featureindexes import FeatureIndex
+from .. import spatial
+from ..rtrees import STRtree
+
+logger = logging.getLogger(__name__)
+
+
+def filter_features(features, operator, geometry_property="geometry",
+                    **kwargs):
+    """Return the features that match a filter.
+
+    This builds a throwaway index. Build a ``SpatialIndex`` instead when
+    the same features are going to be filtered more than once.
+
+    """
+
+    index = SpatialIndex(
+        features, geometry_property=geometry_property, **kwargs)
+    return index.filter(operator)
+
+
+class SpatialIndex(FeatureIndex):
+    """An R-tree backed index for evaluating filters over features.
+
+    Parameters
+    ----------
+    features: iterable
+        The features to index. Features are mappings, just like the ones
+        that are accepted by the predicates of ``compilers.compile_filter``
+    geometry_property: str, optional
+        Name of the property that holds the geometry of the features,
+        either as a WKT string, a ``geometries.Geometry`` or a
+        ``spatial.Shape``. Features that
+        have no geometry can still be matched by non-spatial filters
+    node_capacity: int, optional
+        Maximum number of children of each node of the R-tree
+    kwargs:
+        Passed to ``compilers.PredicateCompiler``
+
+    """
+
+    _OPERATOR_SELECTOR_HANDLERS = dict(
+        FeatureIndex._OPERATOR_SELECTOR_HANDLERS)
+    _OPERATOR_SELECTOR_HANDLERS.update({
+        operators.BinarySpatialOperator: "select_binary_spatial_operator",
+        operators.DistanceOperator: "select_distance_operator",
+    })
+
+    def __init__(self, features, geometry_property="geometry",
+                 node_capacity=10, **kwargs):
+        super(SpatialIndex, self).__init__(features, **kwargs)
+        self.geometry_property = geometry_property
+        getter = self.compiler.compile_value_reference(
+            expressions.ValueReference(geometry_property))
+        self._shapes = []
+        entries = []
+        for position, feature in enumerate(self.features):
+            shape = compilers.get_shape(getter(feature))
+            self._shapes.append(shape)
+            if shape is not None:
+                entries.append((shape.envelope, position))
+        self._positions_with_geometry = frozenset(
+            position for envelope, position in entries)
+        self.tree = STRtree(entries, node_capacity=node_capacity)
+
+    def select_binary_spatial_operator(self, operator, candidates):
+        second = operator.second_operand
+        if (not self._is_indexed(operator.expression) or
+                isinstance(second, expressions.Expression)):
+            return self.scan(operator, candidates)
+        shape = spatial.as_shape(second)
+        operator_type = operator.operator_type
+        if operator_type == operators.SpatialOperatorName.BBOX:
+            shape = spatial.envelope_to_shape(shape.envelope)
+        test = compilers.SPATIAL_FUNCTIONS[operator_type]
+        if operator_type == operators.SpatialOperatorName.DISJOINT:
+            intersecting = self.refine(
+                shape.envelope, candidates, shape, spatial.intersects)
+            result = self._with_geometry(candidates) - intersecting
+        else:
+            result = self.refine(shape.envelope, candidates, shape, test)
+        return result
+
+    def select_distance_operator(self, operator, candidates):
+        if not self._is_indexed(operator.expression):
+            return self.scan(operator, candidates)
+        shape = spatial.as_shape(operator.geometry)
+        distance = operator.get_srs_distance()
+        envelope = expand_envelope(shape.envelope, distance)
+        near = self.refine(
+            envelope, candidates, shape,
+            lambda value, other: spatial.distance(value, other) <= distance
+        )
+        if operator.operator_type == operators.DistanceOperatorName.BEYOND:
+            result = self._with_geometry(candidates) - near
+        else:
+            result = near
+        return result
+
+    def refine(self, envelope, candidates, shape, test):
+        """Run an exact spatial test on the features found in the index"""
+        result = set()
+        if is_empty_envelope(envelope):  # empty geometries match nothing
+            return result
+        for position in self.tree.query(envelope):
+            if candidates is None or position in candidates:
+                if test(self._shapes[position], shape):
+                    result.add(position)
+        return result
+
+    def _uses_index(self, operator):
+        if isinstance(operator, operators.BinarySpatialOperator):
+            result = (
+                self._is_indexed(operator.expression) and
+                not isinstance(operator.second_operand,
+                               expressions.Expression) and
+                operator.operator_type != (
+                    operators.SpatialOperatorName.DISJOINT)
+            )
+        elif isinstance(operator, operators.DistanceOperator):
+            result = (self._is_indexed(operator.expression) and
+                      operator.operator_type == (
+                          operators.DistanceOperatorName.DWITHIN))
+        else:
+            result = False
+        return result
+
+    def _is_indexed(self, expression):
+        return (isinstance(expression, expressions.ValueReference) and
+                expression.value == self.geometry_property)
+
+    def _with_geometry(self, candidates):
+        if candidates is None:
+            result = set(self._positions_with_geometry)
+        else:
+            result = candidates & self._positions_with_geometry
+        return result
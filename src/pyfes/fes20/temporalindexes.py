@@ -0,0 +1,170 @@
+"""Evaluation of FES v2.0 temporal filters over indexed feature collections.
+
+A ``TemporalIndex`` reads the times of a feature collection once and sorts
+them by their begins and by their ends. Every temporal relation bounds the
+begin or the end of the times that it matches, or both. Temporal operators
+on the indexed time property are thus answered by looking up the features
+whose begin or end falls within those bounds, whichever are fewer, and by
+running the exact temporal test on those candidates only. Other operators
+are evaluated as described in ``featureindexes``.
+
+The index does not change after it has been built, so it can be reused for
+any number of filters.
+
+Examples
+--------
+
+>>> from pyfes.fes20 import expressions
+>>> index = TemporalIndex([
+...     {"id": "a", "time": "2020-01-10T12:00:00Z"},
+...     {"id": "b", "time": "2021-06-01"},
+... ])
+>>> operator = operators.TemporalOperator(
+...     operator_type=operators.TemporalOperatorName.DURING,
+...     first_operand=expressions.ValueReference("time"),
+...     second_operand=expressions.Literal("2020-01-01/2020-02-01")
+... )
+>>> [feature["id"] for feature in index.filter(operator)]
+['a']
+
+"""
+
+import logging
+
+from . import compilers
+from . import expressions
+from . import operators
+from .featureindexes import FeatureIndex
+from .. import temporal
+from ..intervals import EndpointIndex
+
+logger = logging.getLogger(__name__)
+
+_NAMES = operators.TemporalOperatorName
+
+# the ranges of begins or ends, given as (side, lower, upper) with
+# inclusive bounds, that contain the times matching each relation with a
+# period. Relations with a single range match exactly the times in it
+_INDEX_RANGES = {
+    _NAMES.AFTER: lambda begin, end: [("begins", end + 1, None)],
+    _NAMES.BEFORE: lambda begin, end: [("ends", None, begin - 1)],
+    _NAMES.BEGINS: lambda begin, end: [
+        ("begins", begin, begin), ("ends", None, end - 1)],
+    _NAMES.BEGUN_BY: lambda begin, end: [
+        ("begins", begin, begin), ("ends", end + 1, None)],
+    _NAMES.T_CONTAINS: lambda begin, end: [
+        ("begins", None, begin - 1), ("ends", end + 1, None)],
+    _NAMES.T_EQUALS: lambda begin, end: [
+        ("begins", begin, begin), ("ends", end, end)],
+    _NAMES.T_OVERLAPS: lambda begin, end: [
+        ("begins", None, begin - 1), ("ends", begin + 1, end - 1)],
+    _NAMES.DURING: lambda begin, end: [
+        ("begins", begin + 1, end - 1), ("ends", begin + 1, end - 1)],
+    _NAMES.MEETS: lambda begin, end: [("ends", begin, begin)],
+    _NAMES.OVERLAPPED_BY: lambda begin, end: [
+        ("begins", begin + 1, end - 1), ("ends", end + 1, None)],
+    _NAMES.MET_BY: lambda begin, end: [("begins", end, end)],
+    _NAMES.ENDED_BY: lambda begin, end: [
+        ("begins", None, begin - 1), ("ends", end, end)],
+    _NAMES.ANY_INTERACTS: lambda begin, end: [
+        ("begins", None, end), ("ends", begin, None)],
+}
+
+
+def filter_features(features, operator, time_property="time", **kwargs):
+    """Return the features that match a filter.
+
+    This builds a throwaway index. Build a ``TemporalIndex`` instead when
+    the same features are going to be filtered more than once.
+
+    """
+
+    index = TemporalIndex(features, time_property=time_property, **kwargs)
+    return index.filter(operator)
+
+
+class TemporalIndex(FeatureIndex):
+    """A sorted-endpoint index for evaluating filters over features.
+
+    Parameters
+    ----------
+    features: iterable
+        The features to index. Features are mappings, just like the ones
+        that are accepted by the predicates of ``compilers.compile_filter``
+    time_property: str, optional
+        Name of the property that holds the time of the features, as any
+        value that ``temporal.as_period`` accepts. Features that have no
+        time can still be matched by non-temporal filters
+    kwargs:
+        Passed to ``compilers.PredicateCompiler``
+
+    """
+
+    _OPERATOR_SELECTOR_HANDLERS = dict(
+        FeatureIndex._OPERATOR_SELECTOR_HANDLERS)
+    _OPERATOR_SELECTOR_HANDLERS.update({
+        operators.TemporalOperator: "select_temporal_operator",
+    })
+
+    def __init__(self, features, time_property="time", **kwargs):
+        super(TemporalIndex, self).__init__(features, **kwargs)
+        self.time_property = time_property
+        getter = self.compiler.compile_value_reference(
+            expressions.ValueReference(time_property))
+        self._periods = [compilers.get_period(getter(feature)) for
+                         feature in self.features]
+        self.endpoints = EndpointIndex(
+            ((period.begin, period.end), position) for
+            position, period in enumerate(self._periods) if
+            period is not None
+        )
+
+    def select_temporal_operator(self, operator, candidates):
+        period = self._get_indexed_period(operator)
+        if period is None:
+            return self.scan(operator, candidates)
+        ranges = _INDEX_RANGES[operator.operator_type](
+            period.begin, period.end)
+        side, lower, upper = min(
+            ranges, key=lambda item: getattr(
+                self.endpoints, "count_" + item[0])(item[1], item[2]))
+        positions = getattr(self.endpoints, "query_" + side)(lower, upper)
+        if len(ranges) > 1:
+            relate = compilers.TEMPORAL_FUNCTIONS[operator.operator_type]
+            periods = self._periods
+            positions = [
+                position for position in positions if
+                relate(periods[position].begin, periods[position].end,
+                       period.begin, period.end)
+            ]
+        if candidates is None:
+            result = set(positions)
+        else:
+            result = candidates.intersection(positions)
+        return result
+
+    def _uses_index(self, operator):
+        return (isinstance(operator, operators.TemporalOperator) and
+                self._get_indexed_period(operator) is not None)
+
+    def _get_indexed_period(self, operator):
+        """Return the period that an indexed operator compares with.
+
+        Returns None when the operator cannot be answered by the index,
+        because it is not about the indexed property or because its second
+        operand is not a fixed time.
+
+        """
+
+        expression = operator.expression
+        if not (isinstance(expression, expressions.ValueReference) and
+                expression.value == self.time_property):
+            return None
+        second = operator.second_operand
+        if isinstance(second, temporal.TimePeriod):
+            result = second
+        elif isinstance(second, expressions.Literal):
+            result = compilers.get_period(second.value)
+        else:
+            result = None
+        return result
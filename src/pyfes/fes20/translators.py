@@ -0,0 +1,365 @@
+"""Translate FES v2.0 filters into SQL WHERE clauses.
+
+Literal values are never inlined in the generated SQL. They are returned as
+bind parameters instead, which keeps the generated SQL safe from injection
+and lets the database reuse its query plans for filters that only differ in
+their values.
+
+Examples
+--------
+
+>>> from pyfes.fes20 import expressions
+>>> operator = operators.BinaryComparisonOperator(
+...     operator_type=operators.BinaryComparisonName.PROPERTY_IS_LESS_THAN,
+...     first_expression=expressions.ValueReference("DEPTH"),
+...     second_expression=expressions.Literal("30")
+... )
+>>> translate_filter(operator)
+('"DEPTH" < ?', ['30'])
+
+"""
+
+import logging
+import re
+
+from . import expressions
+from . import operators
+from .compilers import as_bool
+from .. import errors
+from ..geometries import as_wkt
+from ..utils import as_text
+
+logger = logging.getLogger(__name__)
+
+SQL_COMPARISON_OPERATORS = {
+    operators.BinaryComparisonName.PROPERTY_IS_EQUAL_TO: "=",
+    operators.BinaryComparisonName.PROPERTY_IS_NOT_EQUAL_TO: "<>",
+    operators.BinaryComparisonName.PROPERTY_IS_LESS_THAN: "<",
+    operators.BinaryComparisonName.PROPERTY_IS_LESS_THAN_OR_EQUAL_TO: "<=",
+    operators.BinaryComparisonName.PROPERTY_IS_GREATER_THAN: ">",
+    operators.BinaryComparisonName.PROPERTY_IS_GREATER_THAN_OR_EQUAL_TO: ">=",
+}
+
+SQL_SPATIAL_FUNCTIONS = {
+    operators.SpatialOperatorName.EQUALS: "ST_Equals",
+    operators.SpatialOperatorName.DISJOINT: "ST_Disjoint",
+    operators.SpatialOperatorName.INTERSECTS: "ST_Intersects",
+    operators.SpatialOperatorName.TOUCHES: "ST_Touches",
+    operators.SpatialOperatorName.CROSSES: "ST_Crosses",
+    operators.SpatialOperatorName.WITHIN: "ST_Within",
+    operators.SpatialOperatorName.CONTAINS: "ST_Contains",
+    operators.SpatialOperatorName.OVERLAPS: "ST_Overlaps",
+}
+
+PARAMETER_STYLES = ("qmark", "format", "numeric", "named")
+
+SQL_LIKE_ESCAPE_CHAR = "\\"
+
+_FUNCTION_NAME_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_.]*$")
+
+
+def translate_filter(operator, **kwargs):
+    """Translate a filter into an SQL WHERE clause.
+
+    Parameters
+    ----------
+    operator: operators.NonIdOperator or tuple of operators.ResourceId
+        The filter to translate, as returned by ``parsers.parse_filter``
+    kwargs:
+        Passed to ``SqlTranslator``
+
+    Returns
+    -------
+    tuple
+        A two-element tuple with the SQL clause and its bind parameters.
+        Parameters are a list, except for the ``named`` parameter style,
+        which uses a dict
+
+    """
+
+    return SqlTranslator(**kwargs).translate(operator)
+
+
+def like_pattern_to_sql(pattern, wild_card="*", single_char=".",
+                        escape_char="\\"):
+    """Convert a PropertyIsLike pattern into an SQL LIKE pattern.
+
+    The resulting pattern uses ``SQL_LIKE_ESCAPE_CHAR`` as its escape
+    character.
+
+    """
+
+    result = ""
+    escaped = False
+    sql_special = ("%", "_", SQL_LIKE_ESCAPE_CHAR)
+    for char in pattern:
+        if escaped:
+            result += (SQL_LIKE_ESCAPE_CHAR + char if char in sql_special
+                       else char)
+            escaped = False
+        elif escape_char and char == escape_char:
+            escaped = True
+        elif wild_card and char == wild_card:
+            result += "%"
+        elif single_char and char == single_char:
+            result += "_"
+        elif char in sql_special:
+            result += SQL_LIKE_ESCAPE_CHAR + char
+        else:
+            result += char
+    return result
+
+
+def quote_identifier(name):
+    """Quote an SQL identifier"""
+    return '"{}"'.format(name.replace('"', '""'))
+
+
+class SqlTranslator(object):
+    """Translates FES operators into parameterized SQL.
+
+    Parameters
+    ----------
+    dialect: str, optional
+        Either ``postgis`` or ``spatialite``. It affects only the spatial
+        operators
+    paramstyle: str, optional
+        The DB-API placeholder style to use. One of ``qmark``, ``format``,
+        ``numeric`` or ``named``
+    column_map: dict, optional
+        Maps value references to SQL column expressions. These are inserted
+        in the generated SQL verbatim. Value references that are not
+        in the map are quoted and used as column names
+    functions: dict, optional
+        Maps FES function names to SQL function names. Functions must be
+        mapped in order to be translated
+    id_column: str, optional
+        Name of the column that holds the feature identifiers, which is
+        used when translating ``fes:ResourceId`` filters
+    srid: int, optional
+        Spatial reference identifier of geometries used in spatial
+        operators
+
+    """
+
+    DIALECTS = ("postgis", "spatialite")
+
+    _OPERATOR_TRANSLATOR_HANDLERS = {
+        operators.BinaryComparisonOperator: (
+            "translate_binary_comparison_operator"),
+        operators.LikeOperator: "translate_like_operator",
+        operators.BetweenComparisonOperator: (
+            "translate_between_comparison_operator"),
+        operators.NullOperator: "translate_null_operator",
+        operators.NilOperator: "translate_null_operator",
+        operators.BinarySpatialOperator: "translate_binary_spatial_operator",
+        operators.DistanceOperator: "translate_distance_operator",
+        operators.BinaryLogicOperator: "translate_binary_logic_operator",
+        operators.UnaryLogicOperator: "translate_unary_logic_operator",
+        operators.ResourceId: "translate_resource_id",
+    }
+
+    _EXPRESSION_TRANSLATOR_HANDLERS = {
+        expressions.ValueReference: "translate_value_reference",
+        expressions.Literal: "translate_literal",
+        expressions.Function: "translate_function",
+    }
+
+    def __init__(self, dialect="postgis", paramstyle="qmark",
+                 column_map=None, functions=None, id_column="id", srid=None):
+        if dialect not in self.DIALECTS:
+            raise ValueError("Invalid dialect: {!r}".format(dialect))
+        if paramstyle not in PARAMETER_STYLES:
+            raise ValueError("Invalid paramstyle: {!r}".format(paramstyle))
+        self.dialect = dialect
+        self.paramstyle = paramstyle
+        self.column_map = dict(column_map) if column_map is not None else {}
+        self.functions = dict(functions) if functions is not None else {}
+        self.id_column = id_column
+        self.srid = srid
+
+    def translate(self, operator):
+        """Translate the input operator into SQL.
+
+        Parameters
+        ----------
+        operator: operators.NonIdOperator or tuple of operators.ResourceId
+            The operator tree to translate
+
+        Returns
+        -------
+        tuple
+            A two-element tuple with the SQL clause and its bind parameters
+
+        """
+
+        params = []
+        sql = self._translate(operator, params)
+        if self.paramstyle == "named":
+            params = dict(("p{}".format(index), value) for
+                          index, value in enumerate(params, start=1))
+        return sql, params
+
+    def translate_expression(self, expression, params):
+        handler = self._get_handler(
+            expression, self._EXPRESSION_TRANSLATOR_HANDLERS)
+        return handler(expression, params)
+
+    def translate_value_reference(self, value_reference, params):
+        name = value_reference.value
+        try:
+            result = self.column_map[name]
+        except KeyError:
+            result = quote_identifier(name)
+        return result
+
+    def translate_literal(self, literal, params):
+        return self._bind(literal.value, params)
+
+    def translate_function(self, function, params):
+        try:
+            sql_name = self.functions[function.name]
+        except KeyError:
+            raise errors.InvalidExpressionError(
+                "Unknown function: {!r}".format(function.name))
+        if _FUNCTION_NAME_PATTERN.match(sql_name) is None:
+            raise errors.InvalidExpressionError(
+                "Invalid SQL function name: {!r}".format(sql_name))
+        arguments = [self.translate_expression(argument, params) for
+                     argument in function.arguments]
+        return "{}({})".format(sql_name, ", ".join(arguments))
+
+    def translate_binary_comparison_operator(self, operator, params):
+        first = self.translate_expression(operator.first_expression, params)
+        second = self.translate_expression(operator.second_expression, params)
+        if not as_bool(operator.match_case):
+            first = "LOWER({})".format(first)
+            second = "LOWER({})".format(second)
+        return "{} {} {}".format(
+            first, SQL_COMPARISON_OPERATORS[operator.operator_type], second)
+
+    def translate_like_operator(self, operator, params):
+        pattern = operator.second_expression
+        if not isinstance(pattern, expressions.Literal):
+            raise errors.InvalidOperatorError(
+                "PropertyIsLike patterns must be literals")
+        first = self.translate_expression(operator.first_expression, params)
+        sql_pattern = like_pattern_to_sql(
+            as_text(pattern.value),
+            wild_card=operator.wild_card,
+            single_char=operator.single_char,
+            escape_char=operator.escape_char
+        )
+        return "{} LIKE {} ESCAPE '{}'".format(
+            first, self._bind(sql_pattern, params), SQL_LIKE_ESCAPE_CHAR)
+
+    def translate_between_comparison_operator(self, operator, params):
+        return "{} BETWEEN {} AND {}".format(
+            self.translate_expression(operator.expression, params),
+            self.translate_expression(operator.lower_boundary, params),
+            self.translate_expression(operator.upper_boundary, params),
+        )
+
+    def translate_null_operator(self, operator, params):
+        return "{} IS NULL".format(
+            self.translate_expression(operator.expression, params))
+
+    def translate_binary_spatial_operator(self, operator, params):
+        first = self.translate_expression(operator.expression, params)
+        second = self._translate_geometry(operator.second_operand, params)
+        if operator.operator_type == operators.SpatialOperatorName.BBOX:
+            if self.dialect == "postgis":
+                result = "{} && {}".format(first, second)
+            else:
+                result = "MbrIntersects({}, {})".format(first, second)
+        else:
+            result = "{}({}, {})".format(
+                SQL_SPATIAL_FUNCTIONS[operator.operator_type], first, second)
+        return result
+
+    def translate_distance_operator(self, operator, params):
+        first = self.translate_expression(operator.expression, params)
+        second = self._translate_geometry(operator.geometry, params)
+        distance = self._bind(operator.get_srs_distance(), params)
+        is_within = (
+            operator.operator_type == operators.DistanceOperatorName.DWITHIN)
+        if self.dialect == "postgis":
+            result = "ST_DWithin({}, {}, {})".format(first, second, distance)
+            if not is_within:
+                result = "NOT {}".format(result)
+        else:
+            result = "ST_Distance({}, {}) {} {}".format(
+                first, second, "<=" if is_within else ">", distance)
+        return result
+
+    def translate_binary_logic_operator(self, operator, params):
+        return "({} {} {})".format(
+            self._translate(operator.first_expression, params),
+            operator.operator_type.value.upper(),
+            self._translate(operator.second_expression, params),
+        )
+
+    def translate_unary_logic_operator(self, operator, params):
+        """Translate ``fes:Not``.
+
+        SQL comparisons with NULL are unknown rather than false, and so are
+        their negations. The operand is thus coalesced to false first, so
+        that rows with NULL values match like they do in the compiler.
+
+        """
+
+        return "NOT COALESCE(({}), FALSE)".format(
+            self._translate(operator.expression, params))
+
+    def translate_resource_id(self, operator, params):
+        return self.translate_resource_ids([operator], params)
+
+    def translate_resource_ids(self, resource_ids, params):
+        placeholders = [self._bind(item.rid, params) for item in resource_ids]
+        return "{} IN ({})".format(
+            quote_identifier(self.id_column), ", ".join(placeholders))
+
+    def _translate(self, operator, params):
+        if isinstance(operator, (list, tuple)):
+            result = self.translate_resource_ids(operator, params)
+        elif isinstance(operator, expressions.Expression):
+            result = self.translate_expression(operator, params)
+        else:
+            handler = self._get_handler(
+                operator, self._OPERATOR_TRANSLATOR_HANDLERS)
+            result = handler(operator, params)
+        return result
+
+    def _translate_geometry(self, geometry, params):
+        if isinstance(geometry, expressions.Expression):
+            result = self.translate_expression(geometry, params)
+        else:
+            wkt = as_wkt(geometry)
+            if self.srid is None:
+                result = "ST_GeomFromText({})".format(self._bind(wkt, params))
+            else:
+                result = "ST_GeomFromText({}, {})".format(
+                    self._bind(wkt, params),
+                    self._bind(self.srid, params)
+                )
+        return result
+
+    def _bind(self, value, params):
+        params.append(value)
+        position = len(params)
+        return {
+            "qmark": "?",
+            "format": "%s",
+            "numeric": ":{}".format(position),
+            "named": ":p{}".format(position),
+        }[self.paramstyle]
+
+    def _get_handler(self, item, handlers):
+        for type_ in type(item).__mro__:
+            handler_name = handlers.get(type_)
+            if handler_name is not None:
+                break
+        else:
+            raise errors.InvalidOperatorError(
+                "Cannot translate {!r}".format(item))
+        return getattr(self, handler_name)
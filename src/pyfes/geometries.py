@@ -1,93 +1,1107 @@
+"""Geometry types and parsing of GML geometries.
+
+Geometries keep their coordinates in a flat ``array('d')``, interleaved as
+``x, y[, z]`` tuples, along with a few offsets that describe how the
+coordinates are grouped into points, lines, rings and polygons. Their
+bounds are computed when they are created. Their WKT and WKB
+representations are only built when they are first requested.
+
+Examples
+--------
+
+>>> line = Geometry(GeometryType.LINESTRING, [0, 0, 10, 5], srs="EPSG:4326")
+>>> line.bounds
+(0.0, 0.0, 10.0, 5.0)
+>>> line.wkt
+'LINESTRING (0 0, 10 5)'
+
+"""
+
+from array import array
+from enum import Enum
+import re
+import struct
+import sys
+
 from lxml import etree
 
+from . import errors
+from . import instrumentation
+from .srs import (
+    SpatialReference,
+    YX,
+    get_transformer,
+    resolve as resolve_srs,
+)
+
+DEFAULT_SRS = "http://www.opengis.net/def/crs/EPSG/0/4326"
+
+_WKT_TOKEN_PATTERN = re.compile(
+    r"[A-Za-z]+|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?|[(),]")
+
+
+class GeometryType(Enum):
+    POINT = "Point"
+    LINESTRING = "LineString"
+    POLYGON = "Polygon"
+    MULTIPOINT = "MultiPoint"
+    MULTILINESTRING = "MultiLineString"
+    MULTIPOLYGON = "MultiPolygon"
+    GEOMETRYCOLLECTION = "GeometryCollection"
+
+
+_WKB_TYPE_CODES = {
+    GeometryType.POINT: 1,
+    GeometryType.LINESTRING: 2,
+    GeometryType.POLYGON: 3,
+    GeometryType.MULTIPOINT: 4,
+    GeometryType.MULTILINESTRING: 5,
+    GeometryType.MULTIPOLYGON: 6,
+    GeometryType.GEOMETRYCOLLECTION: 7,
+}
+
+_WKT_GEOMETRY_TYPES = dict(
+    (type_.name, type_) for type_ in GeometryType)
+
+_MULTI_GEOMETRY_MEMBER_TYPES = {
+    GeometryType.MULTIPOINT: GeometryType.POINT,
+    GeometryType.MULTILINESTRING: GeometryType.LINESTRING,
+    GeometryType.MULTIPOLYGON: GeometryType.POLYGON,
+}
+
+_WKB_BYTE_ORDER = 1 if sys.byteorder == "little" else 0
+
+
+class Geometry(object):
+    """A geometry backed by a flat array of coordinates.
+
+    Geometries are not meant to be modified after they have been created.
+
+    Parameters
+    ----------
+    type_: GeometryType or str
+        The type of the geometry
+    coordinates: iterable, optional
+        The coordinates of the geometry, as a flat sequence of numbers.
+        Instances of ``array('d')`` are used as they are, without copying
+    part_offsets: sequence of int, optional
+        Indexes of the coordinate tuples where each point, line or ring of
+        the geometry starts, followed by the total number of coordinate
+        tuples. Defaults to a single part for points, lines and polygons
+        and to one part per coordinate tuple for multipoints
+    polygon_offsets: sequence of int, optional
+        Indexes of the parts where each polygon starts, followed by the
+        total number of parts. Only used by polygons and multipolygons.
+        Defaults to a single polygon for polygons and to one polygon per
+        ring for multipolygons
+    srs: str, optional
+        Name of the spatial reference system of the coordinates
+    dimensions: int, optional
+        Number of values in each coordinate tuple
+    members: iterable of Geometry, optional
+        The members of a geometry collection
+
+    """
+
+    __slots__ = ("type_", "coordinates", "part_offsets", "polygon_offsets",
+                 "srs", "dimensions", "members", "bounds", "_wkt", "_wkb")
+
+    def __init__(self, type_, coordinates=None, part_offsets=None,
+                 polygon_offsets=None, srs=None, dimensions=2, members=None):
+        self.type_ = GeometryType(type_)
+        if isinstance(coordinates, array) and coordinates.typecode == "d":
+            self.coordinates = coordinates
+        else:
+            self.coordinates = array(
+                "d", coordinates if coordinates is not None else [])
+        if len(self.coordinates) % dimensions != 0:
+            raise ValueError("Incomplete coordinate tuple")
+        self.srs = srs
+        self.dimensions = dimensions
+        self.members = tuple(members) if members is not None else ()
+        count = len(self.coordinates) // dimensions
+        if part_offsets is not None:
+            self.part_offsets = tuple(part_offsets)
+        elif count == 0:
+            self.part_offsets = (0,)
+        elif self.type_ == GeometryType.MULTIPOINT:
+            self.part_offsets = tuple(range(count + 1))
+        else:
+            self.part_offsets = (0, count)
+        part_count = len(self.part_offsets) - 1
+        if polygon_offsets is not None:
+            self.polygon_offsets = tuple(polygon_offsets)
+        elif self.type_ == GeometryType.POLYGON and part_count > 0:
+            self.polygon_offsets = (0, part_count)
+        elif self.type_ == GeometryType.MULTIPOLYGON:
+            self.polygon_offsets = tuple(range(part_count + 1))
+        else:
+            self.polygon_offsets = (0,)
+        self.bounds = self._get_bounds()
+        self._wkt = None
+        self._wkb = None
+
+    @classmethod
+    def trusted(cls, type_, coordinates, part_offsets, polygon_offsets,
+                srs=None, dimensions=2, members=(), bounds=None):
+        """Create a geometry out of values that are known to be valid.
+
+        Unlike the regular constructor, the coordinates are used as they
+        are, whatever their type, and no defaults are derived for the
+        offsets. This allows building geometries over a ``memoryview`` of
+        serialized coordinates without copying them. The bounds are only
+        computed when they are not given.
+
+        """
+
+        instance = cls.__new__(cls)
+        instance.type_ = type_
+        instance.coordinates = coordinates
+        instance.part_offsets = part_offsets
+        instance.polygon_offsets = polygon_offsets
+        instance.srs = srs
+        instance.dimensions = dimensions
+        instance.members = members
+        instance.bounds = (tuple(bounds) if bounds is not None else
+                           instance._get_bounds())
+        instance._wkt = None
+        instance._wkb = None
+        return instance
+
+    def __eq__(self, other):
+        if isinstance(other, Geometry):
+            return (self.type_ == other.type_ and
+                    self.srs == other.srs and
+                    self.dimensions == other.dimensions and
+                    self.coordinates == other.coordinates and
+                    self.part_offsets == other.part_offsets and
+                    self.polygon_offsets == other.polygon_offsets and
+                    self.members == other.members)
+        else:
+            return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __hash__(self):
+        return hash((Geometry, self.type_, self.srs,
+                     len(self.coordinates), self.bounds))
+
+    def __repr__(self):
+        return ("{0.__class__.__name__}(type_={0.type_!r}, srs={0.srs!r}, "
+                "bounds={0.bounds!r})".format(self))
+
+    def __getstate__(self):
+        state = dict((name, getattr(self, name)) for name in self.__slots__ if
+                     name not in ("_wkt", "_wkb"))
+        if not isinstance(self.coordinates, array):
+            state["coordinates"] = array("d", self.coordinates)
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self._wkt = None
+        self._wkb = None
+
+    @property
+    def is_empty(self):
+        return self.bounds is None
+
+    @property
+    def wkt(self):
+        """The WKT representation of the geometry, built on first use"""
+        if self._wkt is None:
+            self._wkt = _build_wkt(self)
+        return self._wkt
+
+    @property
+    def wkb(self):
+        """The ISO WKB representation of the geometry, built on first use"""
+        if self._wkb is None:
+            self._wkb = _build_wkb(self)
+        return self._wkb
+
+    def get_part(self, index):
+        """Return the coordinates of a part as a list of ``(x, y)`` tuples"""
+        dimensions = self.dimensions
+        start = self.part_offsets[index] * dimensions
+        end = self.part_offsets[index + 1] * dimensions
+        coordinates = self.coordinates
+        return list(zip(coordinates[start:end:dimensions],
+                        coordinates[start + 1:end:dimensions]))
+
+    def iter_parts(self):
+        for index in range(len(self.part_offsets) - 1):
+            yield self.get_part(index)
+
+    def iter_members(self):
+        """Yield the geometries that make up a multi geometry"""
+        if self.type_ == GeometryType.GEOMETRYCOLLECTION:
+            return iter(self.members)
+        return _iter_members(self, _MULTI_GEOMETRY_MEMBER_TYPES[self.type_])
+
+    def iter_polygons(self):
+        """Yield each polygon as a list of rings of ``(x, y)`` tuples"""
+        offsets = self.polygon_offsets
+        for index in range(len(offsets) - 1):
+            yield [self.get_part(part) for part in
+                   range(offsets[index], offsets[index + 1])]
+
+    def _get_bounds(self):
+        if self.type_ == GeometryType.GEOMETRYCOLLECTION:
+            bounds = [member.bounds for member in self.members if
+                      member.bounds is not None]
+            if len(bounds) == 0:
+                return None
+            return (min(item[0] for item in bounds),
+                    min(item[1] for item in bounds),
+                    max(item[2] for item in bounds),
+                    max(item[3] for item in bounds))
+        if len(self.coordinates) == 0:
+            return None
+        xs = self.coordinates[0::self.dimensions]
+        ys = self.coordinates[1::self.dimensions]
+        return min(xs), min(ys), max(xs), max(ys)
+
+
+def parse_gml(gml_element, srs=None):
+    """Parse a GML geometry element into a ``Geometry``.
+
+    Both GML 3.2 and GML 2 (or 3.1) geometries are supported.
 
-def parse_gml(gml_element):
-    """Parse a GML element into a WKT representation."""
-    qname = etree.QName(gml_element)
+    Parameters
+    ----------
+    gml_element: etree.Element
+        The GML geometry element
+    srs: str, optional
+        The SRS to use when the element does not have a ``srsName``
+        attribute. Members of multi geometries inherit the SRS of their
+        parent. Defaults to EPSG:4326, in latitude, longitude order
+
+    Returns
+    -------
+    Geometry
+        The parsed geometry. Its coordinates are always in x, y order and
+        its ``srs`` is the canonical name of the reference system, as
+        returned by ``srs.resolve``
+
+    """
+
+    if not instrumentation.is_enabled():
+        return _parse_gml_element(gml_element, srs)
+    with instrumentation.timer("gml.parse"):
+        result = _parse_gml_element(gml_element, srs)
+    instrumentation.increment("gml.positions", _count_positions(result))
+    return result
+
+
+def _parse_gml_element(gml_element, srs):
+    """Parse a GML geometry element, without reporting any metrics"""
+    name = etree.QName(gml_element).localname
     try:
-        handler = {
-            "Point": parse_gml_point,
-            "LineString": parse_gml_linestring,
-            "Polygon": parse_gml_polygon,
-            "Box": parse_gml_box,
-        }[qname]
+        handler = _GML_PARSERS[name]
     except KeyError:
-        raise RuntimeError("Invalid GML geometry element: {!r}".format(qname))
+        raise RuntimeError("Invalid GML geometry element: {!r}".format(name))
     else:
-        return handler(gml_element)
+        return handler(gml_element, srs=srs)
+
+
+def _count_positions(geometry):
+    return len(geometry.coordinates) // geometry.dimensions + sum(
+        _count_positions(member) for member in geometry.members)
+
+
+def parse_gml_point(gml_element, srs=None):
+    reference = _get_srs(gml_element, srs)
+    coordinates, dimensions = get_ordered_coordinates(gml_element, reference)
+    if len(coordinates) != dimensions:
+        raise RuntimeError("Invalid GML point")
+    return Geometry(GeometryType.POINT, coordinates, srs=reference.name,
+                    dimensions=dimensions)
+
+
+def parse_gml_linestring(gml_element, srs=None):
+    reference = _get_srs(gml_element, srs)
+    coordinates, dimensions = get_ordered_coordinates(gml_element, reference)
+    return Geometry(GeometryType.LINESTRING, coordinates,
+                    srs=reference.name, dimensions=dimensions)
+
+
+def parse_gml_curve(gml_element, srs=None):
+    """Parse a curve made of ``gml:LineStringSegment`` elements"""
+    reference = _get_srs(gml_element, srs)
+    coordinates = array("d")
+    dimensions = None
+    for segment in _SEGMENTS_XPATH(gml_element):
+        segment_coordinates, dimensions = get_ordered_coordinates(
+            segment, reference)
+        # consecutive segments share their end and start points
+        skip = dimensions if len(coordinates) > 0 else 0
+        coordinates.extend(segment_coordinates[skip:])
+    if dimensions is None:
+        raise RuntimeError("Invalid GML curve")
+    return Geometry(GeometryType.LINESTRING, coordinates,
+                    srs=reference.name, dimensions=dimensions)
+
+
+def parse_gml_polygon(gml_element, srs=None):
+    reference = _get_srs(gml_element, srs)
+    exteriors = _EXTERIOR_RING_XPATH(gml_element)
+    if len(exteriors) != 1:
+        raise RuntimeError("Invalid GML polygon")
+    coordinates = array("d")
+    part_offsets = [0]
+    dimensions = None
+    for ring in exteriors + _INTERIOR_RINGS_XPATH(gml_element):
+        ring_coordinates, ring_dimensions = get_ordered_coordinates(
+            ring, reference)
+        if dimensions not in (None, ring_dimensions):
+            raise RuntimeError("Mixed coordinate dimensions in GML polygon")
+        dimensions = ring_dimensions
+        coordinates.extend(ring_coordinates)
+        part_offsets.append(len(coordinates) // dimensions)
+    return Geometry(GeometryType.POLYGON, coordinates,
+                    part_offsets=part_offsets, srs=reference.name,
+                    dimensions=dimensions)
+
+
+def parse_gml_surface(gml_element, srs=None):
+    """Parse a surface made of a single ``gml:PolygonPatch``"""
+    reference = _get_srs(gml_element, srs)
+    patches = _PATCHES_XPATH(gml_element)
+    if len(patches) != 1:
+        raise RuntimeError("Only GML surfaces with one patch are supported")
+    return parse_gml_polygon(patches[0], srs=reference)
+
+
+def parse_gml_envelope(gml_element, srs=None):
+    """Parse a ``gml:Envelope`` or a ``gml:Box`` into a rectangle"""
+    reference = _get_srs(gml_element, srs)
+    corners = _CORNERS_XPATH(gml_element)
+    if len(corners) == 2:
+        coordinates = array("d")
+        dimensions = None
+        for corner in corners:
+            values = _get_numbers(corner.text)
+            dimensions = _get_srs_dimension(corner, len(values))
+            coordinates.extend(
+                _order_coordinates(reference, values, dimensions))
+    else:
+        coordinates, dimensions = get_ordered_coordinates(
+            gml_element, reference)
+    if len(coordinates) != 2 * dimensions:
+        raise RuntimeError("Invalid GML envelope")
+    xs = coordinates[0::dimensions]
+    ys = coordinates[1::dimensions]
+    minx, miny, maxx, maxy = min(xs), min(ys), max(xs), max(ys)
+    return Geometry(
+        GeometryType.POLYGON,
+        [minx, miny, maxx, miny, maxx, maxy, minx, maxy, minx, miny],
+        srs=reference.name
+    )
 
 
-def parse_gml_point(gml_element):
-    coordinates, srs = get_ordered_coordinates(gml_element)
-    wkt = "POINT ({x} {y})".format(x=coordinates[0], y=coordinates[1])
-    return wkt, srs
+def parse_gml_multipoint(gml_element, srs=None):
+    return _parse_gml_multi_geometry(
+        gml_element, srs, GeometryType.MULTIPOINT, GeometryType.POINT,
+        _POINT_MEMBERS_XPATH
+    )
+
+
+def parse_gml_multicurve(gml_element, srs=None):
+    return _parse_gml_multi_geometry(
+        gml_element, srs, GeometryType.MULTILINESTRING,
+        GeometryType.LINESTRING, _CURVE_MEMBERS_XPATH
+    )
 
 
-def parse_gml_linestring(gml_element):
-    coordinates, srs = get_ordered_coordinates(gml_element)
-    wkt = "LINESTRING ("
-    for x_coord_index in range(0, len(coordinates), 2):
-        x = coordinates[x_coord_index]
-        y = coordinates[x_coord_index + 1]
-        wkt += "{} {},".format(x, y)
-    wkt = wkt[:-1] + ")"
-    return wkt
+def parse_gml_multisurface(gml_element, srs=None):
+    return _parse_gml_multi_geometry(
+        gml_element, srs, GeometryType.MULTIPOLYGON, GeometryType.POLYGON,
+        _SURFACE_MEMBERS_XPATH
+    )
 
 
-def parse_gml_polygon(gml_element):
-    raise NotImplementedError
+def parse_gml_multigeometry(gml_element, srs=None):
+    reference = _get_srs(gml_element, srs)
+    members = [_parse_gml_element(member, reference) for member in
+               _GEOMETRY_MEMBERS_XPATH(gml_element)]
+    return Geometry(GeometryType.GEOMETRYCOLLECTION, srs=reference.name,
+                    members=members)
 
 
-def parse_gml_box(gml_element):
-    coordinates, srs = _get_gml_coordinates(gml_element)
-    wkt = "POLYGON (("
-    for x_coord_index in range(0, len(coordinates), 2):
-        x = coordinates[x_coord_index]
-        y = coordinates[x_coord_index + 1]
-        wkt += "{} {},".format(x, y)
-    wkt += "{first_x} {first_y}))".format(
-        first_x=coordinates[0],
-        first_y=coordinates[1]
+def _parse_gml_multi_geometry(gml_element, srs, type_, member_type,
+                              members_xpath):
+    """Parse the members of a multi geometry and join their coordinates"""
+    reference = _get_srs(gml_element, srs)
+    coordinates = array("d")
+    part_offsets = [0]
+    polygon_offsets = [0]
+    dimensions = 2
+    for index, element in enumerate(members_xpath(gml_element)):
+        member = _parse_gml_element(element, reference)
+        if member.type_ != member_type:
+            raise RuntimeError(
+                "Invalid member of GML {}: {!r}".format(
+                    type_.value, member.type_.value))
+        if index > 0 and member.dimensions != dimensions:
+            raise RuntimeError("Mixed coordinate dimensions in GML geometry")
+        dimensions = member.dimensions
+        start = part_offsets[-1]
+        coordinates.extend(member.coordinates)
+        part_offsets.extend(start + offset for offset in
+                            member.part_offsets[1:])
+        polygon_offsets.append(len(part_offsets) - 1)
+    return Geometry(
+        type_,
+        coordinates,
+        part_offsets=part_offsets,
+        polygon_offsets=(polygon_offsets if
+                         type_ == GeometryType.MULTIPOLYGON else None),
+        srs=reference.name,
+        dimensions=dimensions
     )
-    return wkt
 
 
-def get_ordered_coordinates(gml_element):
-    coordinates, srs = _get_gml_coordinates(gml_element)
-    ordered_coordinates = _order_coordinates(srs, coordinates)
-    return ordered_coordinates, srs
+def get_ordered_coordinates(gml_element, srs):
+    """Return the coordinates of an element in x, y order.
+
+    Parameters
+    ----------
+    gml_element: etree.Element
+        An element with a single sequence of coordinates
+    srs: str or srs.SpatialReference
+        The SRS that the coordinates are written in
+
+    Returns
+    -------
+    tuple
+        An ``array('d')`` with the coordinates and the number of values in
+        each coordinate tuple
+
+    """
+
+    if not isinstance(srs, SpatialReference):
+        srs = resolve_srs(srs)
+    coordinates, dimensions = _get_gml_coordinates(gml_element)
+    return _order_coordinates(srs, coordinates, dimensions), dimensions
+
+
+def _get_srs(gml_element, default=None):
+    """Resolve the SRS of an element, falling back to an inherited one"""
+    name = gml_element.get("srsName")
+    if name is None:
+        if isinstance(default, SpatialReference):
+            return default
+        name = default or DEFAULT_SRS
+    return resolve_srs(name)
 
 
-def _get_axes_order(srs):
-    order = {
-        "http://www.opengis.net/def/crs/EPSG/0/4326": "yx",
-    }
-    return order.get(srs, "yx")
+def _get_srs_dimension(gml_element, default=2):
+    """Find the srsDimension of an element or of its closest ancestor"""
+    for element in _SRS_DIMENSION_XPATH(gml_element):
+        return int(element.get("srsDimension"))
+    return default
 
 
 def _get_gml_coordinates(gml_element):
-    namespaces = {
-        "gml32": "http://www.opengis.net/gml/3.2",
-        "gml2": "http://www.opengis.net/gml",
-    }
-    srs = gml_element.get(
-        "srsName", "http://www.opengis.net/def/crs/EPSG/0/4326")
+    """Read the coordinates of a single point, line or ring element.
+
+    Coordinates may be given in a ``gml:posList``, in a sequence of
+    ``gml:pos`` elements or ``gml:pointProperty`` points, in GML 2
+    ``gml:coordinates`` or in GML 2 ``gml:coord`` elements.
+
+    """
+
+    pos_lists = _POS_LIST_XPATH(gml_element)
+    if len(pos_lists) > 0:
+        coordinates = _get_numbers(pos_lists[0].text)
+        dimensions = _get_srs_dimension(pos_lists[0])
+        return coordinates, dimensions
+    positions = _POS_XPATH(gml_element)
+    if len(positions) > 0:
+        coordinates = array("d")
+        for position in positions:
+            coordinates.extend(_get_numbers(position.text))
+        dimensions = _get_srs_dimension(
+            positions[0], len(coordinates) // len(positions))
+        return coordinates, dimensions
+    coordinates_elements = _COORDINATES_XPATH(gml_element)
+    if len(coordinates_elements) > 0:
+        return _parse_coordinates_element(coordinates_elements[0])
+    coords = _COORD_XPATH(gml_element)
+    if len(coords) > 0:
+        coordinates = array("d")
+        for coord in coords:
+            coordinates.extend(
+                _get_numbers(" ".join(_COORD_VALUES_XPATH(coord))))
+        return coordinates, len(coordinates) // len(coords)
+    raise RuntimeError("Invalid GML element")
+
+
+def _parse_coordinates_element(element):
+    """Parse a GML 2 ``gml:coordinates`` element.
+
+    Its ``decimal``, ``cs`` and ``ts`` attributes define the decimal point,
+    the separator between the values of a coordinate tuple and the
+    separator between tuples.
+
+    """
+
+    text = element.text or ""
+    decimal = element.get("decimal", ".")
+    coordinate_separator = element.get("cs", ",")
+    tuple_separator = element.get("ts", " ")
+    if tuple_separator.isspace():
+        tuples = text.split()
+    else:
+        tuples = [item for item in text.split(tuple_separator) if
+                  not item.isspace() and item != ""]
+    if len(tuples) == 0:
+        raise RuntimeError("Invalid GML coordinates: {!r}".format(text))
+    values = []
+    for tuple_ in tuples:
+        values.extend(tuple_.strip().split(coordinate_separator))
+    if decimal != ".":
+        values = [value.replace(decimal, ".") for value in values]
+    dimensions = len(values) // len(tuples)
+    return _get_numbers(" ".join(values)), dimensions
+
+
+def _get_numbers(text):
+    try:
+        return array("d", [float(value) for value in (text or "").split()])
+    except ValueError:
+        raise RuntimeError("Invalid GML coordinates: {!r}".format(text))
+
+
+def _order_coordinates(reference, coordinates, dimensions):
+    """Swap the first two values of each coordinate tuple, if needed"""
+    ordered = array("d", coordinates)
+    if reference.axis_order == YX:
+        ordered[0::dimensions] = coordinates[1::dimensions]
+        ordered[1::dimensions] = coordinates[0::dimensions]
+    return ordered
+
+
+def _gml_xpath(path):
+    """Compile an XPath that matches the path in all GML namespaces.
+
+    The path is written with a ``gml:`` prefix, which is expanded into a
+    union of the same path in each GML namespace.
+
+    """
+
+    paths = [path.replace("gml:", "{}:".format(prefix)) for
+             prefix in _GML_NAMESPACES]
+    return etree.XPath(" | ".join(paths), namespaces=_GML_NAMESPACES)
+
+
+_GML_NAMESPACES = {
+    "gml32": "http://www.opengis.net/gml/3.2",
+    "gml": "http://www.opengis.net/gml",
+}
+
+_POS_LIST_XPATH = _gml_xpath("gml:posList")
+_POS_XPATH = _gml_xpath("gml:pos | gml:pointProperty/gml:Point/gml:pos")
+_COORDINATES_XPATH = _gml_xpath("gml:coordinates")
+_COORD_XPATH = _gml_xpath("gml:coord")
+_COORD_VALUES_XPATH = _gml_xpath("gml:X/text() | gml:Y/text() | gml:Z/text()")
+_CORNERS_XPATH = _gml_xpath("gml:lowerCorner | gml:upperCorner")
+_SEGMENTS_XPATH = _gml_xpath("gml:segments/gml:LineStringSegment")
+_PATCHES_XPATH = _gml_xpath("gml:patches/gml:PolygonPatch")
+_EXTERIOR_RING_XPATH = _gml_xpath(
+    "gml:exterior/gml:LinearRing | gml:outerBoundaryIs/gml:LinearRing")
+_INTERIOR_RINGS_XPATH = _gml_xpath(
+    "gml:interior/gml:LinearRing | gml:innerBoundaryIs/gml:LinearRing")
+_POINT_MEMBERS_XPATH = _gml_xpath("gml:pointMember/* | gml:pointMembers/*")
+_CURVE_MEMBERS_XPATH = _gml_xpath(
+    "gml:curveMember/* | gml:curveMembers/* | gml:lineStringMember/*")
+_SURFACE_MEMBERS_XPATH = _gml_xpath(
+    "gml:surfaceMember/* | gml:surfaceMembers/* | gml:polygonMember/*")
+_GEOMETRY_MEMBERS_XPATH = _gml_xpath(
+    "gml:geometryMember/* | gml:geometryMembers/*")
+_SRS_DIMENSION_XPATH = etree.XPath("ancestor-or-self::*[@srsDimension][1]")
+
+_GML_PARSERS = {
+    "Point": parse_gml_point,
+    "LineString": parse_gml_linestring,
+    "LinearRing": parse_gml_linestring,
+    "Curve": parse_gml_curve,
+    "Polygon": parse_gml_polygon,
+    "Surface": parse_gml_surface,
+    "Envelope": parse_gml_envelope,
+    "Box": parse_gml_envelope,
+    "MultiPoint": parse_gml_multipoint,
+    "MultiCurve": parse_gml_multicurve,
+    "MultiLineString": parse_gml_multicurve,
+    "MultiSurface": parse_gml_multisurface,
+    "MultiPolygon": parse_gml_multisurface,
+    "MultiGeometry": parse_gml_multigeometry,
+}
+
+
+def as_wkt(geometry):
+    """Return the WKT of a geometry operand, which may already be WKT"""
+    return geometry.wkt if isinstance(geometry, Geometry) else geometry
+
+
+def make_box(minx, miny, maxx, maxy, srs=None):
+    """Return a rectangular polygon with the input bounds"""
+    return Geometry(
+        GeometryType.POLYGON,
+        [minx, miny, maxx, miny, maxx, maxy, minx, maxy, minx, miny],
+        srs=srs
+    )
+
+
+def reproject(geometry, target_srs):
+    """Transform the coordinates of a geometry into another SRS.
+
+    All of the x and y values of the geometry are transformed in a single
+    call to a memoized ``pyproj`` transformer. This requires pyproj to be
+    installed, unless the geometry is already in the target SRS.
+
+    Parameters
+    ----------
+    geometry: Geometry
+        The geometry to reproject. Geometries without an SRS are assumed to
+        be in EPSG:4326
+    target_srs: str
+        Name of the SRS to transform the geometry into
+
+    Returns
+    -------
+    Geometry
+        A new geometry, or the input geometry if it is already in the
+        target SRS
+
+    """
+
+    source = resolve_srs(geometry.srs or DEFAULT_SRS).name
+    target = resolve_srs(target_srs).name
+    if source == target:
+        return geometry
+    if geometry.type_ == GeometryType.GEOMETRYCOLLECTION:
+        return Geometry(
+            geometry.type_,
+            srs=target,
+            members=[reproject(member, target) for
+                     member in geometry.members]
+        )
+    dimensions = geometry.dimensions
+    coordinates = array("d", geometry.coordinates)
+    if len(coordinates) > 0:
+        transformer = get_transformer(source, target)
+        xs, ys = transformer.transform(coordinates[0::dimensions],
+                                       coordinates[1::dimensions])
+        coordinates[0::dimensions] = array("d", xs)
+        coordinates[1::dimensions] = array("d", ys)
+    return Geometry(
+        geometry.type_,
+        coordinates,
+        part_offsets=geometry.part_offsets,
+        polygon_offsets=geometry.polygon_offsets,
+        srs=target,
+        dimensions=dimensions
+    )
+
+
+def format_number(value):
+    """Format a coordinate value with as few digits as are needed"""
+    text = repr(value)
+    return text[:-2] if text.endswith(".0") else text
+
+
+def _build_wkt(geometry):
+    type_ = geometry.type_
+    name = type_.name
+    if geometry.dimensions == 3:
+        name += " Z"
+    elif geometry.dimensions == 4:
+        name += " ZM"
+    if geometry.is_empty:
+        return "{} EMPTY".format(name)
+    if type_ == GeometryType.GEOMETRYCOLLECTION:
+        body = ", ".join(member.wkt for member in geometry.members)
+    elif type_ == GeometryType.POINT:
+        body = _format_wkt_part(geometry, 0)
+    elif type_ in (GeometryType.LINESTRING, GeometryType.MULTIPOINT,
+                   GeometryType.MULTILINESTRING):
+        parts = ["({})".format(_format_wkt_part(geometry, index)) for
+                 index in range(len(geometry.part_offsets) - 1)]
+        body = ", ".join(parts)
+        if type_ == GeometryType.LINESTRING:
+            body = body[1:-1]
+    else:
+        polygons = []
+        offsets = geometry.polygon_offsets
+        for index in range(len(offsets) - 1):
+            rings = ["({})".format(_format_wkt_part(geometry, part)) for
+                     part in range(offsets[index], offsets[index + 1])]
+            polygons.append("({})".format(", ".join(rings)))
+        body = ", ".join(polygons)
+        if type_ == GeometryType.POLYGON:
+            body = body[1:-1]
+    return "{} ({})".format(name, body)
+
+
+def _format_wkt_part(geometry, index):
+    dimensions = geometry.dimensions
+    start = geometry.part_offsets[index] * dimensions
+    end = geometry.part_offsets[index + 1] * dimensions
+    values = [format_number(value) for value in
+              geometry.coordinates[start:end]]
+    return ", ".join(" ".join(values[position:position + dimensions]) for
+                     position in range(0, len(values), dimensions))
+
+
+def _build_wkb(geometry):
+    type_ = geometry.type_
+    code = _WKB_TYPE_CODES[type_] + {2: 0, 3: 1000, 4: 3000}[
+        geometry.dimensions]
+    header = struct.pack("=BI", _WKB_BYTE_ORDER, code)
+    if type_ == GeometryType.GEOMETRYCOLLECTION:
+        chunks = [struct.pack("=I", len(geometry.members))]
+        chunks.extend(member.wkb for member in geometry.members)
+    elif type_ == GeometryType.POINT:
+        if geometry.is_empty:
+            chunks = [struct.pack("={}d".format(geometry.dimensions),
+                                  *[float("nan")] * geometry.dimensions)]
+        else:
+            chunks = [_get_wkb_coordinates(geometry, 0)]
+    elif type_ == GeometryType.LINESTRING:
+        chunks = [_get_wkb_coordinates(geometry, 0, with_count=True)]
+    elif type_ == GeometryType.POLYGON:
+        part_count = len(geometry.part_offsets) - 1
+        chunks = [struct.pack("=I", part_count)]
+        chunks.extend(_get_wkb_coordinates(geometry, index, with_count=True)
+                      for index in range(part_count))
+    else:
+        members = list(geometry.iter_members())
+        chunks = [struct.pack("=I", len(members))]
+        chunks.extend(member.wkb for member in members)
+    return header + b"".join(chunks)
+
+
+def _iter_members(geometry, member_type):
+    """Yield the single geometries that make up a multi geometry"""
+    dimensions = geometry.dimensions
+    if member_type == GeometryType.POLYGON:
+        groups = geometry.polygon_offsets
+    else:
+        groups = tuple(range(len(geometry.part_offsets)))
+    for index in range(len(groups) - 1):
+        offsets = geometry.part_offsets[groups[index]:groups[index + 1] + 1]
+        start = offsets[0]
+        yield Geometry(
+            member_type,
+            geometry.coordinates[start * dimensions:offsets[-1] * dimensions],
+            part_offsets=[offset - start for offset in offsets],
+            srs=geometry.srs,
+            dimensions=dimensions
+        )
+
+
+def _get_wkb_coordinates(geometry, index, with_count=False):
+    dimensions = geometry.dimensions
+    start = geometry.part_offsets[index]
+    end = geometry.part_offsets[index + 1]
+    values = geometry.coordinates[start * dimensions:end * dimensions]
     try:
-        coordinates = gml_element.xpath(
-            "gml32:pos/text()", namespaces=namespaces)[0]
-    except IndexError:
+        data = values.tobytes()
+    except AttributeError:  # python 2 arrays have no tobytes()
+        data = values.tostring()
+    if with_count:
+        data = struct.pack("=I", end - start) + data
+    return data
+
+
+def parse_wkt(wkt, srs=None):
+    """Parse a WKT geometry into a ``Geometry``.
+
+    Parameters
+    ----------
+    wkt: str
+        The WKT representation of a geometry. M values are discarded
+    srs: str, optional
+        The SRS of the geometry
+
+    Raises
+    ------
+    errors.ValidationError
+        If the input is not valid WKT
+
+    """
+
+    reader = _WktReader(wkt)
+    result = reader.read_geometry(srs)
+    if reader.position != len(reader.tokens):
+        raise errors.ValidationError(
+            "Unexpected content after WKT geometry: {!r}".format(wkt))
+    return result
+
+
+class _WktReader(object):
+    """A recursive descent reader of WKT geometries"""
+
+    def __init__(self, wkt):
+        self.wkt = wkt
+        self.tokens = _WKT_TOKEN_PATTERN.findall(wkt)
+        self.position = 0
+        if sum(len(token) for token in self.tokens) != len(
+                "".join(wkt.split())):
+            raise errors.ValidationError(
+                "Invalid characters in WKT: {!r}".format(wkt))
+
+    def next(self):
         try:
-            coordinates = gml_element.xpath(
-                "gml2:coordinates/text()", namespaces=namespaces)[0]
-            coordinates = coordinates.replace(",", " ")
+            token = self.tokens[self.position]
         except IndexError:
-            raise RuntimeError("Invalid GML element")
-    return coordinates.split(), srs
+            raise errors.ValidationError(
+                "Unexpected end of WKT: {!r}".format(self.wkt))
+        self.position += 1
+        return token.upper()
+
+    def peek(self):
+        token = self.next()
+        self.position -= 1
+        return token
+
+    def expect(self, token):
+        if self.next() != token:
+            raise errors.ValidationError(
+                "Expected {!r} in WKT: {!r}".format(token, self.wkt))
+
+    def read_geometry(self, srs):
+        name = self.next()
+        try:
+            type_ = _WKT_GEOMETRY_TYPES[name]
+        except KeyError:
+            raise errors.ValidationError(
+                "Unsupported WKT geometry type: {!r}".format(name))
+        tag = self.next() if self.peek() in ("Z", "M", "ZM") else None
+        if self.peek() == "EMPTY":
+            self.next()
+            dimensions = {None: 2, "Z": 3, "M": 2, "ZM": 4}[tag]
+            return Geometry(type_, srs=srs, dimensions=dimensions)
+        if type_ == GeometryType.GEOMETRYCOLLECTION:
+            members = [self.read_geometry(srs) for _ in self.iter_items()]
+            return Geometry(type_, srs=srs, members=members)
+        builder = _WktBuilder(tag)
+        if type_ == GeometryType.POINT:
+            self.expect("(")
+            self.read_coordinate(builder)
+            self.expect(")")
+            builder.end_part()
+        elif type_ == GeometryType.LINESTRING:
+            self.read_part(builder)
+        elif type_ == GeometryType.POLYGON:
+            self.read_polygon(builder)
+        else:
+            member_type = _MULTI_GEOMETRY_MEMBER_TYPES[type_]
+            for _ in self.iter_items():
+                if self.peek() == "EMPTY":
+                    self.next()
+                elif member_type == GeometryType.POLYGON:
+                    self.read_polygon(builder)
+                elif member_type == GeometryType.LINESTRING:
+                    self.read_part(builder)
+                else:
+                    # points of a MULTIPOINT may or may not be parenthesized
+                    parenthesized = self.peek() == "("
+                    if parenthesized:
+                        self.next()
+                    self.read_coordinate(builder)
+                    if parenthesized:
+                        self.expect(")")
+                    builder.end_part()
+        return Geometry(
+            type_,
+            builder.coordinates,
+            part_offsets=builder.part_offsets,
+            polygon_offsets=(builder.polygon_offsets if
+                             type_ == GeometryType.MULTIPOLYGON else None),
+            srs=srs,
+            dimensions=builder.dimensions
+        )
+
+    def read_polygon(self, builder):
+        for _ in self.iter_items():
+            self.read_part(builder)
+        builder.end_polygon()
+
+    def read_part(self, builder):
+        for _ in self.iter_items():
+            self.read_coordinate(builder)
+        builder.end_part()
+
+    def read_coordinate(self, builder):
+        values = []
+        while self.peek() not in ("(", ")", ","):
+            try:
+                values.append(float(self.next()))
+            except ValueError:
+                raise errors.ValidationError(
+                    "Invalid coordinate in WKT: {!r}".format(self.wkt))
+        try:
+            builder.add_coordinate(values)
+        except ValueError:
+            raise errors.ValidationError(
+                "Invalid coordinate in WKT: {!r}".format(self.wkt))
+
+    def iter_items(self):
+        """Iterate over the comma separated items of a parenthesized list"""
+        self.expect("(")
+        while True:
+            yield
+            token = self.next()
+            if token == ")":
+                break
+            elif token != ",":
+                raise errors.ValidationError(
+                    "Expected ',' or ')' in WKT: {!r}".format(self.wkt))
+
+
+class _WktBuilder(object):
+    """Accumulates the coordinates and offsets of WKT and GeoJSON geometries"""
 
+    def __init__(self, tag):
+        self.tag = tag
+        self.dimensions = {None: None, "Z": 3, "M": 2, "ZM": 4}[tag]
+        self.coordinates = array("d")
+        self.part_offsets = [0]
+        self.polygon_offsets = [0]
 
-def _order_coordinates(srs, coordinates):
-    if _get_axes_order(srs) == "yx":
-        ordered = list(reversed(coordinates))
+    def add_coordinate(self, values):
+        if self.tag == "M":
+            values = values[:2] if len(values) == 3 else values
+        if self.dimensions is None:
+            self.dimensions = len(values)
+        if len(values) != self.dimensions or not 2 <= len(values) <= 4:
+            raise ValueError("Invalid coordinate dimensions")
+        self.coordinates.extend(values)
+
+    def end_part(self):
+        self.part_offsets.append(
+            len(self.coordinates) // (self.dimensions or 2))
+
+    def end_polygon(self):
+        self.polygon_offsets.append(len(self.part_offsets) - 1)
+
+
+def parse_geojson(data, srs=None):
+    """Parse a GeoJSON geometry object into a ``Geometry``.
+
+    Parameters
+    ----------
+    data: dict
+        The decoded GeoJSON geometry
+    srs: str, optional
+        The SRS of the geometry. GeoJSON coordinates are always in x, y
+        order, so they are used as they are
+
+    Raises
+    ------
+    errors.ValidationError
+        If the input is not a valid GeoJSON geometry
+
+    """
+
+    try:
+        type_ = GeometryType(data["type"])
+    except (KeyError, TypeError, ValueError):
+        raise errors.ValidationError(
+            "Invalid GeoJSON geometry: {!r}".format(data))
+    if type_ == GeometryType.GEOMETRYCOLLECTION:
+        members = data.get("geometries")
+        if not isinstance(members, list):
+            raise errors.ValidationError(
+                "Invalid GeoJSON geometry collection: {!r}".format(data))
+        return Geometry(type_, srs=srs, members=[
+            parse_geojson(member, srs=srs) for member in members])
+    coordinates = data.get("coordinates")
+    if type_ == GeometryType.POINT and coordinates == []:
+        return Geometry(type_, srs=srs)
+    builder = _WktBuilder(None)
+    try:
+        if type_ == GeometryType.POINT:
+            builder.add_coordinate(coordinates)
+            builder.end_part()
+        elif type_ in (GeometryType.LINESTRING, GeometryType.MULTIPOINT):
+            for position in coordinates:
+                builder.add_coordinate(position)
+                if type_ == GeometryType.MULTIPOINT:
+                    builder.end_part()
+            if type_ == GeometryType.LINESTRING:
+                builder.end_part()
+        elif type_ in (GeometryType.POLYGON, GeometryType.MULTILINESTRING):
+            _add_geojson_parts(builder, coordinates)
+            if type_ == GeometryType.POLYGON:
+                builder.end_polygon()
+        else:
+            for polygon in coordinates:
+                _add_geojson_parts(builder, polygon)
+                builder.end_polygon()
+    except (TypeError, ValueError):
+        raise errors.ValidationError(
+            "Invalid GeoJSON coordinates: {!r}".format(data))
+    return Geometry(
+        type_,
+        builder.coordinates,
+        part_offsets=builder.part_offsets,
+        polygon_offsets=(builder.polygon_offsets if
+                         type_ == GeometryType.MULTIPOLYGON else None),
+        srs=srs,
+        dimensions=builder.dimensions or 2
+    )
+
+
+def as_geojson(geometry):
+    """Return a geometry as a GeoJSON geometry object.
+
+    Coordinates are written in x, y order, whatever the SRS of the
+    geometry, and the SRS itself is left out.
+
+    """
+
+    type_ = geometry.type_
+    if type_ == GeometryType.GEOMETRYCOLLECTION:
+        return {
+            "type": type_.value,
+            "geometries": [as_geojson(member) for
+                           member in geometry.members],
+        }
+    parts = [_get_geojson_positions(geometry, index) for
+             index in range(len(geometry.part_offsets) - 1)]
+    if type_ == GeometryType.POINT:
+        coordinates = parts[0][0] if len(parts) > 0 else []
+    elif type_ == GeometryType.LINESTRING:
+        coordinates = parts[0] if len(parts) > 0 else []
+    elif type_ == GeometryType.MULTIPOINT:
+        coordinates = [part[0] for part in parts]
+    elif type_ in (GeometryType.POLYGON, GeometryType.MULTILINESTRING):
+        coordinates = parts
     else:
-        ordered = list(coordinates)
-    return ordered
+        offsets = geometry.polygon_offsets
+        coordinates = [parts[offsets[index]:offsets[index + 1]] for
+                       index in range(len(offsets) - 1)]
+    return {"type": type_.value, "coordinates": coordinates}
+
+
+def _add_geojson_parts(builder, parts):
+    for part in parts:
+        for position in part:
+            builder.add_coordinate(position)
+        builder.end_part()
+
+
+def _get_geojson_positions(geometry, index):
+    dimensions = geometry.dimensions
+    start = geometry.part_offsets[index] * dimensions
+    end = geometry.part_offsets[index + 1] * dimensions
+    values = geometry.coordinates[start:end].tolist()
+    return [values[position:position + dimensions] for
+            position in range(0, len(values), dimensions)]
@@ -0,0 +1,249 @@
+"""Lightweight instrumentation of the pyfes hot paths.
+
+pyfes reports how long each stage of its work takes, and how much work it
+does, to the hooks that have been registered with ``add_hook``. A hook is
+any object with ``increment(name, value)`` and ``observe(name, seconds)``
+methods. No hooks are registered by default, in which case instrumented
+code does little more than checking an empty tuple.
+
+``MetricsRegistry`` is a hook that aggregates metrics in memory and can
+export them in the Prometheus text format. ``StatsdHook`` forwards each
+metric as a StatsD line instead.
+
+The following metrics are reported:
+
+================== ======= ==============================================
+name               kind    description
+================== ======= ==============================================
+parse.<format>     timer   ``parsers.parse_filter``, per input format
+parse.failures     counter filters that could not be parsed
+parse.fallbacks    counter XML filters whose namespace did not select a
+                           parser, which are handed to the default one
+cache.hits         counter filters found in a ``FilterCache``
+cache.misses       counter filters not found in a ``FilterCache``
+cache.evictions    counter filters removed from a ``FilterCache``
+fes.tokenize       timer   parsing XML text into elements
+fes.build          timer   building operators out of XML elements
+fes.stream         timer   parsing an XML filter incrementally
+fes.elements       counter XML elements of the parsed filters
+gml.parse          timer   parsing GML geometries
+gml.positions      counter coordinate positions of the GML geometries
+schema.compile     timer   compiling the XML schema
+schema.validate    timer   validating filters against the XML schema
+schema.invalid     counter filters that failed validation
+compile            timer   compiling filters into predicates
+evaluate.batch     timer   evaluating filters over columnar batches
+evaluate.rows      counter features of the evaluated batches
+================== ======= ==============================================
+
+Examples
+--------
+
+>>> registry = MetricsRegistry()
+>>> add_hook(registry)
+>>> with timer("example"):
+...     increment("example.items", 3)
+>>> registry.get_timer("example").count
+1
+>>> registry.get_counter("example.items")
+3
+>>> remove_hook(registry)
+
+"""
+
+from collections import namedtuple
+import re
+import threading
+import time
+
+TimerStats = namedtuple("TimerStats", "count total minimum maximum")
+
+_clock = getattr(time, "perf_counter", time.time)
+
+_hooks = ()
+_hooks_lock = threading.Lock()
+
+_INVALID_PROMETHEUS_CHARACTERS = re.compile(r"[^a-zA-Z0-9_:]")
+
+
+def add_hook(hook):
+    """Start reporting metrics to a hook"""
+    global _hooks
+    with _hooks_lock:
+        if hook not in _hooks:
+            _hooks = _hooks + (hook,)
+
+
+def remove_hook(hook):
+    """Stop reporting metrics to a hook"""
+    global _hooks
+    with _hooks_lock:
+        _hooks = tuple(current for current in _hooks if current is not hook)
+
+
+def is_enabled():
+    """Whether any hook is registered.
+
+    Instrumented code checks this before doing extra work, such as counting
+    the elements of a filter, that is only needed for reporting metrics.
+
+    """
+
+    return len(_hooks) > 0
+
+
+def increment(name, value=1):
+    """Add a value to a counter"""
+    for hook in _hooks:
+        hook.increment(name, value)
+
+
+def observe(name, seconds):
+    """Report the duration of a stage"""
+    for hook in _hooks:
+        hook.observe(name, seconds)
+
+
+def timer(name):
+    """Return a context manager that reports the duration of its block.
+
+    When no hooks are registered, a shared context manager that does
+    nothing is returned instead, so the clock is not even read.
+
+    """
+
+    return _Timer(name) if len(_hooks) > 0 else _NULL_TIMER
+
+
+class _Timer(object):
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = _clock()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        observe(self.name, _clock() - self.start)
+
+
+class _NullTimer(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry(object):
+    """A thread-safe hook that aggregates metrics in memory.
+
+    Counters keep their running total. Timers keep the number of
+    observations, their total duration and the shortest and longest ones.
+
+    """
+
+    def __init__(self):
+        self._counters = {}
+        self._timers = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name, seconds):
+        with self._lock:
+            try:
+                count, total, minimum, maximum = self._timers[name]
+            except KeyError:
+                stats = TimerStats(1, seconds, seconds, seconds)
+            else:
+                stats = TimerStats(count + 1, total + seconds,
+                                   min(minimum, seconds),
+                                   max(maximum, seconds))
+            self._timers[name] = stats
+
+    def get_counter(self, name):
+        return self._counters.get(name, 0)
+
+    def get_timer(self, name):
+        return self._timers.get(name, TimerStats(0, 0.0, None, None))
+
+    def get_cache_hit_rate(self):
+        """Return the ratio of cache lookups that were hits, or None"""
+        hits = self.get_counter("cache.hits")
+        lookups = hits + self.get_counter("cache.misses")
+        return hits / float(lookups) if lookups > 0 else None
+
+    def snapshot(self):
+        """Return a copy of the current counters and timers"""
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "timers": dict(self._timers),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._timers.clear()
+
+    def to_prometheus(self, prefix="pyfes"):
+        """Render the metrics in the Prometheus text exposition format.
+
+        Counters become ``<prefix>_<name>_total`` counters and timers become
+        ``<prefix>_<name>_seconds`` summaries, with a count and a sum.
+
+        """
+
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in sorted(snapshot["counters"].items()):
+            metric = _get_prometheus_name(prefix, name) + "_total"
+            lines.append("# TYPE {} counter".format(metric))
+            lines.append("{} {}".format(metric, value))
+        for name, stats in sorted(snapshot["timers"].items()):
+            metric = _get_prometheus_name(prefix, name) + "_seconds"
+            lines.append("# TYPE {} summary".format(metric))
+            lines.append("{}_count {}".format(metric, stats.count))
+            lines.append("{}_sum {!r}".format(metric, stats.total))
+        return "".join(line + "\n" for line in lines)
+
+
+class StatsdHook(object):
+    """A hook that forwards each metric as a StatsD line.
+
+    Parameters
+    ----------
+    send: callable
+        Called with each line, for example a function that sends it over
+        UDP to a StatsD daemon
+    prefix: str, optional
+        Prefix of the metric names
+
+    """
+
+    def __init__(self, send, prefix="pyfes"):
+        self.send = send
+        self.prefix = prefix
+
+    def increment(self, name, value=1):
+        self.send("{}.{}:{}|c".format(self.prefix, name, value))
+
+    def observe(self, name, seconds):
+        self.send("{}.{}:{:.3f}|ms".format(
+            self.prefix, name, seconds * 1000))
+
+
+def _get_prometheus_name(prefix, name):
+    return _INVALID_PROMETHEUS_CHARACTERS.sub(
+        "_", "{}_{}".format(prefix, name))
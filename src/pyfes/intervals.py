@@ -0,0 +1,95 @@
+"""A static index of intervals, sorted by their begins and by their ends.
+
+The items of the index are kept in two orders, one by the begin of their
+intervals and one by their end. Finding the items whose begin, or whose
+end, falls within a range is then a binary search that returns a slice of
+one of those orders. This takes logarithmic time plus the size of the
+result, and counting the items of a range takes logarithmic time only.
+
+The index cannot be modified after it has been built, which suits
+collections that are indexed once and then queried with many filters.
+
+Examples
+--------
+
+>>> index = EndpointIndex([((0, 10), "a"), ((5, 5), "b"), ((20, 30), "c")])
+>>> index.query_begins(0, 5)
+['a', 'b']
+>>> index.count_ends(upper=10)
+2
+
+"""
+
+from array import array
+import bisect
+
+
+class EndpointIndex(object):
+    """An index over ``(interval, item)`` pairs.
+
+    Parameters
+    ----------
+    entries: iterable
+        Pairs of ``(begin, end)`` integer intervals and the items that they
+        belong to. Items can be any python object
+
+    """
+
+    def __init__(self, entries):
+        entries = [((int(begin), int(end)), item) for
+                   (begin, end), item in entries]
+        by_begin = sorted(entries, key=lambda entry: entry[0][0])
+        by_end = sorted(entries, key=lambda entry: entry[0][1])
+        self._begins = array("q", (entry[0][0] for entry in by_begin))
+        self._begin_items = [entry[1] for entry in by_begin]
+        self._ends = array("q", (entry[0][1] for entry in by_end))
+        self._end_items = [entry[1] for entry in by_end]
+
+    def __len__(self):
+        return len(self._begins)
+
+    def query_begins(self, lower=None, upper=None):
+        """Return the items whose begin is within a range.
+
+        Parameters
+        ----------
+        lower: int, optional
+            Inclusive lower bound of the range. None leaves it unbounded
+        upper: int, optional
+            Inclusive upper bound of the range. None leaves it unbounded
+
+        Returns
+        -------
+        list
+            The items, in the order of their begins
+
+        """
+
+        start, stop = _get_slice(self._begins, lower, upper)
+        return self._begin_items[start:stop]
+
+    def query_ends(self, lower=None, upper=None):
+        """Return the items whose end is within a range.
+
+        The bounds are the same as those of ``query_begins``.
+
+        """
+
+        start, stop = _get_slice(self._ends, lower, upper)
+        return self._end_items[start:stop]
+
+    def count_begins(self, lower=None, upper=None):
+        """Return the number of items that ``query_begins`` would return"""
+        start, stop = _get_slice(self._begins, lower, upper)
+        return stop - start
+
+    def count_ends(self, lower=None, upper=None):
+        """Return the number of items that ``query_ends`` would return"""
+        start, stop = _get_slice(self._ends, lower, upper)
+        return stop - start
+
+
+def _get_slice(keys, lower, upper):
+    start = 0 if lower is None else bisect.bisect_left(keys, lower)
+    stop = len(keys) if upper is None else bisect.bisect_right(keys, upper)
+    return start, max(start, stop)
@@ -1,7 +1,13 @@
 """Parser helpers for pyfes"""
 
+from collections import namedtuple
+import functools
 import logging
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+import threading
 
+from . import instrumentation
 from .fes20 import filterparsers as fes20_filterparsers
 
 logger = logging.getLogger(__name__)
@@ -9,12 +15,112 @@ logger = logging.getLogger(__name__)
 FILTER_PARSER_CLASSES = [
     fes20_filterparsers.FesFilterParser,
     fes20_filterparsers.OgcCqlParser,
+    fes20_filterparsers.Cql2JsonFilterParser,
 ]
 
+FilterParseResult = namedtuple("FilterParseResult", "result error")
+"""The outcome of parsing one of the filters given to ``parse_filters``"""
 
-def parse_filter(data, **kwargs):
+_BYTE_ORDER_MARKS = (u"\ufeff", b"\xef\xbb\xbf")
+
+_parser_pool = threading.local()
+
+
+def sniff_filter_format(data):
+    """Find out whether the input is an XML, a JSON or a text filter.
+
+    Returns
+    -------
+    str
+        Either "xml", "json" or "text"
+
+    """
+
+    if isinstance(data, dict):
+        return "json"
+    head = data[:256].lstrip()
+    for mark in _BYTE_ORDER_MARKS:
+        if isinstance(head, type(mark)) and head.startswith(mark):
+            head = head[len(mark):].lstrip()
+    first = head[:1]
+    if first in (u"<", b"<"):
+        result = "xml"
+    elif first in (u"{", b"{"):
+        result = "json"
+    else:
+        result = "text"
+    return result
+
+
+def get_filter_parser_class(data):
+    """Select the filter parser class that is able to parse the input.
+
+    The format of the input is sniffed and the first class in
+    ``FILTER_PARSER_CLASSES`` that handles that format is selected. When
+    more than one class handles XML, the one whose namespace appears in the
+    input is preferred.
+
+    """
+
+    format_ = sniff_filter_format(data)
+    candidates = [cls for cls in FILTER_PARSER_CLASSES if
+                  cls.FORMAT == format_]
+    if len(candidates) == 0:
+        raise RuntimeError(
+            "No filter parser available for {} input".format(format_))
+    if format_ == "xml" and len(candidates) > 1:
+        for cls in candidates:
+            namespace = cls.NAMESPACE
+            if isinstance(data, bytes):
+                namespace = namespace.encode("utf-8")
+            if namespace in data:
+                result = cls
+                break
+        else:
+            instrumentation.increment("parse.fallbacks")
+            result = candidates[0]
+    else:
+        result = candidates[0]
+    return result
+
+
+def get_filter_parser(cls, **kwargs):
+    """Return a reusable instance of the input filter parser class.
+
+    Parser instances are pooled per thread and reused for calls with the
+    same arguments.
+
+    """
+
+    key = (cls, tuple(sorted(kwargs.items())))
+    try:
+        hash(key)
+    except TypeError:
+        return cls(**kwargs)
+    pool = getattr(_parser_pool, "parsers", None)
+    if pool is None:
+        pool = _parser_pool.parsers = {}
+    try:
+        parser = pool[key]
+    except KeyError:
+        parser = pool[key] = cls(**kwargs)
+    return parser
+
+
+def parse_filter(data, cache=None, **kwargs):
     """Parse FES filters
 
+    Parameters
+    ----------
+    data: str
+        The filter to parse
+    cache: pyfes.caches.FilterCache, optional
+        A cache of previously parsed filters. When it is provided, filters
+        are looked up in the cache before being parsed and the parsed
+        result is stored in it. Cached results are frozen
+    kwargs:
+        Passed to the constructor of the filter parser
+
     Examples
     --------
 
@@ -37,14 +143,89 @@ def parse_filter(data, **kwargs):
 
     """
 
-    for cls in FILTER_PARSER_CLASSES:
-        parser = cls(**kwargs)
-        try:
-            logger.debug("Trying to parse with parser {}...".format(parser))
+    key = cache.make_key(data, **kwargs) if cache is not None else None
+    if key is not None:
+        result = cache.get(key)
+        if result is not None:
+            return result
+    parser = get_filter_parser(get_filter_parser_class(data), **kwargs)
+    try:
+        with instrumentation.timer("parse." + parser.FORMAT):
             result = parser.parse_filter(data)
-            break
-        except Exception:
-            logger.exception("Parsing with parser {} failed.".format(parser))
+    except Exception as err:
+        instrumentation.increment("parse.failures")
+        logger.debug("Parsing with parser %s failed: %s", parser, err)
+        raise RuntimeError("Could not parse filter: {}".format(err))
+    if key is not None:
+        cache.put(key, result)
+    return result
+
+
+def parse_filter_stream(source, **kwargs):
+    """Parse large XML filters incrementally.
+
+    Parameters
+    ----------
+    source: str, bytes, file-like object or iterable of bytes
+        The fes:Filter to parse
+    kwargs:
+        Passed to the ``parse_filter_stream`` method of the parser
+
+    """
+
+    parser = get_filter_parser(fes20_filterparsers.FesFilterParser)
+    return parser.parse_filter_stream(source, **kwargs)
+
+
+def parse_filters(data_items, workers=1, use_processes=False, chunksize=1,
+                  **kwargs):
+    """Parse many filters, optionally in parallel.
+
+    Filters are parsed in a pool of threads, which works well because lxml
+    releases the GIL while parsing, or in a pool of processes. Parsed
+    operators are picklable, so they can be sent back from worker processes.
+
+    Parameters
+    ----------
+    data_items: iterable
+        The filters to parse
+    workers: int, optional
+        Number of parallel workers. Filters are parsed in the calling thread
+        when this is 1
+    use_processes: bool, optional
+        Whether to use a pool of processes instead of a pool of threads
+    chunksize: int, optional
+        Number of filters sent to a worker at a time
+    kwargs:
+        Passed to ``parse_filter``. When using processes these must be
+        picklable, which rules out passing a ``cache``
+
+    Returns
+    -------
+    list
+        One ``FilterParseResult`` for each input filter, in the same order
+        as the input. Filters that could not be parsed have their ``error``
+        set, instead of aborting the whole batch
+
+    """
+
+    parse = functools.partial(_parse_filter_safely, **kwargs)
+    if workers <= 1:
+        results = [parse(data) for data in data_items]
     else:
-        raise RuntimeError("Could not parse filter")
+        pool_class = multiprocessing.Pool if use_processes else ThreadPool
+        pool = pool_class(workers)
+        try:
+            results = pool.map(parse, data_items, chunksize)
+        finally:
+            pool.close()
+            pool.join()
+    return results
+
+
+def _parse_filter_safely(data, **kwargs):
+    try:
+        result = FilterParseResult(parse_filter(data, **kwargs), None)
+    except Exception as err:
+        result = FilterParseResult(None, err)
     return result
@@ -0,0 +1,116 @@
+"""A static R-tree packed with the Sort-Tile-Recursive algorithm.
+
+The tree is built in one go from all of its items, which gives it nearly
+full nodes with little overlap between them. It cannot be modified after it
+has been built, which suits feature collections that are indexed once and
+then queried with many filters.
+
+Examples
+--------
+
+>>> tree = STRtree([((0, 0, 1, 1), "a"), ((5, 5, 6, 6), "b")])
+>>> tree.query((0.5, 0.5, 2, 2))
+['a']
+
+"""
+
+import math
+
+
+class STRtree(object):
+    """An R-tree over ``(envelope, item)`` pairs.
+
+    Parameters
+    ----------
+    entries: iterable
+        Pairs of ``(minx, miny, maxx, maxy)`` envelopes and the items that
+        they bound. Items can be any python object
+    node_capacity: int, optional
+        Maximum number of children of each node of the tree
+
+    """
+
+    def __init__(self, entries, node_capacity=10):
+        if node_capacity < 2:
+            raise ValueError("The node capacity must be at least 2")
+        self.node_capacity = node_capacity
+        level = [(tuple(envelope), item) for envelope, item in entries]
+        self._size = len(level)
+        self._height = 0
+        while len(level) > 1 or (self._height == 0 and len(level) > 0):
+            level = _pack(level, node_capacity)
+            self._height += 1
+        self._root = level[0] if len(level) > 0 else None
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def envelope(self):
+        """The envelope of all of the entries, or None for an empty tree"""
+        return None if self._root is None else self._root[0]
+
+    def query(self, envelope):
+        """Return the items whose envelopes intersect the input envelope.
+
+        Parameters
+        ----------
+        envelope: tuple
+            A ``(minx, miny, maxx, maxy)`` tuple
+
+        Returns
+        -------
+        list
+            The matching items, in no particular order
+
+        """
+
+        result = []
+        if self._root is None:
+            return result
+        minx, miny, maxx, maxy = envelope
+        pending = [(self._root, self._height)]
+        while len(pending) > 0:
+            node, height = pending.pop()
+            node_envelope = node[0]
+            intersects = (node_envelope[0] <= maxx and
+                          minx <= node_envelope[2] and
+                          node_envelope[1] <= maxy and
+                          miny <= node_envelope[3])
+            if not intersects:
+                continue
+            elif height == 0:
+                result.append(node[1])
+            else:
+                pending.extend((child, height - 1) for child in node[1])
+        return result
+
+
+def _pack(entries, node_capacity):
+    """Group a level of the tree into the nodes of the level above it.
+
+    Entries are sorted by the x coordinate of their centers and cut into
+    vertical slices. Each slice is then sorted by the y coordinate of the
+    centers and cut into nodes.
+
+    """
+
+    node_count = int(math.ceil(len(entries) / float(node_capacity)))
+    slice_count = int(math.ceil(math.sqrt(node_count)))
+    slice_size = slice_count * node_capacity
+    entries = sorted(entries, key=lambda entry: entry[0][0] + entry[0][2])
+    nodes = []
+    for slice_start in range(0, len(entries), slice_size):
+        slice_ = sorted(entries[slice_start:slice_start + slice_size],
+                        key=lambda entry: entry[0][1] + entry[0][3])
+        for start in range(0, len(slice_), node_capacity):
+            children = slice_[start:start + node_capacity]
+            nodes.append((_get_envelope(children), children))
+    return nodes
+
+
+def _get_envelope(entries):
+    return (min(entry[0][0] for entry in entries),
+            min(entry[0][1] for entry in entries),
+            max(entry[0][2] for entry in entries),
+            max(entry[0][3] for entry in entries))
@@ -0,0 +1,506 @@
+"""Planar geometry predicates for evaluating spatial filters.
+
+This module implements the spatial relations that FES uses, such as
+``Intersects``, ``Within`` or ``Touches``, in pure python. Geometries are
+read from WKT into ``Shape`` objects, which hold their points, lines and
+polygons as lists of ``(x, y)`` tuples along with their envelope.
+
+The relations between two shapes are worked out by locating a set of
+sample points in both shapes. Samples are taken at every vertex, at every
+intersection between the boundaries of the shapes, at the midpoint of
+each piece of boundary between those intersections and, for polygons,
+just inside and just outside of each of those pieces. This yields the
+cells of the DE-9IM intersection matrix that are relevant for the FES
+spatial operators.
+
+Examples
+--------
+
+>>> square = parse_wkt("POLYGON ((0 0, 10 0, 10 10, 0 10, 0 0))")
+>>> within(parse_wkt("POINT (1 1)"), square)
+True
+>>> touches(parse_wkt("LINESTRING (10 0, 20 0)"), square)
+True
+
+"""
+
+import math
+
+from . import errors
+from . import geometries
+from .fes20.envelopes import envelope_contains
+from .fes20.envelopes import envelopes_intersect
+from .fes20.envelopes import get_points_envelope
+from .fes20.envelopes import is_empty_envelope
+from .utils import string_type
+
+INTERIOR = "I"
+BOUNDARY = "B"
+EXTERIOR = "E"
+
+# tolerance used when checking whether a point lies on a segment, relative
+# to the length of the segment
+_ON_SEGMENT_TOLERANCE = 1e-10
+
+# distance from the boundary of a polygon at which its interior and
+# exterior are sampled, relative to the length of the sampled piece
+_OFFSET_FACTOR = 1e-6
+
+
+class Shape(object):
+    """A planar geometry made of points, lines and polygons.
+
+    Parameters
+    ----------
+    points: list, optional
+        A list of ``(x, y)`` tuples
+    lines: list, optional
+        A list of lines, each one a list of ``(x, y)`` tuples
+    polygons: list, optional
+        A list of polygons, each one a list of closed rings. The first ring
+        of a polygon is its exterior and the others are its holes
+
+    """
+
+    __slots__ = ("points", "lines", "polygons", "envelope",
+                 "_line_boundary")
+
+    def __init__(self, points=None, lines=None, polygons=None):
+        self.points = list(points) if points is not None else []
+        self.lines = list(lines) if lines is not None else []
+        self.polygons = list(polygons) if polygons is not None else []
+        self.envelope = get_points_envelope(self.iter_vertices())
+        self._line_boundary = None
+
+    def __repr__(self):
+        return ("{0.__class__.__name__}(points={0.points!r}, "
+                "lines={0.lines!r}, polygons={0.polygons!r})".format(self))
+
+    @property
+    def dimension(self):
+        """The topological dimension of the shape, or -1 when empty"""
+        if len(self.polygons) > 0:
+            result = 2
+        elif len(self.lines) > 0:
+            result = 1
+        elif len(self.points) > 0:
+            result = 0
+        else:
+            result = -1
+        return result
+
+    @property
+    def is_empty(self):
+        return is_empty_envelope(self.envelope)
+
+    @property
+    def line_boundary(self):
+        """The endpoints of the lines of the shape, per the mod-2 rule"""
+        if self._line_boundary is None:
+            counts = {}
+            for line in self.lines:
+                if line[0] != line[-1]:
+                    for endpoint in (line[0], line[-1]):
+                        counts[endpoint] = counts.get(endpoint, 0) + 1
+            self._line_boundary = frozenset(
+                point for point, count in counts.items() if count % 2 == 1)
+        return self._line_boundary
+
+    def iter_vertices(self):
+        for point in self.points:
+            yield point
+        for line in self.lines:
+            for point in line:
+                yield point
+        for polygon in self.polygons:
+            for ring in polygon:
+                for point in ring:
+                    yield point
+
+    def iter_segments(self):
+        """Yield the segments of the shape as ``(start, end, is_ring)``"""
+        for line in self.lines:
+            for index in range(len(line) - 1):
+                yield line[index], line[index + 1], False
+        for polygon in self.polygons:
+            for ring in polygon:
+                for index in range(len(ring) - 1):
+                    yield ring[index], ring[index + 1], True
+
+
+def as_shape(geometry):
+    """Convert the input geometry into a ``Shape``.
+
+    Parameters
+    ----------
+    geometry: Shape, geometries.Geometry or str
+        Either a shape, which is returned unchanged, a geometry or a WKT
+        string
+
+    """
+
+    if isinstance(geometry, Shape):
+        result = geometry
+    elif isinstance(geometry, geometries.Geometry):
+        result = _geometry_to_shape(geometry)
+    elif isinstance(geometry, string_type):
+        result = parse_wkt(geometry)
+    else:
+        raise errors.ValidationError(
+            "Cannot use {!r} as a geometry".format(geometry))
+    return result
+
+
+def _geometry_to_shape(geometry):
+    shape = Shape()
+    pending = [geometry]
+    while len(pending) > 0:
+        current = pending.pop()
+        type_ = current.type_
+        if type_ == geometries.GeometryType.GEOMETRYCOLLECTION:
+            pending.extend(reversed(current.members))
+        elif type_ in (geometries.GeometryType.POINT,
+                       geometries.GeometryType.MULTIPOINT):
+            for part in current.iter_parts():
+                shape.points.extend(part)
+        elif type_ in (geometries.GeometryType.LINESTRING,
+                       geometries.GeometryType.MULTILINESTRING):
+            shape.lines.extend(current.iter_parts())
+        else:
+            for rings in current.iter_polygons():
+                for ring in rings:
+                    if ring[0] != ring[-1]:
+                        ring.append(ring[0])
+                shape.polygons.append(rings)
+    return Shape(shape.points, shape.lines, shape.polygons)
+
+
+def envelope_to_shape(envelope):
+    """Return a rectangular polygon shape that covers an envelope"""
+    if is_empty_envelope(envelope):
+        return Shape()
+    minx, miny, maxx, maxy = envelope
+    ring = [(minx, miny), (maxx, miny), (maxx, maxy), (minx, maxy),
+            (minx, miny)]
+    return Shape(polygons=[[ring]])
+
+
+def parse_wkt(wkt):
+    """Parse a WKT string into a ``Shape``.
+
+    The WKT is read by ``geometries.parse_wkt``. Z and M coordinates are
+    accepted but discarded.
+
+    """
+
+    shape = _geometry_to_shape(geometries.parse_wkt(wkt))
+    for polygon in shape.polygons:
+        for ring in polygon:
+            if len(ring) < 4:
+                raise errors.ValidationError(
+                    "Invalid polygon ring in WKT: {!r}".format(wkt))
+    return shape
+
+
+def intersects(first, second):
+    """Check whether two shapes have at least one point in common"""
+    if not envelopes_intersect(first.envelope, second.envelope):
+        return False
+    for vertex in first.iter_vertices():
+        if locate(vertex, second) != EXTERIOR:
+            return True
+    for vertex in second.iter_vertices():
+        if locate(vertex, first) != EXTERIOR:
+            return True
+    second_segments = [(start, end) for start, end, is_ring in
+                       second.iter_segments()]
+    for start, end, is_ring in first.iter_segments():
+        segment_envelope = get_points_envelope((start, end))
+        for other_start, other_end in second_segments:
+            candidate = envelopes_intersect(
+                segment_envelope,
+                get_points_envelope((other_start, other_end))
+            )
+            if candidate and len(_intersect_segments(
+                    start, end, other_start, other_end)) > 0:
+                return True
+    return False
+
+
+def disjoint(first, second):
+    return not intersects(first, second)
+
+
+def within(first, second):
+    """Check whether the first shape lies within the second one"""
+    if not envelope_contains(second.envelope, first.envelope):
+        return False
+    cells = relate(first, second)
+    return ((INTERIOR, INTERIOR) in cells and
+            (INTERIOR, EXTERIOR) not in cells and
+            (BOUNDARY, EXTERIOR) not in cells)
+
+
+def contains(first, second):
+    """Check whether the first shape contains the second one"""
+    return within(second, first)
+
+
+def equals(first, second):
+    """Check whether two shapes are topologically equal"""
+    return first.envelope == second.envelope and within(
+        first, second) and within(second, first)
+
+
+def touches(first, second):
+    """Check whether two shapes only have boundary points in common"""
+    if not envelopes_intersect(first.envelope, second.envelope):
+        return False
+    cells = relate(first, second)
+    return _cells_intersect(cells) and (INTERIOR, INTERIOR) not in cells
+
+
+def crosses(first, second):
+    if not envelopes_intersect(first.envelope, second.envelope):
+        return False
+    cells = relate(first, second)
+    first_dimension = first.dimension
+    second_dimension = second.dimension
+    if first_dimension < second_dimension:
+        result = ((INTERIOR, INTERIOR) in cells and
+                  (INTERIOR, EXTERIOR) in cells)
+    elif first_dimension > second_dimension:
+        result = ((INTERIOR, INTERIOR) in cells and
+                  (EXTERIOR, INTERIOR) in cells)
+    elif first_dimension == 1:
+        result = cells.get((INTERIOR, INTERIOR)) == 0
+    else:
+        result = False
+    return result
+
+
+def overlaps(first, second):
+    if not envelopes_intersect(first.envelope, second.envelope):
+        return False
+    dimension = first.dimension
+    if dimension != second.dimension:
+        return False
+    cells = relate(first, second)
+    return (cells.get((INTERIOR, INTERIOR)) == dimension and
+            (INTERIOR, EXTERIOR) in cells and
+            (EXTERIOR, INTERIOR) in cells)
+
+
+def distance(first, second):
+    """Return the minimum cartesian distance between two shapes"""
+    if first.is_empty or second.is_empty:
+        raise errors.ValidationError(
+            "Cannot compute the distance to an empty geometry")
+    if intersects(first, second):
+        return 0.0
+    result = float("inf")
+    for shape, other in ((first, second), (second, first)):
+        segments = [(start, end) for start, end, is_ring in
+                    other.iter_segments()]
+        for vertex in shape.iter_vertices():
+            for point in other.points:
+                result = min(result, _point_distance(vertex, point))
+            for start, end in segments:
+                result = min(result, _point_segment_distance(
+                    vertex, start, end))
+    return result
+
+
+def relate(first, second):
+    """Compute the cells of the intersection matrix of two shapes.
+
+    Returns
+    -------
+    dict
+        Maps ``(location_in_first, location_in_second)`` pairs to the
+        highest dimension of the samples that were found in that cell.
+        Locations are one of ``INTERIOR``, ``BOUNDARY`` or ``EXTERIOR``
+
+    """
+
+    cells = {}
+
+    def record(point, dimension):
+        key = (locate(point, first), locate(point, second))
+        if cells.get(key, -1) < dimension:
+            cells[key] = dimension
+
+    for vertex in first.iter_vertices():
+        record(vertex, 0)
+    for vertex in second.iter_vertices():
+        record(vertex, 0)
+    first_segments = list(first.iter_segments())
+    second_segments = list(second.iter_segments())
+    for segments, other_segments, other in (
+            (first_segments, second_segments, second),
+            (second_segments, first_segments, first)):
+        for start, end, is_ring in segments:
+            splits = [point for point in other.points if
+                      _is_on_segment(point, start, end)]
+            for other_start, other_end, other_is_ring in other_segments:
+                splits.extend(_intersect_segments(
+                    start, end, other_start, other_end))
+            for point in splits:
+                record(point, 0)
+            for piece_start, piece_end in _split_segment(start, end, splits):
+                middle = _midpoint(piece_start, piece_end)
+                record(middle, 1)
+                if is_ring:
+                    for offset in _get_offsets(piece_start, piece_end):
+                        record(offset, 2)
+    return cells
+
+
+def locate(point, shape):
+    """Locate a point in the interior, boundary or exterior of a shape"""
+    envelope = shape.envelope
+    if not (envelope[0] <= point[0] <= envelope[2] and
+            envelope[1] <= point[1] <= envelope[3]):
+        return EXTERIOR
+    for polygon in shape.polygons:
+        location = _locate_in_polygon(point, polygon)
+        if location != EXTERIOR:
+            return location
+    for line in shape.lines:
+        for index in range(len(line) - 1):
+            if _is_on_segment(point, line[index], line[index + 1]):
+                if point in shape.line_boundary:
+                    return BOUNDARY
+                return INTERIOR
+    if point in shape.points:
+        return INTERIOR
+    return EXTERIOR
+
+
+def _cells_intersect(cells):
+    return any(first != EXTERIOR and second != EXTERIOR for
+               first, second in cells)
+
+
+def _locate_in_polygon(point, rings):
+    location = _locate_in_ring(point, rings[0])
+    if location == INTERIOR:
+        for hole in rings[1:]:
+            hole_location = _locate_in_ring(point, hole)
+            if hole_location == BOUNDARY:
+                location = BOUNDARY
+                break
+            elif hole_location == INTERIOR:
+                location = EXTERIOR
+                break
+    return location
+
+
+def _locate_in_ring(point, ring):
+    x, y = point
+    inside = False
+    for index in range(len(ring) - 1):
+        start = ring[index]
+        end = ring[index + 1]
+        if _is_on_segment(point, start, end):
+            return BOUNDARY
+        if (start[1] > y) != (end[1] > y):
+            crossing_x = start[0] + (y - start[1]) * (
+                end[0] - start[0]) / (end[1] - start[1])
+            if x < crossing_x:
+                inside = not inside
+    return INTERIOR if inside else EXTERIOR
+
+
+def _cross(origin, first, second):
+    return ((first[0] - origin[0]) * (second[1] - origin[1]) -
+            (first[1] - origin[1]) * (second[0] - origin[0]))
+
+
+def _is_on_segment(point, start, end):
+    dx = end[0] - start[0]
+    dy = end[1] - start[1]
+    tolerance = _ON_SEGMENT_TOLERANCE * (abs(dx) + abs(dy))
+    if not (min(start[0], end[0]) - tolerance <= point[0] <=
+            max(start[0], end[0]) + tolerance and
+            min(start[1], end[1]) - tolerance <= point[1] <=
+            max(start[1], end[1]) + tolerance):
+        return False
+    if point == start or point == end:
+        return True
+    return abs(_cross(start, end, point)) <= tolerance * math.hypot(dx, dy)
+
+
+def _intersect_segments(start, end, other_start, other_end):
+    """Return the points where two segments intersect"""
+    first_side = _cross(other_start, other_end, start)
+    second_side = _cross(other_start, other_end, end)
+    third_side = _cross(start, end, other_start)
+    fourth_side = _cross(start, end, other_end)
+    is_proper = (
+        ((first_side > 0 and second_side < 0) or
+         (first_side < 0 and second_side > 0)) and
+        ((third_side > 0 and fourth_side < 0) or
+         (third_side < 0 and fourth_side > 0))
+    )
+    if is_proper:
+        ratio = first_side / (first_side - second_side)
+        result = [(start[0] + ratio * (end[0] - start[0]),
+                   start[1] + ratio * (end[1] - start[1]))]
+    else:
+        result = [point for point in (start, end) if
+                  _is_on_segment(point, other_start, other_end)]
+        result.extend(point for point in (other_start, other_end) if
+                      _is_on_segment(point, start, end))
+    return result
+
+
+def _split_segment(start, end, points):
+    """Split a segment into the pieces between the input points"""
+    dx = end[0] - start[0]
+    dy = end[1] - start[1]
+    length = dx * dx + dy * dy
+    if length == 0:
+        return []
+    parameters = set([0.0, 1.0])
+    for point in points:
+        parameter = ((point[0] - start[0]) * dx +
+                     (point[1] - start[1]) * dy) / length
+        if 0.0 < parameter < 1.0:
+            parameters.add(parameter)
+    ordered = sorted(parameters)
+    positions = [(start[0] + parameter * dx, start[1] + parameter * dy) for
+                 parameter in ordered]
+    positions[0] = start
+    positions[-1] = end
+    return list(zip(positions[:-1], positions[1:]))
+
+
+def _midpoint(start, end):
+    return (start[0] + end[0]) / 2.0, (start[1] + end[1]) / 2.0
+
+
+def _get_offsets(start, end):
+    """Return two points next to the middle of a segment, one on each side"""
+    middle = _midpoint(start, end)
+    normal_x = (start[1] - end[1]) * _OFFSET_FACTOR
+    normal_y = (end[0] - start[0]) * _OFFSET_FACTOR
+    return ((middle[0] + normal_x, middle[1] + normal_y),
+            (middle[0] - normal_x, middle[1] - normal_y))
+
+
+def _point_distance(first, second):
+    return math.hypot(first[0] - second[0], first[1] - second[1])
+
+
+def _point_segment_distance(point, start, end):
+    dx = end[0] - start[0]
+    dy = end[1] - start[1]
+    length = dx * dx + dy * dy
+    if length == 0:
+        return _point_distance(point, start)
+    parameter = ((point[0] - start[0]) * dx +
+                 (point[1] - start[1]) * dy) / length
+    parameter = max(0.0, min(1.0, parameter))
+    return _point_distance(
+        point, (start[0] + parameter * dx, start[1] + parameter * dy))
@@ -0,0 +1,444 @@
+"""Resolution of spatial reference system names.
+
+The same spatial reference system can be named in many ways, such as
+``EPSG:4326``, ``urn:ogc:def:crs:EPSG::4326`` or
+``http://www.opengis.net/def/crs/EPSG/0/4326``. These forms also imply
+different axis orders: URNs and ``opengis.net/def`` URLs follow the axis
+order defined by the authority, which is latitude first for EPSG:4326,
+while the short ``EPSG:`` form and the old ``epsg.xml#`` URLs are
+traditionally longitude first.
+
+An ``SrsRegistry`` resolves names into ``SpatialReference`` tuples with a
+canonical ``AUTHORITY:CODE`` name and the axis order of the coordinates
+that are written with that name. Results are memoized, since filters keep
+using the same few names.
+
+Examples
+--------
+
+>>> reference = resolve("urn:ogc:def:crs:EPSG::4326")
+>>> reference.name, reference.axis_order
+('EPSG:4326', 'yx')
+>>> resolve("EPSG:4326").axis_order
+'xy'
+
+"""
+
+from collections import namedtuple
+import logging
+import math
+import re
+import threading
+
+from . import errors
+from . import utils
+
+logger = logging.getLogger(__name__)
+
+# pyproj is an optional dependency that is slow to import, so it is only
+# imported the first time that it is needed, by ``get_pyproj``
+pyproj = utils.UNLOADED
+
+XY = "xy"
+YX = "yx"
+
+# projected EPSG reference systems whose first axis is the northing
+NORTHING_FIRST_CODES = frozenset([
+    "2180", "3006", "3034", "3035", "3067", "3844",
+    "31466", "31467", "31468", "31469",
+])
+
+# units of measure of distances, as UCUM codes and EPSG unit codes, and
+# their size in metres or in radians
+LINEAR_UNITS = {
+    "m": 1.0,
+    "km": 1000.0,
+    "ft": 0.3048,
+    "[ft_i]": 0.3048,
+    "mi": 1609.344,
+    "[mi_i]": 1609.344,
+    "[nmi_i]": 1852.0,
+    "9001": 1.0,
+    "9036": 1000.0,
+    "9002": 0.3048,
+    "9093": 1609.344,
+    "9030": 1852.0,
+}
+
+ANGULAR_UNITS = {
+    "deg": math.pi / 180,
+    "rad": 1.0,
+    "9102": math.pi / 180,
+    "9101": 1.0,
+}
+
+# semi-major axis of the WGS 84 ellipsoid, in metres
+WGS84_RADIUS = 6378137.0
+
+_UOM_PATTERN = re.compile(
+    r"^(?:urn:ogc:def:uom:EPSG::|https?://www\.opengis\.net/def/uom/EPSG/"
+    r"[\w.-]+/)(?P<code>\d+)$",
+    re.IGNORECASE
+)
+
+_URN_PATTERN = re.compile(
+    r"^urn:[\w.-]+:def:crs:(?P<authority>[\w.-]+):(?:[\w.-]*:)?"
+    r"(?P<code>[\w.-]+)$",
+    re.IGNORECASE
+)
+_URL_PATTERN = re.compile(
+    r"^https?://www\.opengis\.net/def/crs/(?P<authority>[\w.-]+)/[\w.-]+/"
+    r"(?P<code>[\w.-]+)$",
+    re.IGNORECASE
+)
+_LEGACY_URL_PATTERN = re.compile(
+    r"^https?://www\.opengis\.net/gml/srs/(?P<authority>\w+)\.xml#"
+    r"(?P<code>[\w.-]+)$",
+    re.IGNORECASE
+)
+_SHORT_PATTERN = re.compile(
+    r"^(?P<authority>[A-Za-z]+):(?P<code>[\w.-]+)$")
+
+
+class SpatialReference(namedtuple("SpatialReference",
+                                  "authority code axis_order")):
+    """A resolved spatial reference system.
+
+    Attributes
+    ----------
+    authority: str or None
+        The authority that defines the reference system, such as ``EPSG``.
+        None for names that could not be resolved
+    code: str
+        The code of the reference system. For names that could not be
+        resolved this is the name itself
+    axis_order: str
+        Either ``XY`` or ``YX``
+
+    """
+
+    __slots__ = ()
+
+    @property
+    def name(self):
+        """The canonical name of the reference system"""
+        if self.authority is None:
+            result = self.code
+        else:
+            result = "{}:{}".format(self.authority, self.code)
+        return result
+
+
+SrsUnits = namedtuple("SrsUnits", "is_geographic factor radius")
+"""The units of the axes of a reference system.
+
+``factor`` is the size of the units in metres, or in radians when the
+system is geographic, and ``radius`` is the semi-major axis of its
+ellipsoid, in metres.
+
+"""
+
+
+class SrsRegistry(object):
+    """Resolves names of spatial reference systems.
+
+    Parameters
+    ----------
+    northing_first_codes: iterable, optional
+        EPSG codes of the projected reference systems whose first axis is
+        the northing. Geographic EPSG reference systems, in the 4000 to
+        4999 range, are always assumed to be latitude first. This is only
+        used when pyproj is not installed
+
+    """
+
+    def __init__(self, northing_first_codes=NORTHING_FIRST_CODES):
+        self.northing_first_codes = frozenset(northing_first_codes)
+        self._axis_orders = {}
+        self._resolved = {}
+        self._lock = threading.Lock()
+
+    def register(self, authority, code, axis_order):
+        """Set the axis order of the reference system of an authority.
+
+        Registered axis orders take precedence over the ones that would
+        otherwise be worked out.
+
+        """
+
+        if axis_order not in (XY, YX):
+            raise ValueError("Invalid axis order: {!r}".format(axis_order))
+        with self._lock:
+            self._axis_orders[(authority.upper(), str(code))] = axis_order
+            self._resolved.clear()
+
+    def resolve(self, name):
+        """Resolve a reference system name.
+
+        Parameters
+        ----------
+        name: str
+            A URN, a URL, or a short ``AUTHORITY:CODE`` name
+
+        Returns
+        -------
+        SpatialReference
+            Names that cannot be resolved are returned as a reference
+            without authority, whose coordinates are assumed to be in
+            ``XY`` order
+
+        """
+
+        try:
+            return self._resolved[name]
+        except KeyError:
+            result = self._resolve(name)
+            with self._lock:
+                self._resolved[name] = result
+            return result
+
+    def get_axis_order(self, authority, code):
+        """Return the axis order defined by an authority for a code"""
+        try:
+            return self._axis_orders[(authority, code)]
+        except KeyError:
+            pass
+        pyproj = get_pyproj()
+        if authority == "OGC":
+            result = XY
+        elif pyproj is not None:
+            try:
+                crs = pyproj.CRS.from_user_input(
+                    "{}:{}".format(authority, code))
+            except pyproj.exceptions.CRSError:
+                result = XY
+            else:
+                first_axis = crs.axis_info[0].direction.lower()
+                result = YX if first_axis in ("north", "south") else XY
+        elif authority == "EPSG":
+            is_geographic = code.isdigit() and 4000 <= int(code) < 5000
+            if is_geographic or code in self.northing_first_codes:
+                result = YX
+            else:
+                result = XY
+        else:
+            result = XY
+        return result
+
+    def _resolve(self, name):
+        text = name.strip()
+        for pattern, uses_authority_order in (
+                (_URN_PATTERN, True),
+                (_URL_PATTERN, True),
+                (_LEGACY_URL_PATTERN, False),
+                (_SHORT_PATTERN, False)):
+            match = pattern.match(text)
+            if match is not None:
+                authority = match.group("authority").upper()
+                code = match.group("code")
+                break
+        else:
+            logger.debug("Could not resolve SRS name %r", name)
+            return SpatialReference(None, name, XY)
+        if authority == "CRS" and code == "84":
+            authority, code = "OGC", "CRS84"
+        elif authority == "OGC":
+            code = code.upper()
+        if uses_authority_order:
+            axis_order = self.get_axis_order(authority, code)
+        else:
+            axis_order = XY
+        return SpatialReference(authority, code, axis_order)
+
+
+REGISTRY = SrsRegistry()
+
+
+def get_pyproj():
+    """Return the pyproj module, or None if it is not installed"""
+    global pyproj
+    if pyproj is utils.UNLOADED:
+        pyproj = utils.import_optional("pyproj")
+    return pyproj
+
+
+def resolve(name):
+    """Resolve a reference system name with the default registry"""
+    return REGISTRY.resolve(name)
+
+
+_TRANSFORMERS = {}
+
+
+def get_transformer(source, target):
+    """Return a memoized pyproj transformer between two reference systems.
+
+    Transformers take and return coordinates in ``XY`` order, regardless
+    of the axis order of the reference systems.
+
+    """
+
+    pyproj = get_pyproj()
+    if pyproj is None:
+        raise errors.PyFesError("pyproj is required for reprojection")
+    source_name = resolve(source).name
+    target_name = resolve(target).name
+    key = (source_name, target_name)
+    try:
+        return _TRANSFORMERS[key]
+    except KeyError:
+        try:
+            transformer = pyproj.Transformer.from_crs(
+                source_name, target_name, always_xy=True)
+        except pyproj.exceptions.CRSError as err:
+            raise errors.PyFesError(
+                "Cannot reproject from {!r} to {!r}: {}".format(
+                    source, target, err))
+        _TRANSFORMERS[key] = transformer
+        return transformer
+
+
+_DISTANCE_FACTORS = {}
+
+
+def get_distance_factor(source, target):
+    """Return the factor that converts distances between reference systems.
+
+    Distances are expressed in the units of the axes of their reference
+    system. They can be converted between systems whose units are both
+    linear, such as metres and feet, or both angular, such as degrees.
+
+    Raises
+    ------
+    errors.PyFesError
+        If one system has linear units and the other angular units, since
+        the conversion between those depends on the location
+
+    """
+
+    source_name = resolve(source).name
+    target_name = resolve(target).name
+    if source_name == target_name:
+        return 1.0
+    key = (source_name, target_name)
+    try:
+        return _DISTANCE_FACTORS[key]
+    except KeyError:
+        pass
+    pyproj = get_pyproj()
+    if pyproj is None:
+        raise errors.PyFesError("pyproj is required for reprojection")
+    try:
+        source_crs = pyproj.CRS.from_user_input(source_name)
+        target_crs = pyproj.CRS.from_user_input(target_name)
+    except pyproj.exceptions.CRSError as err:
+        raise errors.PyFesError(
+            "Cannot convert distances from {!r} to {!r}: {}".format(
+                source, target, err))
+    if source_crs.is_geographic != target_crs.is_geographic:
+        raise errors.PyFesError(
+            "Cannot convert distances from {!r} to {!r}, since only one of "
+            "them has angular units".format(source, target))
+    factor = (source_crs.axis_info[0].unit_conversion_factor /
+              target_crs.axis_info[0].unit_conversion_factor)
+    _DISTANCE_FACTORS[key] = factor
+    return factor
+
+
+_SRS_UNITS = {}
+
+
+def get_srs_units(name):
+    """Return the units of the axes of a reference system.
+
+    Without pyproj, EPSG codes in the 4000 to 4999 range and CRS84 are
+    assumed to be geographic systems in degrees on the WGS 84 ellipsoid,
+    and every other system is assumed to be in metres.
+
+    Returns
+    -------
+    SrsUnits
+
+    """
+
+    reference = resolve(name)
+    try:
+        return _SRS_UNITS[reference.name]
+    except KeyError:
+        pass
+    pyproj = get_pyproj()
+    crs = None
+    if pyproj is not None:
+        try:
+            crs = pyproj.CRS.from_user_input(reference.name)
+        except pyproj.exceptions.CRSError as err:
+            raise errors.PyFesError(
+                "Cannot find the units of {!r}: {}".format(name, err))
+    if crs is not None:
+        result = SrsUnits(
+            crs.is_geographic,
+            crs.axis_info[0].unit_conversion_factor,
+            crs.ellipsoid.semi_major_metre
+        )
+    else:
+        is_geographic = reference.name == "OGC:CRS84" or (
+            reference.authority == "EPSG" and reference.code.isdigit() and
+            4000 <= int(reference.code) < 5000
+        )
+        result = SrsUnits(
+            is_geographic,
+            ANGULAR_UNITS["deg"] if is_geographic else 1.0,
+            WGS84_RADIUS
+        )
+    _SRS_UNITS[reference.name] = result
+    return result
+
+
+def convert_distance(distance, uom, srs_name):
+    """Convert a distance into the units of a reference system.
+
+    Linear distances are converted into the angular units of geographic
+    systems as an arc of a great circle whose radius is the semi-major
+    axis of their ellipsoid. This is exact along the equator only, like
+    any planar distance in degrees.
+
+    Parameters
+    ----------
+    distance: float
+        The distance to convert
+    uom: str or None
+        The unit of measure of the distance, as a UCUM code such as ``m``
+        or ``[mi_i]``, or as an EPSG unit URN or URL. When None, the
+        distance is already in the units of the reference system
+    srs_name: str
+        Name of the reference system
+
+    Raises
+    ------
+    errors.PyFesError
+        If the unit of measure is unknown, or if it is angular and the
+        reference system is not geographic
+
+    """
+
+    if uom is None:
+        return distance
+    match = _UOM_PATTERN.match(uom.strip())
+    code = match.group("code") if match is not None else uom.strip()
+    units = get_srs_units(srs_name)
+    if code in LINEAR_UNITS:
+        metres = distance * LINEAR_UNITS[code]
+        if units.is_geographic:
+            result = metres / units.radius / units.factor
+        else:
+            result = metres / units.factor
+    elif code in ANGULAR_UNITS:
+        if not units.is_geographic:
+            raise errors.PyFesError(
+                "Cannot convert distances in {!r} into the linear units of "
+                "{!r}".format(uom, srs_name))
+        result = distance * ANGULAR_UNITS[code] / units.factor
+    else:
+        raise errors.PyFesError(
+            "Unknown unit of measure: {!r}".format(uom))
+    return result
@@ -0,0 +1,399 @@
+"""Time instants and periods for evaluating temporal filters.
+
+Times are held as integer nanoseconds since the Unix epoch, in UTC, so the
+relations between them are plain integer comparisons. A ``TimePeriod`` has
+a begin and an end, and a time instant is a period whose begin and end are
+the same. ``MIN_TIME`` and ``MAX_TIME`` stand for the missing bounds of
+open periods.
+
+The relation functions follow the ISO 19108 definitions that FES uses for
+its temporal operators. They take the begin and end of two periods and
+only use comparisons and the ``&`` and ``|`` operators, so they work both
+on integers and on numpy arrays of integers.
+
+Examples
+--------
+
+>>> period = parse_period("2020-01-01/2020-02-01")
+>>> instant = parse_period("2020-01-15T12:00:00+02:00")
+>>> during(instant.begin, instant.end, period.begin, period.end)
+True
+>>> format_time(instant.begin)
+'2020-01-15T10:00:00Z'
+
+"""
+
+import datetime as dt
+import numbers
+import re
+import time
+
+from lxml import etree
+
+from .utils import string_type
+
+MIN_TIME = -2 ** 63
+"""The begin of periods that have no begin"""
+
+MAX_TIME = 2 ** 63 - 1
+"""The end of periods that have no end"""
+
+NANOSECONDS_PER_SECOND = 10 ** 9
+
+GML_TIME_ELEMENTS = frozenset(["TimeInstant", "TimePeriod"])
+"""Local names of the GML temporal elements that pyfes can parse"""
+
+_SECONDS_PER_DAY = 86400
+_EPOCH_ORDINAL = dt.date(1970, 1, 1).toordinal()
+_OPEN_BOUNDS = ("", "..")
+
+_TIME_PATTERN = re.compile(r"""
+    (?P<year>\d{4})
+    (?:-(?P<month>\d{2})
+        (?:-(?P<day>\d{2})
+            (?:[T ](?P<hour>\d{2}):(?P<minute>\d{2})
+                (?::(?P<second>\d{2})(?:[.,](?P<fraction>\d+))?)?)?
+            (?P<offset>Z|[-+]\d{2}(?::?\d{2})?)?
+        )?
+    )?$
+""", re.VERBOSE)
+
+
+class TimePeriod(object):
+    """A period of time, or a time instant when its begin and end are equal.
+
+    Time periods are not meant to be modified after they have been created.
+
+    Parameters
+    ----------
+    begin: int
+        Begin of the period, in nanoseconds since the Unix epoch. Use
+        ``MIN_TIME`` for periods that have no begin
+    end: int, optional
+        End of the period, in nanoseconds since the Unix epoch. Use
+        ``MAX_TIME`` for periods that have no end. Defaults to the begin,
+        which makes a time instant
+
+    """
+
+    __slots__ = ("begin", "end")
+
+    def __init__(self, begin, end=None):
+        begin = int(begin)
+        end = begin if end is None else int(end)
+        if not MIN_TIME <= begin <= end <= MAX_TIME:
+            raise ValueError(
+                "Invalid time period: {!r}, {!r}".format(begin, end))
+        self.begin = begin
+        self.end = end
+
+    @classmethod
+    def trusted(cls, begin, end):
+        """Create a time period out of bounds that are known to be valid"""
+        instance = cls.__new__(cls)
+        instance.begin = begin
+        instance.end = end
+        return instance
+
+    def __eq__(self, other):
+        if isinstance(other, TimePeriod):
+            return self.begin == other.begin and self.end == other.end
+        else:
+            return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __hash__(self):
+        return hash((TimePeriod, self.begin, self.end))
+
+    def __repr__(self):
+        return "{0}(begin={1!r}, end={2!r})".format(
+            type(self).__name__, self.begin, self.end)
+
+    def __str__(self):
+        return format_period(self)
+
+    def __getstate__(self):
+        return {"begin": self.begin, "end": self.end}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    @property
+    def is_instant(self):
+        return self.begin == self.end
+
+
+def parse_time(text):
+    """Parse an ISO 8601 date, or date and time, into epoch nanoseconds.
+
+    Times without a UTC offset are taken to be in UTC. Dates and reduced
+    precision values, such as ``2020`` or ``2020-05``, stand for the instant
+    at which they begin. Fractions of a second are kept up to nanoseconds.
+
+    Raises
+    ------
+    ValueError
+        If the input is not a valid time
+
+    """
+
+    match = _TIME_PATTERN.match(text.strip())
+    if match is None:
+        raise ValueError("Invalid time: {!r}".format(text))
+    parts = match.groupdict()
+    date = dt.date(int(parts["year"]), int(parts["month"] or 1),
+                   int(parts["day"] or 1))
+    time_ = dt.time(int(parts["hour"] or 0), int(parts["minute"] or 0),
+                    int(parts["second"] or 0))
+    seconds = ((date.toordinal() - _EPOCH_ORDINAL) * _SECONDS_PER_DAY +
+               time_.hour * 3600 + time_.minute * 60 + time_.second)
+    offset = parts["offset"]
+    if offset is not None and offset != "Z":
+        digits = offset[1:].replace(":", "")
+        minutes = int(digits[:2]) * 60 + int(digits[2:] or 0)
+        seconds -= minutes * 60 if offset[0] == "+" else -minutes * 60
+    fraction = (parts["fraction"] or "")[:9].ljust(9, "0")
+    return seconds * NANOSECONDS_PER_SECOND + int(fraction)
+
+
+def format_time(value):
+    """Format epoch nanoseconds as an ISO 8601 date and time in UTC"""
+    days, nanoseconds = divmod(value, _SECONDS_PER_DAY *
+                               NANOSECONDS_PER_SECOND)
+    seconds, nanoseconds = divmod(nanoseconds, NANOSECONDS_PER_SECOND)
+    result = "{}T{:02d}:{:02d}:{:02d}".format(
+        dt.date.fromordinal(_EPOCH_ORDINAL + days).isoformat(),
+        seconds // 3600, seconds // 60 % 60, seconds % 60
+    )
+    if nanoseconds > 0:
+        result += "." + "{:09d}".format(nanoseconds).rstrip("0")
+    return result + "Z"
+
+
+def parse_period(text):
+    """Parse an ISO 8601 time instant or a ``begin/end`` period.
+
+    Either bound of a period may be ``..`` or empty, which leaves the period
+    open on that side.
+
+    Raises
+    ------
+    ValueError
+        If the input is not a valid instant or period
+
+    """
+
+    if "/" in text:
+        begin, end = text.split("/", 1)
+        result = TimePeriod(
+            MIN_TIME if begin.strip() in _OPEN_BOUNDS else parse_time(begin),
+            MAX_TIME if end.strip() in _OPEN_BOUNDS else parse_time(end)
+        )
+    else:
+        result = TimePeriod(parse_time(text))
+    return result
+
+
+def format_period(period):
+    """Format a time period as an ISO 8601 instant or ``begin/end`` period"""
+    if period.is_instant:
+        return format_time(period.begin)
+    return "{}/{}".format(
+        ".." if period.begin == MIN_TIME else format_time(period.begin),
+        ".." if period.end == MAX_TIME else format_time(period.end)
+    )
+
+
+def get_current_time():
+    """Return the current time, in nanoseconds since the Unix epoch"""
+    try:
+        return time.time_ns()
+    except AttributeError:  # python < 3.7
+        return int(time.time() * NANOSECONDS_PER_SECOND)
+
+
+def as_period(value):
+    """Convert a time value into a ``TimePeriod``.
+
+    Parameters
+    ----------
+    value: object
+        Either a ``TimePeriod``, an ISO 8601 string as accepted by
+        ``parse_period``, a ``datetime.datetime`` or ``datetime.date``, an
+        integer number of nanoseconds since the Unix epoch, a numpy
+        ``datetime64`` or a ``(begin, end)`` pair of those. Naive datetimes
+        are taken to be in UTC
+
+    Returns
+    -------
+    TimePeriod or None
+        The time period, or None if the value is None or not a time
+
+    Raises
+    ------
+    ValueError
+        If the value is not a valid time
+
+    """
+
+    if value is None or isinstance(value, TimePeriod):
+        result = value
+    elif isinstance(value, string_type):
+        result = parse_period(value)
+    elif isinstance(value, (dt.datetime, dt.date)):
+        result = TimePeriod(_from_datetime(value))
+    elif isinstance(value, numbers.Integral) and not isinstance(value, bool):
+        result = TimePeriod(value)
+    elif isinstance(value, (tuple, list)) and len(value) == 2:
+        begin, end = value
+        result = TimePeriod(_get_bound(begin, MIN_TIME).begin,
+                            _get_bound(end, MAX_TIME).end)
+    elif getattr(getattr(value, "dtype", None), "kind", None) == "M":
+        # numpy datetime64 values, of which NaT is not equal to itself
+        if value != value:
+            result = None
+        else:
+            result = TimePeriod(int(value.astype("datetime64[ns]").astype(
+                "int64")))
+    else:
+        raise ValueError("Not a time value: {!r}".format(value))
+    return result
+
+
+def _get_bound(value, default):
+    if value is None or (isinstance(value, string_type) and
+                         value.strip() in _OPEN_BOUNDS):
+        result = TimePeriod(default)
+    else:
+        result = as_period(value)
+    return result
+
+
+def _from_datetime(value):
+    if isinstance(value, dt.datetime):
+        offset = value.utcoffset()
+        if offset is not None:
+            value = value.replace(tzinfo=None) - offset
+        seconds = ((value.toordinal() - _EPOCH_ORDINAL) * _SECONDS_PER_DAY +
+                   value.hour * 3600 + value.minute * 60 + value.second)
+        result = (seconds * NANOSECONDS_PER_SECOND +
+                  value.microsecond * 1000)
+    else:
+        result = ((value.toordinal() - _EPOCH_ORDINAL) * _SECONDS_PER_DAY *
+                  NANOSECONDS_PER_SECOND)
+    return result
+
+
+def parse_gml_time(gml_element):
+    """Parse a GML ``TimeInstant`` or ``TimePeriod`` into a ``TimePeriod``.
+
+    Both GML 3.2 and GML 3.1 elements are supported. Periods may give their
+    bounds either as ``beginPosition`` and ``endPosition`` or as ``begin``
+    and ``end`` time instants. Positions whose ``indeterminatePosition`` is
+    ``unknown`` leave the period open on that side and those that are
+    ``now`` are set to the current time.
+
+    """
+
+    qname = etree.QName(gml_element)
+    namespace = "{{{}}}".format(qname.namespace)
+    try:
+        if qname.localname == "TimeInstant":
+            position = _read_gml_position(
+                gml_element.find(namespace + "timePosition"), None)
+            if position is None:
+                raise ValueError("unknown time position")
+            result = TimePeriod(position)
+        elif qname.localname == "TimePeriod":
+            result = TimePeriod(
+                _read_gml_bound(gml_element, namespace, "begin", MIN_TIME),
+                _read_gml_bound(gml_element, namespace, "end", MAX_TIME)
+            )
+        else:
+            raise RuntimeError(
+                "Invalid GML temporal element: {!r}".format(qname.localname))
+    except ValueError as err:
+        raise RuntimeError(
+            "Invalid GML {}: {}".format(qname.localname, err))
+    return result
+
+
+def _read_gml_bound(period_element, namespace, name, default):
+    position_element = period_element.find(
+        "{0}{1}Position".format(namespace, name))
+    if position_element is None:
+        position_element = period_element.find(
+            "{0}{1}/{0}TimeInstant/{0}timePosition".format(namespace, name))
+    if position_element is None:
+        raise ValueError("missing {}".format(name))
+    return _read_gml_position(position_element, default)
+
+
+def _read_gml_position(position_element, default):
+    if position_element is None:
+        raise ValueError("missing time position")
+    indeterminate = position_element.get("indeterminatePosition")
+    text = (position_element.text or "").strip()
+    if indeterminate == "now":
+        result = get_current_time()
+    elif indeterminate == "unknown" or text == "":
+        result = default
+    else:
+        result = parse_time(text)
+    return result
+
+
+def after(begin, end, other_begin, other_end):
+    return begin > other_end
+
+
+def before(begin, end, other_begin, other_end):
+    return end < other_begin
+
+
+def begins(begin, end, other_begin, other_end):
+    return (begin == other_begin) & (end < other_end)
+
+
+def begun_by(begin, end, other_begin, other_end):
+    return (begin == other_begin) & (end > other_end)
+
+
+def contains(begin, end, other_begin, other_end):
+    return (begin < other_begin) & (end > other_end)
+
+
+def during(begin, end, other_begin, other_end):
+    return (begin > other_begin) & (end < other_end)
+
+
+def equals(begin, end, other_begin, other_end):
+    return (begin == other_begin) & (end == other_end)
+
+
+def overlaps(begin, end, other_begin, other_end):
+    return (begin < other_begin) & (end > other_begin) & (end < other_end)
+
+
+def overlapped_by(begin, end, other_begin, other_end):
+    return (begin > other_begin) & (begin < other_end) & (end > other_end)
+
+
+def meets(begin, end, other_begin, other_end):
+    return end == other_begin
+
+
+def met_by(begin, end, other_begin, other_end):
+    return begin == other_end
+
+
+def ended_by(begin, end, other_begin, other_end):
+    return (begin < other_begin) & (end == other_end)
+
+
+def any_interacts(begin, end, other_begin, other_end):
+    return (begin <= other_end) & (end >= other_begin)
@@ -3,13 +3,29 @@
 from __future__ import absolute_import
 import importlib
 import logging
+import sys
 
 from lxml import etree
 
+from . import errors
+
 logger = logging.getLogger(__name__)
 
 XML_PARSER = etree.XMLParser(resolve_entities=False)
 
+# base class of strings and type of text strings, which python 2 splits
+# into str and unicode
+try:
+    string_type = basestring  # noqa: F821
+    text_type = unicode  # noqa: F821
+except NameError:  # python 3
+    string_type = str
+    text_type = str
+
+
+UNLOADED = object()
+"""Placeholder for optional dependencies that have not been imported yet"""
+
 
 def lazy_load(path, package="pyfes"):
     """Lazily load a module"""
@@ -18,9 +34,175 @@ def lazy_load(path, package="pyfes"):
     return getattr(the_module, class_name)
 
 
-class ReadOnlyList(object):
-    _data = []
+def import_optional(name):
+    """Import an optional dependency, returning None if it is not installed.
+
+    Some optional dependencies take a long time to import, so modules keep
+    them as ``UNLOADED`` and only call this the first time they are needed.
+
+    """
+
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+def as_text(value):
+    """Convert a value to text, keeping strings as they are.
+
+    Unlike ``str``, this does not fail on non ASCII text on python 2.
+
+    """
+
+    return value if isinstance(value, string_type) else text_type(value)
+
+
+def make_lazy_getattr(module_name, lazy_attributes):
+    """Return a module ``__getattr__`` that loads attributes on first use.
+
+    Parameters
+    ----------
+    module_name: str
+        Name of the module that the function is meant for
+    lazy_attributes: dict
+        Maps attribute names to either the path of an object, suitable for
+        ``lazy_load``, or to a function that takes no arguments and builds
+        the attribute. Loaded attributes are stored in the module, so each
+        one is only loaded once.
+
+    """
+
+    def __getattr__(name):
+        try:
+            loader = lazy_attributes[name]
+        except KeyError:
+            raise AttributeError(
+                "module {!r} has no attribute {!r}".format(module_name, name))
+        module = sys.modules[module_name]
+        if callable(loader):
+            value = loader()
+        else:
+            value = lazy_load(loader, package=module.__package__)
+        # threads that race to load the same attribute all get the value
+        # stored by the first one
+        return module.__dict__.setdefault(name, value)
+
+    return __getattr__
+
+
+class Freezable(object):
+    """Mixin for objects that can be made immutable.
+
+    Frozen objects, including every freezable object that they reference,
+    can no longer have their attributes set. This makes them safe to share,
+    for example between the consumers of a cache.
+
+    Freezable classes use ``__slots__`` in order to keep the memory footprint
+    of each instance small. Subclasses should define their own ``__slots__``
+    too.
+
+    """
 
+    __slots__ = ("_frozen",)
+
+    def __new__(cls, *args, **kwargs):
+        instance = super(Freezable, cls).__new__(cls)
+        object.__setattr__(instance, "_frozen", False)
+        return instance
+
+    @classmethod
+    def from_slots(cls, **slots):
+        """Create a new instance by setting its slots directly.
+
+        This bypasses ``__init__`` and any validation that it would perform.
+        It is meant for callers, such as filter parsers, that already
+        guarantee the validity of the input values.
+
+        """
+
+        instance = object.__new__(cls)
+        set_slot = object.__setattr__
+        set_slot(instance, "_frozen", False)
+        for name, value in slots.items():
+            set_slot(instance, name, value)
+        return instance
+
+    @property
+    def frozen(self):
+        return self._frozen
+
+    def freeze(self):
+        """Make this object and the objects it references immutable"""
+        if not self._frozen:
+            for value in self.__getstate__().values():
+                freeze(value)
+            object.__setattr__(self, "_frozen", True)
+        return self
+
+    def __ne__(self, other):
+        # python 2 does not derive != from the __eq__ of subclasses
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __setattr__(self, name, value):
+        if self._frozen:
+            raise errors.ImmutableObjectError(
+                "Cannot set {!r} on frozen object {!r}".format(name, self))
+        super(Freezable, self).__setattr__(name, value)
+
+    def __getstate__(self):
+        state = dict(getattr(self, "__dict__", {}))
+        for name in get_slot_names(type(self)):
+            try:
+                state[name] = getattr(self, name)
+            except AttributeError:  # slot has not been set
+                pass
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+
+def get_slot_names(cls):
+    """Return the names of all slots defined by a class and its bases"""
+    try:
+        result = _SLOT_NAMES[cls]
+    except KeyError:
+        names = []
+        for class_ in reversed(cls.__mro__):
+            slots = class_.__dict__.get("__slots__", ())
+            if isinstance(slots, string_type):
+                slots = (slots,)
+            names.extend(name for name in slots if
+                         name not in ("__dict__", "__weakref__"))
+        result = tuple(names)
+        _SLOT_NAMES[cls] = result
+    return result
+
+
+_SLOT_NAMES = {}
+
+
+def freeze(item):
+    """Freeze the input item, if it supports being frozen.
+
+    Lists and tuples have their items frozen, which is how filters made of
+    several ``ResourceId`` operators are handled.
+
+    """
+
+    if isinstance(item, Freezable):
+        item.freeze()
+    elif isinstance(item, (list, tuple, ReadOnlyList)):
+        for sub_item in item:
+            freeze(sub_item)
+    return item
+
+
+class ReadOnlyList(object):
+    __slots__ = ("_data",)
 
     def __init__(self, arguments=None):
         self._data = list(arguments) if arguments is not None else []
@@ -1,6 +1,8 @@
 """Validators for pyfes expression types"""
 
 from .errors import ValidationError
+from .temporal import TimePeriod
+from .utils import string_type
 
 
 def validate_gml_property_name(item):
@@ -10,12 +12,14 @@ def validate_gml_property_name(item):
 
 def validate_gml_temporal_object(item):
     """Check that the input is a GML temporal object."""
-    raise ValidationError
+    if not isinstance(item, TimePeriod):
+        raise ValidationError
 
 
 def validate_resource_identifier(rid):
     """Check that the input is a valid resource identifier."""
-    raise ValidationError
+    if not isinstance(rid, string_type) or rid.strip() == "":
+        raise ValidationError
 
 
 def validate_wkt(item):
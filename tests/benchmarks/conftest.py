@@ -0,0 +1,59 @@
+"""Fixtures for the pyfes benchmarks.
+
+Besides the timings collected by pytest-benchmark, which include the
+throughput of each stage in operations per second, every benchmark records
+latency percentiles and the peak memory allocated by a single call in its
+``extra_info``. Peak memory is measured with ``tracemalloc`` and is left
+out on pythons that do not have it. Results are saved and compared across
+commits with the usual pytest-benchmark options, for example::
+
+    py.test tests/benchmarks --benchmark-only --benchmark-autosave
+    py.test tests/benchmarks --benchmark-only \\
+        --benchmark-compare --benchmark-compare-fail=median:10%
+
+"""
+
+import pytest
+
+try:
+    import tracemalloc
+except ImportError:  # python 2
+    tracemalloc = None
+
+PERCENTILES = (50, 90, 99)
+
+
+def get_percentile(sorted_values, percentile):
+    """Return a percentile of already sorted values, by nearest rank"""
+    rank = int(round(percentile / 100.0 * (len(sorted_values) - 1)))
+    return sorted_values[rank]
+
+
+def get_peak_memory(function, *args):
+    """Return the peak memory, in bytes, allocated by calling a function"""
+    tracemalloc.start()
+    try:
+        function(*args)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+@pytest.fixture
+def measure(benchmark):
+    """Benchmark a function and record its latency and peak memory"""
+
+    def run(function, *args):
+        result = benchmark(function, *args)
+        if benchmark.stats is not None:  # benchmarks are not disabled
+            latencies = sorted(benchmark.stats.stats.data)
+            for percentile in PERCENTILES:
+                benchmark.extra_info["p{}".format(percentile)] = (
+                    get_percentile(latencies, percentile))
+            if tracemalloc is not None:
+                benchmark.extra_info["peak_memory"] = get_peak_memory(
+                    function, *args)
+        return result
+
+    return run
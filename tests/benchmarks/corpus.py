@@ -0,0 +1,270 @@
+"""A corpus of realistic filters for benchmarking pyfes.
+
+Every filter is available both as a ``fes:Filter`` document and as an
+equivalent CQL2 text expression. Generated filters use a fixed random seed,
+so the corpus is identical on every run and results can be compared across
+commits.
+
+"""
+
+from collections import namedtuple
+import math
+import random
+
+FilterSample = namedtuple("FilterSample", "name xml cql")
+
+PROPERTIES = tuple("p{}".format(index) for index in range(10))
+"""Numeric properties used by the generated filters"""
+
+TEXT_PROPERTIES = tuple("t{}".format(index) for index in range(5))
+"""Text properties used by the generated ``PropertyIsLike`` operators"""
+
+FES_HEADER = (
+    '<fes:Filter xmlns:fes="http://www.opengis.net/fes/2.0" '
+    'xmlns:gml="http://www.opengis.net/gml/3.2">'
+)
+FES_FOOTER = "</fes:Filter>"
+
+SPEC_EXAMPLES = (
+    FilterSample(
+        "spec_equal_to",
+        FES_HEADER +
+        "<fes:PropertyIsEqualTo>"
+        "<fes:ValueReference>SomeProperty</fes:ValueReference>"
+        "<fes:Literal>100</fes:Literal>"
+        "</fes:PropertyIsEqualTo>" +
+        FES_FOOTER,
+        "SomeProperty = 100"
+    ),
+    FilterSample(
+        "spec_less_than",
+        FES_HEADER +
+        "<fes:PropertyIsLessThan>"
+        "<fes:ValueReference>DEPTH</fes:ValueReference>"
+        "<fes:Literal>30</fes:Literal>"
+        "</fes:PropertyIsLessThan>" +
+        FES_FOOTER,
+        "DEPTH < 30"
+    ),
+    FilterSample(
+        "spec_not_disjoint",
+        FES_HEADER +
+        "<fes:Not><fes:Disjoint>"
+        "<fes:ValueReference>Geometry</fes:ValueReference>"
+        '<gml:Envelope srsName="urn:ogc:def:crs:EPSG::4326">'
+        "<gml:lowerCorner>13.0983 31.5899</gml:lowerCorner>"
+        "<gml:upperCorner>35.5472 42.8143</gml:upperCorner>"
+        "</gml:Envelope>"
+        "</fes:Disjoint></fes:Not>" +
+        FES_FOOTER,
+        "NOT S_DISJOINT(Geometry, "
+        "BBOX(31.5899, 13.0983, 42.8143, 35.5472))"
+    ),
+    FilterSample(
+        "spec_and_not_disjoint",
+        FES_HEADER +
+        "<fes:And>"
+        "<fes:PropertyIsLessThan>"
+        "<fes:ValueReference>DEPTH</fes:ValueReference>"
+        "<fes:Literal>30</fes:Literal>"
+        "</fes:PropertyIsLessThan>"
+        "<fes:Not><fes:Disjoint>"
+        "<fes:ValueReference>Geometry</fes:ValueReference>"
+        '<gml:Envelope srsName="urn:ogc:def:crs:EPSG::4326">'
+        "<gml:lowerCorner>13.0983 31.5899</gml:lowerCorner>"
+        "<gml:upperCorner>35.5472 42.8143</gml:upperCorner>"
+        "</gml:Envelope>"
+        "</fes:Disjoint></fes:Not>"
+        "</fes:And>" +
+        FES_FOOTER,
+        "DEPTH < 30 AND NOT S_DISJOINT(Geometry, "
+        "BBOX(31.5899, 13.0983, 42.8143, 35.5472))"
+    ),
+    FilterSample(
+        "spec_between",
+        FES_HEADER +
+        "<fes:PropertyIsBetween>"
+        "<fes:ValueReference>DEPTH</fes:ValueReference>"
+        "<fes:LowerBoundary><fes:Literal>100</fes:Literal>"
+        "</fes:LowerBoundary>"
+        "<fes:UpperBoundary><fes:Literal>200</fes:Literal>"
+        "</fes:UpperBoundary>"
+        "</fes:PropertyIsBetween>" +
+        FES_FOOTER,
+        "DEPTH BETWEEN 100 AND 200"
+    ),
+    FilterSample(
+        "spec_like",
+        FES_HEADER +
+        '<fes:PropertyIsLike wildCard="*" singleChar="#" escapeChar="!">'
+        "<fes:ValueReference>LAST_NAME</fes:ValueReference>"
+        "<fes:Literal>JOHN*</fes:Literal>"
+        "</fes:PropertyIsLike>" +
+        FES_FOOTER,
+        "LAST_NAME LIKE 'JOHN%'"
+    ),
+)
+
+
+def _make_leaf(random_):
+    """Return the XML and CQL forms of a random comparison"""
+    kind = random_.randrange(4)
+    value = random_.randrange(1000)
+    name = random_.choice(TEXT_PROPERTIES if kind == 3 else PROPERTIES)
+    reference = "<fes:ValueReference>{}</fes:ValueReference>".format(name)
+    if kind == 0:
+        xml = (
+            "<fes:PropertyIsLessThan>{}<fes:Literal>{}</fes:Literal>"
+            "</fes:PropertyIsLessThan>".format(reference, value)
+        )
+        cql = "{} < {}".format(name, value)
+    elif kind == 1:
+        xml = (
+            "<fes:PropertyIsEqualTo>{}<fes:Literal>{}</fes:Literal>"
+            "</fes:PropertyIsEqualTo>".format(reference, value)
+        )
+        cql = "{} = {}".format(name, value)
+    elif kind == 2:
+        xml = (
+            "<fes:PropertyIsBetween>{}"
+            "<fes:LowerBoundary><fes:Literal>{}</fes:Literal>"
+            "</fes:LowerBoundary>"
+            "<fes:UpperBoundary><fes:Literal>{}</fes:Literal>"
+            "</fes:UpperBoundary>"
+            "</fes:PropertyIsBetween>".format(reference, value, value + 50)
+        )
+        cql = "{} BETWEEN {} AND {}".format(name, value, value + 50)
+    else:
+        xml = (
+            '<fes:PropertyIsLike wildCard="*" singleChar="." '
+            'escapeChar="\\">{}<fes:Literal>{}*</fes:Literal>'
+            "</fes:PropertyIsLike>".format(reference, value)
+        )
+        cql = "{} LIKE '{}%'".format(name, value)
+    return xml, cql
+
+
+def make_logic_tree(size, seed=0):
+    """Generate a balanced tree of alternating ``And`` and ``Or`` operators.
+
+    Parameters
+    ----------
+    size: int
+        Number of comparison operators at the leaves of the tree
+    seed: int, optional
+        Seed for the random choice of comparisons
+
+    """
+
+    random_ = random.Random(seed)
+    nodes = [_make_leaf(random_) for _ in range(size)]
+    depth = 0
+    while len(nodes) > 1:
+        name = "And" if depth % 2 == 0 else "Or"
+        combined = []
+        for index in range(0, len(nodes) - 1, 2):
+            (first_xml, first_cql), (second_xml, second_cql) = (
+                nodes[index:index + 2])
+            combined.append((
+                "<fes:{0}>{1}{2}</fes:{0}>".format(
+                    name, first_xml, second_xml),
+                "({} {} {})".format(first_cql, name.upper(), second_cql)
+            ))
+        if len(nodes) % 2 == 1:
+            combined.append(nodes[-1])
+        nodes = combined
+        depth += 1
+    xml, cql = nodes[0]
+    return FilterSample("logic_tree_{}".format(size),
+                        FES_HEADER + xml + FES_FOOTER, cql)
+
+
+def _make_ring(center_x, center_y, radius, vertices, random_):
+    points = []
+    for index in range(vertices):
+        angle = 2 * math.pi * index / vertices
+        distance = radius * (0.8 + 0.2 * random_.random())
+        points.append((round(center_x + distance * math.cos(angle), 6),
+                       round(center_y + distance * math.sin(angle), 6)))
+    points.append(points[0])
+    return points
+
+
+def make_polygon_filter(polygons, vertices, seed=0):
+    """Generate an ``Intersects`` filter with a large multi polygon.
+
+    Parameters
+    ----------
+    polygons: int
+        Number of polygons in the geometry
+    vertices: int
+        Number of vertices of each polygon
+    seed: int, optional
+        Seed for the random jitter of the vertices
+
+    """
+
+    random_ = random.Random(seed)
+    rings = [
+        _make_ring(index * 3.0, 0.0, 1.0, vertices, random_)
+        for index in range(polygons)
+    ]
+    members = "".join(
+        "<gml:surfaceMember><gml:Polygon gml:id=\"s{}\">"
+        "<gml:exterior><gml:LinearRing><gml:posList>{}</gml:posList>"
+        "</gml:LinearRing></gml:exterior>"
+        "</gml:Polygon></gml:surfaceMember>".format(
+            index, " ".join("{} {}".format(x, y) for x, y in ring))
+        for index, ring in enumerate(rings)
+    )
+    xml = (
+        FES_HEADER +
+        "<fes:Intersects>"
+        "<fes:ValueReference>geometry</fes:ValueReference>"
+        '<gml:MultiSurface gml:id="ms" srsName="EPSG:4326">{}'
+        "</gml:MultiSurface>"
+        "</fes:Intersects>".format(members) +
+        FES_FOOTER
+    )
+    cql = "S_INTERSECTS(geometry, MULTIPOLYGON({}))".format(", ".join(
+        "(({}))".format(", ".join("{} {}".format(x, y) for x, y in ring))
+        for ring in rings
+    ))
+    return FilterSample(
+        "polygons_{}x{}".format(polygons, vertices), xml, cql)
+
+
+LOGIC_TREES = (
+    make_logic_tree(16),
+    make_logic_tree(256),
+    make_logic_tree(4096),
+)
+
+POLYGON_FILTERS = (
+    make_polygon_filter(1, 1000),
+    make_polygon_filter(50, 200),
+)
+
+CORPUS = SPEC_EXAMPLES + LOGIC_TREES + POLYGON_FILTERS
+
+NON_SPATIAL = tuple(sample for sample in CORPUS if
+                    "Disjoint" not in sample.xml and
+                    "Intersects" not in sample.xml)
+
+
+def make_features(count, seed=0):
+    """Generate features with a value for every property of the corpus"""
+    random_ = random.Random(seed)
+    names = PROPERTIES + ("SomeProperty", "DEPTH", "LAST_NAME")
+    features = []
+    for index in range(count):
+        feature = dict((name, random_.randrange(1000)) for name in names)
+        for name in TEXT_PROPERTIES:
+            feature[name] = "{}-{}".format(random_.randrange(1000), name)
+        feature["LAST_NAME"] = random_.choice(("JOHNSON", "SMITH"))
+        x = random_.uniform(-10.0, 160.0)
+        y = random_.uniform(-10.0, 50.0)
+        feature["geometry"] = feature["Geometry"] = "POINT ({} {})".format(
+            x, y)
+        features.append(feature)
+    return features
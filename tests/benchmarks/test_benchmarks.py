@@ -0,0 +1,144 @@
+"""Benchmarks for the parse, render, compile and evaluate paths of pyfes.
+
+Each stage is measured over the filters of the ``corpus`` module. The
+benchmarks only run when pytest-benchmark is installed and are skipped
+unless ``--benchmark-only`` or ``--benchmark-enable`` is given.
+
+"""
+
+from lxml import etree
+import pytest
+
+from pyfes import geometries
+from pyfes import parsers
+from pyfes.fes20 import compilers
+from pyfes.fes20 import cql2json
+from pyfes.fes20 import cqlparsers
+from pyfes.fes20 import renderers
+from pyfes.fes20 import serializers
+from pyfes.fes20 import translators
+
+from corpus import CORPUS
+from corpus import LOGIC_TREES
+from corpus import NON_SPATIAL
+from corpus import POLYGON_FILTERS
+from corpus import make_features
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = pytest.mark.performance
+
+FEATURE_COUNT = 1000
+BATCH_SIZE = 10000
+
+# evaluating the largest tree over a batch takes seconds per round, mostly
+# spent matching the patterns of its PropertyIsLike operators
+BATCH_SAMPLES = tuple(sample for sample in NON_SPATIAL if
+                      sample is not LOGIC_TREES[-1])
+
+_OPERATORS = {}
+
+
+def get_operator(sample):
+    """Return the parsed filter of a sample, parsing it only once"""
+    try:
+        result = _OPERATORS[sample.name]
+    except KeyError:
+        result = _OPERATORS[sample.name] = parsers.parse_filter(sample.xml)
+    return result
+
+
+def get_ids(samples):
+    return [sample.name for sample in samples]
+
+
+@pytest.mark.benchmark(group="parse-xml")
+@pytest.mark.parametrize("sample", CORPUS, ids=get_ids(CORPUS))
+def test_parse_xml(measure, sample):
+    data = sample.xml.encode("utf-8")
+    assert measure(parsers.parse_filter, data) == get_operator(sample)
+
+
+@pytest.mark.benchmark(group="parse-cql")
+@pytest.mark.parametrize("sample", CORPUS, ids=get_ids(CORPUS))
+def test_parse_cql(measure, sample):
+    assert measure(cqlparsers.parse_cql, sample.cql) is not None
+
+
+@pytest.mark.benchmark(group="parse-cql2-json")
+@pytest.mark.parametrize("sample", CORPUS, ids=get_ids(CORPUS))
+def test_parse_cql2_json(measure, sample):
+    data = cql2json.render_cql2_json(get_operator(sample))
+    assert measure(cql2json.parse_cql2_json, data) is not None
+
+
+@pytest.mark.benchmark(group="parse-gml")
+@pytest.mark.parametrize("sample", POLYGON_FILTERS,
+                         ids=get_ids(POLYGON_FILTERS))
+def test_parse_gml(measure, sample):
+    element = etree.fromstring(sample.xml.encode("utf-8"))[0][1]
+    assert measure(geometries.parse_gml, element) is not None
+
+
+@pytest.mark.benchmark(group="render-xml")
+@pytest.mark.parametrize("sample", CORPUS, ids=get_ids(CORPUS))
+def test_render_xml(measure, sample):
+    assert measure(renderers.render_filter, get_operator(sample))
+
+
+@pytest.mark.benchmark(group="render-cql2-json")
+@pytest.mark.parametrize("sample", CORPUS, ids=get_ids(CORPUS))
+def test_render_cql2_json(measure, sample):
+    assert measure(cql2json.render_cql2_json, get_operator(sample))
+
+
+@pytest.mark.benchmark(group="translate-sql")
+@pytest.mark.parametrize("sample", CORPUS, ids=get_ids(CORPUS))
+def test_translate_sql(measure, sample):
+    assert measure(translators.translate_filter, get_operator(sample))
+
+
+@pytest.mark.benchmark(group="serialize")
+@pytest.mark.parametrize("sample", CORPUS, ids=get_ids(CORPUS))
+def test_dumps(measure, sample):
+    assert measure(serializers.dumps, get_operator(sample))
+
+
+@pytest.mark.benchmark(group="deserialize")
+@pytest.mark.parametrize("sample", CORPUS, ids=get_ids(CORPUS))
+def test_loads(measure, sample):
+    data = serializers.dumps(get_operator(sample))
+    assert measure(serializers.loads, data) == get_operator(sample)
+
+
+@pytest.mark.benchmark(group="compile")
+@pytest.mark.parametrize("sample", CORPUS, ids=get_ids(CORPUS))
+def test_compile(measure, sample):
+    assert measure(compilers.compile_filter, get_operator(sample))
+
+
+@pytest.mark.benchmark(group="evaluate-features")
+@pytest.mark.parametrize("sample", CORPUS, ids=get_ids(CORPUS))
+def test_evaluate_features(measure, sample):
+    predicate = compilers.compile_filter(get_operator(sample))
+    features = make_features(FEATURE_COUNT)
+
+    def evaluate():
+        return sum(1 for feature in features if predicate(feature))
+
+    assert measure(evaluate) >= 0
+
+
+@pytest.mark.benchmark(group="evaluate-batch")
+@pytest.mark.parametrize("sample", BATCH_SAMPLES,
+                         ids=get_ids(BATCH_SAMPLES))
+def test_evaluate_batch(measure, sample):
+    np = pytest.importorskip("numpy")
+    from pyfes.fes20 import evaluators
+    features = make_features(BATCH_SIZE)
+    batch = dict(
+        (name, np.array([feature[name] for feature in features]))
+        for name in features[0] if name not in ("geometry", "Geometry")
+    )
+    mask = measure(evaluators.evaluate_batch, get_operator(sample), batch)
+    assert len(mask) == BATCH_SIZE
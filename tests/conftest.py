@@ -8,3 +8,19 @@ def pytest_configure(config):
         "markers",
         "unit: Run onyl unit tests"
     )
+    config.addinivalue_line(
+        "markers",
+        "performance: Benchmarks, which need pytest-benchmark"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip benchmarks unless they were explicitly requested"""
+    if (config.getoption("benchmark_only", default=False) or
+            config.getoption("benchmark_enable", default=False)):
+        return
+    skip_benchmark = pytest.mark.skip(
+        reason="use --benchmark-only or --benchmark-enable to run")
+    for item in items:
+        if item.get_closest_marker("performance") is not None:
+            item.add_marker(skip_benchmark)
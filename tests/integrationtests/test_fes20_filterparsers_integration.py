@@ -1,11 +1,14 @@
 """Integration tests for pyfes.fes20.filterparsers."""
 
+import io
+
 import pytest
 
 from pyfes.fes20.operators import BinaryComparisonOperator
 from pyfes.fes20.operators import BinaryComparisonName
 from pyfes.fes20 import expressions
 from pyfes.fes20 import filterparsers
+from pyfes.fes20 import operators
 
 pytestmark = pytest.mark.integration
 
@@ -56,3 +59,56 @@ def test_fes_filter_parser_parse(filter_, expected):
     parser = filterparsers.FesFilterParser()
     result = parser.parse_filter(data=filter_)
     assert result == expected
+
+
+def _generate_resource_id_filter(count):
+    yield (
+        b'<fes:Filter xmlns:fes="http://www.opengis.net/fes/2.0">'
+    )
+    for index in range(count):
+        yield '<fes:ResourceId rid="feature.{}"/>'.format(index).encode()
+    yield b"</fes:Filter>"
+
+
+def _generate_nested_filter(depth):
+    comparison = (
+        "<fes:PropertyIsEqualTo>"
+        "<fes:ValueReference>name</fes:ValueReference>"
+        "<fes:Literal>{}</fes:Literal>"
+        "</fes:PropertyIsEqualTo>"
+    )
+    opening = "".join("<fes:Or>" + comparison.format(index) for
+                      index in range(depth))
+    closing = "</fes:Or>" * depth
+    return (
+        '<fes:Filter xmlns:fes="http://www.opengis.net/fes/2.0">'
+        '{}{}{}</fes:Filter>'.format(opening, comparison.format(depth),
+                                     closing)
+    )
+
+
+def test_fes_filter_parser_parse_stream_chunks():
+    parser = filterparsers.FesFilterParser()
+    result = parser.parse_filter_stream(_generate_resource_id_filter(5000))
+    assert len(result) == 5000
+    assert result[-1].rid == "feature.4999"
+
+
+def test_fes_filter_parser_parse_stream_file_like():
+    data = _generate_nested_filter(200)
+    parser = filterparsers.FesFilterParser()
+    result = parser.parse_filter_stream(io.BytesIO(data.encode("utf-8")),
+                                        chunk_size=100)
+    assert result == parser.parse_filter(data)
+    depth = 0
+    while isinstance(result, operators.BinaryLogicOperator):
+        result = result.second_expression
+        depth += 1
+    assert depth == 200
+
+
+def test_fes_filter_parser_parse_stream_invalid():
+    parser = filterparsers.FesFilterParser()
+    with pytest.raises(RuntimeError):
+        parser.parse_filter_stream(
+            b'<fes:Other xmlns:fes="http://www.opengis.net/fes/2.0"/>')
@@ -148,7 +148,6 @@ def test_fes20_examples_212_filter04():
     assert result == expected
 
 
-@pytest.mark.skip
 def test_fes20_examples_212_filter05():
     filter_ = """
         <?xml version="1.0"?>
@@ -165,7 +164,14 @@ def test_fes20_examples_212_filter05():
             <fes:ResourceId rid="INWATERA_1M.7890"/>
             <fes:ResourceId rid="BUILTUPA_1M.4321"/>
         </fes:Filter>
-    """.strip(),
-    expected = operators.ResourceId(rid="")
+    """.strip()
+    expected = tuple(operators.ResourceId(rid=rid) for rid in (
+        "TREESA_1M.1234",
+        "TREESA_1M.5678",
+        "TREESA_1M.9012",
+        "INWATERA_1M.3456",
+        "INWATERA_1M.7890",
+        "BUILTUPA_1M.4321",
+    ))
     result = parsers.parse_filter(filter_)
     assert result == expected
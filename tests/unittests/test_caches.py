@@ -0,0 +1,140 @@
+"""Unit tests for pyfes.caches"""
+
+import mock
+import pytest
+
+from pyfes import caches
+from pyfes import errors
+from pyfes import parsers
+from pyfes.fes20 import expressions
+from pyfes.fes20 import operators
+
+pytestmark = pytest.mark.unit
+
+FILTER_TEMPLATE = """
+<{prefix}:Filter xmlns:{prefix}="http://www.opengis.net/fes/2.0">
+    <{prefix}:PropertyIsLessThan>
+        <{prefix}:ValueReference>DEPTH</{prefix}:ValueReference>
+        <{prefix}:Literal>{value}</{prefix}:Literal>
+    </{prefix}:PropertyIsLessThan>
+</{prefix}:Filter>
+"""
+
+
+@pytest.mark.parametrize("first, second", [
+    (
+        FILTER_TEMPLATE.format(prefix="fes", value=30),
+        FILTER_TEMPLATE.format(prefix="f", value=30),
+    ),
+    (
+        FILTER_TEMPLATE.format(prefix="fes", value=30),
+        " ".join(FILTER_TEMPLATE.format(prefix="fes", value=30).split()),
+    ),
+    (
+        '<a:Filter xmlns:a="urn:x" xmlns:b="urn:y"><b:Thing/></a:Filter>',
+        '<y:Filter  xmlns:y="urn:x" xmlns:x="urn:y" ><x:Thing /></y:Filter>',
+    ),
+    ("DEPTH < 30", "  DEPTH < 30\n"),
+    (b"DEPTH < 30", "DEPTH < 30"),
+])
+def test_normalize_filter_text_equivalent(first, second):
+    first_result = caches.normalize_filter_text(first)
+    second_result = caches.normalize_filter_text(second)
+    assert first_result == second_result
+
+
+@pytest.mark.parametrize("first, second", [
+    (
+        FILTER_TEMPLATE.format(prefix="fes", value=30),
+        FILTER_TEMPLATE.format(prefix="fes", value=31),
+    ),
+    (
+        "<fes:Literal>a  b</fes:Literal>",
+        "<fes:Literal>a b</fes:Literal>",
+    ),
+    (
+        "<fes:Literal> </fes:Literal>",
+        "<fes:Literal></fes:Literal>",
+    ),
+    (
+        "<fes:Literal>\n  <gml:Point/></fes:Literal>",
+        "<fes:Literal><gml:Point/></fes:Literal>",
+    ),
+])
+def test_normalize_filter_text_different(first, second):
+    first_result = caches.normalize_filter_text(first)
+    second_result = caches.normalize_filter_text(second)
+    assert first_result != second_result
+
+
+def test_filter_cache_lru_eviction():
+    cache = caches.FilterCache(maxsize=2)
+    cache.put("first", 1)
+    cache.put("second", 2)
+    assert cache.get("first") == 1
+    cache.put("third", 3)
+    assert cache.get("second") is None
+    assert cache.get("first") == 1
+    assert cache.get("third") == 3
+    assert cache.info() == caches.CacheInfo(
+        hits=3, misses=1, evictions=1, maxsize=2, currsize=2)
+
+
+def test_filter_cache_ttl_eviction():
+    cache = caches.FilterCache(ttl=10)
+    with mock.patch.object(caches, "_clock", return_value=100):
+        cache.put("first", 1)
+    with mock.patch.object(caches, "_clock", return_value=105):
+        assert cache.get("first") == 1
+    with mock.patch.object(caches, "_clock", return_value=110):
+        assert cache.get("first") is None
+    assert cache.info().evictions == 1
+    assert len(cache) == 0
+
+
+def test_filter_cache_clear():
+    cache = caches.FilterCache()
+    cache.put("first", 1)
+    cache.get("first")
+    cache.clear()
+    assert cache.info() == caches.CacheInfo(
+        hits=0, misses=0, evictions=0, maxsize=256, currsize=0)
+
+
+def test_filter_cache_freezes_cached_operators():
+    operator = operators.BinaryComparisonOperator(
+        operator_type=operators.BinaryComparisonName.PROPERTY_IS_EQUAL_TO,
+        first_expression=expressions.ValueReference("this"),
+        second_expression=expressions.Literal("that"),
+    )
+    cache = caches.FilterCache()
+    cache.put("key", operator)
+    assert operator.frozen
+    assert operator.first_expression.frozen
+    with pytest.raises(errors.ImmutableObjectError):
+        operator.match_case = False
+    with pytest.raises(errors.ImmutableObjectError):
+        operator.second_expression.value = "other"
+
+
+def test_parse_filter_with_cache():
+    cache = caches.FilterCache()
+    first = parsers.parse_filter(
+        FILTER_TEMPLATE.format(prefix="fes", value=30), cache=cache)
+    second = parsers.parse_filter(
+        FILTER_TEMPLATE.format(prefix="other", value=30), cache=cache)
+    assert first is second
+    assert first.frozen
+    assert cache.info().hits == 1
+    assert cache.info().misses == 1
+
+
+def test_parse_filter_with_cache_keeps_whitespace_literals():
+    cache = caches.FilterCache()
+    space, empty = [
+        parsers.parse_filter(
+            FILTER_TEMPLATE.format(prefix="fes", value=value), cache=cache)
+        for value in (" ", "")
+    ]
+    assert space.second_expression.value == " "
+    assert empty.second_expression.value is None
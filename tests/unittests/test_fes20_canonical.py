@@ -0,0 +1,106 @@
+"""Unit tests for pyfes.fes20.canonical"""
+
+import pytest
+
+from pyfes.fes20 import canonical
+from pyfes.fes20 import expressions
+from pyfes.fes20 import operators
+
+pytestmark = pytest.mark.unit
+
+
+def _compare(name, value, operator_type="PropertyIsEqualTo"):
+    return operators.BinaryComparisonOperator(
+        operator_type=operator_type,
+        first_expression=expressions.ValueReference(name),
+        second_expression=expressions.Literal(value)
+    )
+
+
+def _logic(operator_type, *operands):
+    result = operands[0]
+    for operand in operands[1:]:
+        result = operators.BinaryLogicOperator(operator_type, result, operand)
+    return result
+
+
+A = _compare("a", 1)
+B = _compare("b", 2)
+C = _compare("c", 3)
+
+
+@pytest.mark.parametrize("first, second", [
+    (_logic("And", A, B), _logic("And", B, A)),
+    (_logic("Or", A, B, C), _logic("Or", C, B, A)),
+    (
+        _logic("And", A, _logic("And", B, C)),
+        _logic("And", _logic("And", C, A), B)
+    ),
+    (
+        operators.UnaryLogicOperator("Not", _logic("Or", A, B)),
+        operators.UnaryLogicOperator("Not", _logic("Or", B, A)),
+    ),
+    (
+        _logic("Or", _logic("And", A, B), C),
+        _logic("Or", C, _logic("And", B, A)),
+    ),
+    (
+        (operators.ResourceId("x.1"), operators.ResourceId("x.2")),
+        (operators.ResourceId("x.2"), operators.ResourceId("x.1"),
+         operators.ResourceId("x.2")),
+    ),
+])
+def test_equivalent_filters(first, second):
+    assert first != second
+    assert canonical.canonicalize(first) == canonical.canonicalize(second)
+    assert canonical.canonical_text(first) == canonical.canonical_text(second)
+    assert (canonical.structural_hash(first) ==
+            canonical.structural_hash(second))
+
+
+@pytest.mark.parametrize("first, second", [
+    (_logic("And", A, B), _logic("Or", A, B)),
+    (
+        _logic("And", A, _logic("Or", B, C)),
+        _logic("Or", _logic("And", A, B), C),
+    ),
+    (_compare("a", 1), _compare("a", "1")),
+    (_compare("a", 1), _compare("a", 1, "PropertyIsNotEqualTo")),
+    (
+        operators.NullOperator(expressions.ValueReference("a")),
+        operators.NilOperator(expressions.ValueReference("a")),
+    ),
+    (
+        operators.DistanceOperator(
+            "DWithin", expressions.ValueReference("a"), "POINT (1 2)", 1,
+            uom="m"),
+        operators.DistanceOperator(
+            "DWithin", expressions.ValueReference("a"), "POINT (1 2)", 1,
+            uom="km"),
+    ),
+])
+def test_different_filters(first, second):
+    assert canonical.canonicalize(first) != canonical.canonicalize(second)
+    assert (canonical.structural_hash(first) !=
+            canonical.structural_hash(second))
+
+
+def test_canonicalize_does_not_modify_input():
+    operator = _logic("And", C, B, A).freeze()
+    result = canonical.canonicalize(operator)
+    assert operator.second_expression is A
+    assert result.second_expression is C
+    assert not result.frozen
+
+
+def test_canonicalize_deeply_nested_filter():
+    operands = [_compare("a", index) for index in range(3000)]
+    operator = _logic("Or", *operands)
+    result = canonical.canonicalize(operator)
+    assert result == canonical.canonicalize(_logic("Or", *operands[::-1]))
+    assert len(canonical.structural_hash(result)) == 64
+
+
+def test_canonical_filters_are_usable_as_dict_keys():
+    cache = {canonical.canonicalize(_logic("And", A, B)): "result"}
+    assert cache[canonical.canonicalize(_logic("And", B, A))] == "result"
@@ -0,0 +1,371 @@
+"""Unit tests for pyfes.fes20.compilers"""
+
+import pytest
+
+from pyfes import errors
+from pyfes import geometries
+from pyfes import temporal
+from pyfes.fes20 import compilers
+from pyfes.fes20 import expressions
+from pyfes.fes20 import operators
+
+pytestmark = pytest.mark.unit
+
+
+def _comparison(operator_type, name, value, **kwargs):
+    return operators.BinaryComparisonOperator(
+        operator_type=operator_type,
+        first_expression=expressions.ValueReference(name),
+        second_expression=expressions.Literal(value),
+        **kwargs
+    )
+
+
+@pytest.mark.parametrize("operator_type, literal, feature, expected", [
+    ("PropertyIsEqualTo", "100", {"prop": 100}, True),
+    ("PropertyIsEqualTo", "100", {"prop": "100"}, True),
+    ("PropertyIsEqualTo", "100", {"prop": 10}, False),
+    ("PropertyIsNotEqualTo", "100", {"prop": 10}, True),
+    ("PropertyIsLessThan", "30", {"prop": 10}, True),
+    ("PropertyIsLessThan", "30", {"prop": 30}, False),
+    ("PropertyIsLessThanOrEqualTo", "30", {"prop": 30}, True),
+    ("PropertyIsGreaterThan", 30, {"prop": 31.5}, True),
+    ("PropertyIsGreaterThanOrEqualTo", 30, {"prop": 29}, False),
+    ("PropertyIsEqualTo", "abc", {"prop": "abc"}, True),
+    ("PropertyIsLessThan", "abc", {"prop": 10}, False),
+    ("PropertyIsEqualTo", "100", {}, False),
+    ("PropertyIsEqualTo", "100", {"prop": None}, False),
+])
+def test_compile_binary_comparison(operator_type, literal, feature, expected):
+    predicate = compilers.compile_filter(
+        _comparison(operator_type, "prop", literal))
+    assert predicate(feature) == expected
+
+
+@pytest.mark.parametrize("match_case, feature, expected", [
+    (True, {"prop": "ABC"}, False),
+    (False, {"prop": "ABC"}, True),
+    ("false", {"prop": "ABC"}, True),
+])
+def test_compile_binary_comparison_match_case(match_case, feature, expected):
+    predicate = compilers.compile_filter(
+        _comparison("PropertyIsEqualTo", "prop", "abc",
+                    match_case=match_case)
+    )
+    assert predicate(feature) == expected
+
+
+@pytest.mark.parametrize("match_action, values, expected", [
+    (operators.MatchAction.ANY, [1, 5], True),
+    (operators.MatchAction.ANY, [1, 2], False),
+    (operators.MatchAction.ALL, [5, 5], True),
+    (operators.MatchAction.ALL, [1, 5], False),
+    (operators.MatchAction.ONE, [1, 5], True),
+    (operators.MatchAction.ONE, [5, 5], False),
+])
+def test_compile_binary_comparison_match_action(match_action, values,
+                                                expected):
+    predicate = compilers.compile_filter(
+        _comparison("PropertyIsEqualTo", "prop", "5",
+                    match_action=match_action)
+    )
+    assert predicate({"prop": values}) == expected
+
+
+def test_compile_binary_comparison_between_references():
+    predicate = compilers.compile_filter(
+        operators.BinaryComparisonOperator(
+            operator_type="PropertyIsLessThan",
+            first_expression=expressions.ValueReference("low"),
+            second_expression=expressions.ValueReference("high"),
+        )
+    )
+    assert predicate({"low": 1, "high": "2"})
+    assert not predicate({"low": 3, "high": 2})
+
+
+def test_compile_nested_value_reference():
+    predicate = compilers.compile_filter(
+        _comparison("PropertyIsEqualTo", "a/b", "1"))
+    assert predicate({"a": {"b": 1}})
+    assert not predicate({"a": 1})
+
+
+@pytest.mark.parametrize("pattern, value, expected", [
+    ("abc*", "abcdef", True),
+    ("abc*", "xabc", False),
+    ("a.c", "abc", True),
+    ("a.c", "abbc", False),
+    ("a!*c", "a*c", True),
+    ("a!*c", "abc", False),
+    ("50%", "50%", True),
+    (u"caf\u00e9*", u"caf\u00e9 noir", True),
+    (u"caf\u00e9", u"cafe", False),
+])
+def test_compile_like_operator(pattern, value, expected):
+    predicate = compilers.compile_filter(
+        operators.LikeOperator(
+            first_expression=expressions.ValueReference("prop"),
+            second_expression=expressions.Literal(pattern),
+            wild_card="*",
+            single_char=".",
+            escape_char="!"
+        )
+    )
+    assert predicate({"prop": value}) == expected
+
+
+@pytest.mark.parametrize("value, expected", [
+    (10, True),
+    (20, True),
+    (15, True),
+    (9, False),
+    (21, False),
+    (None, False),
+])
+def test_compile_between_comparison_operator(value, expected):
+    predicate = compilers.compile_filter(
+        operators.BetweenComparisonOperator(
+            expression=expressions.ValueReference("prop"),
+            lower_boundary=expressions.Literal("10"),
+            upper_boundary=expressions.Literal(20),
+        )
+    )
+    assert predicate({"prop": value}) == expected
+
+
+@pytest.mark.parametrize("literal", [7, 7.0, "7", "abc", True, 10 ** 20])
+@pytest.mark.parametrize("value", [
+    7, 7.5, "7", " 7 ", "7.0", "abc", "ABC", "", True, None,
+])
+def test_literal_and_runtime_comparisons_agree(literal, value):
+    for operator_type in operators.BinaryComparisonName:
+        by_literal = compilers.compile_filter(
+            _comparison(operator_type, "prop", literal))
+        by_reference = compilers.compile_filter(
+            operators.BinaryComparisonOperator(
+                operator_type=operator_type,
+                first_expression=expressions.ValueReference("prop"),
+                second_expression=expressions.ValueReference("other"),
+            )
+        )
+        feature = {"prop": value, "other": literal}
+        assert by_literal(feature) == by_reference(feature), operator_type
+    between = compilers.compile_filter(
+        operators.BetweenComparisonOperator(
+            expression=expressions.ValueReference("prop"),
+            lower_boundary=expressions.Literal(literal),
+            upper_boundary=expressions.Literal(literal),
+        )
+    )
+    is_equal = compilers.compile_filter(
+        _comparison("PropertyIsEqualTo", "prop", literal))
+    assert between({"prop": value}) == is_equal({"prop": value})
+
+
+@pytest.mark.parametrize("feature, null_expected, nil_expected", [
+    ({}, True, False),
+    ({"prop": None}, True, True),
+    ({"prop": 1}, False, False),
+])
+def test_compile_null_and_nil_operators(feature, null_expected,
+                                        nil_expected):
+    reference = expressions.ValueReference("prop")
+    null_predicate = compilers.compile_filter(
+        operators.NullOperator(reference))
+    nil_predicate = compilers.compile_filter(operators.NilOperator(reference))
+    assert null_predicate(feature) == null_expected
+    assert nil_predicate(feature) == nil_expected
+
+
+@pytest.mark.parametrize("type_, feature, expected", [
+    (operators.BinaryLogicType.AND, {"a": 1, "b": 2, "c": 3}, True),
+    (operators.BinaryLogicType.AND, {"a": 1, "b": 2, "c": 0}, False),
+    (operators.BinaryLogicType.OR, {"a": 0, "b": 0, "c": 3}, True),
+    (operators.BinaryLogicType.OR, {"a": 0, "b": 0, "c": 0}, False),
+])
+def test_compile_binary_logic_operator(type_, feature, expected):
+    operator = operators.BinaryLogicOperator(
+        operator_type=type_,
+        first_expression=operators.BinaryLogicOperator(
+            operator_type=type_,
+            first_expression=_comparison("PropertyIsEqualTo", "a", "1"),
+            second_expression=_comparison("PropertyIsEqualTo", "b", "2"),
+        ),
+        second_expression=_comparison("PropertyIsEqualTo", "c", "3"),
+    )
+    predicate = compilers.compile_filter(operator)
+    assert predicate(feature) == expected
+
+
+def test_compile_unary_logic_operator():
+    predicate = compilers.compile_filter(
+        operators.UnaryLogicOperator(
+            operator_type=operators.UnaryLogicType.NOT,
+            operand=_comparison("PropertyIsEqualTo", "a", "1")
+        )
+    )
+    assert predicate({"a": 2})
+    assert not predicate({"a": 1})
+
+
+def test_compile_resource_ids():
+    predicate = compilers.compile_filter(
+        (operators.ResourceId("first.1"), operators.ResourceId("first.2")),
+        id_property="fid"
+    )
+    assert predicate({"fid": "first.2"})
+    assert not predicate({"fid": "first.3"})
+
+
+def test_compile_function():
+    operator = operators.BinaryComparisonOperator(
+        operator_type="PropertyIsEqualTo",
+        first_expression=expressions.Function(
+            "upper", arguments=[expressions.ValueReference("name")]),
+        second_expression=expressions.Literal("ABC"),
+    )
+    predicate = compilers.compile_filter(
+        operator, functions={"upper": lambda value: value.upper()})
+    assert predicate({"name": "abc"})
+
+
+def test_compile_unknown_function():
+    operator = operators.BinaryComparisonOperator(
+        operator_type="PropertyIsEqualTo",
+        first_expression=expressions.Function("unknown"),
+        second_expression=expressions.Literal("ABC"),
+    )
+    with pytest.raises(errors.InvalidExpressionError):
+        compilers.compile_filter(operator)
+
+
+def test_compile_unsupported_operator():
+    with pytest.raises(errors.InvalidOperatorError):
+        compilers.compile_filter(object())
+
+
+@pytest.mark.parametrize("operator_type, geometry, expected", [
+    ("BBOX", "POINT (5 5)", True),
+    ("BBOX", "LINESTRING (-5 -5, -1 12)", False),
+    ("Intersects", "LINESTRING (-5 5, 5 5)", True),
+    ("Within", "POINT (5 5)", True),
+    ("Within", "POINT (0 5)", False),
+    ("Disjoint", "POINT (20 20)", True),
+    ("Touches", "POINT (0 5)", True),
+    ("Contains", "POINT (5 5)", False),
+])
+def test_compile_binary_spatial_operator(operator_type, geometry, expected):
+    operator = operators.BinarySpatialOperator(
+        operator_type=operator_type,
+        first_operand=expressions.ValueReference("geom"),
+        second_operand="POLYGON ((0 0, 10 0, 10 10, 0 10, 0 0))"
+    )
+    predicate = compilers.compile_filter(operator)
+    assert predicate({"geom": geometry}) == expected
+
+
+@pytest.mark.parametrize("feature", [
+    {},
+    {"geom": None},
+    {"geom": "POINT EMPTY"},
+    {"geom": "not a geometry"},
+])
+def test_compile_binary_spatial_operator_without_geometry(feature):
+    operator = operators.BinarySpatialOperator(
+        operator_type="Disjoint",
+        first_operand=expressions.ValueReference("geom"),
+        second_operand="POINT (1 1)"
+    )
+    assert not compilers.compile_filter(operator)(feature)
+
+
+@pytest.mark.parametrize("operator_type, distance, expected", [
+    ("DWithin", 5, True),
+    ("DWithin", 4.9, False),
+    ("Beyond", 5, False),
+    ("Beyond", 4.9, True),
+])
+def test_compile_distance_operator(operator_type, distance, expected):
+    operator = operators.DistanceOperator(
+        operator_type=operator_type,
+        expression=expressions.ValueReference("geom"),
+        geometry="POINT (0 0)",
+        distance=distance
+    )
+    predicate = compilers.compile_filter(operator)
+    assert predicate({"geom": "LINESTRING (3 4, 10 4)"}) == expected
+
+
+@pytest.mark.parametrize("geometry, uom, expected", [
+    ("POINT (5 0)", "m", False),
+    ("POINT (0.005 0)", "m", True),
+    ("POINT (5 0)", "km", True),
+    ("POINT (500 0)", None, True),
+])
+def test_compile_distance_operator_with_units(geometry, uom, expected):
+    operator = operators.DistanceOperator(
+        operator_type="DWithin",
+        expression=expressions.ValueReference("geom"),
+        geometry=geometries.Geometry("Point", [0, 0], srs="EPSG:4326"),
+        distance=1000,
+        uom=uom
+    )
+    predicate = compilers.compile_filter(operator)
+    assert predicate({"geom": geometry}) == expected
+
+
+def _temporal(operator_type, period):
+    return operators.TemporalOperator(
+        operator_type=operator_type,
+        first_operand=expressions.ValueReference("time"),
+        second_operand=period
+    )
+
+
+@pytest.mark.parametrize("operator_type, time, expected", [
+    ("After", "2020-03-01", True),
+    ("After", "2020-02-01", False),
+    ("Before", "2019-12-31T23:59:59Z", True),
+    ("Before", "2020-01-01", False),
+    ("Begins", "2020-01-01/2020-01-15", True),
+    ("Begins", "2020-01-01/2020-02-01", False),
+    ("BegunBy", "2020-01-01/2020-03-01", True),
+    ("TContains", "2019-01-01/2021-01-01", True),
+    ("TContains", "2020-01-01/2021-01-01", False),
+    ("During", "2020-01-15", True),
+    ("During", "2020-01-01", False),
+    ("TEquals", "2020-01-01T00:00:00Z/2020-02-01T00:00:00Z", True),
+    ("TEquals", "2020-01-01/..", False),
+    ("TOverlaps", "2019-12-01/2020-01-15", True),
+    ("OverlappedBy", "2020-01-15/2020-03-01", True),
+    ("OverlappedBy", "2020-01-01/2020-03-01", False),
+    ("Meets", "2019-12-01/2020-01-01", True),
+    ("MetBy", "2020-02-01/2020-03-01", True),
+    ("EndedBy", "2019-12-01/2020-02-01", True),
+    ("AnyInteracts", "2020-02-01/..", True),
+    ("AnyInteracts", "../2019-12-31", False),
+])
+def test_compile_temporal_operator(operator_type, time, expected):
+    predicate = compilers.compile_filter(
+        _temporal(operator_type, temporal.parse_period(
+            "2020-01-01/2020-02-01")))
+    assert predicate({"time": time}) == expected
+
+
+@pytest.mark.parametrize("feature", [
+    {},
+    {"time": None},
+    {"time": "not a time"},
+    {"time": 1.5},
+])
+def test_compile_temporal_operator_without_time(feature):
+    predicate = compilers.compile_filter(
+        _temporal("AnyInteracts", expressions.Literal("../..")))
+    assert not predicate(feature)
+
+
+def test_compile_temporal_operator_invalid_literal():
+    with pytest.raises(errors.InvalidExpressionError):
+        compilers.compile_filter(
+            _temporal("During", expressions.Literal("not a time")))
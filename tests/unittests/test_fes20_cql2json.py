@@ -0,0 +1,227 @@
+"""Unit tests for pyfes.fes20.cql2json"""
+
+import json
+
+import mock
+import pytest
+
+from pyfes import errors
+from pyfes import geometries
+from pyfes import parsers
+from pyfes import temporal
+from pyfes.fes20 import cql2json
+from pyfes.fes20 import cqlparsers
+from pyfes.fes20 import expressions
+from pyfes.fes20 import operators
+
+pytestmark = pytest.mark.unit
+
+NAME = expressions.ValueReference("name")
+GEOM = expressions.ValueReference("geom")
+DEPTH = {"property": "DEPTH"}
+POINT = {"type": "Point", "coordinates": [1, 2]}
+
+
+@pytest.mark.parametrize("document, cql", [
+    ({"op": "<", "args": [DEPTH, 30]}, "DEPTH < 30"),
+    ({"op": "<>", "args": [DEPTH, "it's"]}, "DEPTH <> 'it''s'"),
+    ({"op": ">=", "args": [DEPTH, -2.5]}, "DEPTH >= -2.5"),
+    ({"op": "=", "args": [DEPTH, True]}, "DEPTH = TRUE"),
+    ({"op": "like", "args": [{"property": "name"}, "Tag%"]},
+     "name LIKE 'Tag%'"),
+    ({"op": "not", "args": [
+        {"op": "like", "args": [{"property": "name"}, "Tag%"]}]},
+     "name NOT LIKE 'Tag%'"),
+    ({"op": "between", "args": [DEPTH, 1, 10]}, "DEPTH BETWEEN 1 AND 10"),
+    ({"op": "in", "args": [DEPTH, [1, 2, 3]]}, "DEPTH IN (1, 2, 3)"),
+    ({"op": "isNull", "args": [DEPTH]}, "DEPTH IS NULL"),
+    ({"op": "and", "args": [
+        {"op": "<", "args": [DEPTH, 30]},
+        {"op": ">", "args": [DEPTH, 10]},
+        {"op": "or", "args": [
+            {"op": "isNull", "args": [DEPTH]},
+            {"op": "=", "args": [DEPTH, 0]}]},
+    ]}, "DEPTH < 30 AND DEPTH > 10 AND (DEPTH IS NULL OR DEPTH = 0)"),
+    ({"op": "=", "args": [
+        {"op": "lower", "args": [{"property": "name"}, 2]}, "a"]},
+     "lower(name, 2) = 'a'"),
+    ({"op": "s_intersects", "args": [{"property": "geom"}, POINT]},
+     "S_INTERSECTS(geom, POINT (1 2))"),
+    ({"op": "S_WITHIN", "args": [POINT, {"property": "geom"}]},
+     "S_WITHIN(POINT (1 2), geom)"),
+    ({"op": "s_intersects", "args": [
+        {"property": "geom"}, {"bbox": [-10, 40, 10, 50]}]},
+     "S_INTERSECTS(geom, BBOX(-10, 40, 10, 50))"),
+    ({"op": "s_crosses", "args": [{"property": "geom"}, {
+        "type": "MultiLineString",
+        "coordinates": [[[0, 0, 1], [1, 1, 1]], [[2, 2, 1], [3, 3, 1]]]}]},
+     "S_CROSSES(geom, MULTILINESTRING Z ((0 0 1, 1 1 1), (2 2 1, 3 3 1)))"),
+    ({"op": "s_dwithin", "args": [{"property": "geom"}, POINT, 10,
+                                  "meters"]},
+     "DWITHIN(geom, POINT(1 2), 10, meters)"),
+    ({"op": "t_before", "args": [
+        {"property": "time"}, {"timestamp": "2020-01-01T00:00:00Z"}]},
+     "T_BEFORE(time, TIMESTAMP('2020-01-01T00:00:00Z'))"),
+    ({"op": "t_metBy", "args": [
+        {"property": "time"}, {"date": "2020-01-01"}]},
+     "T_METBY(time, DATE('2020-01-01'))"),
+    ({"op": "t_during", "args": [
+        {"property": "time"}, {"interval": ["2020-01-01", ".."]}]},
+     "T_DURING(time, INTERVAL('2020-01-01', '..'))"),
+])
+def test_parse_cql2_json_matches_cql_text(document, cql):
+    expected = cqlparsers.parse_cql(cql)
+    assert cql2json.parse_cql2_json(document) == expected
+    assert cql2json.parse_cql2_json(json.dumps(document)) == expected
+    assert cql2json.parse_cql2_json(
+        json.dumps(document).encode("utf-8")) == expected
+
+
+def test_parse_case_insensitive_comparison():
+    result = cql2json.parse_cql2_json({"op": "=", "args": [
+        {"op": "casei", "args": [DEPTH]},
+        {"op": "casei", "args": ["abc"]},
+    ]})
+    assert result == operators.BinaryComparisonOperator(
+        "PropertyIsEqualTo", expressions.ValueReference("DEPTH"),
+        expressions.Literal("abc"), match_case=False)
+
+
+def test_parse_geometry_srs():
+    result = cql2json.parse_cql2_json(
+        {"op": "s_intersects", "args": [{"property": "geom"}, POINT]},
+        srs="EPSG:4326"
+    )
+    assert result.second_operand.srs == "EPSG:4326"
+
+
+@pytest.mark.parametrize("operator", [
+    cqlparsers.parse_cql(
+        "DEPTH < 30 AND (name LIKE 'Tag%' OR DEPTH BETWEEN 1 AND 10)"),
+    cqlparsers.parse_cql("lower(name) IN ('a', 'b') OR NOT name IS NULL"),
+    cqlparsers.parse_cql(
+        "S_CONTAINS(geom, POLYGON ((0 0, 10 0, 10 10, 0 0)))"),
+    cqlparsers.parse_cql("BEYOND(geom, POINT(1 2), 10.5)"),
+    cqlparsers.parse_cql("BEYOND(geom, POINT(1 2), 1, nautical miles)"),
+    cqlparsers.parse_cql("T_DURING(time, INTERVAL('2020-01-01', '..'))"),
+    cqlparsers.parse_cql("T_AFTER(time, TIMESTAMP('2020-01-01T10:00Z'))"),
+    operators.BinaryComparisonOperator(
+        "PropertyIsNotEqualTo", NAME, expressions.Literal(None),
+        match_case=False),
+    operators.BinarySpatialOperator(
+        "Intersects", GEOM,
+        geometries.parse_wkt(
+            "GEOMETRYCOLLECTION (POINT (1 2), POINT EMPTY, "
+            "MULTIPOLYGON (((0 0, 1 0, 1 1, 0 0)), ((5 5, 6 5, 6 6, 5 5))), "
+            "MULTIPOINT ((3 4), (5 6)))"
+        )
+    ),
+])
+def test_render_cql2_json_round_trip(operator):
+    rendered = cql2json.render_cql2_json(operator)
+    assert cql2json.parse_cql2_json(rendered) == operator
+    with mock.patch.object(cql2json, "orjson", None):
+        assert cql2json.render_cql2_json(operator) == rendered
+        assert cql2json.parse_cql2_json(rendered) == operator
+
+
+@pytest.mark.parametrize("operator, expected", [
+    (
+        operators.LikeOperator(NAME, expressions.Literal("a*b.!*100%"),
+                               wild_card="*", single_char=".",
+                               escape_char="!"),
+        {"op": "like", "args": [{"property": "name"}, "a%b_*100\\%"]}
+    ),
+    (
+        operators.BinarySpatialOperator(
+            "BBOX", GEOM, geometries.make_box(0, 1, 2, 3)),
+        {"op": "s_intersects", "args": [{"property": "geom"},
+                                        {"bbox": [0.0, 1.0, 2.0, 3.0]}]}
+    ),
+    (
+        operators.BinarySpatialOperator("Touches", GEOM, "POINT (1 2)"),
+        {"op": "s_touches", "args": [
+            {"property": "geom"},
+            {"type": "Point", "coordinates": [1.0, 2.0]}]}
+    ),
+    (
+        operators.TemporalOperator(
+            "During", expressions.ValueReference("time"),
+            temporal.parse_period("2020-01-01/..")),
+        {"op": "t_during", "args": [
+            {"property": "time"},
+            {"interval": ["2020-01-01T00:00:00Z", ".."]}]}
+    ),
+    (
+        operators.TemporalOperator(
+            "After", expressions.ValueReference("time"),
+            temporal.parse_period("2020-01-01T10:00:00.25Z")),
+        {"op": "t_after", "args": [
+            {"property": "time"},
+            {"timestamp": "2020-01-01T10:00:00.25Z"}]}
+    ),
+])
+def test_render_document(operator, expected):
+    assert cql2json.Cql2JsonRenderer().render_document(operator) == expected
+
+
+def test_long_chains_do_not_recurse():
+    document = {"op": "or", "args": [
+        {"op": "=", "args": [DEPTH, index]} for index in range(5000)]}
+    for _ in range(2000):
+        document = {"op": "not", "args": [document]}
+    operator = cql2json.parse_cql2_json(document)
+    result = cql2json.Cql2JsonRenderer().render_document(operator)
+    for _ in range(2000):
+        assert result["op"] == "not"
+        result = result["args"][0]
+    assert result["op"] == "or"
+    assert result["args"][-1] == {"op": "=", "args": [DEPTH, 4999]}
+    assert len(result["args"]) == 5000
+
+
+@pytest.mark.parametrize("operator", [
+    operators.NilOperator(NAME),
+    operators.BinaryComparisonOperator(
+        "PropertyIsEqualTo", NAME, expressions.Literal(1),
+        match_action="All"),
+    (operators.ResourceId("a"),),
+    operators.DistanceOperator("DWithin", GEOM, "POINT (1 2)", 5,
+                               uom="urn:ogc:def:uom:EPSG::9001"),
+])
+def test_render_unsupported(operator):
+    with pytest.raises(errors.PyFesError):
+        cql2json.render_cql2_json(operator)
+
+
+@pytest.mark.parametrize("data", [
+    "{",
+    "30",
+    '{"property": "DEPTH"}',
+    '{"op": "<", "args": [{"property": "DEPTH"}]}',
+    '{"op": "<", "args": {"property": "DEPTH"}}',
+    '{"op": "and", "args": [{"op": "isNull", "args": [{"property": "a"}]}]}',
+    '{"op": "and", "args": [{"property": "a"}, {"property": "b"}]}',
+    '{"op": "in", "args": [{"property": "a"}, []]}',
+    '{"op": "=", "args": [{"op": "casei", "args": ["a"]}, "a"]}',
+    '{"op": "=", "args": [{"property": "a"}, {"unknown": 1}]}',
+    '{"op": "=", "args": [{"property": "a"}, {"bbox": [1, 2]}]}',
+    '{"op": "s_intersects", "args": [{"property": "a"}, '
+    '{"type": "Point", "coordinates": [1]}]}',
+    '{"op": "s_dwithin", "args": [{"property": "a"}, '
+    '{"property": "b"}, 10]}',
+    '{"op": "s_dwithin", "args": [{"property": "a"}, '
+    '{"type": "Point", "coordinates": [1, 2]}, 10, "furlongs"]}',
+    '{"op": "s_dwithin", "args": [{"property": "a"}, '
+    '{"type": "Point", "coordinates": [1, 2]}, 10, 5]}',
+    '{"op": "t_after", "args": [{"property": "a"}, {"interval": [1]}]}',
+])
+def test_parse_invalid(data):
+    with pytest.raises(errors.ValidationError):
+        cql2json.parse_cql2_json(data)
+
+
+def test_parse_filter_with_cql2_json():
+    result = parsers.parse_filter(
+        b'{"op": "<", "args": [{"property": "DEPTH"}, 30]}')
+    assert result == cqlparsers.parse_cql("DEPTH < 30")
@@ -0,0 +1,201 @@
+"""Unit tests for pyfes.fes20.cqlparsers"""
+
+import pytest
+
+from pyfes import errors
+from pyfes import geometries
+from pyfes import parsers
+from pyfes.fes20 import cqlparsers
+from pyfes.fes20 import expressions
+from pyfes.fes20 import filterparsers
+from pyfes.fes20 import operators
+from pyfes.fes20 import renderers
+
+pytestmark = pytest.mark.unit
+
+DEPTH = expressions.ValueReference("DEPTH")
+NAME = expressions.ValueReference("name")
+GEOM = expressions.ValueReference("geom")
+
+
+def _compare(operator_type, first, second):
+    return operators.BinaryComparisonOperator(operator_type, first, second)
+
+
+def _and(first, second):
+    return operators.BinaryLogicOperator("And", first, second)
+
+
+def _or(first, second):
+    return operators.BinaryLogicOperator("Or", first, second)
+
+
+def _not(operand):
+    return operators.UnaryLogicOperator("Not", operand)
+
+
+def _box(minx, miny, maxx, maxy, srs=None):
+    return geometries.Geometry(
+        "Polygon",
+        [minx, miny, maxx, miny, maxx, maxy, minx, maxy, minx, miny],
+        srs=srs
+    )
+
+
+LESS = _compare("PropertyIsLessThan", DEPTH, expressions.Literal(30))
+LIKE = operators.LikeOperator(NAME, expressions.Literal("Tag%"),
+                              wild_card="%", single_char="_",
+                              escape_char="\\")
+
+
+@pytest.mark.parametrize("data, expected", [
+    ("DEPTH < 30", LESS),
+    ("depth <= -2.5", _compare(
+        "PropertyIsLessThanOrEqualTo", expressions.ValueReference("depth"),
+        expressions.Literal(-2.5))),
+    ("DEPTH <> 'it''s'", _compare(
+        "PropertyIsNotEqualTo", DEPTH, expressions.Literal("it's"))),
+    ("DEPTH != TRUE", _compare(
+        "PropertyIsNotEqualTo", DEPTH, expressions.Literal(True))),
+    ('"the depth" >= 1e3', _compare(
+        "PropertyIsGreaterThanOrEqualTo",
+        expressions.ValueReference("the depth"), expressions.Literal(1e3))),
+    ("name LIKE 'Tag%'", LIKE),
+    ("name NOT LIKE 'Tag%'", _not(LIKE)),
+    ("DEPTH BETWEEN 1 AND 10", operators.BetweenComparisonOperator(
+        DEPTH, expressions.Literal(1), expressions.Literal(10))),
+    ("DEPTH NOT BETWEEN 1 AND 10", _not(operators.BetweenComparisonOperator(
+        DEPTH, expressions.Literal(1), expressions.Literal(10)))),
+    ("DEPTH IS NULL", operators.NullOperator(DEPTH)),
+    ("DEPTH IS NOT NULL", _not(operators.NullOperator(DEPTH))),
+    ("name IN ('a', 'b')", _or(
+        _compare("PropertyIsEqualTo", NAME, expressions.Literal("a")),
+        _compare("PropertyIsEqualTo", NAME, expressions.Literal("b")))),
+    ("name NOT IN ('a')", _not(
+        _compare("PropertyIsEqualTo", NAME, expressions.Literal("a")))),
+    ("DEPTH < 30 AND name LIKE 'Tag%' OR NOT DEPTH IS NULL", _or(
+        _and(LESS, LIKE), _not(operators.NullOperator(DEPTH)))),
+    ("DEPTH < 30 and (name LIKE 'Tag%' or DEPTH < 30)", _and(
+        LESS, _or(LIKE, LESS))),
+    ("NOT DEPTH < 30 AND DEPTH < 30", _and(_not(LESS), LESS)),
+    ("lower(name, 2) = 'a'", _compare(
+        "PropertyIsEqualTo",
+        expressions.Function("lower", [NAME, expressions.Literal(2)]),
+        expressions.Literal("a"))),
+    ("date = DATE('2020-01-01')", _compare(
+        "PropertyIsEqualTo", expressions.ValueReference("date"),
+        expressions.Literal("2020-01-01"))),
+    ("S_INTERSECTS(geom, POINT (1 2))", operators.BinarySpatialOperator(
+        "Intersects", GEOM, geometries.Geometry("Point", [1, 2]))),
+    ("within(POINT(1 2), geom)", operators.BinarySpatialOperator(
+        "Contains", GEOM, geometries.Geometry("Point", [1, 2]))),
+    ("S_CROSSES(geom, LINESTRING Z (0 -1 5, 1 1 5))",
+     operators.BinarySpatialOperator(
+         "Crosses", GEOM,
+         geometries.Geometry("LineString", [0, -1, 5, 1, 1, 5],
+                             dimensions=3))),
+    ("BBOX(geom, -10, 40, 10, 50)", operators.BinarySpatialOperator(
+        "BBOX", GEOM, _box(-10, 40, 10, 50))),
+    ("BBOX(geom, -10, 40, 10, 50, 'EPSG:3857')",
+     operators.BinarySpatialOperator(
+         "BBOX", GEOM, _box(-10, 40, 10, 50, srs="EPSG:3857"))),
+    ("S_INTERSECTS(geom, BBOX(-10, 40, 10, 50))",
+     operators.BinarySpatialOperator(
+         "Intersects", GEOM, _box(-10, 40, 10, 50))),
+    ("S_INTERSECTS(geom, ENVELOPE(-10, 10, 50, 40))",
+     operators.BinarySpatialOperator(
+         "Intersects", GEOM, _box(-10, 40, 10, 50))),
+    ("DWITHIN(geom, POINT(1 2), 10, meters)", operators.DistanceOperator(
+        "DWithin", GEOM, geometries.Geometry("Point", [1, 2]), 10,
+        uom="m")),
+    ("DWITHIN(geom, POINT(1 2), 10, Statute Miles)",
+     operators.DistanceOperator(
+         "DWithin", GEOM, geometries.Geometry("Point", [1, 2]), 10,
+         uom="[mi_i]")),
+    ("BEYOND(geom, POINT(1 2), 2.5)", operators.DistanceOperator(
+        "Beyond", GEOM, geometries.Geometry("Point", [1, 2]), 2.5)),
+    ("T_BEFORE(time, TIMESTAMP('2020-01-01T00:00:00Z'))",
+     operators.TemporalOperator(
+         "Before", expressions.ValueReference("time"),
+         expressions.Literal("2020-01-01T00:00:00Z"))),
+    ("time AFTER 2020-01-01T00:00:00Z", operators.TemporalOperator(
+        "After", expressions.ValueReference("time"),
+        expressions.Literal("2020-01-01T00:00:00Z"))),
+    ("time DURING 2020-01-01/2020-02-01", operators.TemporalOperator(
+        "During", expressions.ValueReference("time"),
+        expressions.Literal("2020-01-01/2020-02-01"))),
+    ("T_DURING(time, INTERVAL('2020-01-01', '..'))",
+     operators.TemporalOperator(
+         "During", expressions.ValueReference("time"),
+         expressions.Literal("2020-01-01/.."))),
+    ("IN ('river.1', 'river.2')", (
+        operators.ResourceId("river.1"), operators.ResourceId("river.2"))),
+])
+def test_parse_cql(data, expected):
+    assert cqlparsers.parse_cql(data) == expected
+
+
+@pytest.mark.parametrize("data", [
+    "bbox = 1",
+    "date = 1",
+    "in = 1",
+])
+def test_keywords_as_property_names(data):
+    result = cqlparsers.parse_cql(data)
+    assert result.first_expression == expressions.ValueReference(
+        data.split()[0])
+
+
+def test_parse_cql_geometry_srs():
+    result = cqlparsers.parse_cql("S_INTERSECTS(geom, POINT (1 2))",
+                                  srs="EPSG:4326")
+    assert result.second_operand.srs == "EPSG:4326"
+
+
+def test_parse_long_cql_chain():
+    data = " OR ".join("DEPTH = {}".format(index) for index in range(5000))
+    result = cqlparsers.parse_cql(data)
+    assert result.second_expression == _compare(
+        "PropertyIsEqualTo", DEPTH, expressions.Literal(4999))
+
+
+@pytest.mark.parametrize("data", [
+    "",
+    "DEPTH",
+    "DEPTH <",
+    "DEPTH < 30 name",
+    "(DEPTH < 30",
+    "DEPTH AND DEPTH < 30",
+    "DEPTH < 30 AND 2",
+    "DEPTH ~ 30",
+    "DEPTH + 1 < 30",
+    "name LIKE 'unterminated",
+    "BBOX(geom, 1, 2)",
+    "S_INTERSECTS(geom, POINT (1 2)",
+    "S_INTERSECTS(geom, POINT (1))",
+    "DWITHIN(geom, other, 10, meters)",
+    "DWITHIN(geom, POINT(1 2), 10, furlongs)",
+    "DWITHIN(geom, POINT(1 2), 10, statute)",
+    "DWITHIN(geom, POINT(1 2), 10, )",
+    "DWITHIN(geom, POINT(1 2), 10, meters, meters)",
+    "name NOT NULL",
+])
+def test_parse_invalid_cql(data):
+    with pytest.raises(errors.ValidationError):
+        cqlparsers.parse_cql(data)
+
+
+def test_parse_filter_with_cql():
+    assert parsers.parse_filter(b"DEPTH < 30") == LESS
+
+
+@pytest.mark.parametrize("data", [
+    "DEPTH < 30 AND (name LIKE 'Tag%' OR DEPTH BETWEEN 1 AND 10)",
+    "NOT name IS NULL",
+    "DWITHIN(geom, POINT(1 2), 10, meters)",
+    "BEYOND(geom, POINT(1 2), 2.5, nautical miles)",
+])
+def test_parse_cql_matches_fes_parser(data):
+    result = cqlparsers.parse_cql(data, srs="EPSG:4326")
+    rendered = renderers.render_filter(result)
+    assert filterparsers.FesFilterParser().parse_filter(rendered) == result
@@ -0,0 +1,157 @@
+"""Unit tests for pyfes.fes20.envelopes"""
+
+import pytest
+
+from pyfes import geometries
+from pyfes.fes20 import envelopes
+from pyfes.fes20 import expressions
+from pyfes.fes20 import operators
+
+pytestmark = pytest.mark.unit
+
+EMPTY = envelopes.EMPTY_ENVELOPE
+
+
+def _box(minx, miny, maxx, maxy):
+    return "POLYGON (({0} {1}, {2} {1}, {2} {3}, {0} {3}, {0} {1}))".format(
+        minx, miny, maxx, maxy)
+
+
+def _spatial(operator_type, geometry, name="geom"):
+    return operators.BinarySpatialOperator(
+        operator_type=operator_type,
+        first_operand=expressions.ValueReference(name),
+        second_operand=geometry
+    )
+
+
+def _distance(operator_type, geometry, distance, name="geom"):
+    return operators.DistanceOperator(
+        operator_type=operator_type,
+        expression=expressions.ValueReference(name),
+        geometry=geometry,
+        distance=distance
+    )
+
+
+def _logic(operator_type, *operands):
+    result = operands[0]
+    for operand in operands[1:]:
+        result = operators.BinaryLogicOperator(operator_type, result, operand)
+    return result
+
+
+COMPARISON = operators.BinaryComparisonOperator(
+    operators.BinaryComparisonName.PROPERTY_IS_EQUAL_TO,
+    expressions.ValueReference("name"),
+    expressions.Literal("a")
+)
+
+
+@pytest.mark.parametrize("operator, expected", [
+    (COMPARISON, None),
+    ((operators.ResourceId("a.1"),), None),
+    (_spatial("BBOX", _box(0, 0, 10, 10)), (0, 0, 10, 10)),
+    (_spatial("Within", "POINT (1 2)"), (1, 2, 1, 2)),
+    (_spatial("Disjoint", _box(0, 0, 10, 10)), None),
+    (
+        _spatial("Intersects", expressions.ValueReference("other_geom")),
+        None
+    ),
+    (_distance("DWithin", "POINT (1 2)", 1), (0, 1, 2, 3)),
+    (_distance("Beyond", "POINT (1 2)", 1), None),
+    (
+        _logic(
+            "And",
+            _spatial("BBOX", _box(0, 0, 10, 10)),
+            COMPARISON,
+            _spatial("Intersects", _box(5, 5, 20, 20)),
+        ),
+        (5, 5, 10, 10)
+    ),
+    (
+        _logic(
+            "And",
+            _spatial("BBOX", _box(0, 0, 1, 1)),
+            _spatial("BBOX", _box(5, 5, 6, 6)),
+        ),
+        EMPTY
+    ),
+    (
+        _logic(
+            "Or",
+            _spatial("BBOX", _box(0, 0, 1, 1)),
+            _spatial("BBOX", _box(5, 5, 6, 6)),
+        ),
+        (0, 0, 6, 6)
+    ),
+    (
+        _logic("Or", _spatial("BBOX", _box(0, 0, 1, 1)), COMPARISON),
+        None
+    ),
+    (
+        operators.UnaryLogicOperator(
+            "Not", _spatial("BBOX", _box(0, 0, 1, 1))),
+        None
+    ),
+    (
+        _logic(
+            "Or",
+            _logic(
+                "And",
+                _spatial("BBOX", _box(0, 0, 1, 1)),
+                _spatial("BBOX", _box(5, 5, 6, 6)),
+            ),
+            _spatial("BBOX", _box(2, 2, 3, 3)),
+        ),
+        (2, 2, 3, 3)
+    ),
+])
+def test_get_filter_envelope(operator, expected):
+    assert envelopes.get_filter_envelope(operator) == expected
+
+
+def test_get_filter_envelope_for_property():
+    operator = _logic(
+        "And",
+        _spatial("BBOX", _box(0, 0, 10, 10), name="geom"),
+        _spatial("BBOX", _box(20, 20, 30, 30), name="other_geom"),
+    )
+    assert envelopes.get_filter_envelope(operator) == EMPTY
+    assert envelopes.get_filter_envelope(
+        operator, property_name="geom") == (0, 0, 10, 10)
+    assert envelopes.get_filter_envelope(
+        operator, property_name="missing") is None
+
+
+@pytest.mark.parametrize("first, second, expected", [
+    ((0, 0, 2, 2), (1, 1, 3, 3), True),
+    ((0, 0, 1, 1), (1, 1, 3, 3), True),
+    ((0, 0, 1, 1), (2, 2, 3, 3), False),
+    ((0, 0, 1, 1), None, True),
+    ((0, 0, 1, 1), EMPTY, False),
+])
+def test_envelopes_intersect(first, second, expected):
+    assert envelopes.envelopes_intersect(first, second) == expected
+
+
+@pytest.mark.parametrize("points, expected", [
+    ([(1, 2)], (1, 2, 1, 2)),
+    ([(0, 5), (3, -1), (1, 1)], (0, -1, 3, 5)),
+    ([], EMPTY),
+])
+def test_get_points_envelope(points, expected):
+    assert envelopes.get_points_envelope(points) == expected
+
+
+@pytest.mark.parametrize("operand, expected", [
+    (_box(0, 0, 1, 2), (0, 0, 1, 2)),
+    (geometries.Geometry("LineString", [0, 5, 3, -1]), (0, -1, 3, 5)),
+    (geometries.Geometry("Point"), None),
+    (expressions.ValueReference("other"), None),
+    ("LINESTRING Z (0 5 1, 3 -1 2)", (0, -1, 3, 5)),
+    ("POINT EMPTY", None),
+    ("not a geometry", None),
+])
+def test_get_operand_envelope(operand, expected):
+    assert envelopes.get_operand_envelope(operand) == expected
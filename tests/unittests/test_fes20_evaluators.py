@@ -0,0 +1,294 @@
+"""Unit tests for pyfes.fes20.evaluators"""
+
+import pytest
+
+from pyfes import temporal
+from pyfes.fes20 import expressions
+from pyfes.fes20 import operators
+
+np = pytest.importorskip("numpy")
+evaluators = pytest.importorskip("pyfes.fes20.evaluators")
+
+pytestmark = pytest.mark.unit
+
+
+def _comparison(operator_type, name, value, **kwargs):
+    return operators.BinaryComparisonOperator(
+        operator_type=operator_type,
+        first_expression=expressions.ValueReference(name),
+        second_expression=expressions.Literal(value),
+        **kwargs
+    )
+
+
+@pytest.fixture
+def batch():
+    return {
+        "depth": np.array([10, 30, 50, 70]),
+        "height": np.array([1.5, np.nan, 3.5, 0.5]),
+        "name": np.array(["first", "Second", "third", "fourth"]),
+        "tag": np.array(["a", None, "b", None], dtype=object),
+        "id": np.array(["f.1", "f.2", "f.3", "f.4"]),
+    }
+
+
+@pytest.mark.parametrize("operator_type, name, literal, expected", [
+    ("PropertyIsEqualTo", "depth", "30", [False, True, False, False]),
+    ("PropertyIsNotEqualTo", "depth", "30", [True, False, True, True]),
+    ("PropertyIsLessThan", "depth", "30", [True, False, False, False]),
+    ("PropertyIsLessThanOrEqualTo", "depth", 30, [True, True, False, False]),
+    ("PropertyIsGreaterThan", "height", "1", [True, False, True, False]),
+    ("PropertyIsGreaterThanOrEqualTo", "depth", 50,
+     [False, False, True, True]),
+    ("PropertyIsEqualTo", "name", "third", [False, False, True, False]),
+    ("PropertyIsEqualTo", "tag", "b", [False, False, True, False]),
+    ("PropertyIsEqualTo", "depth", "abc", [False, False, False, False]),
+    ("PropertyIsEqualTo", "missing", "1", [False, False, False, False]),
+])
+def test_evaluate_binary_comparison(batch, operator_type, name, literal,
+                                    expected):
+    result = evaluators.evaluate_batch(
+        _comparison(operator_type, name, literal), batch)
+    assert result.tolist() == expected
+
+
+def test_evaluate_binary_comparison_match_case(batch):
+    result = evaluators.evaluate_batch(
+        _comparison("PropertyIsEqualTo", "name", "second", match_case=False),
+        batch
+    )
+    assert result.tolist() == [False, True, False, False]
+
+
+def test_evaluate_structured_array():
+    batch = np.array(
+        [(1, 2.0), (5, 1.0)],
+        dtype=[("first", "i4"), ("second", "f8")]
+    )
+    operator = operators.BinaryComparisonOperator(
+        operator_type="PropertyIsLessThan",
+        first_expression=expressions.ValueReference("first"),
+        second_expression=expressions.ValueReference("second"),
+    )
+    result = evaluators.evaluate_batch(operator, batch)
+    assert result.tolist() == [True, False]
+
+
+def test_evaluate_between_comparison_operator(batch):
+    operator = operators.BetweenComparisonOperator(
+        expression=expressions.ValueReference("depth"),
+        lower_boundary=expressions.Literal("30"),
+        upper_boundary=expressions.Literal("50"),
+    )
+    result = evaluators.evaluate_batch(operator, batch)
+    assert result.tolist() == [False, True, True, False]
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("height", [False, True, False, False]),
+    ("tag", [False, True, False, True]),
+    ("depth", [False, False, False, False]),
+    ("missing", [True, True, True, True]),
+])
+def test_evaluate_null_operator(batch, name, expected):
+    operator = operators.NullOperator(expressions.ValueReference(name))
+    result = evaluators.evaluate_batch(operator, batch)
+    assert result.tolist() == expected
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("height", [False, False, False, False]),
+    ("tag", [False, True, False, True]),
+    ("depth", [False, False, False, False]),
+    ("missing", [False, False, False, False]),
+])
+def test_evaluate_nil_operator(batch, name, expected):
+    operator = operators.NilOperator(expressions.ValueReference(name))
+    result = evaluators.evaluate_batch(operator, batch)
+    assert result.tolist() == expected
+
+
+@pytest.mark.parametrize("name", ["height", "tag", "depth", "missing"])
+def test_evaluate_nil_operator_matches_compiled_predicate(batch, name):
+    from pyfes.fes20 import compilers
+    features = [dict((key, column[index]) for key, column in batch.items())
+                for index in range(4)]
+    operator = operators.NilOperator(expressions.ValueReference(name))
+    predicate = compilers.compile_filter(operator)
+    expected = [predicate(feature) for feature in features]
+    assert evaluators.evaluate_batch(operator, batch).tolist() == expected
+
+
+def test_evaluate_null_operator_masked_array():
+    values = np.ma.array([1, 2, 3], mask=[False, True, False])
+    operator = operators.NullOperator(expressions.ValueReference("value"))
+    result = evaluators.evaluate_batch(operator, {"value": values})
+    assert result.tolist() == [False, True, False]
+
+
+def test_evaluate_like_operator(batch):
+    operator = operators.LikeOperator(
+        first_expression=expressions.ValueReference("name"),
+        second_expression=expressions.Literal("f*"),
+        wild_card="*",
+        single_char=".",
+        escape_char="!"
+    )
+    result = evaluators.evaluate_batch(operator, batch)
+    assert result.tolist() == [True, False, False, True]
+
+
+@pytest.mark.parametrize("type_, expected", [
+    (operators.BinaryLogicType.AND, [False, True, True, False]),
+    (operators.BinaryLogicType.OR, [True, True, True, True]),
+])
+def test_evaluate_binary_logic_operator(batch, type_, expected):
+    operator = operators.BinaryLogicOperator(
+        operator_type=type_,
+        first_expression=_comparison("PropertyIsLessThan", "depth", "60"),
+        second_expression=_comparison("PropertyIsGreaterThan", "depth", "20")
+    )
+    result = evaluators.evaluate_batch(operator, batch)
+    assert result.tolist() == expected
+
+
+def test_evaluate_unary_logic_operator(batch):
+    operator = operators.UnaryLogicOperator(
+        operator_type=operators.UnaryLogicType.NOT,
+        operand=_comparison("PropertyIsLessThan", "depth", "60")
+    )
+    result = evaluators.evaluate_batch(operator, batch)
+    assert result.tolist() == [False, False, False, True]
+
+
+def test_evaluate_resource_ids(batch):
+    result = evaluators.evaluate_batch(
+        (operators.ResourceId("f.2"), operators.ResourceId("f.4")), batch)
+    assert result.tolist() == [False, True, False, True]
+
+
+def test_evaluate_matches_compiled_predicate(batch):
+    from pyfes.fes20 import compilers
+    operator = operators.BinaryLogicOperator(
+        operator_type=operators.BinaryLogicType.OR,
+        first_expression=_comparison("PropertyIsLessThan", "height", "2"),
+        second_expression=_comparison("PropertyIsEqualTo", "tag", "b"),
+    )
+    predicate = compilers.compile_filter(operator)
+    features = [dict((key, column[index]) for key, column in batch.items())
+                for index in range(4)]
+    expected = [predicate(feature) for feature in features]
+    result = evaluators.evaluate_batch(operator, batch)
+    assert result.tolist() == expected
+
+
+@pytest.mark.parametrize("column", [
+    np.array(["2020-01-10", "2020-03-01", "NaT", "2019-06-01T12:00"],
+             dtype="datetime64[ns]"),
+    np.array(["2020-01-10", "2020-03-01", None, "2019-06-01T12:00:00Z"],
+             dtype=object),
+    np.array([[1578614400, 1578614400], [1583020800, 1583020800],
+              [0, -1], [1559390400, 1559390400]]) * 10 ** 9,
+])
+def test_evaluate_temporal_operator(column):
+    operator = operators.TemporalOperator(
+        operator_type=operators.TemporalOperatorName.DURING,
+        first_operand=expressions.ValueReference("time"),
+        second_operand=temporal.parse_period("2020-01-01/2020-02-01")
+    )
+    if column.ndim == 2:
+        column = np.ma.masked_array(column, mask=[[0, 0], [0, 0], [1, 1],
+                                                  [0, 0]])
+    result = evaluators.evaluate_batch(operator, {"time": column})
+    assert result.tolist() == [True, False, False, False]
+
+
+@pytest.mark.parametrize("operator_type", list(
+    operators.TemporalOperatorName))
+def test_evaluate_temporal_operator_matches_compiled_predicate(
+        operator_type):
+    from pyfes.fes20 import compilers
+    times = ["2020-01-01", "2020-02-01", "2020-01-15", "2019-12-01",
+             "2020-03-01", "../2020-01-01", "2020-01-01/2020-02-01",
+             "2019-12-01/2020-01-15", "2020-01-15/2020-03-01",
+             "2020-01-01/2020-01-15", "2020-01-15/2020-02-01",
+             "2020-02-01/..", None]
+    operator = operators.TemporalOperator(
+        operator_type=operator_type,
+        first_operand=expressions.ValueReference("time"),
+        second_operand=temporal.parse_period("2020-01-01/2020-02-01")
+    )
+    predicate = compilers.compile_filter(operator)
+    expected = [predicate({"time": time}) for time in times]
+    result = evaluators.evaluate_batch(
+        operator, {"time": np.array(times, dtype=object)})
+    assert result.tolist() == expected
+
+
+MIXED_BATCH_VALUES = {
+    "ints": [1, 7, 30, -2, 100],
+    "floats": [1.5, np.nan, 7.0, -2.0, 1e20],
+    "bools": [True, False, True, False, True],
+    "text": ["1", "7", "abc", "ABC", "30"],
+    "objects": ["7", 7, None, "abc", 7.5],
+}
+
+
+@pytest.mark.parametrize("name", sorted(MIXED_BATCH_VALUES))
+@pytest.mark.parametrize("literal", [7, 7.5, "7", "30", "abc", "ABC", None])
+@pytest.mark.parametrize("match_case", [True, False])
+def test_evaluate_comparisons_match_compiled_predicate(name, literal,
+                                                       match_case):
+    from pyfes.fes20 import compilers
+    batch = {
+        "ints": np.array(MIXED_BATCH_VALUES["ints"]),
+        "floats": np.array(MIXED_BATCH_VALUES["floats"]),
+        "bools": np.array(MIXED_BATCH_VALUES["bools"]),
+        "text": np.array(MIXED_BATCH_VALUES["text"]),
+        "objects": np.array(MIXED_BATCH_VALUES["objects"], dtype=object),
+    }
+    features = [dict((key, column[index]) for key, column in batch.items())
+                for index in range(5)]
+    operators_ = [
+        _comparison(operator_type, name, literal, match_case=match_case)
+        for operator_type in operators.BinaryComparisonName
+    ] + [
+        operators.BinaryComparisonOperator(
+            operator_type=operator_type,
+            first_expression=expressions.ValueReference(name),
+            second_expression=expressions.ValueReference(other),
+            match_case=match_case
+        ) for operator_type in operators.BinaryComparisonName for
+        other in sorted(batch)
+    ] + [
+        operators.BetweenComparisonOperator(
+            expression=expressions.ValueReference(name),
+            lower_boundary=expressions.Literal(literal),
+            upper_boundary=expressions.Literal("30")
+        ),
+        operators.BetweenComparisonOperator(
+            expression=expressions.ValueReference(name),
+            lower_boundary=expressions.ValueReference("ints"),
+            upper_boundary=expressions.Literal(literal)
+        ),
+    ]
+    for operator in operators_:
+        predicate = compilers.compile_filter(operator)
+        expected = [predicate(feature) for feature in features]
+        result = evaluators.evaluate_batch(operator, batch)
+        assert result.tolist() == expected, operator
+
+
+def test_evaluate_comparison_masked_array():
+    batch = {"depth": np.ma.masked_array([10, 30, 50], mask=[0, 1, 0])}
+    result = evaluators.evaluate_batch(
+        _comparison("PropertyIsNotEqualTo", "depth", "abc"), batch)
+    assert result.tolist() == [True, False, True]
+
+
+def test_evaluate_comparison_of_times_is_rejected():
+    from pyfes import errors
+    batch = {"time": np.array(["2020-01-01"], dtype="datetime64[ns]")}
+    with pytest.raises(errors.InvalidExpressionError):
+        evaluators.evaluate_batch(
+            _comparison("PropertyIsLessThan", "time", "2020-02-01"), batch)
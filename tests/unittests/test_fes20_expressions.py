@@ -30,6 +30,7 @@ pytestmark = pytest.mark.unit
 def test_expression_equality(first, second, expected):
     result = first == second
     assert result == expected
+    assert (first != second) != expected
 
 
 @pytest.mark.parametrize("expression_cls", [
@@ -83,3 +84,33 @@ def test_function_remove_argument():
     function_ = Function("some_name", arguments=[Literal("stuff")])
     function_.remove_argument(function_.arguments[0])
     assert len(function_.arguments) == 0
+
+
+def test_function_frozen_arguments():
+    function_ = Function("some_name", arguments=[Literal("stuff")])
+    function_.freeze()
+    assert function_.arguments[0].frozen
+    with pytest.raises(errors.ImmutableObjectError):
+        function_.add_argument(Literal("other"))
+    with pytest.raises(errors.ImmutableObjectError):
+        function_.remove_argument(function_.arguments[0])
+
+
+def test_value_reference_names_are_interned():
+    first = ValueReference("".join(["some", "_name"]))
+    second = ValueReference.trusted("".join(["some", "_name"]))
+    assert first.value is second.value
+
+
+@pytest.mark.parametrize("first, second", [
+    (Literal("this"), Literal.trusted("this")),
+    (ValueReference("this"), ValueReference.trusted("this")),
+    (
+        Function("do_stuff", [Literal("this")]),
+        Function.trusted("do_stuff", [Literal.trusted("this")])
+    ),
+])
+def test_expression_hashing(first, second):
+    assert first == second
+    assert hash(first) == hash(second)
+    assert not hasattr(second, "__dict__")
@@ -5,9 +5,15 @@ import pytest
 
 from pyfes.fes20.operators import BinaryComparisonOperator
 from pyfes.fes20.operators import BinaryComparisonName
+from pyfes.fes20 import compilers
 from pyfes.fes20 import expressions
 from pyfes.fes20 import filterparsers
+from pyfes.fes20 import operators
+from pyfes.fes20 import reprojectors
 from pyfes.fes20.namespaces import NAMESPACES
+from pyfes import errors
+from pyfes import geometries
+from pyfes import temporal
 
 pytestmark = pytest.mark.unit
 
@@ -43,3 +49,306 @@ def test_fes_filter_parser_parse_literal_expression(value, type_,
     parser = filterparsers.FesFilterParser()
     result = parser.parse_literal_expression(element)
     assert result.value == expected_value
+
+
+def _parse(body):
+    data = '<fes:Filter xmlns:fes="{fes}">{body}</fes:Filter>'.format(
+        fes=NAMESPACES["fes"], body=body)
+    parser = filterparsers.FesFilterParser()
+    return parser.parse_filter(data), parser.parse_filter_stream(data)
+
+
+@pytest.mark.parametrize("body, expected", [
+    (
+        "<fes:PropertyIsLike wildCard='*' singleChar='.' escapeChar='!'>"
+        "<fes:ValueReference>name</fes:ValueReference>"
+        "<fes:Literal>a*</fes:Literal>"
+        "</fes:PropertyIsLike>",
+        operators.LikeOperator(
+            first_expression=expressions.ValueReference("name"),
+            second_expression=expressions.Literal("a*"),
+            wild_card="*", single_char=".", escape_char="!"
+        )
+    ),
+    (
+        "<fes:PropertyIsNull>"
+        "<fes:ValueReference>name</fes:ValueReference>"
+        "</fes:PropertyIsNull>",
+        operators.NullOperator(expressions.ValueReference("name"))
+    ),
+    (
+        "<fes:PropertyIsBetween>"
+        "<fes:ValueReference>depth</fes:ValueReference>"
+        "<fes:LowerBoundary><fes:Literal>1</fes:Literal></fes:LowerBoundary>"
+        "<fes:UpperBoundary><fes:Literal>2</fes:Literal></fes:UpperBoundary>"
+        "</fes:PropertyIsBetween>",
+        operators.BetweenComparisonOperator(
+            expression=expressions.ValueReference("depth"),
+            lower_boundary=expressions.Literal("1"),
+            upper_boundary=expressions.Literal("2"),
+        )
+    ),
+    (
+        "<fes:PropertyIsEqualTo matchCase='false'>"
+        "<fes:Function name='upper'>"
+        "<fes:ValueReference>name</fes:ValueReference>"
+        "</fes:Function>"
+        "<fes:Literal>A</fes:Literal>"
+        "</fes:PropertyIsEqualTo>",
+        BinaryComparisonOperator(
+            operator_type=BinaryComparisonName.PROPERTY_IS_EQUAL_TO,
+            first_expression=expressions.Function(
+                "upper", arguments=[expressions.ValueReference("name")]),
+            second_expression=expressions.Literal("A"),
+            match_case=False
+        )
+    ),
+    (
+        "<fes:During xmlns:gml='http://www.opengis.net/gml/3.2'>"
+        "<fes:ValueReference>time</fes:ValueReference>"
+        "<gml:TimePeriod gml:id='p1'>"
+        "<gml:beginPosition>2020-01-01</gml:beginPosition>"
+        "<gml:endPosition indeterminatePosition='unknown'/>"
+        "</gml:TimePeriod>"
+        "</fes:During>",
+        operators.TemporalOperator(
+            operator_type=operators.TemporalOperatorName.DURING,
+            first_operand=expressions.ValueReference("time"),
+            second_operand=temporal.TimePeriod(
+                1577836800 * 10 ** 9, temporal.MAX_TIME)
+        )
+    ),
+])
+def test_fes_filter_parser_parse_operators(body, expected):
+    result, streamed_result = _parse(body)
+    assert result == expected
+    assert streamed_result == expected
+
+
+_DISTANCE_FILTER = (
+    "<fes:DWithin xmlns:gml='http://www.opengis.net/gml/3.2'>"
+    "<fes:ValueReference>geom</fes:ValueReference>"
+    "<gml:Point srsName='EPSG:4326'><gml:pos>0 0</gml:pos></gml:Point>"
+    "<fes:Distance{}>1000</fes:Distance>"
+    "</fes:DWithin>"
+)
+
+
+def test_fes_filter_parser_parse_distance_operator():
+    result, streamed_result = _parse(_DISTANCE_FILTER.format(" uom='m'"))
+    assert result == streamed_result
+    assert result.distance == 1000
+    assert result.uom == "m"
+    predicate = compilers.compile_filter(result)
+    assert predicate({"geom": "POINT (0.005 0)"})
+    assert not predicate({"geom": "POINT (5 0)"})
+    pytest.importorskip("pyproj")
+    reprojected = reprojectors.reproject_filter(result, "EPSG:3857")
+    assert reprojected.distance == 1000
+    assert reprojected.uom == "m"
+
+
+@pytest.mark.parametrize("attributes", ["", " uom=''", " uom=' '"])
+def test_fes_filter_parser_distance_without_uom(attributes):
+    with pytest.raises(errors.InvalidOperatorError):
+        _parse(_DISTANCE_FILTER.format(attributes))
+
+
+@pytest.mark.parametrize("body", [
+    "",
+    "<fes:ResourceId rid='a.1'/>"
+    "<fes:PropertyIsNull>"
+    "<fes:ValueReference>name</fes:ValueReference>"
+    "</fes:PropertyIsNull>",
+    "<fes:PropertyIsNull>"
+    "<fes:ValueReference>name</fes:ValueReference>"
+    "</fes:PropertyIsNull>"
+    "<fes:ResourceId rid='a.1'/>",
+])
+def test_fes_filter_parser_invalid_filter(body):
+    parser = filterparsers.FesFilterParser()
+    data = '<fes:Filter xmlns:fes="{}">{}</fes:Filter>'.format(
+        NAMESPACES["fes"], body)
+    with pytest.raises(RuntimeError):
+        parser.parse_filter(data)
+    with pytest.raises(RuntimeError):
+        parser.parse_filter_stream(data)
+
+
+def test_fes_filter_parser_parse_nary_logic_operator():
+    comparison = (
+        "<fes:PropertyIsEqualTo>"
+        "<fes:ValueReference>name</fes:ValueReference>"
+        "<fes:Literal>{}</fes:Literal>"
+        "</fes:PropertyIsEqualTo>"
+    )
+    body = "<fes:Or>{}</fes:Or>".format(
+        "".join(comparison.format(index) for index in range(3)))
+    result, streamed_result = _parse(body)
+    for item in (result, streamed_result):
+        assert item.operator_type == operators.BinaryLogicType.OR
+        assert item.second_expression.second_expression.value == "2"
+        assert item.first_expression.first_expression.second_expression == (
+            expressions.Literal("0"))
+
+
+@pytest.mark.parametrize("geometry, type_, part_offsets", [
+    (
+        "<gml:Polygon><gml:exterior><gml:LinearRing>"
+        "<gml:posList>0 0 0 10 10 10 10 0 0 0</gml:posList>"
+        "</gml:LinearRing></gml:exterior><gml:interior><gml:LinearRing>"
+        "<gml:posList>2 2 2 4 4 4 4 2 2 2</gml:posList>"
+        "</gml:LinearRing></gml:interior></gml:Polygon>",
+        "Polygon", (0, 5, 10)
+    ),
+    (
+        "<gml:MultiCurve><gml:curveMember><gml:LineString>"
+        "<gml:posList>0 0 1 1</gml:posList></gml:LineString>"
+        "</gml:curveMember><gml:curveMember><gml:LineString>"
+        "<gml:posList>2 2 3 3 4 4</gml:posList></gml:LineString>"
+        "</gml:curveMember></gml:MultiCurve>",
+        "MultiLineString", (0, 2, 5)
+    ),
+])
+def test_fes_filter_parser_parse_gml_geometries(geometry, type_,
+                                                part_offsets):
+    body = (
+        '<fes:Intersects xmlns:gml="{}">'
+        "<fes:ValueReference>geom</fes:ValueReference>{}"
+        "</fes:Intersects>".format(NAMESPACES["gml"], geometry)
+    )
+    result, streamed_result = _parse(body)
+    assert result == streamed_result
+    operand = result.second_operand
+    assert operand.type_ == geometries.GeometryType(type_)
+    assert operand.part_offsets == part_offsets
+
+
+@pytest.mark.parametrize("enum_class", [
+    operators.BinaryComparisonName,
+    operators.BinaryLogicType,
+    operators.DistanceOperatorName,
+    operators.SpatialOperatorName,
+    operators.UnaryLogicType,
+    operators.TemporalOperatorName,
+])
+def test_fes_filter_parser_handler_index(enum_class):
+    index = filterparsers.FesFilterParser.get_handler_index()
+    for member in enum_class:
+        qname = "{{{}}}{}".format(NAMESPACES["fes"], member.value)
+        operator_type, builder = index[qname]
+        assert operator_type is member
+        assert callable(builder)
+
+
+def test_fes_filter_parser_register_operator():
+
+    class CustomParser(filterparsers.FesFilterParser):
+        pass
+
+    custom_qname = "{urn:custom}IsEven"
+    CustomParser.register_operator(
+        custom_qname,
+        lambda parser, element, children, operator_type: (
+            operator_type, children)
+    )
+    data = (
+        '<fes:Filter xmlns:fes="{}" xmlns:c="urn:custom">'
+        '<c:IsEven/>'
+        '</fes:Filter>'.format(NAMESPACES["fes"])
+    )
+    assert custom_qname in CustomParser.get_handler_index()
+    assert custom_qname not in (
+        filterparsers.FesFilterParser.get_handler_index())
+    assert CustomParser().parse_filter(data) == (None, [])
+    assert CustomParser().parse_filter_stream(data) == (None, [])
+
+
+def test_fes_filter_parser_subclass_builders_are_used():
+
+    class CustomParser(filterparsers.FesFilterParser):
+
+        def build_value_reference_expression(self, element, children,
+                                             operator_type):
+            return expressions.ValueReference(element.text.lower())
+
+    data = (
+        '<fes:Filter xmlns:fes="{}"><fes:PropertyIsNull>'
+        '<fes:ValueReference>NAME</fes:ValueReference>'
+        '</fes:PropertyIsNull></fes:Filter>'.format(NAMESPACES["fes"])
+    )
+    result = CustomParser().parse_filter(data)
+    assert result.expression.value == "name"
+
+
+def test_fes_filter_parser_unrecognized_operator():
+    data = (
+        '<fes:Filter xmlns:fes="{}"><fes:PropertyIsFuzzy/>'
+        '</fes:Filter>'.format(NAMESPACES["fes"])
+    )
+    with pytest.raises(RuntimeError):
+        filterparsers.FesFilterParser().parse_filter(data)
+
+
+@pytest.mark.parametrize("body, expected", [
+    (
+        "<fes:PropertyIsEqualTo>"
+        "<fes:ValueReference>name</fes:ValueReference>"
+        "</fes:PropertyIsEqualTo>",
+        errors.InvalidOperatorError
+    ),
+    (
+        "<fes:PropertyIsNull>"
+        "<fes:Not><fes:PropertyIsNull>"
+        "<fes:ValueReference>name</fes:ValueReference>"
+        "</fes:PropertyIsNull></fes:Not>"
+        "</fes:PropertyIsNull>",
+        errors.InvalidExpressionError
+    ),
+    (
+        "<fes:DWithin>"
+        "<fes:ValueReference>geom</fes:ValueReference>"
+        "<fes:Distance uom='m'>10</fes:Distance>"
+        "</fes:DWithin>",
+        errors.InvalidOperatorError
+    ),
+    (
+        "<fes:Intersects>"
+        "<fes:ValueReference>geom</fes:ValueReference>"
+        "</fes:Intersects>",
+        errors.InvalidOperatorError
+    ),
+    (
+        "<fes:Intersects>"
+        "<fes:ValueReference>geom</fes:ValueReference>"
+        "<fes:Distance uom='m'>10</fes:Distance>"
+        "</fes:Intersects>",
+        errors.InvalidExpressionError
+    ),
+    (
+        "<fes:During>"
+        "<fes:ValueReference>time</fes:ValueReference>"
+        "</fes:During>",
+        errors.InvalidOperatorError
+    ),
+    (
+        "<fes:PropertyIsBetween>"
+        "<fes:ValueReference>depth</fes:ValueReference>"
+        "<fes:LowerBoundary/>"
+        "<fes:UpperBoundary><fes:Literal>2</fes:Literal></fes:UpperBoundary>"
+        "</fes:PropertyIsBetween>",
+        errors.InvalidOperatorError
+    ),
+    ("<fes:Literal type='xs:int'/>", errors.InvalidExpressionError),
+    ("<fes:Literal type='xs:float'> </fes:Literal>",
+     errors.InvalidExpressionError),
+    ("<fes:Literal type='xs:integer'>ten</fes:Literal>",
+     errors.InvalidExpressionError),
+])
+def test_fes_filter_parser_invalid_operands(body, expected):
+    parser = filterparsers.FesFilterParser()
+    element = etree.fromstring(
+        '<fes:Filter xmlns:fes="{}">{}</fes:Filter>'.format(
+            NAMESPACES["fes"], body))
+    with pytest.raises(expected):
+        parser._parse_node(element)
@@ -1,11 +1,14 @@
 """Tests for the custom pyfes types"""
 
+import pickle
+
 import pytest
 
 from pyfes.fes20 import expressions
 from pyfes.fes20 import operators
 
 from pyfes import errors
+from pyfes import geometries
 
 pytestmark = pytest.mark.unit
 
@@ -58,6 +61,7 @@ def test_validate_operand_invalid(operand, allowed):
 ])
 def test_operator_equality(first, second):
     assert first == second
+    assert not first != second
 
 
 @pytest.mark.parametrize("operator_type", [
@@ -119,3 +123,153 @@ def test_binary_comparison_operator_invalid(type_, first, second, match_action,
             second_expression=second,
             match_action=match_action
         )
+
+
+@pytest.mark.parametrize("trusted, validated", [
+    (
+        operators.BinaryComparisonOperator.trusted(
+            operators.BinaryComparisonName.PROPERTY_IS_EQUAL_TO,
+            expressions.ValueReference.trusted("this"),
+            expressions.Literal.trusted("that")
+        ),
+        operators.BinaryComparisonOperator(
+            "PropertyIsEqualTo",
+            expressions.ValueReference("this"),
+            expressions.Literal("that")
+        ),
+    ),
+    (
+        operators.BetweenComparisonOperator.trusted(
+            expressions.ValueReference.trusted("this"),
+            expressions.Literal.trusted(1),
+            expressions.Literal.trusted(2)
+        ),
+        operators.BetweenComparisonOperator(
+            expressions.ValueReference("this"),
+            expressions.Literal(1),
+            expressions.Literal(2)
+        ),
+    ),
+    (
+        operators.UnaryLogicOperator.trusted(
+            operators.UnaryLogicType.NOT,
+            operators.NullOperator.trusted(
+                expressions.ValueReference.trusted("this"))
+        ),
+        operators.UnaryLogicOperator(
+            "Not",
+            operators.NullOperator(expressions.ValueReference("this"))
+        ),
+    ),
+])
+def test_trusted_construction(trusted, validated):
+    assert trusted == validated
+    assert hash(trusted) == hash(validated)
+    assert not trusted.frozen
+
+
+@pytest.mark.parametrize("operator", [
+    operators.BinaryComparisonOperator(
+        operators.BinaryComparisonName.PROPERTY_IS_LESS_THAN,
+        expressions.ValueReference("this"),
+        expressions.Literal(1)
+    ),
+    operators.LikeOperator(
+        expressions.ValueReference("this"),
+        expressions.Literal("a*"),
+        wild_card="*"
+    ),
+    operators.NilOperator(expressions.ValueReference("this"), "missing"),
+    operators.ResourceId("some.1"),
+])
+def test_operators_are_slotted(operator):
+    assert not hasattr(operator, "__dict__")
+    with pytest.raises(AttributeError):
+        operator.some_attribute = "some value"
+
+
+def test_frozen_operator_pickling():
+    operator = operators.BinaryLogicOperator(
+        operators.BinaryLogicType.AND,
+        operators.NullOperator(expressions.ValueReference("this")),
+        operators.LikeOperator(
+            expressions.ValueReference("that"),
+            expressions.Literal("a*"),
+            wild_card="*"
+        )
+    ).freeze()
+    result = pickle.loads(pickle.dumps(operator))
+    assert result == operator
+    assert result.frozen
+    assert result.second_expression.wild_card == "*"
+    with pytest.raises(errors.ImmutableObjectError):
+        result.second_expression.wild_card = "%"
+    assert len({operator, result}) == 1
+
+
+@pytest.mark.parametrize("first, second", [
+    (
+        operators.BinaryComparisonOperator(
+            operators.BinaryComparisonName.PROPERTY_IS_EQUAL_TO,
+            expressions.ValueReference("this"),
+            expressions.Literal("that")
+        ),
+        operators.BinaryComparisonOperator(
+            operators.BinaryComparisonName.PROPERTY_IS_NOT_EQUAL_TO,
+            expressions.ValueReference("this"),
+            expressions.Literal("that")
+        ),
+    ),
+    (
+        operators.NullOperator(expressions.ValueReference("this")),
+        operators.NilOperator(expressions.ValueReference("this")),
+    ),
+    (
+        operators.BetweenComparisonOperator(
+            expressions.ValueReference("this"),
+            expressions.Literal(1),
+            expressions.Literal(2)
+        ),
+        operators.BetweenComparisonOperator(
+            expressions.ValueReference("this"),
+            expressions.Literal(1),
+            expressions.Literal(3)
+        ),
+    ),
+    (
+        operators.LikeOperator(
+            expressions.ValueReference("this"),
+            expressions.Literal("a*"),
+            wild_card="*"
+        ),
+        operators.LikeOperator(
+            expressions.ValueReference("this"),
+            expressions.Literal("a*"),
+            wild_card="%"
+        ),
+    ),
+    (
+        operators.DistanceOperator(
+            "DWithin", expressions.ValueReference("geom"), "POINT (1 2)",
+            10, uom="m"),
+        operators.DistanceOperator(
+            "DWithin", expressions.ValueReference("geom"), "POINT (1 2)",
+            10, uom="km"),
+    ),
+])
+def test_operator_inequality(first, second):
+    assert first != second
+    assert len({first, second}) == 2
+
+
+def test_spatial_operators_accept_geometries():
+    geometry = geometries.Geometry("Point", [1, 2], srs="EPSG:4326")
+    spatial = operators.BinarySpatialOperator(
+        "Intersects", expressions.ValueReference("geom"), geometry)
+    distance = operators.DistanceOperator(
+        "DWithin", expressions.ValueReference("geom"), geometry, 10)
+    assert spatial.second_operand is geometry
+    assert distance.geometry is geometry
+    for operator in (spatial, distance):
+        operator.freeze()
+        assert pickle.loads(pickle.dumps(operator)) == operator
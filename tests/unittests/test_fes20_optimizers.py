@@ -0,0 +1,299 @@
+"""Unit tests for pyfes.fes20.optimizers"""
+
+import random
+
+import pytest
+
+from pyfes.fes20 import compilers
+from pyfes.fes20 import expressions
+from pyfes.fes20 import operators
+from pyfes.fes20 import optimizers
+
+pytestmark = pytest.mark.unit
+
+BOX = "POLYGON ((0 0, 10 0, 10 10, 0 10, 0 0))"
+INNER = "POLYGON ((1 1, 2 1, 2 2, 1 1))"
+OUTER = "POLYGON ((-1 -1, 20 -1, 20 20, -1 -1))"
+
+
+def _compare(operator_type, name, value):
+    return operators.BinaryComparisonOperator(
+        operator_type=operator_type,
+        first_expression=expressions.ValueReference(name),
+        second_expression=expressions.Literal(value)
+    )
+
+
+def _between(name, lower, upper):
+    return operators.BetweenComparisonOperator(
+        expressions.ValueReference(name),
+        expressions.Literal(lower),
+        expressions.Literal(upper)
+    )
+
+
+def _spatial(operator_type, geometry, name="geom"):
+    return operators.BinarySpatialOperator(
+        operator_type=operator_type,
+        first_operand=expressions.ValueReference(name),
+        second_operand=geometry
+    )
+
+
+def _logic(operator_type, *operands):
+    result = operands[0]
+    for operand in operands[1:]:
+        result = operators.BinaryLogicOperator(operator_type, result, operand)
+    return result
+
+
+def _not(operand):
+    return operators.UnaryLogicOperator("Not", operand)
+
+
+def _compare_literals(operator_type, first, second):
+    return operators.BinaryComparisonOperator(
+        operator_type=operator_type,
+        first_expression=expressions.Literal(first),
+        second_expression=expressions.Literal(second)
+    )
+
+
+EQUAL = _compare("PropertyIsEqualTo", "a", 1)
+LIKE = operators.LikeOperator(
+    expressions.ValueReference("b"), expressions.Literal("x*"), wild_card="*")
+TRUE = _compare_literals("PropertyIsLessThan", 1, 2)
+FUNCTION = operators.BinaryComparisonOperator(
+    "PropertyIsEqualTo",
+    expressions.Function("random", [expressions.Literal(1)]),
+    expressions.Literal(1)
+)
+FALSE = _compare_literals("PropertyIsEqualTo", 1, "2")
+
+
+@pytest.mark.parametrize("operator, expected", [
+    (_not(_not(EQUAL)), EQUAL),
+    (_not(_not(_not(EQUAL))), _not(EQUAL)),
+    (_logic("And", EQUAL, _compare("PropertyIsEqualTo", "a", 1)), EQUAL),
+    (_logic("Or", EQUAL, LIKE, EQUAL), _logic("Or", EQUAL, LIKE)),
+    (
+        _logic("And", _logic("And", EQUAL, LIKE), _not(_not(EQUAL))),
+        _logic("And", EQUAL, LIKE)
+    ),
+    (
+        _logic(
+            "And",
+            _spatial("BBOX", BOX),
+            _spatial("Intersects", INNER)
+        ),
+        _spatial("Intersects", INNER)
+    ),
+    (
+        _logic(
+            "And",
+            _spatial("BBOX", BOX),
+            _spatial("Intersects", OUTER)
+        ),
+        _logic(
+            "And",
+            _spatial("BBOX", BOX),
+            _spatial("Intersects", OUTER)
+        ),
+    ),
+    (
+        _logic(
+            "And",
+            _spatial("BBOX", BOX),
+            _spatial("Disjoint", INNER)
+        ),
+        _logic(
+            "And",
+            _spatial("BBOX", BOX),
+            _spatial("Disjoint", INNER)
+        ),
+    ),
+    (
+        _logic(
+            "And",
+            _spatial("BBOX", BOX),
+            _spatial("Intersects", INNER, name="other")
+        ),
+        _logic(
+            "And",
+            _spatial("BBOX", BOX),
+            _spatial("Intersects", INNER, name="other")
+        ),
+    ),
+    (
+        _logic("And", _spatial("Intersects", BOX), LIKE, EQUAL),
+        _logic("And", EQUAL, LIKE, _spatial("Intersects", BOX)),
+    ),
+    (_logic("And", TRUE, EQUAL), EQUAL),
+    (_logic("And", LIKE, FALSE, EQUAL), FALSE),
+    (_logic("Or", LIKE, TRUE, EQUAL), TRUE),
+    (_logic("Or", FALSE, EQUAL, _not(TRUE)), EQUAL),
+    (_logic("And", _not(FALSE), TRUE), _not(FALSE)),
+    (_logic("Or", _logic("And", LIKE, FALSE), EQUAL), EQUAL),
+    (
+        _logic("And", _compare_literals("PropertyIsEqualTo", 1, "a"), EQUAL),
+        _compare_literals("PropertyIsEqualTo", 1, "a"),
+    ),
+    (
+        _logic("And", FUNCTION, EQUAL),
+        _logic("And", EQUAL, FUNCTION),
+    ),
+])
+def test_optimize_filter(operator, expected):
+    assert optimizers.optimize_filter(operator) == expected
+
+
+@pytest.mark.parametrize("operator, expected", [
+    (
+        _logic(
+            "And",
+            _compare("PropertyIsGreaterThanOrEqualTo", "depth", 10),
+            _compare("PropertyIsLessThanOrEqualTo", "depth", 30),
+        ),
+        _between("depth", 10, 30)
+    ),
+    (
+        _logic(
+            "And",
+            _compare("PropertyIsGreaterThan", "depth", 10),
+            _compare("PropertyIsGreaterThanOrEqualTo", "depth", 20),
+            _compare("PropertyIsGreaterThan", "depth", 20),
+            _compare("PropertyIsLessThan", "depth", "50"),
+        ),
+        _logic(
+            "And",
+            _compare("PropertyIsGreaterThan", "depth", 20),
+            _compare("PropertyIsLessThan", "depth", "50"),
+        ),
+    ),
+    (
+        _logic(
+            "And",
+            _between("depth", 0, 100),
+            operators.BinaryComparisonOperator(
+                "PropertyIsGreaterThanOrEqualTo",
+                expressions.Literal(50),
+                expressions.ValueReference("depth")
+            ),
+            _between("depth", 10, 200),
+        ),
+        _between("depth", 10, 50)
+    ),
+    (
+        _logic(
+            "And",
+            _compare("PropertyIsGreaterThan", "depth", "ten"),
+            _compare("PropertyIsLessThan", "depth", 30),
+        ),
+        _logic(
+            "And",
+            _compare("PropertyIsGreaterThan", "depth", "ten"),
+            _compare("PropertyIsLessThan", "depth", 30),
+        ),
+    ),
+    (
+        _logic(
+            "And",
+            _compare("PropertyIsLessThan", "a", "100"),
+            _compare("PropertyIsLessThan", "a", "30"),
+        ),
+        _logic(
+            "And",
+            _compare("PropertyIsLessThan", "a", "100"),
+            _compare("PropertyIsLessThan", "a", "30"),
+        ),
+    ),
+])
+def test_optimize_filter_merge_ranges(operator, expected):
+    result = optimizers.optimize_filter(operator, merge_ranges=True)
+    assert result == expected
+
+
+def test_optimize_filter_keeps_ranges_by_default():
+    operator = _logic(
+        "And",
+        _compare("PropertyIsGreaterThanOrEqualTo", "depth", 10),
+        _compare("PropertyIsLessThanOrEqualTo", "depth", 30),
+    )
+    assert optimizers.optimize_filter(operator) == operator
+
+
+def test_optimize_filter_keeps_multivalued_matches():
+    operator = _logic(
+        "And",
+        _compare("PropertyIsGreaterThanOrEqualTo", "depth", 10),
+        _compare("PropertyIsLessThanOrEqualTo", "depth", 5),
+    )
+    predicate = compilers.compile_filter(optimizers.optimize_filter(operator))
+    assert predicate({"depth": [20, 1]})
+    merged = compilers.compile_filter(
+        optimizers.optimize_filter(operator, merge_ranges=True))
+    assert not merged({"depth": [20, 1]})
+
+
+def test_optimize_filter_without_reordering():
+    operator = _logic("Or", _spatial("Intersects", BOX), LIKE, EQUAL)
+    result = optimizers.optimize_filter(operator, reorder=False)
+    assert result == operator
+
+
+def test_optimize_filter_does_not_modify_input():
+    operator = _logic("And", LIKE, _not(_not(EQUAL))).freeze()
+    optimizers.optimize_filter(operator)
+    assert operator.second_expression == _not(_not(EQUAL))
+
+
+def test_optimize_deeply_nested_filter():
+    operands = [_compare("PropertyIsEqualTo", "a", index) for
+                index in range(3000)]
+    result = optimizers.optimize_filter(_logic("Or", *(operands * 2)))
+    assert result == _logic("Or", *operands)
+
+
+def _random_filter(generator, depth):
+    if depth == 0 or generator.random() < 0.3:
+        literals = [5, 7, 10, 7.5, "5", "7", "10", "100", "abc"]
+        if generator.random() < 0.1:
+            return _compare_literals(
+                generator.choice(["PropertyIsLessThan", "PropertyIsEqualTo"]),
+                generator.choice(literals),
+                generator.choice(literals)
+            )
+        if generator.random() < 0.2:
+            return _between("a", generator.choice(literals),
+                            generator.choice(literals))
+        return _compare(
+            generator.choice([
+                "PropertyIsLessThan", "PropertyIsLessThanOrEqualTo",
+                "PropertyIsGreaterThan", "PropertyIsGreaterThanOrEqualTo",
+                "PropertyIsEqualTo",
+            ]),
+            "a",
+            generator.choice(literals)
+        )
+    if generator.random() < 0.2:
+        return _not(_random_filter(generator, depth - 1))
+    return _logic(
+        generator.choice(["And", "Or"]),
+        *[_random_filter(generator, depth - 1) for _ in
+          range(generator.randint(2, 4))]
+    )
+
+
+@pytest.mark.parametrize("merge_ranges", [False, True])
+@pytest.mark.parametrize("seed", range(400))
+def test_optimized_filter_matches_the_same_features(seed, merge_ranges):
+    generator = random.Random(seed)
+    operator = _random_filter(generator, 3)
+    features = [{"a": value} for value in [
+        5, 7, 10, 25, 7.5, "5", "7", "10", "25", "100", "7.5", "abc", None,
+    ]] + [{}]
+    expected = compilers.compile_filter(operator)
+    optimized = compilers.compile_filter(optimizers.optimize_filter(
+        operator, merge_ranges=merge_ranges))
+    for feature in features:
+        assert optimized(feature) == expected(feature), feature
@@ -1,14 +1,25 @@
 """Unit tests for pyfes.fes20.renderers"""
 
+import io
+
 from lxml import etree
 import pytest
 
+from pyfes import errors
+from pyfes import geometries
+from pyfes import temporal
 from pyfes.fes20 import expressions
+from pyfes.fes20 import filterparsers
+from pyfes.fes20 import operators
 from pyfes.fes20 import renderers
 from pyfes.fes20.namespaces import NAMESPACES
 
 pytestmark = pytest.mark.unit
 
+NAME = expressions.ValueReference("name")
+GEOM = expressions.ValueReference("geom")
+TIME = expressions.ValueReference("time")
+
 
 def test_fes_filter_renderer_render_value_reference():
     renderer = renderers.FesFilterRenderer()
@@ -20,3 +31,184 @@ def test_fes_filter_renderer_render_value_reference():
         "</fes:ValueReference>".format(NAMESPACES["fes"])
     )
     assert etree.tostring(result) == etree.tostring(expected)
+
+
+@pytest.mark.parametrize("operator", [
+    operators.BinaryComparisonOperator(
+        "PropertyIsEqualTo", NAME, expressions.Literal("a & <b>")),
+    operators.BinaryComparisonOperator(
+        "PropertyIsLessThan", NAME, expressions.Literal(1.5),
+        match_case=False, match_action="All"),
+    operators.LikeOperator(NAME, expressions.Literal("a*"), wild_card="*",
+                           single_char=".", escape_char="!"),
+    operators.BetweenComparisonOperator(
+        NAME, expressions.Literal(1), expressions.Literal(10)),
+    operators.NullOperator(NAME),
+    operators.NilOperator(NAME, nil_reason="missing"),
+    operators.BinaryComparisonOperator(
+        "PropertyIsEqualTo",
+        expressions.Function("lower", [NAME, expressions.Literal(True)]),
+        expressions.Literal("a")
+    ),
+    operators.BinarySpatialOperator(
+        "Within", GEOM,
+        geometries.parse_wkt("POLYGON ((0 0, 10 0, 10 10, 0 0), "
+                             "(1 1, 2 1, 2 2, 1 1))", srs="EPSG:3857")
+    ),
+    operators.BinarySpatialOperator(
+        "Intersects", GEOM,
+        geometries.parse_wkt(
+            "GEOMETRYCOLLECTION (POINT (1 2), MULTIPOINT ((3 4), (5 6)), "
+            "MULTIPOLYGON (((0 0, 1 0, 1 1, 0 0)), ((5 5, 6 5, 6 6, 5 5))))",
+            srs="EPSG:4326"
+        )
+    ),
+    operators.BinarySpatialOperator(
+        "BBOX", GEOM,
+        geometries.parse_wkt("MULTILINESTRING Z ((1 2 3, 4 5 6))",
+                             srs="EPSG:4326")
+    ),
+    operators.DistanceOperator(
+        "Beyond", GEOM,
+        geometries.Geometry("Point", [1.25, -3], srs="EPSG:4326"), 10.5,
+        uom="m"),
+    operators.TemporalOperator(
+        "After", TIME, temporal.parse_period("2020-01-01T10:00:00.5Z")),
+    operators.TemporalOperator(
+        "During", TIME, temporal.parse_period("2020-01-01/..")),
+    operators.TemporalOperator(
+        "TContains", TIME, temporal.parse_period("2020-01-01/2021-01-01")),
+    operators.BinaryLogicOperator(
+        "And",
+        operators.BinaryLogicOperator(
+            "And", operators.NullOperator(NAME),
+            operators.NullOperator(GEOM)),
+        operators.UnaryLogicOperator(
+            "Not",
+            operators.BinaryLogicOperator(
+                "Or", operators.NullOperator(NAME),
+                operators.NilOperator(GEOM))
+        )
+    ),
+    (operators.ResourceId("a", version="5"), operators.ResourceId("b")),
+])
+def test_render_filter_round_trip(operator):
+    rendered = renderers.render_filter(operator)
+    parser = filterparsers.FesFilterParser()
+    assert parser.parse_filter(rendered) == operator
+    assert parser.parse_filter_stream(rendered) == operator
+
+
+def test_render_filter_is_byte_stable():
+    operator = operators.BinaryLogicOperator(
+        "Or",
+        operators.BinarySpatialOperator(
+            "Intersects", GEOM,
+            geometries.Geometry("Point", [1, 2], srs="EPSG:4326")),
+        operators.BinarySpatialOperator(
+            "Intersects", GEOM,
+            geometries.Geometry("Point", [3, 4], srs="EPSG:4326")),
+    )
+    renderer = renderers.FesFilterRenderer()
+    first = renderer.render(operator)
+    assert renderer.render(operator) == first
+    assert renderers.render_filter(
+        filterparsers.FesFilterParser().parse_filter(first)) == first
+    assert b'gml:id="pyfes.1"' in first
+    assert b'gml:id="pyfes.2"' in first
+
+
+def test_render_wkt_operand_as_gml():
+    operator = operators.BinarySpatialOperator(
+        "Intersects", GEOM, "LINESTRING (1 2, 3 4)")
+    result = renderers.render_filter(operator)
+    assert (b'<gml:LineString gml:id="pyfes.1">'
+            b'<gml:posList>1 2 3 4</gml:posList></gml:LineString>') in result
+    result = renderers.FesFilterRenderer(default_srs="EPSG:4326").render(
+        operator)
+    assert b'<gml:LineString gml:id="pyfes.1" srsName="EPSG:4326">' in result
+    parsed = filterparsers.FesFilterParser().parse_filter(result)
+    assert parsed.second_operand.wkt == "LINESTRING (1 2, 3 4)"
+
+
+@pytest.mark.parametrize("operator", [
+    operators.BinarySpatialOperator(
+        "Intersects", GEOM, geometries.parse_wkt("POLYGON ((0 0, 1 0, 0 0))")),
+    operators.DistanceOperator(
+        "DWithin", GEOM, geometries.parse_wkt("POINT Z (1 2 3)"), 5),
+])
+def test_render_geometry_without_srs(operator):
+    assert b"srsName" not in renderers.render_filter(operator)
+
+
+@pytest.mark.parametrize("uom, expected", [
+    ("km", b'<fes:Distance uom="km">5</fes:Distance>'),
+    (None, b'<fes:Distance uom="ft">5</fes:Distance>'),
+])
+def test_render_distance_units(uom, expected):
+    operator = operators.DistanceOperator(
+        "DWithin", GEOM, "POINT (1 2)", 5, uom=uom)
+    renderer = renderers.FesFilterRenderer(distance_units="ft")
+    assert expected in renderer.render(operator)
+
+
+@pytest.mark.parametrize("literal, expected", [
+    (expressions.Literal("text"), b"<fes:Literal>text</fes:Literal>"),
+    (expressions.Literal(3), b'<fes:Literal type="xs:int">3</fes:Literal>'),
+    (
+        expressions.Literal(-2 ** 31),
+        b'<fes:Literal type="xs:int">-2147483648</fes:Literal>'
+    ),
+    (
+        expressions.Literal(2 ** 31),
+        b'<fes:Literal type="xs:long">2147483648</fes:Literal>'
+    ),
+    (
+        expressions.Literal(2 ** 63),
+        b'<fes:Literal type="xs:integer">9223372036854775808</fes:Literal>'
+    ),
+    (
+        expressions.Literal(2.0),
+        b'<fes:Literal type="xs:float">2</fes:Literal>'
+    ),
+    (
+        expressions.Literal(False),
+        b'<fes:Literal type="xs:boolean">false</fes:Literal>'
+    ),
+    (expressions.Literal(None), b"<fes:Literal></fes:Literal>"),
+    (
+        expressions.Literal(u"caf\u00e9"),
+        u"<fes:Literal>caf\u00e9</fes:Literal>".encode("utf-8")
+    ),
+])
+def test_render_literal(literal, expected):
+    operator = operators.BinaryComparisonOperator(
+        "PropertyIsEqualTo", NAME, literal)
+    rendered = renderers.render_filter(operator)
+    assert expected in rendered
+    assert filterparsers.FesFilterParser().parse_filter(rendered) == operator
+
+
+def test_write_to_stream():
+    operator = operators.NullOperator(NAME)
+    output = io.BytesIO()
+    renderers.FesFilterRenderer(xml_declaration=True).write(
+        output, operator)
+    result = output.getvalue()
+    assert result.startswith(b"<?xml")
+    assert result.endswith(b"</fes:Filter>")
+    assert filterparsers.FesFilterParser().parse_filter(result) == operator
+
+
+def test_render_element():
+    element = renderers.FesFilterRenderer().render_element(
+        operators.NullOperator(NAME))
+    assert element.tag == "{{{}}}Filter".format(NAMESPACES["fes"])
+    assert element[0].tag == "{{{}}}PropertyIsNull".format(NAMESPACES["fes"])
+
+
+def test_render_unknown_node():
+    operator = operators.UnaryLogicOperator.trusted(
+        operator_type=operators.UnaryLogicType.NOT, operand=object())
+    with pytest.raises(errors.PyFesError):
+        renderers.render_filter(operator)
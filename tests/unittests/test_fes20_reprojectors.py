@@ -0,0 +1,112 @@
+"""Unit tests for pyfes.fes20.reprojectors"""
+
+import pytest
+
+from pyfes import errors
+from pyfes import geometries
+from pyfes.fes20 import expressions
+from pyfes.fes20 import operators
+from pyfes.fes20 import reprojectors
+
+pytestmark = pytest.mark.unit
+
+GEOM = expressions.ValueReference("geom")
+BOX = "POLYGON ((0 0, 10 0, 10 10, 0 10, 0 0))"
+
+
+def _intersects(operand):
+    return operators.BinarySpatialOperator(
+        operator_type="Intersects", first_operand=GEOM,
+        second_operand=operand)
+
+
+@pytest.mark.parametrize("operator", [
+    _intersects(BOX),
+    _intersects(geometries.Geometry("Point", [1, 2], srs="EPSG:3857")),
+    operators.BinaryComparisonOperator(
+        "PropertyIsEqualTo", expressions.ValueReference("name"),
+        expressions.Literal("a")),
+    operators.BinaryLogicOperator(
+        "And",
+        _intersects(BOX),
+        operators.UnaryLogicOperator("Not", _intersects(BOX))
+    ),
+    (operators.ResourceId("a"),),
+])
+def test_reproject_filter_keeps_unchanged_operators(operator):
+    assert reprojectors.reproject_filter(operator, "EPSG:3857") is operator
+
+
+def test_reproject_filter():
+    pytest.importorskip("pyproj")
+    point = geometries.Geometry("Point", [180, 0], srs="EPSG:4326")
+    projected_point = geometries.Geometry("Point", [1, 2], srs="EPSG:3395")
+    operator = operators.BinaryLogicOperator(
+        "Or",
+        operators.UnaryLogicOperator("Not", _intersects(point)),
+        operators.DistanceOperator(
+            operator_type="DWithin", expression=GEOM,
+            geometry=projected_point, distance=10)
+    )
+    result = reprojectors.reproject_filter(operator, "EPSG:3857")
+    spatial_operator = result.first_expression.expression
+    distance_operator = result.second_expression
+    assert spatial_operator.second_operand.srs == "EPSG:3857"
+    assert spatial_operator.second_operand.coordinates[0] == pytest.approx(
+        20037508.34, abs=0.01)
+    assert distance_operator.geometry.srs == "EPSG:3857"
+    assert distance_operator.distance == 10
+    assert distance_operator.operator_type == (
+        operators.DistanceOperatorName.DWITHIN)
+    assert point.srs == "EPSG:4326"
+
+
+@pytest.mark.parametrize("source_srs, target_srs, expected", [
+    ("EPSG:2263", "EPSG:3857", 0.3048006096),
+    ("EPSG:3857", "EPSG:2263", 1 / 0.3048006096),
+    ("EPSG:4326", "EPSG:4269", 1.0),
+    ("EPSG:4326", "urn:ogc:def:crs:EPSG::4326", 1.0),
+])
+def test_reproject_distance_operator(source_srs, target_srs, expected):
+    pytest.importorskip("pyproj")
+    operator = operators.DistanceOperator(
+        operator_type="Beyond", expression=GEOM,
+        geometry=geometries.Geometry("Point", [10, 50], srs=source_srs),
+        distance=0.5
+    )
+    result = reprojectors.reproject_filter(operator, target_srs)
+    assert result.distance == pytest.approx(0.5 * expected)
+
+
+@pytest.mark.parametrize("source_srs, target_srs", [
+    ("EPSG:4326", "EPSG:3857"),
+    ("EPSG:3857", "EPSG:4326"),
+    ("EPSG:2263", "EPSG:4326"),
+])
+def test_reproject_distance_operator_with_units(source_srs, target_srs):
+    pytest.importorskip("pyproj")
+    operator = operators.DistanceOperator(
+        operator_type="DWithin", expression=GEOM,
+        geometry=geometries.Geometry("Point", [10, 50], srs=source_srs),
+        distance=1000, uom="m"
+    )
+    result = reprojectors.reproject_filter(operator, target_srs)
+    assert result.geometry.srs == target_srs
+    assert result.distance == 1000
+    assert result.uom == "m"
+
+
+@pytest.mark.parametrize("source_srs, target_srs", [
+    ("EPSG:4326", "EPSG:3857"),
+    ("EPSG:3857", "EPSG:4326"),
+])
+def test_reproject_distance_operator_between_unit_kinds(source_srs,
+                                                        target_srs):
+    pytest.importorskip("pyproj")
+    operator = operators.DistanceOperator(
+        operator_type="DWithin", expression=GEOM,
+        geometry=geometries.Geometry("Point", [10, 50], srs=source_srs),
+        distance=0.5
+    )
+    with pytest.raises(errors.PyFesError):
+        reprojectors.reproject_filter(operator, target_srs)
@@ -0,0 +1,219 @@
+"""Unit tests for pyfes.fes20.schemaparsers"""
+
+import threading
+
+from lxml import etree
+import mock
+import pytest
+
+from pyfes import errors
+from pyfes.fes20 import filterparsers
+from pyfes.fes20 import schemaparsers
+
+pytestmark = pytest.mark.unit
+
+VALID_FILTER = b"""
+<fes:Filter
+    xmlns:fes="http://www.opengis.net/fes/2.0"
+    xmlns:gml="http://www.opengis.net/gml/3.2">
+  <fes:And>
+    <fes:PropertyIsLessThan>
+      <fes:ValueReference>depth</fes:ValueReference>
+      <fes:Literal>30</fes:Literal>
+    </fes:PropertyIsLessThan>
+    <fes:Intersects>
+      <fes:ValueReference>geom</fes:ValueReference>
+      <gml:Point gml:id="p1" srsName="urn:ogc:def:crs:EPSG::4326">
+        <gml:pos>1 2</gml:pos>
+      </gml:Point>
+    </fes:Intersects>
+  </fes:And>
+</fes:Filter>
+"""
+
+INVALID_FILTER = b"""
+<fes:Filter xmlns:fes="http://www.opengis.net/fes/2.0">
+  <fes:PropertyIsLessThan unknown="attribute">
+    <fes:ValueReference>depth</fes:ValueReference>
+    <fes:Literal>30</fes:Literal>
+  </fes:PropertyIsLessThan>
+</fes:Filter>
+"""
+
+
+@pytest.mark.parametrize("location, expected", [
+    ("http://example.com/a.xsd", "/local/a.xsd"),
+    ("http://example.com/b.xsd", "/prefix/b.xsd"),
+    ("http://example.com/deep/c.xsd", "/deep/c.xsd"),
+    ("http://other.com/a.xsd", None),
+])
+def test_schema_catalog_resolve(location, expected):
+    catalog = schemaparsers.SchemaCatalog(
+        entries={"http://example.com/a.xsd": "/local/a.xsd"},
+        rewrites={
+            "http://example.com/": "/prefix/",
+            "http://example.com/deep/": "/deep/",
+        }
+    )
+    assert catalog.resolve(location) == expected
+
+
+def test_schema_catalog_from_file(tmpdir):
+    catalog_file = tmpdir.join("catalog.xml")
+    catalog_file.write(
+        '<catalog xmlns="{}">'
+        '<system systemId="http://example.com/a.xsd" uri="a.xsd"/>'
+        '<uri name="urn:b" uri="sub/b.xsd"/>'
+        '<rewriteSystem systemIdStartString="http://example.com/x/" '
+        'rewritePrefix="x/"/>'
+        '</catalog>'.format(schemaparsers.CATALOG_NAMESPACE)
+    )
+    catalog = schemaparsers.SchemaCatalog.from_file(str(catalog_file))
+    assert catalog.resolve("http://example.com/a.xsd") == str(
+        tmpdir.join("a.xsd"))
+    assert catalog.resolve("urn:b") == str(tmpdir.join("sub", "b.xsd"))
+    assert catalog.resolve("http://example.com/x/c.xsd") == str(
+        tmpdir.join("x", "c.xsd"))
+
+
+def test_bundled_catalog_resolves_official_locations():
+    catalog = schemaparsers.SchemaCatalog.from_file(
+        schemaparsers.DEFAULT_CATALOG_PATH)
+    for location in ("http://schemas.opengis.net/filter/2.0/filterAll.xsd",
+                     "http://schemas.opengis.net/gml/3.2.1/gml.xsd",
+                     "http://www.w3.org/1999/xlink.xsd"):
+        with open(catalog.resolve(location), "rb") as fh:
+            assert etree.parse(fh).getroot().tag.endswith("schema")
+
+
+def test_schema_parser_compiles_lazily():
+    with mock.patch.object(schemaparsers.SchemaParser,
+                           "parse_schema_document") as mock_parse, \
+            mock.patch.object(schemaparsers.SchemaParser,
+                              "compile_schema") as mock_compile:
+        parser = schemaparsers.SchemaParser()
+        assert not mock_parse.called
+        parser.schema
+        parser.schema
+        assert mock_parse.call_count == 1
+        assert mock_compile.call_count == 1
+
+
+def test_schema_parser_compiles_once_per_thread():
+    parser = schemaparsers.SchemaParser()
+    results = []
+    with mock.patch.object(schemaparsers.SchemaParser,
+                           "parse_schema_document", autospec=True,
+                           side_effect=lambda self: object()) as mock_parse, \
+            mock.patch.object(schemaparsers.SchemaParser, "compile_schema",
+                              autospec=True,
+                              side_effect=lambda self, document: object()):
+        threads = [threading.Thread(target=lambda: results.append(
+            (parser.schema, parser.schema))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert mock_parse.call_count == 1
+    assert all(first is second for first, second in results)
+    assert len(set(id(first) for first, second in results)) == 8
+
+
+def test_schema_parser_validates_concurrently():
+    parser = schemaparsers.SchemaParser()
+    failures = []
+
+    def validate(data, valid):
+        element = etree.fromstring(data)
+        for _ in range(20):
+            try:
+                parser.validate_xml(element)
+                result = True
+            except errors.ValidationError as err:
+                # the error must be the one of this thread's element
+                result = False if "unknown" in str(err) else None
+            if result != valid:
+                failures.append(data)
+
+    threads = [
+        threading.Thread(target=validate, args=(
+            (VALID_FILTER, True) if index % 2 else (INVALID_FILTER, False)))
+        for index in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert failures == []
+
+
+def test_schema_parser_resolves_imports_through_catalog():
+    resolved = []
+    original = schemaparsers.SchemaCatalog.resolve
+
+    def resolve(catalog, location):
+        result = original(catalog, location)
+        if result is not None:
+            resolved.append(location)
+        return result
+
+    with mock.patch.object(schemaparsers.SchemaCatalog, "resolve",
+                           autospec=True, side_effect=resolve):
+        schema = schemaparsers.SchemaParser().parse_schema()
+    assert schema is not None
+    assert "http://schemas.opengis.net/filter/2.0/filterAll.xsd" in resolved
+    assert "http://www.w3.org/1999/xlink.xsd" in resolved
+
+
+def test_schema_parser_uses_environment_schema_path(tmpdir, monkeypatch):
+    schema_file = tmpdir.join("custom.xsd")
+    schema_file.write(
+        '<xsd:schema xmlns:xsd="http://www.w3.org/2001/XMLSchema">'
+        '<xsd:element name="custom"/>'
+        '</xsd:schema>'
+    )
+    monkeypatch.setenv("PYFES_SCHEMA_PATH", str(schema_file))
+    parser = schemaparsers.SchemaParser()
+    parser.validate_xml(etree.fromstring(b"<custom/>"))
+    with pytest.raises(errors.ValidationError):
+        parser.validate_xml(etree.fromstring(b"<other/>"))
+
+
+@pytest.mark.parametrize("data, valid", [
+    (VALID_FILTER, True),
+    (INVALID_FILTER, False),
+])
+def test_schema_parser_validate_xml(data, valid):
+    element = etree.fromstring(data)
+    if valid:
+        schemaparsers.schema_parser.validate_xml(element)
+    else:
+        with pytest.raises(errors.ValidationError):
+            schemaparsers.schema_parser.validate_xml(element)
+
+
+def test_schema_parser_validate_xml_without_schema(tmpdir):
+    parser = schemaparsers.SchemaParser(
+        schema_path=str(tmpdir.join("missing.xsd")))
+    with pytest.raises(errors.PyFesError):
+        parser.validate_xml(etree.fromstring(VALID_FILTER))
+
+
+@pytest.mark.parametrize("validate", [True, False])
+def test_fes_filter_parser_validation(validate):
+    parser = filterparsers.FesFilterParser(validate=validate)
+    assert parser.parse_filter(VALID_FILTER) is not None
+    if validate:
+        with pytest.raises(errors.ValidationError):
+            parser.parse_filter(INVALID_FILTER)
+    else:
+        assert parser.parse_filter(INVALID_FILTER) is not None
+
+
+def test_fes_filter_parser_validation_reuses_parsed_element():
+    schema_parser = mock.MagicMock(spec=schemaparsers.SchemaParser)
+    parser = filterparsers.FesFilterParser(validate=True,
+                                           schema_parser=schema_parser)
+    parser.parse_filter(VALID_FILTER)
+    element = schema_parser.validate_xml.call_args[0][0]
+    assert element.tag == "{http://www.opengis.net/fes/2.0}Filter"
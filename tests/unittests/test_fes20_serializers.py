@@ -0,0 +1,194 @@
+"""Unit tests for pyfes.fes20.serializers"""
+
+from array import array
+import datetime as dt
+import pickle
+import struct
+
+import pytest
+
+from pyfes import errors
+from pyfes import geometries
+from pyfes import temporal
+from pyfes.fes20 import cqlparsers
+from pyfes.fes20 import expressions
+from pyfes.fes20 import operators
+from pyfes.fes20 import serializers
+
+pytestmark = pytest.mark.unit
+
+NAME = expressions.ValueReference("name")
+GEOM = expressions.ValueReference("geom")
+POLYGON = geometries.parse_wkt(
+    "POLYGON ((0 0, 10 0, 10 10, 0 0), (1 1, 2 1, 2 2, 1 1))",
+    srs="EPSG:3857"
+)
+
+
+@pytest.mark.parametrize("operator", [
+    operators.BinaryComparisonOperator(
+        "PropertyIsEqualTo", NAME, expressions.Literal(u"caf\xe9")),
+    operators.BinaryComparisonOperator(
+        "PropertyIsLessThan", NAME, expressions.Literal(-1.5),
+        match_case=False, match_action="All"),
+    operators.BinaryComparisonOperator(
+        "PropertyIsGreaterThan", NAME, expressions.Literal(-2 ** 70)),
+    operators.LikeOperator(NAME, expressions.Literal("a*"), wild_card="*",
+                           single_char=".", escape_char="!"),
+    operators.BetweenComparisonOperator(
+        NAME, expressions.Literal(1), expressions.Literal(10)),
+    operators.NullOperator(NAME),
+    operators.NilOperator(NAME, nil_reason="missing"),
+    operators.BinaryComparisonOperator(
+        "PropertyIsEqualTo",
+        expressions.Function("lower", [NAME, expressions.Literal(True),
+                                       expressions.Literal(None)]),
+        expressions.Function("now")
+    ),
+    operators.BinarySpatialOperator("Within", GEOM, POLYGON),
+    operators.BinarySpatialOperator(
+        "Intersects", GEOM,
+        geometries.parse_wkt(
+            "GEOMETRYCOLLECTION (POINT (1 2), POINT EMPTY, "
+            "MULTIPOLYGON (((0 0, 1 0, 1 1, 0 0)), ((5 5, 6 5, 6 6, 5 5))))",
+            srs="EPSG:4326"
+        )
+    ),
+    operators.BinarySpatialOperator(
+        "BBOX", GEOM, geometries.parse_wkt("LINESTRING Z (1 2 3, 4 5 6)")),
+    operators.BinarySpatialOperator("Touches", GEOM, "POINT (1 2)"),
+    operators.BinarySpatialOperator("Equals", GEOM, NAME),
+    operators.DistanceOperator(
+        "Beyond", GEOM,
+        geometries.Geometry("Point", [1.25, -3], srs="EPSG:4326"), 10.5),
+    operators.DistanceOperator("DWithin", GEOM, "POINT (1 2)", 3, uom="km"),
+    operators.TemporalOperator(
+        "During", NAME, expressions.Literal("2020-01-01/2020-02-01")),
+    operators.TemporalOperator(
+        "Before", NAME, temporal.TimePeriod(temporal.MIN_TIME, -1)),
+    operators.TemporalOperator(
+        "TEquals", NAME, temporal.parse_period("2020-01-01T10:00:00Z")),
+    operators.BinaryLogicOperator(
+        "And",
+        operators.BinaryLogicOperator(
+            "Or", operators.NullOperator(NAME), operators.NullOperator(GEOM)),
+        operators.UnaryLogicOperator("Not", operators.NilOperator(GEOM))
+    ),
+    (operators.ResourceId("a", version="5"), operators.ResourceId("b")),
+    cqlparsers.parse_cql("foo(geom, POINT(1 1)) = 1"),
+    operators.BinaryComparisonOperator(
+        "PropertyIsEqualTo",
+        expressions.Function("begin", [expressions.Literal(
+            temporal.parse_period("2020-01-01/2020-02-01"))]),
+        expressions.Literal(dt.datetime(2020, 1, 1, 23, 59, 59, 999999))
+    ),
+    (
+        operators.ResourceId(
+            "a", start_time=dt.datetime(2020, 1, 1),
+            end_time=dt.datetime(1, 1, 1, 0, 0, 1)
+        ),
+    ),
+])
+def test_round_trip(operator):
+    data = serializers.dumps(operator)
+    assert data.startswith(serializers.MAGIC)
+    assert serializers.loads(data) == operator
+    assert serializers.loads(data, copy=True) == operator
+    assert serializers.loads(bytearray(data)) == operator
+    assert serializers.dumps(serializers.loads(data)) == data
+
+
+def test_loads_keeps_coordinates_in_place():
+    operator = operators.BinarySpatialOperator("Within", GEOM, POLYGON)
+    data = serializers.dumps(operator)
+    geometry = serializers.loads(data).second_operand
+    assert isinstance(geometry.coordinates, memoryview)
+    assert geometry.coordinates.obj is data
+    assert geometry.bounds == POLYGON.bounds
+    assert geometry.wkt == POLYGON.wkt
+    assert geometry.wkb == POLYGON.wkb
+    copied = serializers.loads(data, copy=True).second_operand
+    assert isinstance(copied.coordinates, array)
+    assert pickle.loads(pickle.dumps(geometry)) == POLYGON
+
+
+def test_loads_does_not_validate():
+    operator = serializers.loads(serializers.dumps(
+        operators.BinarySpatialOperator("Within", GEOM, POLYGON)))
+    assert not operator.frozen
+    assert operator.operator_type is operators.SpatialOperatorName.WITHIN
+    assert operator.expression.validators == ()
+
+
+@pytest.mark.parametrize("offset", [
+    dt.timedelta(0),
+    dt.timedelta(hours=5, minutes=30),
+    -dt.timedelta(hours=23, minutes=59),
+])
+def test_round_trip_aware_datetime(offset):
+    if not hasattr(dt, "timezone"):
+        pytest.skip("python 2 has no fixed offset timezones")
+    start_time = dt.datetime(2020, 1, 1, 12, tzinfo=dt.timezone(offset))
+    operator = (operators.ResourceId("a", start_time=start_time),)
+    data = serializers.dumps(operator)
+    result = serializers.loads(data)[0].start_time
+    assert result == start_time
+    assert result.utcoffset() == offset
+    assert serializers.dumps(serializers.loads(data)) == data
+
+
+def test_round_trip_long_chain():
+    operator = operators.NullOperator(NAME)
+    for index in range(5000):
+        operator = operators.BinaryLogicOperator.trusted(
+            operators.BinaryLogicType.OR, operator,
+            operators.BinaryComparisonOperator.trusted(
+                operators.BinaryComparisonName.PROPERTY_IS_EQUAL_TO,
+                NAME, expressions.Literal.trusted(index))
+        )
+    assert serializers.loads(serializers.dumps(operator)) == operator
+
+
+def test_strings_are_stored_once():
+    single = serializers.dumps(operators.NullOperator(NAME))
+    operator = operators.BinaryLogicOperator(
+        "And", operators.NullOperator(NAME), operators.NullOperator(NAME))
+    assert len(serializers.dumps(operator)) - len(single) <= 8
+
+
+@pytest.mark.parametrize("operator", [
+    operators.BinaryComparisonOperator(
+        "PropertyIsEqualTo", NAME, expressions.Literal(dt.date(2020, 1, 1))),
+    operators.UnaryLogicOperator.trusted(
+        operator_type=operators.UnaryLogicType.NOT, operand=object()),
+    (operators.ResourceId("a"), "b"),
+])
+def test_dumps_unsupported(operator):
+    with pytest.raises(errors.SerializationError):
+        serializers.dumps(operator)
+
+
+def _replace(data, position, new):
+    return data[:position] + new + data[position + len(new):]
+
+
+DATA = serializers.dumps(operators.BinarySpatialOperator(
+    "Within", GEOM, POLYGON))
+DATETIME_DATA = serializers.dumps(operators.NullOperator(
+    expressions.Literal(dt.datetime(2020, 1, 1, 23, 59, 59, 999999))))
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"PYFES",
+    _replace(DATA, 0, b"NOTIT"),
+    _replace(DATA, 5, struct.pack("<B", serializers.FORMAT_VERSION + 1)),
+    DATA[:-8],
+    DATA[:40] + b"\xff" + DATA[41:],
+    _replace(DATA, 12, struct.pack("<I", 1000)),
+    # a time of day of 24:00:00
+    DATETIME_DATA.replace(b"\xff\xbf\xdd", b"\x80\xc0\xdd"),
+])
+def test_loads_invalid(data):
+    with pytest.raises(errors.SerializationError):
+        serializers.loads(data)
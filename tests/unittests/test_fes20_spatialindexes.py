@@ -0,0 +1,118 @@
+"""Unit tests for pyfes.fes20.spatialindexes"""
+
+import mock
+import pytest
+
+from pyfes.fes20 import compilers
+from pyfes.fes20 import expressions
+from pyfes.fes20 import operators
+from pyfes.fes20 import spatialindexes
+
+pytestmark = pytest.mark.unit
+
+FEATURES = [
+    {"id": "point", "kind": 1, "geom": "POINT (1 1)"},
+    {"id": "far_point", "kind": 2, "geom": "POINT (50 50)"},
+    {"id": "edge_point", "kind": 1, "geom": "POINT (0 5)"},
+    {"id": "line", "kind": 2, "geom": "LINESTRING (-5 5, 15 5)"},
+    {"id": "inner_line", "kind": 1, "geom": "LINESTRING (2 2, 8 8)"},
+    {"id": "square", "kind": 2,
+     "geom": "POLYGON ((0 0, 10 0, 10 10, 0 10, 0 0))"},
+    {"id": "neighbour", "kind": 1,
+     "geom": "POLYGON ((10 0, 20 0, 20 10, 10 10, 10 0))"},
+    {"id": "overlapping", "kind": 2,
+     "geom": "POLYGON ((5 5, 15 5, 15 15, 5 15, 5 5))"},
+    {"id": "no_geometry", "kind": 1},
+]
+
+SQUARE = "POLYGON ((0 0, 10 0, 10 10, 0 10, 0 0))"
+
+
+def _spatial(operator_type, geometry=SQUARE, name="geom"):
+    return operators.BinarySpatialOperator(
+        operator_type=operator_type,
+        first_operand=expressions.ValueReference(name),
+        second_operand=geometry
+    )
+
+
+def _distance(operator_type, distance, geometry="POINT (50 40)"):
+    return operators.DistanceOperator(
+        operator_type=operator_type,
+        expression=expressions.ValueReference("geom"),
+        geometry=geometry,
+        distance=distance
+    )
+
+
+def _kind(value):
+    return operators.BinaryComparisonOperator(
+        operator_type="PropertyIsEqualTo",
+        first_expression=expressions.ValueReference("kind"),
+        second_expression=expressions.Literal(value)
+    )
+
+
+@pytest.fixture(scope="module")
+def index():
+    return spatialindexes.SpatialIndex(
+        FEATURES, geometry_property="geom", node_capacity=2)
+
+
+@pytest.mark.parametrize("operator", [
+    _spatial(name) for name in operators.SpatialOperatorName
+] + [
+    _spatial("Intersects", "LINESTRING (0 20, 20 0)"),
+    _spatial("BBOX", "LINESTRING (-1 -1, 1 1)"),
+    _spatial("Intersects", "POINT EMPTY"),
+    _spatial("Intersects", name="other"),
+    _distance("DWithin", 10),
+    _distance("Beyond", 10),
+    _distance("DWithin", 100),
+    operators.BinaryLogicOperator("And", _kind(1), _spatial("Intersects")),
+    operators.BinaryLogicOperator("Or", _kind(1), _spatial("Within")),
+    operators.BinaryLogicOperator(
+        "And", _distance("Beyond", 10), _spatial("Disjoint")),
+    operators.UnaryLogicOperator("Not", _spatial("Intersects")),
+    operators.UnaryLogicOperator("Not", _kind(1)),
+    (operators.ResourceId("line"), operators.ResourceId("square")),
+])
+def test_index_matches_linear_scan(index, operator):
+    predicate = compilers.compile_filter(operator)
+    expected = [feature for feature in FEATURES if predicate(feature)]
+    assert index.filter(operator) == expected
+
+
+@pytest.mark.parametrize("operator_type, expected", [
+    ("BBOX", ["point", "edge_point", "line", "inner_line", "square",
+              "neighbour", "overlapping"]),
+    ("Within", ["point", "inner_line", "square"]),
+    ("Touches", ["edge_point", "neighbour"]),
+    ("Crosses", ["line"]),
+    ("Overlaps", ["overlapping"]),
+    ("Disjoint", ["far_point"]),
+])
+def test_spatial_operators(index, operator_type, expected):
+    result = index.filter(_spatial(operator_type))
+    assert [feature["id"] for feature in result] == expected
+
+
+def test_index_is_reusable(index):
+    first = index.select(_spatial("Within"))
+    index.select(_distance("Beyond", 1))
+    assert index.select(_spatial("Within")) == first
+
+
+def test_index_narrows_candidates_before_scanning(index):
+    operator = operators.BinaryLogicOperator(
+        "And", _kind(2), _distance("DWithin", 10))
+    with mock.patch.object(index, "scan", wraps=index.scan) as scan:
+        result = index.filter(operator)
+    assert [feature["id"] for feature in result] == ["far_point"]
+    scan.assert_called_once_with(_kind(2), set([1]))
+
+
+def test_filter_features():
+    operator = _spatial("Contains", "POINT (2 8)")
+    result = spatialindexes.filter_features(FEATURES, operator, "geom")
+    assert [feature["id"] for feature in result] == ["square"]
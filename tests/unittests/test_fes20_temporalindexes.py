@@ -0,0 +1,111 @@
+"""Unit tests for pyfes.fes20.temporalindexes"""
+
+import mock
+import pytest
+
+from pyfes import temporal
+from pyfes.fes20 import compilers
+from pyfes.fes20 import expressions
+from pyfes.fes20 import operators
+from pyfes.fes20 import temporalindexes
+
+pytestmark = pytest.mark.unit
+
+FEATURES = [
+    {"id": "instant", "kind": 1, "time": "2020-01-15"},
+    {"id": "begin", "kind": 2, "time": "2020-01-01"},
+    {"id": "end", "kind": 1, "time": "2020-02-01"},
+    {"id": "before", "kind": 2, "time": "2019-06-01/2019-12-01"},
+    {"id": "after", "kind": 1, "time": "2020-03-01/.."},
+    {"id": "same", "kind": 2, "time": "2020-01-01/2020-02-01"},
+    {"id": "first_half", "kind": 1, "time": "2020-01-01/2020-01-15"},
+    {"id": "second_half", "kind": 2, "time": "2020-01-15/2020-02-01"},
+    {"id": "starting", "kind": 1, "time": "2019-12-01/2020-01-15"},
+    {"id": "ending", "kind": 2, "time": "2020-01-15/2020-03-01"},
+    {"id": "around", "kind": 1, "time": "../2021-01-01"},
+    {"id": "meeting", "kind": 2, "time": "2019-12-01/2020-01-01"},
+    {"id": "no_time", "kind": 1},
+    {"id": "invalid_time", "kind": 2, "time": "tomorrow"},
+]
+
+JANUARY = "2020-01-01/2020-02-01"
+
+
+def _temporal(operator_type, period=JANUARY, name="time"):
+    if not isinstance(period, expressions.Expression):
+        period = temporal.parse_period(period)
+    return operators.TemporalOperator(
+        operator_type=operator_type,
+        first_operand=expressions.ValueReference(name),
+        second_operand=period
+    )
+
+
+def _kind(value):
+    return operators.BinaryComparisonOperator(
+        operator_type="PropertyIsEqualTo",
+        first_expression=expressions.ValueReference("kind"),
+        second_expression=expressions.Literal(value)
+    )
+
+
+@pytest.fixture(scope="module")
+def index():
+    return temporalindexes.TemporalIndex(FEATURES)
+
+
+@pytest.mark.parametrize("operator", [
+    _temporal(name) for name in operators.TemporalOperatorName
+] + [
+    _temporal(name, "2020-01-15") for name in operators.TemporalOperatorName
+] + [
+    _temporal("During", "../.."),
+    _temporal("AnyInteracts", expressions.Literal(JANUARY)),
+    _temporal("After", expressions.ValueReference("time")),
+    _temporal("During", name="other"),
+    operators.BinaryLogicOperator("And", _kind(1), _temporal("During")),
+    operators.BinaryLogicOperator("Or", _kind(2), _temporal("Meets")),
+    operators.UnaryLogicOperator("Not", _temporal("AnyInteracts")),
+    (operators.ResourceId("same"), operators.ResourceId("around")),
+])
+def test_index_matches_linear_scan(index, operator):
+    predicate = compilers.compile_filter(operator)
+    expected = [feature for feature in FEATURES if predicate(feature)]
+    assert index.filter(operator) == expected
+
+
+@pytest.mark.parametrize("operator_type, expected", [
+    ("After", ["after"]),
+    ("Before", ["before"]),
+    ("Begins", ["begin", "first_half"]),
+    ("BegunBy", []),
+    ("TContains", ["around"]),
+    ("During", ["instant"]),
+    ("TEquals", ["same"]),
+    ("TOverlaps", ["starting"]),
+    ("OverlappedBy", ["ending"]),
+    ("Meets", ["begin", "meeting"]),
+    ("MetBy", ["end"]),
+    ("EndedBy", []),
+    ("AnyInteracts", ["instant", "begin", "end", "same", "first_half",
+                      "second_half", "starting", "ending", "around",
+                      "meeting"]),
+])
+def test_temporal_operators(index, operator_type, expected):
+    result = index.filter(_temporal(operator_type))
+    assert [feature["id"] for feature in result] == expected
+
+
+def test_index_narrows_candidates_before_scanning(index):
+    operator = operators.BinaryLogicOperator(
+        "And", _kind(1), _temporal("TContains"))
+    with mock.patch.object(index, "scan", wraps=index.scan) as scan:
+        result = index.filter(operator)
+    assert [feature["id"] for feature in result] == ["around"]
+    scan.assert_called_once_with(_kind(1), set([10]))
+
+
+def test_filter_features():
+    result = temporalindexes.filter_features(
+        FEATURES, _temporal("MetBy", "2019-01-01/2020-03-01"))
+    assert [feature["id"] for feature in result] == ["after"]
@@ -0,0 +1,260 @@
+"""Unit tests for pyfes.fes20.translators"""
+
+import sqlite3
+
+import pytest
+
+from pyfes import errors
+from pyfes import geometries
+from pyfes.fes20 import expressions
+from pyfes.fes20 import operators
+from pyfes.fes20 import translators
+
+pytestmark = pytest.mark.unit
+
+
+def _comparison(operator_type, name, value, **kwargs):
+    return operators.BinaryComparisonOperator(
+        operator_type=operator_type,
+        first_expression=expressions.ValueReference(name),
+        second_expression=expressions.Literal(value),
+        **kwargs
+    )
+
+
+@pytest.fixture
+def connection():
+    connection = sqlite3.connect(":memory:")
+    connection.execute(
+        "CREATE TABLE features (id TEXT, depth INTEGER, name TEXT)")
+    connection.executemany(
+        "INSERT INTO features VALUES (?, ?, ?)",
+        [
+            ("f.1", 10, "first"),
+            ("f.2", 30, "Second"),
+            ("f.3", 50, "third_one"),
+            ("f.4", None, "fourth%"),
+        ]
+    )
+    yield connection
+    connection.close()
+
+
+def _select_ids(connection, operator, **kwargs):
+    where, params = translators.translate_filter(operator, **kwargs)
+    cursor = connection.execute(
+        "SELECT id FROM features WHERE {} ORDER BY id".format(where), params)
+    return [row[0] for row in cursor]
+
+
+@pytest.mark.parametrize("operator_type, expected_sql", [
+    ("PropertyIsEqualTo", '"depth" = ?'),
+    ("PropertyIsNotEqualTo", '"depth" <> ?'),
+    ("PropertyIsLessThan", '"depth" < ?'),
+    ("PropertyIsLessThanOrEqualTo", '"depth" <= ?'),
+    ("PropertyIsGreaterThan", '"depth" > ?'),
+    ("PropertyIsGreaterThanOrEqualTo", '"depth" >= ?'),
+])
+def test_translate_binary_comparison(operator_type, expected_sql):
+    result = translators.translate_filter(
+        _comparison(operator_type, "depth", "30"))
+    assert result == (expected_sql, ["30"])
+
+
+@pytest.mark.parametrize("paramstyle, expected", [
+    ("qmark", ('("a" = ? AND "b" = ?)', [1, 2])),
+    ("format", ('("a" = %s AND "b" = %s)', [1, 2])),
+    ("numeric", ('("a" = :1 AND "b" = :2)', [1, 2])),
+    ("named", ('("a" = :p1 AND "b" = :p2)', {"p1": 1, "p2": 2})),
+])
+def test_translate_paramstyle(paramstyle, expected):
+    operator = operators.BinaryLogicOperator(
+        operator_type=operators.BinaryLogicType.AND,
+        first_expression=_comparison("PropertyIsEqualTo", "a", 1),
+        second_expression=_comparison("PropertyIsEqualTo", "b", 2),
+    )
+    result = translators.translate_filter(operator, paramstyle=paramstyle)
+    assert result == expected
+
+
+def test_translate_quotes_identifiers():
+    sql, params = translators.translate_filter(
+        _comparison("PropertyIsEqualTo", 'bad" OR 1=1 --', "1"))
+    assert sql == '"bad"" OR 1=1 --" = ?'
+
+
+def test_translate_column_map():
+    sql, params = translators.translate_filter(
+        _comparison("PropertyIsEqualTo", "name", "1"),
+        column_map={"name": "t.name"}
+    )
+    assert sql == "t.name = ?"
+
+
+@pytest.mark.parametrize("pattern, expected", [
+    ("abc*", "abc%"),
+    ("a.c", "a_c"),
+    ("a!*c", "a*c"),
+    ("50%", "50\\%"),
+    ("a_b*", "a\\_b%"),
+    ("a!.b", "a.b"),
+])
+def test_like_pattern_to_sql(pattern, expected):
+    result = translators.like_pattern_to_sql(
+        pattern, wild_card="*", single_char=".", escape_char="!")
+    assert result == expected
+
+
+@pytest.mark.parametrize("operator, expected", [
+    (_comparison("PropertyIsLessThan", "depth", "30"), ["f.1"]),
+    (_comparison("PropertyIsGreaterThanOrEqualTo", "depth", 30),
+     ["f.2", "f.3"]),
+    (_comparison("PropertyIsEqualTo", "name", "second", match_case=False),
+     ["f.2"]),
+    (
+        operators.LikeOperator(
+            first_expression=expressions.ValueReference("name"),
+            second_expression=expressions.Literal("*d.one"),
+            wild_card="*", single_char=".", escape_char="!"
+        ),
+        ["f.3"]
+    ),
+    (
+        operators.LikeOperator(
+            first_expression=expressions.ValueReference("name"),
+            second_expression=expressions.Literal("*%"),
+            wild_card="*", single_char=".", escape_char="!"
+        ),
+        ["f.4"]
+    ),
+    (
+        operators.BetweenComparisonOperator(
+            expression=expressions.ValueReference("depth"),
+            lower_boundary=expressions.Literal(20),
+            upper_boundary=expressions.Literal(50),
+        ),
+        ["f.2", "f.3"]
+    ),
+    (operators.NullOperator(expressions.ValueReference("depth")), ["f.4"]),
+    (
+        operators.BinaryLogicOperator(
+            operator_type=operators.BinaryLogicType.OR,
+            first_expression=_comparison("PropertyIsEqualTo", "depth", 10),
+            second_expression=operators.UnaryLogicOperator(
+                operator_type=operators.UnaryLogicType.NOT,
+                operand=_comparison("PropertyIsLessThan", "depth", 40),
+            ),
+        ),
+        ["f.1", "f.3", "f.4"]
+    ),
+    (
+        operators.UnaryLogicOperator(
+            operator_type=operators.UnaryLogicType.NOT,
+            operand=_comparison("PropertyIsEqualTo", "depth", 10),
+        ),
+        ["f.2", "f.3", "f.4"]
+    ),
+    ((operators.ResourceId("f.2"), operators.ResourceId("f.4")),
+     ["f.2", "f.4"]),
+])
+def test_translate_against_sqlite(connection, operator, expected):
+    assert _select_ids(connection, operator) == expected
+
+
+@pytest.mark.parametrize("operand", [
+    _comparison("PropertyIsLessThan", "depth", 40),
+    _comparison("PropertyIsNotEqualTo", "depth", 30),
+    operators.NullOperator(expressions.ValueReference("depth")),
+])
+def test_translate_not_matches_compiled_predicate(connection, operand):
+    from pyfes.fes20 import compilers
+    operator = operators.UnaryLogicOperator(
+        operator_type=operators.UnaryLogicType.NOT, operand=operand)
+    predicate = compilers.compile_filter(operator)
+    rows = connection.execute("SELECT id, depth, name FROM features")
+    expected = sorted(
+        id_ for id_, depth, name in rows if
+        predicate({"id": id_, "depth": depth, "name": name}))
+    assert _select_ids(connection, operator) == expected
+
+
+def test_translate_function(connection):
+    operator = operators.BinaryComparisonOperator(
+        operator_type="PropertyIsEqualTo",
+        first_expression=expressions.Function(
+            "upper", arguments=[expressions.ValueReference("name")]),
+        second_expression=expressions.Literal("FIRST"),
+    )
+    result = _select_ids(connection, operator, functions={"upper": "UPPER"})
+    assert result == ["f.1"]
+
+
+@pytest.mark.parametrize("functions", [
+    {},
+    {"upper": "UPPER(); DROP TABLE features; --"},
+])
+def test_translate_invalid_function(functions):
+    operator = operators.BinaryComparisonOperator(
+        operator_type="PropertyIsEqualTo",
+        first_expression=expressions.Function("upper"),
+        second_expression=expressions.Literal("FIRST"),
+    )
+    with pytest.raises(errors.InvalidExpressionError):
+        translators.translate_filter(operator, functions=functions)
+
+
+@pytest.mark.parametrize("operator_type, dialect, srid, expected", [
+    ("BBOX", "postgis", None,
+     ('"geom" && ST_GeomFromText(?)', ["POINT (1 2)"])),
+    ("BBOX", "spatialite", None,
+     ('MbrIntersects("geom", ST_GeomFromText(?))', ["POINT (1 2)"])),
+    ("Intersects", "postgis", 4326,
+     ('ST_Intersects("geom", ST_GeomFromText(?, ?))',
+      ["POINT (1 2)", 4326])),
+    ("Within", "spatialite", None,
+     ('ST_Within("geom", ST_GeomFromText(?))', ["POINT (1 2)"])),
+])
+def test_translate_binary_spatial_operator(operator_type, dialect, srid,
+                                           expected):
+    operator = operators.BinarySpatialOperator(
+        operator_type=operator_type,
+        first_operand=expressions.ValueReference("geom"),
+        second_operand="POINT (1 2)"
+    )
+    result = translators.translate_filter(
+        operator, dialect=dialect, srid=srid)
+    assert result == expected
+
+
+def test_translate_geometry_operand():
+    operator = operators.BinarySpatialOperator(
+        operator_type="Intersects",
+        first_operand=expressions.ValueReference("geom"),
+        second_operand=geometries.Geometry("Point", [1, 2])
+    )
+    result = translators.translate_filter(operator, dialect="postgis")
+    assert result == ('ST_Intersects("geom", ST_GeomFromText(?))',
+                      ["POINT (1 2)"])
+
+
+@pytest.mark.parametrize("operator_type, dialect, expected", [
+    ("DWithin", "postgis", 'ST_DWithin("geom", ST_GeomFromText(?), ?)'),
+    ("Beyond", "postgis", 'NOT ST_DWithin("geom", ST_GeomFromText(?), ?)'),
+    ("DWithin", "spatialite",
+     'ST_Distance("geom", ST_GeomFromText(?)) <= ?'),
+    ("Beyond", "spatialite", 'ST_Distance("geom", ST_GeomFromText(?)) > ?'),
+])
+def test_translate_distance_operator(operator_type, dialect, expected):
+    operator = operators.DistanceOperator(
+        operator_type=operator_type,
+        expression=expressions.ValueReference("geom"),
+        geometry="POINT (1 2)",
+        distance=10
+    )
+    result = translators.translate_filter(operator, dialect=dialect)
+    assert result == (expected, ["POINT (1 2)", 10.0])
+
+
+def test_translate_invalid_dialect():
+    with pytest.raises(ValueError):
+        translators.SqlTranslator(dialect="oracle")
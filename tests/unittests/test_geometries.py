@@ -0,0 +1,500 @@
+"""Unit tests for pyfes.geometries"""
+
+from array import array
+import pickle
+import struct
+
+from lxml import etree
+import pytest
+
+from pyfes import errors
+from pyfes import geometries
+
+pytestmark = pytest.mark.unit
+
+GML2 = "http://www.opengis.net/gml"
+GML32 = "http://www.opengis.net/gml/3.2"
+
+
+@pytest.mark.parametrize("wkt, expected", [
+    ("POINT (1 2)", (1, 2, 1, 2)),
+    ("POLYGON ((0 0, 10 0, 10 5, 0 0))", (0, 0, 10, 5)),
+    ("POINT Z (1 2 3)", (1, 2, 1, 2)),
+    ("LINESTRING ZM (1 2 3 4, -1 5 6 7)", (-1, 2, 1, 5)),
+    ("LINESTRING(1e2 -2, .5 3)", (0.5, -2, 100, 3)),
+    (
+        "GEOMETRYCOLLECTION (POINT (1 2), LINESTRING (3 4, 5 6))",
+        (1, 2, 5, 6)
+    ),
+    ("GEOMETRYCOLLECTION (POINT Z (1 2 3))", (1, 2, 1, 2)),
+    ("POINT EMPTY", None),
+])
+def test_parse_wkt_bounds(wkt, expected):
+    assert geometries.parse_wkt(wkt).bounds == expected
+
+
+@pytest.mark.parametrize("geometry, expected", [
+    (geometries.Geometry("Point", [1, 2]), "POINT (1 2)"),
+    (geometries.Geometry("Point", [1.5, 2, 3], dimensions=3),
+     "POINT Z (1.5 2 3)"),
+    (geometries.Geometry("Point"), "POINT EMPTY"),
+    (geometries.Geometry("LineString", [0, 0, 10, 5]),
+     "LINESTRING (0 0, 10 5)"),
+    (
+        geometries.Geometry(
+            "Polygon", [0, 0, 10, 0, 10, 10, 0, 0, 2, 1, 3, 1, 3, 2, 2, 1],
+            part_offsets=[0, 4, 8]
+        ),
+        "POLYGON ((0 0, 10 0, 10 10, 0 0), (2 1, 3 1, 3 2, 2 1))"
+    ),
+    (geometries.Geometry("MultiPoint", [1, 2, 3, 4]),
+     "MULTIPOINT ((1 2), (3 4))"),
+    (
+        geometries.Geometry("MultiLineString", [0, 0, 1, 1, 2, 2, 3, 3],
+                            part_offsets=[0, 2, 4]),
+        "MULTILINESTRING ((0 0, 1 1), (2 2, 3 3))"
+    ),
+    (
+        geometries.Geometry(
+            "MultiPolygon",
+            [0, 0, 1, 0, 1, 1, 0, 0, 5, 5, 6, 5, 6, 6, 5, 5],
+            part_offsets=[0, 4, 8]
+        ),
+        "MULTIPOLYGON (((0 0, 1 0, 1 1, 0 0)), ((5 5, 6 5, 6 6, 5 5)))"
+    ),
+    (
+        geometries.Geometry("GeometryCollection", members=[
+            geometries.Geometry("Point", [1, 2]),
+            geometries.Geometry("LineString", [3, 4, 5, 6]),
+        ]),
+        "GEOMETRYCOLLECTION (POINT (1 2), LINESTRING (3 4, 5 6))"
+    ),
+])
+def test_geometry_wkt(geometry, expected):
+    assert geometry.wkt == expected
+    assert geometries.parse_wkt(expected).bounds == geometry.bounds
+
+
+def test_geometry_wkb():
+    little = "<" if geometries.sys.byteorder == "little" else ">"
+    order = b"\x01" if little == "<" else b"\x00"
+    point = geometries.Geometry("Point", [1, 2])
+    assert point.wkb == order + struct.pack(little + "Idd", 1, 1, 2)
+    line = geometries.Geometry("LineString", [0, 0, 10, 5])
+    assert line.wkb == order + struct.pack(little + "II4d", 2, 2, 0, 0, 10, 5)
+    multipoint = geometries.Geometry("MultiPoint", [1, 2, 3, 4])
+    assert multipoint.wkb == (
+        order + struct.pack(little + "II", 4, 2) +
+        order + struct.pack(little + "Idd", 1, 1, 2) +
+        order + struct.pack(little + "Idd", 1, 3, 4)
+    )
+
+
+def test_geometry_exports_are_lazy():
+    geometry = geometries.Geometry("LineString", [0, 0, 10, 5])
+    assert geometry._wkt is None and geometry._wkb is None
+    assert geometry.wkt is geometry.wkt
+
+
+def test_geometry_keeps_coordinate_arrays():
+    coordinates = array("d", [0, 0, 10, 5])
+    geometry = geometries.Geometry("LineString", coordinates)
+    assert geometry.coordinates is coordinates
+    assert geometry.bounds == (0, 0, 10, 5)
+
+
+def test_geometry_equality_and_pickling():
+    geometry = geometries.Geometry("LineString", [0, 0, 10, 5], srs="a")
+    geometry.wkt
+    unpickled = pickle.loads(pickle.dumps(geometry))
+    assert unpickled == geometry
+    assert not unpickled != geometry
+    assert hash(unpickled) == hash(geometry)
+    assert unpickled._wkt is None
+    assert geometry != geometries.Geometry("LineString", [0, 0, 10, 5])
+
+
+def test_geometry_with_incomplete_coordinates():
+    with pytest.raises(ValueError):
+        geometries.Geometry("Point", [1, 2, 3])
+
+
+@pytest.mark.parametrize("gml, expected_type, expected_bounds", [
+    (
+        '<gml:Point xmlns:gml="{}" srsName="EPSG:3857">'
+        '<gml:pos>5 5</gml:pos></gml:Point>'.format(GML32),
+        geometries.GeometryType.POINT, (5, 5, 5, 5)
+    ),
+    (
+        '<gml:LineString xmlns:gml="{}" srsName="EPSG:3857">'
+        '<gml:posList>0 0 10 10</gml:posList></gml:LineString>'.format(GML32),
+        geometries.GeometryType.LINESTRING, (0, 0, 10, 10)
+    ),
+    (
+        '<gml:Box xmlns:gml="{}" srsName="EPSG:3857">'
+        '<gml:coordinates>1,1 3,3</gml:coordinates></gml:Box>'.format(GML2),
+        geometries.GeometryType.POLYGON, (1, 1, 3, 3)
+    ),
+])
+def test_parse_gml(gml, expected_type, expected_bounds):
+    result = geometries.parse_gml(etree.fromstring(gml))
+    assert isinstance(result, geometries.Geometry)
+    assert result.type_ == expected_type
+    assert result.srs == "EPSG:3857"
+    assert result.bounds == expected_bounds
+
+
+SQUARE_POS_LIST = "0 0 0 10 10 10 10 0 0 0"
+HOLE_POS_LIST = "2 2 2 4 4 4 4 2 2 2"
+
+
+def _gml(body, namespace=GML32):
+    return etree.fromstring(body.format(
+        ns='xmlns:gml="{}"'.format(namespace)))
+
+
+@pytest.mark.parametrize("gml, type_, part_offsets, polygon_offsets", [
+    (
+        '<gml:Point {ns}><gml:pos>5 5</gml:pos></gml:Point>',
+        "Point", (0, 1), (0,)
+    ),
+    (
+        '<gml:LineString {ns}><gml:pos>0 0</gml:pos><gml:pos>10 10</gml:pos>'
+        '</gml:LineString>',
+        "LineString", (0, 2), (0,)
+    ),
+    (
+        '<gml:Curve {ns}><gml:segments>'
+        '<gml:LineStringSegment><gml:posList>0 0 5 5</gml:posList>'
+        '</gml:LineStringSegment>'
+        '<gml:LineStringSegment><gml:posList>5 5 10 10</gml:posList>'
+        '</gml:LineStringSegment>'
+        '</gml:segments></gml:Curve>',
+        "LineString", (0, 3), (0,)
+    ),
+    (
+        '<gml:Polygon {ns}><gml:exterior><gml:LinearRing>'
+        '<gml:posList>' + SQUARE_POS_LIST + '</gml:posList>'
+        '</gml:LinearRing></gml:exterior><gml:interior><gml:LinearRing>'
+        '<gml:posList>' + HOLE_POS_LIST + '</gml:posList>'
+        '</gml:LinearRing></gml:interior></gml:Polygon>',
+        "Polygon", (0, 5, 10), (0, 2)
+    ),
+    (
+        '<gml:Surface {ns}><gml:patches><gml:PolygonPatch><gml:exterior>'
+        '<gml:LinearRing><gml:posList>' + SQUARE_POS_LIST + '</gml:posList>'
+        '</gml:LinearRing></gml:exterior></gml:PolygonPatch></gml:patches>'
+        '</gml:Surface>',
+        "Polygon", (0, 5), (0, 1)
+    ),
+    (
+        '<gml:Envelope {ns}><gml:lowerCorner>0 0</gml:lowerCorner>'
+        '<gml:upperCorner>10 10</gml:upperCorner></gml:Envelope>',
+        "Polygon", (0, 5), (0, 1)
+    ),
+    (
+        '<gml:MultiPoint {ns}>'
+        '<gml:pointMember><gml:Point><gml:pos>0 0</gml:pos></gml:Point>'
+        '</gml:pointMember>'
+        '<gml:pointMembers><gml:Point><gml:pos>10 10</gml:pos></gml:Point>'
+        '<gml:Point><gml:pos>5 5</gml:pos></gml:Point></gml:pointMembers>'
+        '</gml:MultiPoint>',
+        "MultiPoint", (0, 1, 2, 3), (0,)
+    ),
+    (
+        '<gml:MultiCurve {ns}>'
+        '<gml:curveMember><gml:LineString><gml:posList>0 0 5 5</gml:posList>'
+        '</gml:LineString></gml:curveMember>'
+        '<gml:curveMember><gml:LineString>'
+        '<gml:posList>6 6 8 8 10 10</gml:posList>'
+        '</gml:LineString></gml:curveMember>'
+        '</gml:MultiCurve>',
+        "MultiLineString", (0, 2, 5), (0,)
+    ),
+    (
+        '<gml:MultiSurface {ns}>'
+        '<gml:surfaceMember><gml:Polygon><gml:exterior><gml:LinearRing>'
+        '<gml:posList>' + SQUARE_POS_LIST + '</gml:posList>'
+        '</gml:LinearRing></gml:exterior><gml:interior><gml:LinearRing>'
+        '<gml:posList>' + HOLE_POS_LIST + '</gml:posList>'
+        '</gml:LinearRing></gml:interior></gml:Polygon></gml:surfaceMember>'
+        '<gml:surfaceMember><gml:Polygon><gml:exterior><gml:LinearRing>'
+        '<gml:posList>' + HOLE_POS_LIST + '</gml:posList>'
+        '</gml:LinearRing></gml:exterior></gml:Polygon></gml:surfaceMember>'
+        '</gml:MultiSurface>',
+        "MultiPolygon", (0, 5, 10, 15), (0, 2, 3)
+    ),
+])
+def test_parse_gml32_geometries(gml, type_, part_offsets, polygon_offsets):
+    result = geometries.parse_gml(_gml(gml))
+    assert result.type_ == geometries.GeometryType(type_)
+    assert result.part_offsets == part_offsets
+    assert result.polygon_offsets == polygon_offsets
+    assert result.dimensions == 2
+    assert result.srs == "EPSG:4326"
+    assert result.bounds[0] == result.bounds[1]
+    assert result.bounds[2] == result.bounds[3]
+
+
+@pytest.mark.parametrize("gml, type_, part_offsets, polygon_offsets", [
+    (
+        '<gml:Point {ns}><gml:coordinates>5,5</gml:coordinates></gml:Point>',
+        "Point", (0, 1), (0,)
+    ),
+    (
+        '<gml:Point {ns}><gml:coord><gml:X>5</gml:X><gml:Y>5</gml:Y>'
+        '</gml:coord></gml:Point>',
+        "Point", (0, 1), (0,)
+    ),
+    (
+        '<gml:LineString {ns}>'
+        '<gml:coordinates decimal="," cs=";" ts="|">0;0|10,5;10,5'
+        '</gml:coordinates></gml:LineString>',
+        "LineString", (0, 2), (0,)
+    ),
+    (
+        '<gml:Polygon {ns}><gml:outerBoundaryIs><gml:LinearRing>'
+        '<gml:coordinates>0,0 0,10 10,10 10,0 0,0</gml:coordinates>'
+        '</gml:LinearRing></gml:outerBoundaryIs>'
+        '<gml:innerBoundaryIs><gml:LinearRing>'
+        '<gml:coordinates>2,2 2,4 4,4 4,2 2,2</gml:coordinates>'
+        '</gml:LinearRing></gml:innerBoundaryIs></gml:Polygon>',
+        "Polygon", (0, 5, 10), (0, 2)
+    ),
+    (
+        '<gml:Box {ns}><gml:coord><gml:X>0</gml:X><gml:Y>0</gml:Y></gml:coord>'
+        '<gml:coord><gml:X>10</gml:X><gml:Y>10</gml:Y></gml:coord></gml:Box>',
+        "Polygon", (0, 5), (0, 1)
+    ),
+    (
+        '<gml:MultiLineString {ns}><gml:lineStringMember><gml:LineString>'
+        '<gml:coordinates>0,0 10,10</gml:coordinates></gml:LineString>'
+        '</gml:lineStringMember></gml:MultiLineString>',
+        "MultiLineString", (0, 2), (0,)
+    ),
+    (
+        '<gml:MultiPolygon {ns}><gml:polygonMember><gml:Polygon>'
+        '<gml:outerBoundaryIs><gml:LinearRing>'
+        '<gml:coordinates>0,0 0,10 10,10 10,0 0,0</gml:coordinates>'
+        '</gml:LinearRing></gml:outerBoundaryIs></gml:Polygon>'
+        '</gml:polygonMember></gml:MultiPolygon>',
+        "MultiPolygon", (0, 5), (0, 1)
+    ),
+])
+def test_parse_gml2_geometries(gml, type_, part_offsets, polygon_offsets):
+    result = geometries.parse_gml(_gml(gml, namespace=GML2))
+    assert result.type_ == geometries.GeometryType(type_)
+    assert result.part_offsets == part_offsets
+    assert result.polygon_offsets == polygon_offsets
+    assert result.dimensions == 2
+
+
+def test_parse_gml_multigeometry_inherits_srs():
+    result = geometries.parse_gml(_gml(
+        '<gml:MultiGeometry {ns} srsName="EPSG:3857">'
+        '<gml:geometryMember><gml:Point><gml:pos>5 5</gml:pos></gml:Point>'
+        '</gml:geometryMember>'
+        '<gml:geometryMember><gml:LineString>'
+        '<gml:posList>0 0 10 10</gml:posList></gml:LineString>'
+        '</gml:geometryMember></gml:MultiGeometry>'
+    ))
+    assert result.type_ == geometries.GeometryType.GEOMETRYCOLLECTION
+    assert [member.srs for member in result.members] == ["EPSG:3857"] * 2
+    assert result.bounds == (0, 0, 10, 10)
+
+
+def test_parse_gml_srs_dimension():
+    result = geometries.parse_gml(_gml(
+        '<gml:Polygon {ns} srsDimension="3"><gml:exterior><gml:LinearRing>'
+        '<gml:posList>0 0 1 0 10 1 10 10 1 0 0 1</gml:posList>'
+        '</gml:LinearRing></gml:exterior></gml:Polygon>'
+    ))
+    assert result.dimensions == 3
+    assert result.part_offsets == (0, 4)
+
+
+@pytest.mark.parametrize("gml", [
+    '<gml:Circle {ns}><gml:pos>0 0</gml:pos></gml:Circle>',
+    '<gml:Point {ns}/>',
+    '<gml:Point {ns}><gml:pos>1 a</gml:pos></gml:Point>',
+    '<gml:Polygon {ns}/>',
+    '<gml:MultiPoint {ns}><gml:pointMember><gml:LineString>'
+    '<gml:posList>0 0 1 1</gml:posList></gml:LineString></gml:pointMember>'
+    '</gml:MultiPoint>',
+])
+def test_parse_invalid_gml(gml):
+    with pytest.raises(RuntimeError):
+        geometries.parse_gml(_gml(gml))
+
+
+@pytest.mark.parametrize("srs_name, expected_wkt", [
+    (None, "LINESTRING (2 1, 4 3, 6 5)"),
+    ("urn:ogc:def:crs:EPSG::4326", "LINESTRING (2 1, 4 3, 6 5)"),
+    ("EPSG:4326", "LINESTRING (1 2, 3 4, 5 6)"),
+    ("http://www.opengis.net/def/crs/OGC/1.3/CRS84",
+     "LINESTRING (1 2, 3 4, 5 6)"),
+    ("EPSG:3857", "LINESTRING (1 2, 3 4, 5 6)"),
+])
+def test_parse_gml_axis_order(srs_name, expected_wkt):
+    attribute = "" if srs_name is None else ' srsName="{}"'.format(srs_name)
+    result = geometries.parse_gml(_gml(
+        '<gml:LineString {ns}' + attribute + '>'
+        '<gml:posList>1 2 3 4 5 6</gml:posList></gml:LineString>'
+    ))
+    assert result.wkt == expected_wkt
+
+
+def test_parse_gml_axis_order_keeps_z():
+    result = geometries.parse_gml(_gml(
+        '<gml:LineString {ns} srsName="urn:ogc:def:crs:EPSG::4326" '
+        'srsDimension="3"><gml:posList>1 2 3 4 5 6</gml:posList>'
+        '</gml:LineString>'
+    ))
+    assert result.wkt == "LINESTRING Z (2 1 3, 5 4 6)"
+    assert result.srs == "EPSG:4326"
+
+
+def test_parse_gml_envelope_axis_order():
+    result = geometries.parse_gml(_gml(
+        '<gml:Envelope {ns} srsName="urn:ogc:def:crs:EPSG::4326">'
+        '<gml:lowerCorner>40 -10</gml:lowerCorner>'
+        '<gml:upperCorner>45 -5</gml:upperCorner></gml:Envelope>'
+    ))
+    assert result.bounds == (-10, 40, -5, 45)
+
+
+def test_reproject_to_same_srs_returns_input():
+    geometry = geometries.Geometry("Point", [1, 2], srs="EPSG:4326")
+    assert geometries.reproject(geometry, "urn:ogc:def:crs:EPSG::4326") is (
+        geometry)
+
+
+def test_reproject():
+    pytest.importorskip("pyproj")
+    geometry = geometries.Geometry(
+        "MultiPoint", [0, 0, 180, 0, 0, 85], srs="EPSG:4326")
+    result = geometries.reproject(geometry, "EPSG:3857")
+    assert result.srs == "EPSG:3857"
+    assert result.type_ == geometry.type_
+    assert result.part_offsets == geometry.part_offsets
+    assert result.coordinates[0:2] == array("d", [0, 0])
+    assert result.coordinates[2] == pytest.approx(20037508.34, abs=0.01)
+    assert result.coordinates[3] == pytest.approx(0, abs=1e-6)
+    assert result.coordinates[5] == pytest.approx(19971868.88, abs=0.01)
+
+
+def test_reproject_geometry_collection():
+    pytest.importorskip("pyproj")
+    geometry = geometries.Geometry(
+        "GeometryCollection",
+        srs="EPSG:3857",
+        members=[geometries.Geometry("Point", [0, 0], srs="EPSG:3857")]
+    )
+    result = geometries.reproject(geometry, "EPSG:4326")
+    assert result.srs == "EPSG:4326"
+    assert [member.srs for member in result.members] == ["EPSG:4326"]
+    assert result.bounds == pytest.approx((0, 0, 0, 0))
+
+
+@pytest.mark.parametrize("wkt, expected_wkt, part_offsets, polygon_offsets", [
+    ("POINT (1 2)", "POINT (1 2)", (0, 1), (0,)),
+    ("point z (1 2 3)", "POINT Z (1 2 3)", (0, 1), (0,)),
+    ("POINT (1 2 3)", "POINT Z (1 2 3)", (0, 1), (0,)),
+    ("LINESTRING M (1 2 3, 4 5 6)", "LINESTRING (1 2, 4 5)", (0, 2), (0,)),
+    ("MULTIPOINT (1 2, (3 4))", "MULTIPOINT ((1 2), (3 4))", (0, 1, 2),
+     (0,)),
+    (
+        "POLYGON ((0 0, 10 0, 10 10, 0 0), (1 1, 2 1, 2 2, 1 1))",
+        "POLYGON ((0 0, 10 0, 10 10, 0 0), (1 1, 2 1, 2 2, 1 1))",
+        (0, 4, 8), (0, 2)
+    ),
+    (
+        "MULTIPOLYGON (((0 0, 1 0, 1 1, 0 0)), EMPTY, "
+        "((5 5, 6 5, 6 6, 5 5)))",
+        "MULTIPOLYGON (((0 0, 1 0, 1 1, 0 0)), ((5 5, 6 5, 6 6, 5 5)))",
+        (0, 4, 8), (0, 1, 2)
+    ),
+    ("LINESTRING EMPTY", "LINESTRING EMPTY", (0,), (0,)),
+])
+def test_parse_wkt(wkt, expected_wkt, part_offsets, polygon_offsets):
+    result = geometries.parse_wkt(wkt, srs="EPSG:4326")
+    assert result.wkt == expected_wkt
+    assert result.part_offsets == part_offsets
+    assert result.polygon_offsets == polygon_offsets
+    assert result.srs == "EPSG:4326"
+
+
+def test_parse_wkt_geometry_collection():
+    result = geometries.parse_wkt(
+        "GEOMETRYCOLLECTION (POINT (1 2), LINESTRING (0 0, 1e2 1))")
+    assert [member.type_ for member in result.members] == [
+        geometries.GeometryType.POINT, geometries.GeometryType.LINESTRING]
+    assert result.bounds == (0, 0, 100, 2)
+
+
+@pytest.mark.parametrize("wkt", [
+    "POINT (1)",
+    "POINT (1 2",
+    "POINT (1 2) POINT (3 4)",
+    "CIRCLE (1 2)",
+    "LINESTRING (1 2, 3 4 5)",
+    "LINESTRING (1 2; 3 4)",
+])
+def test_parse_invalid_wkt(wkt):
+    with pytest.raises(errors.ValidationError):
+        geometries.parse_wkt(wkt)
+
+
+def test_geometry_iter_members():
+    geometry = geometries.parse_wkt(
+        "MULTILINESTRING ((0 0, 1 1), (2 2, 3 3, 4 4))", srs="EPSG:3857")
+    members = list(geometry.iter_members())
+    assert [member.wkt for member in members] == [
+        "LINESTRING (0 0, 1 1)", "LINESTRING (2 2, 3 3, 4 4)"]
+    assert all(member.srs == "EPSG:3857" for member in members)
+
+
+@pytest.mark.parametrize("wkt", [
+    "POINT (1 2)",
+    "POINT Z (1 2 3)",
+    "LINESTRING (1 2, 3 4)",
+    "POLYGON ((0 0, 10 0, 10 10, 0 0), (1 1, 2 1, 2 2, 1 1))",
+    "MULTIPOINT ((1 2), (3 4))",
+    "MULTILINESTRING ((1 2, 3 4), (5 6, 7 8))",
+    "MULTIPOLYGON (((0 0, 1 0, 1 1, 0 0)), ((5 5, 6 5, 6 6, 5 5), "
+    "(5.5 5.5, 5.6 5.5, 5.6 5.6, 5.5 5.5)))",
+    "GEOMETRYCOLLECTION (POINT (1 2), LINESTRING (1 2, 3 4))",
+])
+def test_geojson_round_trip(wkt):
+    geometry = geometries.parse_wkt(wkt, srs="EPSG:4326")
+    document = geometries.as_geojson(geometry)
+    assert document["type"] == geometry.type_.value
+    assert geometries.parse_geojson(document, srs="EPSG:4326") == geometry
+
+
+def test_as_geojson():
+    geometry = geometries.parse_wkt("POLYGON ((0 0, 10 0, 10 10, 0 0))")
+    assert geometries.as_geojson(geometry) == {
+        "type": "Polygon",
+        "coordinates": [[[0, 0], [10, 0], [10, 10], [0, 0]]],
+    }
+
+
+@pytest.mark.parametrize("document", [
+    {"type": "Circle", "coordinates": [1, 2]},
+    {"coordinates": [1, 2]},
+    {"type": "Point", "coordinates": [1]},
+    {"type": "Point", "coordinates": ["a", "b"]},
+    {"type": "LineString", "coordinates": [[1, 2], [3, 4, 5]]},
+    {"type": "Polygon", "coordinates": [1, 2]},
+    {"type": "GeometryCollection"},
+])
+def test_parse_invalid_geojson(document):
+    with pytest.raises(errors.ValidationError):
+        geometries.parse_geojson(document)
+
+
+def test_make_box():
+    box = geometries.make_box(0, 1, 2, 3, srs="EPSG:4326")
+    assert box.bounds == (0, 1, 2, 3)
+    assert box.wkt == "POLYGON ((0 1, 2 1, 2 3, 0 3, 0 1))"
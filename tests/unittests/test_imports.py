@@ -0,0 +1,110 @@
+"""Unit tests for the import time of pyfes"""
+
+import subprocess
+import sys
+
+import pytest
+
+import pyfes
+
+pytestmark = [
+    pytest.mark.unit,
+    pytest.mark.skipif(sys.version_info < (3, 7),
+                       reason="requires -X importtime"),
+]
+
+IMPORT_TIME_BUDGET = 0.15
+"""Seconds that importing pyfes.parsers may take, besides lxml itself"""
+
+SLOW_MODULES = (
+    "pkg_resources",
+    "pyproj",
+    "numpy",
+    "pyfes.fes20.cqlparsers",
+    "pyfes.fes20.cql2json",
+    "pyfes.fes20.evaluators",
+)
+
+
+def run_python(code):
+    return subprocess.check_output(
+        [sys.executable, "-X", "importtime", "-c", code],
+        stderr=subprocess.STDOUT, universal_newlines=True
+    )
+
+
+def get_cumulative_import_times(output):
+    """Parse the output of ``-X importtime`` into seconds per module.
+
+    Returns
+    -------
+    dict
+        Maps module names to tuples with the nesting level of the import
+        and its cumulative time
+
+    """
+
+    result = {}
+    for line in output.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            self_time, cumulative, name = line[12:].split("|")
+            if cumulative.strip().isdigit():
+                level = (len(name) - len(name.lstrip()) - 1) // 2
+                result[name.strip()] = (level, int(cumulative) / 1e6)
+    return result
+
+
+def test_import_does_not_load_slow_modules():
+    output = run_python(
+        "import sys, pyfes.parsers; "
+        "print(sorted(name for name in {!r} if name in sys.modules))".format(
+            SLOW_MODULES)
+    )
+    assert output.splitlines()[-1] == "[]"
+
+
+def get_import_time():
+    """Return the time spent importing pyfes.parsers, besides lxml"""
+    times = get_cumulative_import_times(run_python("import pyfes.parsers"))
+    total = sum(cumulative for name, (level, cumulative) in times.items()
+                if level == 0 and name.startswith("pyfes"))
+    return total - times.get("lxml.etree", (0, 0))[1]
+
+
+def test_import_time_stays_within_budget():
+    # the best of a few runs is less sensitive to a busy machine
+    assert min(get_import_time() for _ in range(3)) < IMPORT_TIME_BUDGET
+
+
+@pytest.mark.parametrize("name", [
+    "__version__",
+    "parsers",
+    "fes20",
+])
+def test_package_attributes_are_loaded_lazily(name):
+    assert getattr(pyfes, name) is not None
+
+
+def test_unknown_package_attribute():
+    with pytest.raises(AttributeError):
+        pyfes.something_else
+
+
+def test_schema_parser_is_created_lazily():
+    output = run_python(
+        "import pyfes.fes20.schemaparsers as m; "
+        "print('schema_parser' in vars(m)); "
+        "parser = m.schema_parser; "
+        "print('schema_parser' in vars(m), m.schema_parser is parser)"
+    )
+    assert output.splitlines()[-2:] == ["False", "True True"]
+
+
+def test_package_version_is_set_without_getattr():
+    output = run_python(
+        "import sys; version_info = sys.version_info; "
+        "sys.version_info = (3, 6); import pyfes; "
+        "sys.version_info = version_info; "
+        "print('__version__' in vars(pyfes), 'pyfes.fes20' in sys.modules)"
+    )
+    assert output.splitlines()[-1] == "True False"
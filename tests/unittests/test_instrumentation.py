@@ -0,0 +1,187 @@
+"""Unit tests for pyfes.instrumentation"""
+
+from lxml import etree
+import mock
+import pytest
+
+from pyfes import caches
+from pyfes import geometries
+from pyfes import instrumentation
+from pyfes import parsers
+from pyfes.fes20 import filterparsers
+
+pytestmark = pytest.mark.unit
+
+FILTER = (
+    '<fes:Filter xmlns:fes="http://www.opengis.net/fes/2.0">'
+    "<fes:PropertyIsLessThan>"
+    "<fes:ValueReference>DEPTH</fes:ValueReference>"
+    "<fes:Literal>30</fes:Literal>"
+    "</fes:PropertyIsLessThan>"
+    "</fes:Filter>"
+)
+
+MULTI_POINT = (
+    '<gml:MultiPoint xmlns:gml="http://www.opengis.net/gml/3.2">'
+    "<gml:pointMember><gml:Point><gml:pos>0 0</gml:pos></gml:Point>"
+    "</gml:pointMember>"
+    "<gml:pointMember><gml:Point><gml:pos>5 5</gml:pos></gml:Point>"
+    "</gml:pointMember>"
+    "</gml:MultiPoint>"
+)
+
+
+@pytest.fixture
+def registry():
+    result = instrumentation.MetricsRegistry()
+    instrumentation.add_hook(result)
+    yield result
+    instrumentation.remove_hook(result)
+
+
+def test_disabled_instrumentation_does_nothing():
+    assert not instrumentation.is_enabled()
+    assert instrumentation.timer("a") is instrumentation.timer("b")
+    with instrumentation.timer("a"):
+        instrumentation.increment("a")
+
+
+def test_hooks_are_added_once_and_removed():
+    hook = mock.MagicMock()
+    instrumentation.add_hook(hook)
+    instrumentation.add_hook(hook)
+    try:
+        assert instrumentation.is_enabled()
+        instrumentation.increment("items", 2)
+        instrumentation.observe("stage", 0.5)
+    finally:
+        instrumentation.remove_hook(hook)
+    instrumentation.increment("items")
+    assert not instrumentation.is_enabled()
+    hook.increment.assert_called_once_with("items", 2)
+    hook.observe.assert_called_once_with("stage", 0.5)
+
+
+def test_registry_aggregates_metrics():
+    registry = instrumentation.MetricsRegistry()
+    registry.increment("items")
+    registry.increment("items", 4)
+    registry.observe("stage", 1.0)
+    registry.observe("stage", 3.0)
+    assert registry.get_counter("items") == 5
+    assert registry.get_counter("other") == 0
+    assert registry.get_timer("stage") == instrumentation.TimerStats(
+        count=2, total=4.0, minimum=1.0, maximum=3.0)
+    assert registry.get_timer("other").count == 0
+    assert registry.snapshot() == {
+        "counters": {"items": 5},
+        "timers": {"stage": (2, 4.0, 1.0, 3.0)},
+    }
+    registry.reset()
+    assert registry.snapshot() == {"counters": {}, "timers": {}}
+
+
+@pytest.mark.parametrize("hits, misses, expected", [
+    (0, 0, None),
+    (3, 1, 0.75),
+    (0, 2, 0.0),
+])
+def test_registry_cache_hit_rate(hits, misses, expected):
+    registry = instrumentation.MetricsRegistry()
+    if hits > 0:
+        registry.increment("cache.hits", hits)
+    if misses > 0:
+        registry.increment("cache.misses", misses)
+    assert registry.get_cache_hit_rate() == expected
+
+
+def test_registry_to_prometheus():
+    registry = instrumentation.MetricsRegistry()
+    registry.increment("cache.hits", 3)
+    registry.observe("fes.tokenize", 0.25)
+    registry.observe("fes.tokenize", 0.5)
+    assert registry.to_prometheus(prefix="app-pyfes") == (
+        "# TYPE app_pyfes_cache_hits_total counter\n"
+        "app_pyfes_cache_hits_total 3\n"
+        "# TYPE app_pyfes_fes_tokenize_seconds summary\n"
+        "app_pyfes_fes_tokenize_seconds_count 2\n"
+        "app_pyfes_fes_tokenize_seconds_sum 0.75\n"
+    )
+
+
+def test_statsd_hook():
+    lines = []
+    hook = instrumentation.StatsdHook(lines.append, prefix="app")
+    hook.increment("cache.hits")
+    hook.observe("fes.build", 0.0125)
+    assert lines == ["app.cache.hits:1|c", "app.fes.build:12.500|ms"]
+
+
+def test_timer_reports_failed_stages(registry):
+    with pytest.raises(ValueError):
+        with instrumentation.timer("stage"):
+            raise ValueError()
+    assert registry.get_timer("stage").count == 1
+
+
+def test_parse_filter_reports_stages(registry):
+    parsers.parse_filter(FILTER)
+    for name in ("parse.xml", "fes.tokenize", "fes.build"):
+        assert registry.get_timer(name).count == 1
+    assert registry.get_counter("fes.elements") == 4
+    assert registry.get_counter("parse.failures") == 0
+
+
+def test_parse_filter_stream_reports_elements(registry):
+    parsers.parse_filter_stream(FILTER)
+    assert registry.get_timer("fes.stream").count == 1
+    assert registry.get_counter("fes.elements") == 4
+
+
+def test_parse_filter_reports_failures(registry):
+    with pytest.raises(RuntimeError):
+        parsers.parse_filter("<fes:Filter")
+    assert registry.get_counter("parse.failures") == 1
+
+
+def test_parse_filter_reports_fallbacks(registry):
+
+    class OtherParser(filterparsers.FesFilterParser):
+        NAMESPACE = "http://example.com/filter"
+
+    classes = [OtherParser, filterparsers.FesFilterParser]
+    with mock.patch.object(parsers, "FILTER_PARSER_CLASSES", classes):
+        assert parsers.get_filter_parser_class(FILTER) is (
+            filterparsers.FesFilterParser)
+        assert registry.get_counter("parse.fallbacks") == 0
+        assert parsers.get_filter_parser_class("<Filter/>") is OtherParser
+    assert registry.get_counter("parse.fallbacks") == 1
+
+
+def test_cache_reports_lookups_and_evictions(registry):
+    cache = caches.FilterCache(maxsize=1)
+    parsers.parse_filter(FILTER, cache=cache)
+    parsers.parse_filter(FILTER, cache=cache)
+    parsers.parse_filter(FILTER.replace("30", "40"), cache=cache)
+    assert registry.get_counter("cache.hits") == 1
+    assert registry.get_counter("cache.misses") == 2
+    assert registry.get_counter("cache.evictions") == 1
+    assert registry.get_cache_hit_rate() == pytest.approx(1 / 3.0)
+
+
+def test_parse_gml_counts_positions_once(registry):
+    geometries.parse_gml(etree.fromstring(MULTI_POINT))
+    assert registry.get_timer("gml.parse").count == 1
+    assert registry.get_counter("gml.positions") == 2
+
+
+def test_compile_and_evaluate_report_stages(registry):
+    from pyfes.fes20 import compilers
+    operator = parsers.parse_filter(FILTER)
+    compilers.compile_filter(operator)
+    assert registry.get_timer("compile").count == 1
+    np = pytest.importorskip("numpy")
+    from pyfes.fes20 import evaluators
+    evaluators.evaluate_batch(operator, {"DEPTH": np.array([10, 50, 20])})
+    assert registry.get_timer("evaluate.batch").count == 1
+    assert registry.get_counter("evaluate.rows") == 3
@@ -0,0 +1,49 @@
+"""Unit tests for pyfes.intervals"""
+
+import random
+
+import pytest
+
+from pyfes import intervals
+
+pytestmark = pytest.mark.unit
+
+
+def _brute_force(entries, side, lower, upper):
+    return sorted(item for interval, item in entries if
+                  (lower is None or interval[side] >= lower) and
+                  (upper is None or interval[side] <= upper))
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 10, 500])
+@pytest.mark.parametrize("lower, upper", [
+    (None, None),
+    (20, 60),
+    (None, 30),
+    (70, None),
+    (50, 50),
+    (60, 20),
+])
+def test_query_matches_brute_force(size, lower, upper):
+    generator = random.Random(size)
+    entries = []
+    for item in range(size):
+        begin = generator.randrange(0, 100)
+        entries.append(((begin, begin + generator.randrange(0, 10)), item))
+    index = intervals.EndpointIndex(entries)
+    assert len(index) == size
+    expected_begins = _brute_force(entries, 0, lower, upper)
+    expected_ends = _brute_force(entries, 1, lower, upper)
+    assert sorted(index.query_begins(lower, upper)) == expected_begins
+    assert sorted(index.query_ends(lower, upper)) == expected_ends
+    assert index.count_begins(lower, upper) == len(expected_begins)
+    assert index.count_ends(lower, upper) == len(expected_ends)
+
+
+def test_query_extreme_bounds():
+    index = intervals.EndpointIndex([
+        ((-2 ** 63, 0), "open begin"),
+        ((0, 2 ** 63 - 1), "open end"),
+    ])
+    assert index.query_begins(upper=-1) == ["open begin"]
+    assert index.query_ends(lower=1) == ["open end"]
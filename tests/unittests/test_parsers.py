@@ -0,0 +1,116 @@
+"""Unit tests for pyfes.parsers"""
+
+import pickle
+
+import mock
+import pytest
+
+from pyfes import parsers
+from pyfes.fes20 import filterparsers
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.mark.parametrize("data, expected", [
+    ("<fes:Filter/>", "xml"),
+    ("  \n <?xml version='1.0'?><fes:Filter/>", "xml"),
+    (u"﻿<fes:Filter/>", "xml"),
+    (b"\xef\xbb\xbf <fes:Filter/>", "xml"),
+    (b"<fes:Filter/>", "xml"),
+    ("DEPTH < 30", "text"),
+    (b"DEPTH < 30", "text"),
+    ("", "text"),
+    (' {"op": "<"}', "json"),
+    (b'\xef\xbb\xbf{"op": "<"}', "json"),
+    ({"op": "<"}, "json"),
+])
+def test_sniff_filter_format(data, expected):
+    assert parsers.sniff_filter_format(data) == expected
+
+
+@pytest.mark.parametrize("data, expected", [
+    ('<fes:Filter xmlns:fes="http://www.opengis.net/fes/2.0"/>',
+     filterparsers.FesFilterParser),
+    ("DEPTH < 30", filterparsers.OgcCqlParser),
+    ('{"op": "<"}', filterparsers.Cql2JsonFilterParser),
+])
+def test_get_filter_parser_class(data, expected):
+    assert parsers.get_filter_parser_class(data) is expected
+
+
+def test_get_filter_parser_class_prefers_matching_namespace():
+
+    class OtherXmlParser(filterparsers.BaseFilterParser):
+        FORMAT = "xml"
+        NAMESPACE = "http://www.opengis.net/ogc"
+
+    classes = [filterparsers.FesFilterParser, OtherXmlParser]
+    with mock.patch.object(parsers, "FILTER_PARSER_CLASSES", classes):
+        result = parsers.get_filter_parser_class(
+            b'<ogc:Filter xmlns:ogc="http://www.opengis.net/ogc"/>')
+    assert result is OtherXmlParser
+
+
+def test_get_filter_parser_is_pooled():
+    first = parsers.get_filter_parser(filterparsers.FesFilterParser)
+    second = parsers.get_filter_parser(filterparsers.FesFilterParser)
+    assert first is second
+
+
+def test_parse_filter_uses_only_the_sniffed_parser():
+    with mock.patch.object(filterparsers.OgcCqlParser,
+                           "parse_filter") as mock_parse, \
+            mock.patch.object(parsers.logger, "exception") as mock_exception:
+        with pytest.raises(RuntimeError):
+            parsers.parse_filter("<fes:Filter>")
+    mock_parse.assert_not_called()
+    mock_exception.assert_not_called()
+
+
+def _comparison_filter(value):
+    return (
+        '<fes:Filter xmlns:fes="http://www.opengis.net/fes/2.0">'
+        '<fes:PropertyIsLessThan>'
+        '<fes:ValueReference>DEPTH</fes:ValueReference>'
+        '<fes:Literal>{}</fes:Literal>'
+        '</fes:PropertyIsLessThan>'
+        '</fes:Filter>'.format(value)
+    )
+
+
+@pytest.mark.parametrize("workers, use_processes", [
+    (1, False),
+    (3, False),
+    (2, True),
+])
+def test_parse_filters(workers, use_processes):
+    data_items = [_comparison_filter(index) for index in range(20)]
+    data_items[7] = "<fes:Filter>"
+    results = parsers.parse_filters(
+        data_items, workers=workers, use_processes=use_processes)
+    assert len(results) == 20
+    for index, (result, error) in enumerate(results):
+        if index == 7:
+            assert result is None
+            assert isinstance(error, RuntimeError)
+        else:
+            assert error is None
+            assert result.second_expression.value == str(index)
+
+
+@pytest.mark.parametrize("data", [
+    _comparison_filter(10),
+    '<fes:Filter xmlns:fes="http://www.opengis.net/fes/2.0">'
+    '<fes:ResourceId rid="a.1"/><fes:ResourceId rid="a.2"/></fes:Filter>',
+])
+def test_parsed_filters_are_picklable(data):
+    parsed = parsers.parse_filter(data)
+    unpickled = pickle.loads(pickle.dumps(parsed, pickle.HIGHEST_PROTOCOL))
+    assert unpickled == parsed
+
+
+def test_frozen_filters_stay_frozen_when_unpickled():
+    parsed = parsers.parse_filter(_comparison_filter(10)).freeze()
+    unpickled = pickle.loads(pickle.dumps(parsed))
+    assert unpickled.frozen
+    assert unpickled.first_expression.frozen
@@ -0,0 +1,48 @@
+"""Unit tests for pyfes.rtrees"""
+
+import random
+
+import pytest
+
+from pyfes import rtrees
+
+pytestmark = pytest.mark.unit
+
+
+def _brute_force(entries, envelope):
+    return sorted(item for item_envelope, item in entries if
+                  item_envelope[0] <= envelope[2] and
+                  envelope[0] <= item_envelope[2] and
+                  item_envelope[1] <= envelope[3] and
+                  envelope[1] <= item_envelope[3])
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 10, 11, 500])
+@pytest.mark.parametrize("node_capacity", [2, 4, 10])
+def test_query_matches_brute_force(size, node_capacity):
+    generator = random.Random(size)
+    entries = []
+    for item in range(size):
+        x = generator.uniform(0, 100)
+        y = generator.uniform(0, 100)
+        entries.append(((x, y, x + generator.uniform(0, 5), y), item))
+    tree = rtrees.STRtree(entries, node_capacity=node_capacity)
+    assert len(tree) == size
+    for envelope in [(10, 10, 30, 40), (0, 0, 100, 100), (200, 200, 300, 300)]:
+        assert sorted(tree.query(envelope)) == _brute_force(entries, envelope)
+
+
+def test_empty_tree():
+    tree = rtrees.STRtree([])
+    assert tree.envelope is None
+    assert tree.query((0, 0, 1, 1)) == []
+
+
+def test_tree_envelope():
+    tree = rtrees.STRtree([((0, 0, 1, 1), "a"), ((5, -5, 6, 6), "b")])
+    assert tree.envelope == (0, -5, 6, 6)
+
+
+def test_invalid_node_capacity():
+    with pytest.raises(ValueError):
+        rtrees.STRtree([], node_capacity=1)
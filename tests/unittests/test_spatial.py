@@ -0,0 +1,155 @@
+"""Unit tests for pyfes.spatial"""
+
+import pytest
+
+from pyfes import errors
+from pyfes import geometries
+from pyfes import spatial
+
+pytestmark = pytest.mark.unit
+
+SQUARE = "POLYGON ((0 0, 10 0, 10 10, 0 10, 0 0))"
+SQUARE_WITH_HOLE = ("POLYGON ((0 0, 10 0, 10 10, 0 10, 0 0), "
+                    "(4 4, 6 4, 6 6, 4 6, 4 4))")
+
+
+@pytest.mark.parametrize("wkt, points, lines, polygons", [
+    ("POINT (1 2)", 1, 0, 0),
+    ("POINT Z (1 2 3)", 1, 0, 0),
+    ("POINT EMPTY", 0, 0, 0),
+    ("MULTIPOINT (1 2, 3 4)", 2, 0, 0),
+    ("MULTIPOINT ((1 2), (3 4))", 2, 0, 0),
+    ("LINESTRING (1 2, 3 4)", 0, 1, 0),
+    ("MULTILINESTRING ((1 2, 3 4), (5 6, 7 8))", 0, 2, 0),
+    (SQUARE_WITH_HOLE, 0, 0, 1),
+    ("MULTIPOLYGON (((0 0, 1 0, 1 1, 0 0)), ((5 5, 6 5, 6 6, 5 5)))",
+     0, 0, 2),
+    ("GEOMETRYCOLLECTION (POINT (1 2), LINESTRING (3 4, 5 6))", 1, 1, 0),
+])
+def test_parse_wkt(wkt, points, lines, polygons):
+    shape = spatial.parse_wkt(wkt)
+    assert len(shape.points) == points
+    assert len(shape.lines) == lines
+    assert len(shape.polygons) == polygons
+
+
+def test_parse_wkt_closes_rings():
+    shape = spatial.parse_wkt("POLYGON ((0 0, 1 0, 1 1))")
+    assert shape.polygons[0][0] == [(0, 0), (1, 0), (1, 1), (0, 0)]
+    assert shape.envelope == (0, 0, 1, 1)
+
+
+def test_empty_shape():
+    shape = spatial.parse_wkt("POINT EMPTY")
+    assert shape.is_empty
+    assert spatial.envelope_to_shape(shape.envelope).is_empty
+    assert not spatial.intersects(shape, spatial.parse_wkt("POINT (0 0)"))
+
+
+@pytest.mark.parametrize("wkt", [
+    "POINT (1)",
+    "POINT (1 2",
+    "POINT (1 2) 3",
+    "CIRCLE (1 2, 3)",
+    "POLYGON ((0 0, 1 1))",
+    "not a geometry",
+])
+def test_parse_invalid_wkt(wkt):
+    with pytest.raises(errors.ValidationError):
+        spatial.parse_wkt(wkt)
+
+
+@pytest.mark.parametrize("predicate, first, second, expected", [
+    ("intersects", "POINT (5 5)", SQUARE, True),
+    ("intersects", "POINT (20 20)", SQUARE, False),
+    ("intersects", "LINESTRING (-5 5, 15 5)", SQUARE, True),
+    ("intersects", "POLYGON ((2 2, 3 2, 3 3, 2 2))", SQUARE, True),
+    ("intersects", "POINT (5 5)", SQUARE_WITH_HOLE, False),
+    ("disjoint", "POINT (20 20)", SQUARE, True),
+    ("within", "POINT (5 5)", SQUARE, True),
+    ("within", "POINT (0 5)", SQUARE, False),
+    ("within", "LINESTRING (1 5, 9 5)", SQUARE, True),
+    ("within", "LINESTRING (0 0, 10 0)", SQUARE, False),
+    ("within", "POLYGON ((0 0, 5 0, 5 5, 0 5, 0 0))", SQUARE, True),
+    ("within", "POLYGON ((1 1, 3 1, 3 3, 1 3, 1 1))", SQUARE_WITH_HOLE,
+     True),
+    ("within", "POLYGON ((1 1, 9 1, 9 9, 1 9, 1 1))", SQUARE_WITH_HOLE,
+     False),
+    ("within", "MULTIPOINT ((1 1), (2 2))", SQUARE, True),
+    ("contains", SQUARE, "POINT (5 5)", True),
+    ("contains", "POINT (5 5)", SQUARE, False),
+    ("equals", "POLYGON ((10 10, 0 10, 0 0, 10 0, 10 10))", SQUARE, True),
+    ("equals", "POLYGON ((0 0, 5 0, 5 5, 0 5, 0 0))", SQUARE, False),
+    ("equals", "POINT (1 2)", "POINT (1 2)", True),
+    ("touches", "POINT (0 5)", SQUARE, True),
+    ("touches", "LINESTRING (0 0, 10 0)", SQUARE, True),
+    ("touches", "POLYGON ((10 0, 20 0, 20 10, 10 10, 10 0))", SQUARE, True),
+    ("touches", "POLYGON ((5 5, 15 5, 15 15, 5 15, 5 5))", SQUARE, False),
+    ("touches", "LINESTRING (0 0, 10 0)", "LINESTRING (10 0, 15 5)", True),
+    ("crosses", "LINESTRING (-5 5, 15 5)", SQUARE, True),
+    ("crosses", "LINESTRING (1 5, 9 5)", SQUARE, False),
+    ("crosses", "LINESTRING (0 0, 10 10)", "LINESTRING (0 10, 10 0)", True),
+    ("crosses", "LINESTRING (0 0, 10 0)", "LINESTRING (5 0, 15 0)", False),
+    ("overlaps", "POLYGON ((5 5, 15 5, 15 15, 5 15, 5 5))", SQUARE, True),
+    ("overlaps", "POLYGON ((1 1, 2 1, 2 2, 1 1))", SQUARE, False),
+    ("overlaps", "LINESTRING (0 0, 10 0)", "LINESTRING (5 0, 15 0)", True),
+    ("overlaps", "POINT (5 5)", SQUARE, False),
+])
+def test_predicates(predicate, first, second, expected):
+    result = getattr(spatial, predicate)(
+        spatial.parse_wkt(first), spatial.parse_wkt(second))
+    assert result == expected
+
+
+@pytest.mark.parametrize("first, second, expected", [
+    ("POINT (0 20)", SQUARE, 10),
+    ("LINESTRING (20 0, 20 10)", SQUARE, 10),
+    ("POINT (5 5)", SQUARE, 0),
+    ("POINT (5 5)", SQUARE_WITH_HOLE, 1),
+    ("POINT (0 0)", "POINT (3 4)", 5),
+])
+def test_distance(first, second, expected):
+    result = spatial.distance(
+        spatial.parse_wkt(first), spatial.parse_wkt(second))
+    assert result == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("point, expected", [
+    ((2.0, 2.0), spatial.INTERIOR),
+    ((0.0, 5.0), spatial.BOUNDARY),
+    ((5.0, 4.0), spatial.BOUNDARY),
+    ((5.0, 5.0), spatial.EXTERIOR),
+    ((20.0, 5.0), spatial.EXTERIOR),
+])
+def test_locate(point, expected):
+    shape = spatial.parse_wkt(SQUARE_WITH_HOLE)
+    assert spatial.locate(point, shape) == expected
+
+
+@pytest.mark.parametrize("geometry, wkt", [
+    (geometries.Geometry("Point", [1, 2]), "POINT (1 2)"),
+    (geometries.Geometry("MultiPoint", [1, 2, 3, 4]), "MULTIPOINT (1 2, 3 4)"),
+    (geometries.Geometry("LineString", [0, 0, 10, 5]),
+     "LINESTRING (0 0, 10 5)"),
+    (
+        geometries.Geometry(
+            "Polygon", [0, 0, 10, 0, 10, 10, 0, 0, 2, 1, 3, 1, 3, 2, 2, 1],
+            part_offsets=[0, 4, 8]
+        ),
+        "POLYGON ((0 0, 10 0, 10 10, 0 0), (2 1, 3 1, 3 2, 2 1))"
+    ),
+    (
+        geometries.Geometry("GeometryCollection", members=[
+            geometries.Geometry("Point", [1, 2]),
+            geometries.Geometry("LineString", [3, 4, 5, 6]),
+        ]),
+        "GEOMETRYCOLLECTION (POINT (1 2), LINESTRING (3 4, 5 6))"
+    ),
+])
+def test_as_shape_from_geometry(geometry, wkt):
+    shape = spatial.as_shape(geometry)
+    expected = spatial.parse_wkt(wkt)
+    assert shape.points == expected.points
+    assert shape.lines == expected.lines
+    assert shape.polygons == expected.polygons
+    assert shape.envelope == expected.envelope
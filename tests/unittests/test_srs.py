@@ -0,0 +1,136 @@
+"""Unit tests for pyfes.srs"""
+
+import math
+
+import mock
+import pytest
+
+from pyfes import errors
+from pyfes import srs
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("EPSG:4326", ("EPSG", "4326", srs.XY)),
+    ("epsg:4326", ("EPSG", "4326", srs.XY)),
+    ("urn:ogc:def:crs:EPSG::4326", ("EPSG", "4326", srs.YX)),
+    ("urn:ogc:def:crs:EPSG:6.6:4326", ("EPSG", "4326", srs.YX)),
+    ("urn:x-ogc:def:crs:EPSG:4326", ("EPSG", "4326", srs.YX)),
+    ("http://www.opengis.net/def/crs/EPSG/0/4326", ("EPSG", "4326", srs.YX)),
+    ("https://www.opengis.net/def/crs/EPSG/0/3857",
+     ("EPSG", "3857", srs.XY)),
+    ("http://www.opengis.net/gml/srs/epsg.xml#4326",
+     ("EPSG", "4326", srs.XY)),
+    ("urn:ogc:def:crs:OGC:1.3:CRS84", ("OGC", "CRS84", srs.XY)),
+    ("http://www.opengis.net/def/crs/OGC/1.3/CRS84",
+     ("OGC", "CRS84", srs.XY)),
+    ("CRS:84", ("OGC", "CRS84", srs.XY)),
+    ("my local grid", (None, "my local grid", srs.XY)),
+])
+def test_resolve(name, expected):
+    registry = srs.SrsRegistry()
+    assert registry.resolve(name) == expected
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("urn:ogc:def:crs:EPSG::4326", "EPSG:4326"),
+    ("CRS:84", "OGC:CRS84"),
+    ("my local grid", "my local grid"),
+])
+def test_spatial_reference_name(name, expected):
+    assert srs.resolve(name).name == expected
+
+
+def test_resolve_is_memoized():
+    registry = srs.SrsRegistry()
+    with mock.patch.object(registry, "_resolve",
+                           wraps=registry._resolve) as resolver:
+        first = registry.resolve("urn:ogc:def:crs:EPSG::4326")
+        second = registry.resolve("urn:ogc:def:crs:EPSG::4326")
+    assert first is second
+    assert resolver.call_count == 1
+
+
+def test_register():
+    registry = srs.SrsRegistry()
+    assert registry.resolve("urn:ogc:def:crs:EPSG::3857").axis_order == (
+        srs.XY)
+    registry.register("epsg", 3857, srs.YX)
+    assert registry.resolve("urn:ogc:def:crs:EPSG::3857").axis_order == (
+        srs.YX)
+
+
+def test_register_invalid_axis_order():
+    with pytest.raises(ValueError):
+        srs.SrsRegistry().register("EPSG", "4326", "zx")
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("urn:ogc:def:crs:EPSG::4258", srs.YX),
+    ("urn:ogc:def:crs:EPSG::3067", srs.YX),
+    ("urn:ogc:def:crs:EPSG::32629", srs.XY),
+    ("urn:ogc:def:crs:FOO::1", srs.XY),
+])
+def test_resolve_without_pyproj(name, expected):
+    with mock.patch.object(srs, "pyproj", None):
+        registry = srs.SrsRegistry()
+        assert registry.resolve(name).axis_order == expected
+
+
+def test_get_transformer_without_pyproj():
+    with mock.patch.object(srs, "pyproj", None):
+        with pytest.raises(errors.PyFesError):
+            srs.get_transformer("EPSG:4326", "EPSG:3857")
+
+
+def test_get_transformer_is_memoized():
+    pytest.importorskip("pyproj")
+    transformer = srs.get_transformer("EPSG:4326", "EPSG:3857")
+    assert srs.get_transformer(
+        "urn:ogc:def:crs:EPSG::4326", "EPSG:3857") is transformer
+    assert transformer.transform(180, 0)[0] == pytest.approx(
+        20037508.34, abs=0.01)
+
+
+def test_get_transformer_invalid_srs():
+    pytest.importorskip("pyproj")
+    with pytest.raises(errors.PyFesError):
+        srs.get_transformer("EPSG:4326", "my local grid")
+
+
+@pytest.mark.parametrize("distance, uom, srs_name, expected", [
+    (10, None, "EPSG:4326", 10),
+    (1, "km", "EPSG:3857", 1000),
+    (1000, "m", "EPSG:3857", 1000),
+    (1, "urn:ogc:def:uom:EPSG::9036", "EPSG:3857", 1000),
+    (1, "http://www.opengis.net/def/uom/EPSG/0/9093", "EPSG:3857",
+     1609.344),
+    (1, "[nmi_i]", "EPSG:3857", 1852),
+    (6378137 * math.pi / 180, "m", "EPSG:4326", 1),
+    (6378137 * math.pi / 180, "m", "urn:ogc:def:crs:EPSG::4326", 1),
+    (2, "deg", "EPSG:4326", 2),
+])
+def test_convert_distance(distance, uom, srs_name, expected):
+    assert srs.convert_distance(distance, uom, srs_name) == pytest.approx(
+        expected)
+    with mock.patch.object(srs, "pyproj", None), \
+            mock.patch.object(srs, "_SRS_UNITS", {}):
+        assert srs.convert_distance(
+            distance, uom, srs_name) == pytest.approx(expected)
+
+
+def test_convert_distance_into_feet():
+    pytest.importorskip("pyproj")
+    assert srs.convert_distance(1, "[ft_i]", "EPSG:2263") == pytest.approx(
+        0.3048 / 0.3048006096)
+
+
+@pytest.mark.parametrize("uom, srs_name", [
+    ("parsec", "EPSG:3857"),
+    ("", "EPSG:3857"),
+    ("deg", "EPSG:3857"),
+])
+def test_convert_distance_invalid(uom, srs_name):
+    with pytest.raises(errors.PyFesError):
+        srs.convert_distance(1, uom, srs_name)
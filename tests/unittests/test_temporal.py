@@ -0,0 +1,200 @@
+"""Unit tests for pyfes.temporal"""
+
+import datetime as dt
+import pickle
+
+from lxml import etree
+import pytest
+
+from pyfes import temporal
+
+pytestmark = pytest.mark.unit
+
+SECOND = temporal.NANOSECONDS_PER_SECOND
+JAN_2020 = 1577836800 * SECOND
+GML = "http://www.opengis.net/gml/3.2"
+GML31 = "http://www.opengis.net/gml"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2020-01-01T00:00:00Z", JAN_2020),
+    ("2020-01-01", JAN_2020),
+    ("2020", JAN_2020),
+    ("2020-01", JAN_2020),
+    ("2020-01-01T02:00:00+02:00", JAN_2020),
+    ("2019-12-31T19:00-0500", JAN_2020),
+    ("2020-01-01 00:00:01.5", JAN_2020 + 3 * SECOND // 2),
+    ("2020-01-01T00:00:00.123456789123Z", JAN_2020 + 123456789),
+    ("1969-12-31T23:59:59Z", -SECOND),
+])
+def test_parse_time(text, expected):
+    assert temporal.parse_time(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "yesterday",
+    "2020-13-01",
+    "2020-01-01T25:00:00Z",
+    "2020-01-01T00:00:00+1",
+])
+def test_parse_invalid_time(text):
+    with pytest.raises(ValueError):
+        temporal.parse_time(text)
+
+
+@pytest.mark.parametrize("value, expected", [
+    (JAN_2020, "2020-01-01T00:00:00Z"),
+    (JAN_2020 + 1500, "2020-01-01T00:00:00.0000015Z"),
+    (-SECOND // 2, "1969-12-31T23:59:59.5Z"),
+])
+def test_format_time(value, expected):
+    assert temporal.format_time(value) == expected
+    assert temporal.parse_time(expected) == value
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2020-01-01", temporal.TimePeriod(JAN_2020)),
+    ("2020-01-01/2020-01-01T00:00:01Z",
+     temporal.TimePeriod(JAN_2020, JAN_2020 + SECOND)),
+    ("../2020-01-01", temporal.TimePeriod(temporal.MIN_TIME, JAN_2020)),
+    ("2020-01-01/", temporal.TimePeriod(JAN_2020, temporal.MAX_TIME)),
+])
+def test_parse_period(text, expected):
+    result = temporal.parse_period(text)
+    assert result == expected
+    assert temporal.parse_period(temporal.format_period(result)) == result
+
+
+@pytest.mark.parametrize("text", [
+    "2020-01-02/2020-01-01",
+    "2020-01-01/tomorrow",
+])
+def test_parse_invalid_period(text):
+    with pytest.raises(ValueError):
+        temporal.parse_period(text)
+
+
+def test_time_period():
+    period = temporal.TimePeriod(JAN_2020, JAN_2020 + SECOND)
+    assert not period.is_instant
+    assert temporal.TimePeriod(JAN_2020).is_instant
+    assert period != temporal.TimePeriod(JAN_2020)
+    assert len(set([period, temporal.TimePeriod.trusted(
+        JAN_2020, JAN_2020 + SECOND)])) == 1
+    assert pickle.loads(pickle.dumps(period)) == period
+    assert str(period) == "2020-01-01T00:00:00Z/2020-01-01T00:00:01Z"
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, None),
+    (JAN_2020, temporal.TimePeriod(JAN_2020)),
+    ("2020-01-01", temporal.TimePeriod(JAN_2020)),
+    (dt.date(2020, 1, 1), temporal.TimePeriod(JAN_2020)),
+    (dt.datetime(2020, 1, 1, 0, 0, 0, 1), temporal.TimePeriod(
+        JAN_2020 + 1000)),
+    ((None, "2020-01-01"), temporal.TimePeriod(temporal.MIN_TIME, JAN_2020)),
+    (("2020-01-01", dt.date(2020, 1, 2)), temporal.TimePeriod(
+        JAN_2020, JAN_2020 + 86400 * SECOND)),
+])
+def test_as_period(value, expected):
+    assert temporal.as_period(value) == expected
+
+
+def test_as_period_numpy_datetime():
+    np = pytest.importorskip("numpy")
+    value = np.datetime64("2020-01-01T00:00:00.5")
+    assert temporal.as_period(value) == temporal.TimePeriod(
+        JAN_2020 + SECOND // 2)
+    assert temporal.as_period(np.datetime64("NaT")) is None
+
+
+@pytest.mark.parametrize("value", [True, 1.5, object(), (1, 2, 3)])
+def test_as_period_invalid(value):
+    with pytest.raises(ValueError):
+        temporal.as_period(value)
+
+
+@pytest.mark.parametrize("gml, expected", [
+    (
+        "<gml:TimeInstant xmlns:gml='{}'>"
+        "<gml:timePosition>2020-01-01</gml:timePosition>"
+        "</gml:TimeInstant>".format(GML),
+        temporal.TimePeriod(JAN_2020)
+    ),
+    (
+        "<gml:TimePeriod xmlns:gml='{}'>"
+        "<gml:beginPosition>2020-01-01</gml:beginPosition>"
+        "<gml:endPosition>2020-01-01T00:00:01Z</gml:endPosition>"
+        "</gml:TimePeriod>".format(GML),
+        temporal.TimePeriod(JAN_2020, JAN_2020 + SECOND)
+    ),
+    (
+        "<gml:TimePeriod xmlns:gml='{}'>"
+        "<gml:begin><gml:TimeInstant>"
+        "<gml:timePosition>2020-01-01</gml:timePosition>"
+        "</gml:TimeInstant></gml:begin>"
+        "<gml:end><gml:TimeInstant>"
+        "<gml:timePosition indeterminatePosition='unknown'/>"
+        "</gml:TimeInstant></gml:end>"
+        "</gml:TimePeriod>".format(GML31),
+        temporal.TimePeriod(JAN_2020, temporal.MAX_TIME)
+    ),
+])
+def test_parse_gml_time(gml, expected):
+    assert temporal.parse_gml_time(etree.fromstring(gml)) == expected
+
+
+def test_parse_gml_time_now():
+    gml = etree.fromstring(
+        "<gml:TimePeriod xmlns:gml='{}'>"
+        "<gml:beginPosition>2020-01-01</gml:beginPosition>"
+        "<gml:endPosition indeterminatePosition='now'/>"
+        "</gml:TimePeriod>".format(GML)
+    )
+    before = temporal.get_current_time()
+    result = temporal.parse_gml_time(gml)
+    assert before <= result.end <= temporal.get_current_time()
+
+
+@pytest.mark.parametrize("gml", [
+    "<gml:TimeInstant xmlns:gml='{}'/>",
+    "<gml:TimeInstant xmlns:gml='{}'>"
+    "<gml:timePosition>later</gml:timePosition></gml:TimeInstant>",
+    "<gml:TimePeriod xmlns:gml='{}'>"
+    "<gml:beginPosition>2020-01-01</gml:beginPosition></gml:TimePeriod>",
+    "<gml:TimePeriod xmlns:gml='{}'>"
+    "<gml:beginPosition>2020-01-02</gml:beginPosition>"
+    "<gml:endPosition>2020-01-01</gml:endPosition></gml:TimePeriod>",
+    "<gml:TimeEdge xmlns:gml='{}'/>",
+])
+def test_parse_invalid_gml_time(gml):
+    with pytest.raises(RuntimeError):
+        temporal.parse_gml_time(etree.fromstring(gml.format(GML)))
+
+
+# the relations of a period that begins at 10 and ends at 20 with others
+@pytest.mark.parametrize("relation, begin, end, expected", [
+    (temporal.after, 0, 5, True),
+    (temporal.after, 0, 10, False),
+    (temporal.before, 25, 30, True),
+    (temporal.before, 20, 30, False),
+    (temporal.begins, 10, 30, True),
+    (temporal.begins, 10, 20, False),
+    (temporal.begun_by, 10, 15, True),
+    (temporal.contains, 12, 18, True),
+    (temporal.contains, 10, 18, False),
+    (temporal.during, 0, 30, True),
+    (temporal.during, 10, 30, False),
+    (temporal.equals, 10, 20, True),
+    (temporal.overlaps, 15, 30, True),
+    (temporal.overlaps, 20, 30, False),
+    (temporal.overlapped_by, 0, 15, True),
+    (temporal.meets, 20, 30, True),
+    (temporal.met_by, 0, 10, True),
+    (temporal.ended_by, 15, 20, True),
+    (temporal.any_interacts, 20, 30, True),
+    (temporal.any_interacts, 21, 30, False),
+])
+def test_relations(relation, begin, end, expected):
+    assert relation(10, 20, begin, end) == expected